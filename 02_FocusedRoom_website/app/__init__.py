@@ -4,12 +4,14 @@ from flask import Flask, request
 
 from .config import Config
 from .models import db
+from .utils.rate_limiter import rate_limiter
 
 
 def create_app():
     app = Flask(__name__, static_folder="static", template_folder="templates")
     app.config.from_object(Config)
     db.init_app(app)
+    rate_limiter.init_app(app)
 
     # <-- ADD THIS CONTEXT PROCESSOR -->
     @app.context_processor
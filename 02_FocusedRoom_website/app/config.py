@@ -13,3 +13,62 @@ class Config:
     MAIL_DEFAULT_SENDER = os.environ.get("MAIL_DEFAULT_SENDER")
     # Gemini API config (MILESTONE 5)
     GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+    # Bearer token for the /admin/gemini/stats and /admin/psychometrics endpoints (unset = 404)
+    ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+    # Big Five report pipeline (background worker)
+    # When false, the report job runs inline in the request (local dev without a worker)
+    BIG_FIVE_ASYNC = os.environ.get("BIG_FIVE_ASYNC", "true").lower() == "true"
+    WORKER_POLL_INTERVAL = float(os.environ.get("WORKER_POLL_INTERVAL", "1.0"))
+    JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+    JOB_RETRY_DELAY = int(os.environ.get("JOB_RETRY_DELAY", "30"))
+    JOB_LOCK_TIMEOUT = int(os.environ.get("JOB_LOCK_TIMEOUT", "300"))
+    # Inline mode: seconds /big-five waits for the AI report before answering with the generic
+    # report; the AI report then replaces it in the background (0 waits for it)
+    BIG_FIVE_LATENCY_BUDGET = float(os.environ.get("BIG_FIVE_LATENCY_BUDGET", "15"))
+    # Seconds a POST /big-five Idempotency-Key replays the original result
+    IDEMPOTENCY_KEY_TTL = int(os.environ.get("IDEMPOTENCY_KEY_TTL", "86400"))
+    # Rate limiting: "memory" (per process), "database" or "redis" (shared by all workers)
+    RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL", os.environ.get("REDIS_URL"))
+    # Upper bound on GCRA keys kept per process by the memory backend (LRU eviction)
+    RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", "100000"))
+    # Big Five PDF rendering (process pool, see app/utils/pdf_renderer.py)
+    PDF_RENDER_WORKERS = int(os.environ.get("PDF_RENDER_WORKERS", "2"))
+    PDF_RENDER_MAX_PENDING = int(os.environ.get("PDF_RENDER_MAX_PENDING", "16"))
+    PDF_RENDER_QUEUE_TIMEOUT = float(os.environ.get("PDF_RENDER_QUEUE_TIMEOUT", "5"))
+    PDF_RENDER_TIMEOUT = float(os.environ.get("PDF_RENDER_TIMEOUT", "30"))
+    PDF_CACHE_ENTRIES = int(os.environ.get("PDF_CACHE_ENTRIES", "64"))
+    # Empirical percentile norms (app/utils/norms.py); the built-in curve is used until a
+    # trait/segment has NORMS_MIN_SAMPLES results
+    NORMS_ENABLED = os.environ.get("NORMS_ENABLED", "true").lower() == "true"
+    NORMS_MIN_SAMPLES = int(os.environ.get("NORMS_MIN_SAMPLES", "200"))
+    # Seconds between norm table version checks in each web worker
+    NORMS_CHECK_INTERVAL = float(os.environ.get("NORMS_CHECK_INTERVAL", "60"))
+    # Seconds between incremental norm refreshes in the background worker (0 disables)
+    NORMS_REFRESH_INTERVAL = float(os.environ.get("NORMS_REFRESH_INTERVAL", "300"))
+    # Seconds between deletions of expired report_cache rows in the background worker
+    # (0 disables); without it expired rows only go when their exact key is looked up
+    REPORT_CACHE_PURGE_INTERVAL = float(os.environ.get("REPORT_CACHE_PURGE_INTERVAL", "3600"))
+    # "People like you" nearest-neighbour index (app/utils/similarity.py)
+    # Seconds between fetches of new results into each web worker's index
+    SIMILARITY_CHECK_INTERVAL = float(os.environ.get("SIMILARITY_CHECK_INTERVAL", "30"))
+    # New results kept in the brute-force tail before the KD-tree is rebuilt
+    SIMILARITY_REBUILD_TAIL = int(os.environ.get("SIMILARITY_REBUILD_TAIL", "4096"))
+    # Demographic values shared by fewer people than this are reported only as "other"
+    SIMILARITY_MIN_GROUP = int(os.environ.get("SIMILARITY_MIN_GROUP", "5"))
+    # Step the neighbours' returned scores are rounded to (exact scores are never returned)
+    SIMILARITY_SCORE_BUCKET = float(os.environ.get("SIMILARITY_SCORE_BUCKET", "5"))
+    SIMILARITY_MAX_K = int(os.environ.get("SIMILARITY_MAX_K", "50"))
+    # Archetype base reports (app/utils/archetypes.py); reports are reused for submissions
+    # within ARCHETYPE_MAX_DISTANCE trait levels of an archetype
+    ARCHETYPE_MIN_MEMBERS = int(os.environ.get("ARCHETYPE_MIN_MEMBERS", "20"))
+    ARCHETYPE_MAX_ARCHETYPES = int(os.environ.get("ARCHETYPE_MAX_ARCHETYPES", "100"))
+    ARCHETYPE_MAX_DISTANCE = int(os.environ.get("ARCHETYPE_MAX_DISTANCE", "1"))
+    # Seconds between archetype report version checks in each web worker
+    ARCHETYPE_CHECK_INTERVAL = float(os.environ.get("ARCHETYPE_CHECK_INTERVAL", "300"))
+    # Seconds between re-clustering runs in the background worker (0 disables), limited to
+    # the UTC hours in ARCHETYPE_OFFPEAK_HOURS ("2-6"; empty = any time)
+    ARCHETYPE_REFRESH_INTERVAL = float(os.environ.get("ARCHETYPE_REFRESH_INTERVAL", "86400"))
+    ARCHETYPE_OFFPEAK_HOURS = os.environ.get("ARCHETYPE_OFFPEAK_HOURS", "2-6")
+    # Gemini calls per refresh run for new base reports
+    ARCHETYPE_MAX_REPORTS_PER_RUN = int(os.environ.get("ARCHETYPE_MAX_REPORTS_PER_RUN", "25"))
@@ -1,3 +1,4 @@
+import secrets
 from datetime import datetime
 
 from flask_sqlalchemy import SQLAlchemy
@@ -56,12 +57,75 @@ class BigFiveResult(db.Model):  # type: ignore[name-defined]
     report_id = db.Column(db.Integer, nullable=False, default=1)
     # Store normalized trait scores as JSON (scores, percentiles, raw_scores)
     scores = db.Column(db.JSON, nullable=False)
+    # Raw questionnaire answers, 3 bits per item (see app/utils/answer_packing.py)
+    raw_answers = db.Column(db.LargeBinary, nullable=True)
     # AI-generated personality suggestions (from Gemini or fallback)
     suggestions = db.Column(db.Text)
+    # Report pipeline state: 'pending' until the worker stores suggestions, then 'complete'
+    status = db.Column(db.String(20), nullable=False, default="complete", index=True)
+    # Unguessable key of the result's public URLs (report, stream, PDF, similar profiles)
+    access_token = db.Column(
+        db.String(64), unique=True, index=True, default=lambda: secrets.token_urlsafe(32)
+    )
     # Timestamp for analytics and sorting
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 
+class BackgroundJob(db.Model):  # type: ignore[name-defined]
+    """DB-backed job queue drained by ``python -m app.worker``."""
+
+    __tablename__ = "background_job"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Job type, e.g. 'big_five_report'
+    kind = db.Column(db.String(50), nullable=False, index=True)
+    # Result this job works on (NULL for jobs not tied to a result)
+    result_id = db.Column(
+        db.Integer, db.ForeignKey("big_five_result.id"), nullable=True, index=True
+    )
+    # Job arguments (email, demographics, flags)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    # Lifecycle: 'pending' -> 'running' -> 'done' | 'failed'
+    status = db.Column(db.String(20), nullable=False, default="pending", index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # Earliest time the job may be claimed (used for retry backoff)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    # Worker that currently holds the job and when it claimed it
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
+
+
+class ReportCacheEntry(db.Model):  # type: ignore[name-defined]
+    """Persistent cache of Gemini reports keyed by quantized scores + demographics."""
+
+    __tablename__ = "report_cache"
+
+    # SHA-256 of quantized scores, percentiles and normalized demographics
+    cache_key = db.Column(db.String(64), primary_key=True)
+    report = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class RateLimitCounter(db.Model):  # type: ignore[name-defined]
+    """Fixed-window request counter shared by all workers (RATE_LIMIT_BACKEND=database)."""
+
+    __tablename__ = "rate_limit_counter"
+
+    # "<endpoint>:<client ip>"
+    key = db.Column(db.String(255), primary_key=True)
+    # Unix timestamps (float seconds) so the upsert can compare them without casts
+    window_start = db.Column(db.Float, nullable=False)
+    expires_at = db.Column(db.Float, nullable=False, index=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
 class BlogEngagement(db.Model):  # type: ignore[name-defined]
     """Track blog post engagement metrics."""
 
@@ -83,3 +147,114 @@ class BlogEngagement(db.Model):  # type: ignore[name-defined]
             "post_slug", "engagement_type", "user_identifier", name="unique_engagement"
         ),
     )
+
+
+class BlogEngagementCounter(db.Model):  # type: ignore[name-defined]
+    """Denormalized per-post engagement counts, kept in step with blog_engagement."""
+
+    __tablename__ = "blog_engagement_counter"
+
+    post_slug = db.Column(db.String(255), primary_key=True)
+    # Engagement type: 'like', 'helpful_yes', 'helpful_no'
+    engagement_type = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class NormTable(db.Model):  # type: ignore[name-defined]
+    """Empirical percentile norms per trait and segment, maintained by app/utils/norms.py."""
+
+    __tablename__ = "norm_table"
+
+    # Big Five trait key, e.g. 'openness'
+    trait = db.Column(db.String(50), primary_key=True)
+    # 'all', 'profession:<name>' or 'career_stage:<name>' (names normalized)
+    segment = db.Column(db.String(255), primary_key=True)
+    sample_count = db.Column(db.Integer, nullable=False, default=0, index=True)
+    # Highest big_five_result.id folded into the sketch (incremental refresh watermark)
+    last_result_id = db.Column(db.Integer, nullable=False, default=0)
+    # Serialized KLL quantile sketch of the trait's normalized scores
+    sketch = db.Column(db.JSON, nullable=False)
+    # Lookup arrays derived from the sketch: sorted scores and their percentiles
+    table = db.Column(db.JSON, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Optimistic lock: a concurrent refresh fails with StaleDataError instead of double counting
+    version = db.Column(db.Integer, nullable=False)
+
+    __mapper_args__ = {"version_id_col": version}
+
+
+class ArchetypeReport(db.Model):  # type: ignore[name-defined]
+    """Pre-generated base AI report per trait-level archetype (see app/utils/archetypes.py)."""
+
+    __tablename__ = "archetype_report"
+
+    # Trait levels in TRAITS order, e.g. 'H-M-L-VH-M' (VL/L/M/H/VH)
+    archetype_key = db.Column(db.String(50), primary_key=True)
+    # Results in this archetype at the last clustering run
+    member_count = db.Column(db.Integer, nullable=False, default=0)
+    # Mean scores and percentiles of the members (trait -> value)
+    centroid = db.Column(db.JSON, nullable=False)
+    # Base markdown report written for the archetype (no personal details)
+    report = db.Column(db.Text, nullable=True)
+    generated_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class CircuitBreakerState(db.Model):  # type: ignore[name-defined]
+    """Circuit breaker state shared by all workers (see app/utils/circuit_breaker.py)."""
+
+    __tablename__ = "circuit_breaker_state"
+
+    # Breaker name, e.g. 'gemini'
+    name = db.Column(db.String(100), primary_key=True)
+    # 'closed', 'open' or 'half_open'
+    state = db.Column(db.String(20), nullable=False)
+    # Consecutive failures since the last success
+    failures = db.Column(db.Integer, nullable=False, default=0)
+    # Unix timestamps (float seconds), like rate_limit_counter
+    opened_at = db.Column(db.Float, nullable=False, default=0.0)
+    probe_until = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.Float, nullable=False)
+    # Compare-and-set counter; every update is UPDATE ... WHERE version = :read_version
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ApiLimiterState(db.Model):  # type: ignore[name-defined]
+    """Concurrency and token budget state shared by all workers (see app/utils/api_limiter.py)."""
+
+    __tablename__ = "api_limiter_state"
+
+    # Limiter name, e.g. 'gemini'
+    name = db.Column(db.String(100), primary_key=True)
+    # {"leases": {id: expires_at}, "queue": [[id, seen_at]], "requests": [level, at], "tokens": ...}
+    state = db.Column(db.JSON, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False)
+    # Compare-and-set counter; every update is UPDATE ... WHERE version = :read_version
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class SingleFlightLease(db.Model):  # type: ignore[name-defined]
+    """Lease on an in-flight call shared by all workers (see app/utils/single_flight.py)."""
+
+    __tablename__ = "single_flight_lease"
+
+    # '<name>:<request key>', e.g. 'gemini_report:<sha256 of the report inputs>'
+    key = db.Column(db.String(128), primary_key=True)
+    # Worker holding the lease; only it may publish a result or release the row
+    owner = db.Column(db.String(100), nullable=False)
+    # Unix timestamp: lease expiry while running, then result expiry
+    expires_at = db.Column(db.Float, nullable=False, index=True)
+    # Leader's result, read by waiting workers (NULL while running)
+    result = db.Column(db.Text, nullable=True)
+
+
+class IdempotencyKey(db.Model):  # type: ignore[name-defined]
+    """Client Idempotency-Key of a POST /big-five, mapped to the result it created."""
+
+    __tablename__ = "idempotency_key"
+
+    key = db.Column(db.String(255), primary_key=True)
+    # SHA-256 of the request body; a reused key with another body is rejected
+    request_hash = db.Column(db.String(64), nullable=False)
+    result_id = db.Column(db.Integer, db.ForeignKey("big_five_result.id"), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
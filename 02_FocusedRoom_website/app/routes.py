@@ -1,24 +1,47 @@
+import hashlib
 import json
 import logging
 import os
-from datetime import datetime, timezone
-from pathlib import Path
-
-from flask import Blueprint, Response, jsonify, redirect, render_template, request
-from sqlalchemy import text
-
-from app.utils.gemini_client import generate_personality_suggestions, get_gemini_client
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import IntegrityError
 
-from .models import BigFiveResult, BlogEngagement, Subscriber, db
+from .models import BigFiveResult, BlogEngagement, Customer, IdempotencyKey, Subscriber, db
+from .utils.admin_auth import admin_required
+from .utils.answer_packing import pack_answers
 from .utils.bigfive import compute_bigfive_scores, validate_answers
+from .utils.blog_catalog import blog_catalog
+from .utils.blog_engagement import adjust_engagement_count, get_engagement_summary
 from .utils.emailer import email_service
+from .utils.gemini_client import generate_fallback_suggestions, get_gemini_client
+from .utils.job_queue import BIG_FIVE_REPORT_JOB, claim_job, enqueue_job
+from .utils.norms import apply_norms
+from .utils.pdf_renderer import PDFRenderQueueFullError, get_pdf_renderer
+from .utils.psychometrics import (
+    DEFAULT_MIN_CONSISTENCY,
+    DEFAULT_STRAIGHTLINE_RUN,
+    compute_quality_report,
+)
 from .utils.rate_limiter import rate_limit
 from .utils.seo import generate_sitemap_xml
-from .utils.validators import (
-    extract_name_from_big_five_report,
-    extract_name_from_email,
-    validate_subscription_request,
-)
+from .utils.similarity import get_similarity_index
+from .utils.validators import extract_name_from_email, validate_subscription_request
+from .worker import run_job, run_job_with_deadline, store_provisional_report
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -26,15 +49,6 @@ logger = logging.getLogger(__name__)
 main_bp = Blueprint("main", __name__)
 
 
-def _get_gemini_provider() -> str:
-    """Helper function to get current Gemini provider for logging."""
-    try:
-        client = get_gemini_client()
-        return client.provider
-    except Exception:
-        return "unknown"
-
-
 @main_bp.route("/")
 def index():
     return render_template("index.html")
@@ -130,13 +144,26 @@ def subscribe():
         return jsonify({"success": False, "error": "Internal server error"}), 500
 
 
+def _pack_raw_answers(answers):
+    """Packed answers for BigFiveResult.raw_answers, or None for non-whole-number answers."""
+    try:
+        return pack_answers(answers)
+    except ValueError as e:
+        logger.warning(f"Raw answers not stored: {str(e)}")
+        return None
+
+
 @main_bp.route("/big-five", methods=["GET", "POST"])
 def big_five():
     """
     Big Five Personality Test endpoint.
 
     GET: Render test page
-    POST: Process test results, store in database, return AI insights
+    POST: Score the test, store a pending result and enqueue the AI report job.
+          Returns 202 with the result's access_token; poll
+          /big-five/result/<access_token> for the report.
+          A repeated request with the same Idempotency-Key header gets the original
+          result back (Idempotent-Replayed: true) instead of a new result and report.
     """
     if request.method == "GET":
         return render_template("bigfive.html")
@@ -151,6 +178,11 @@ def big_five():
         if not data:
             return jsonify({"success": False, "error": "No data provided"}), 400
 
+        # Double clicks and client retries replay the original result
+        idempotency, replay = _check_idempotency_key(data)
+        if replay is not None:
+            return replay
+
         # Extract and validate required fields
         answers = data.get("answers")
         email = data.get("email", "").strip().lower() if data.get("email") else None
@@ -237,6 +269,14 @@ def big_five():
         try:
             # Compute Big Five scores
             result_data = compute_bigfive_scores(answers)
+            # Empirical percentiles once enough results exist (built-in curve otherwise)
+            if current_app.config.get("NORMS_ENABLED"):
+                profile = demographics or {}
+                apply_norms(
+                    result_data,
+                    profession=profile.get("profession") or profile.get("career"),
+                    career_stage=profile.get("careerStage"),
+                )
             scores = result_data["scores"]
             percentiles = result_data["percentiles"]
             raw_scores = result_data.get("raw_scores", {})
@@ -244,18 +284,7 @@ def big_five():
             user_type = f"subscriber {subscriber_id}" if subscriber_id else "anonymous user"
             logger.info(f"Computed Big Five scores for {user_type}")
 
-            # Generate AI-powered personality suggestions (Gemini with fallback)
-            # Pass demographics for hyper-personalized insights
-            suggestions = generate_personality_suggestions(
-                scores=scores,
-                percentiles=percentiles,
-                demographics=demographics,
-                fallback=True,  # Graceful fallback if API fails
-            )
-
-            logger.info(f"Generated personality suggestions using {_get_gemini_provider()}")
-
-            # Store result in database with customer link and report_id
+            # Store a pending result; the AI report is generated by the background worker
             result = BigFiveResult(
                 customer_id=subscriber_id,
                 report_id=report_id,
@@ -264,80 +293,70 @@ def big_five():
                     "percentiles": percentiles,
                     "raw_scores": raw_scores,
                 },
-                suggestions=suggestions,
+                raw_answers=_pack_raw_answers(answers),
+                suggestions=None,
+                status="pending",
             )
             db.session.add(result)
-            db.session.commit()
-
-            user_type = f"subscriber {subscriber_id}" if subscriber_id else "anonymous user"
-            logger.info(f"Stored Big Five result (ID: {result.id}) for {user_type}")
-
-            # Send emails if email was provided
-            welcome_email_sent = False
-            report_email_sent = False
-
-            if email and subscriber_id:
-                try:
-                    # Extract name from Big Five report (best source!)
-                    user_name = extract_name_from_big_five_report(suggestions)
-                    if not user_name:
-                        # Fallback to email-based name extraction
-                        user_name = extract_name_from_email(email)
-
-                    # NEW SUBSCRIBERS: Send Welcome email first
-                    if is_new_subscriber:
-                        try:
-                            welcome_result = email_service.send_welcome_vision_email(
-                                email, user_name
-                            )
-                            welcome_email_sent = welcome_result.get("success", False)
-                            if welcome_email_sent:
-                                logger.info(
-                                    f"Sent Welcome email to new subscriber: {email} "
-                                    f"(Name: {user_name})"
-                                )
-                            else:
-                                error_msg = welcome_result.get("error")
-                                logger.error(
-                                    f"Failed to send Welcome email to {email}: " f"{error_msg}"
-                                )
-                        except Exception as welcome_error:
-                            logger.error(
-                                f"Exception sending Welcome email to {email}: {str(welcome_error)}"
-                            )
-
-                    # ALWAYS: Send Big Five Report email
-                    email_result = email_service.send_big_five_report_email(
-                        email=email, user_name=user_name, markdown_report=suggestions, scores=scores
-                    )
-
-                    report_email_sent = email_result.get("success", False)
-                    if report_email_sent:
-                        logger.info(f"Sent Big Five report email to {email} (Name: {user_name})")
-                    else:
-                        logger.error(
-                            f"Failed to send Big Five email to {email}: {email_result.get('error')}"
-                        )
-
-                except Exception as email_error:
-                    # Don't fail the request if email fails - just log it
-                    logger.error(f"Exception sending emails to {email}: {str(email_error)}")
-
-            # Track overall email success
-            email_sent = welcome_email_sent or report_email_sent
+            db.session.flush()  # Get result.id for the job
+
+            # Enqueue report generation + emails in the same transaction as the result
+            job = enqueue_job(
+                BIG_FIVE_REPORT_JOB,
+                payload={
+                    "email": email if subscriber_id else None,
+                    "demographics": demographics,
+                    "is_new_subscriber": is_new_subscriber,
+                },
+                result_id=result.id,
+            )
+            replay = _commit_new_result(idempotency, result.id, data)
+            if replay is not None:
+                return replay
+
+            logger.info(f"Stored Big Five result (ID: {result.id}) for {user_type}, job {job.id}")
+
+            if not current_app.config["BIG_FIVE_ASYNC"]:
+                # Inline mode (no worker running): process the job in this request
+                outcome = _run_report_job_inline(job.id, result)
+
+                return jsonify(
+                    {
+                        "success": True,
+                        "status": result.status,
+                        "access_token": result.access_token,
+                        "status_url": url_for(
+                            "main.big_five_result", access_token=result.access_token
+                        ),
+                        "scores": scores,
+                        "percentiles": percentiles,
+                        "suggestions": result.suggestions,
+                        "email_captured": email is not None,
+                        "subscriber_id": subscriber_id,
+                        "email_sent": bool(outcome and outcome.get("email_sent")),
+                    }
+                )
 
-            # Return comprehensive response
-            return jsonify(
-                {
-                    "success": True,
-                    "result_id": result.id,
-                    "scores": scores,
-                    "percentiles": percentiles,
-                    "suggestions": suggestions,
-                    "email_captured": email is not None,
-                    "subscriber_id": subscriber_id,
-                    "email_sent": email_sent,  # NEW: Track if email was sent
-                }
+            # Return immediately; the client polls status_url for the report
+            return (
+                jsonify(
+                    {
+                        "success": True,
+                        "status": result.status,
+                        "access_token": result.access_token,
+                        "status_url": url_for(
+                            "main.big_five_result", access_token=result.access_token
+                        ),
+                        "stream_url": url_for(
+                            "main.big_five_stream", access_token=result.access_token
+                        ),
+                        "scores": scores,
+                        "percentiles": percentiles,
+                        "email_captured": email is not None,
+                        "subscriber_id": subscriber_id,
+                    }
+                ),
+                202,
             )
 
         except ValueError as e:
@@ -349,6 +368,327 @@ def big_five():
             return jsonify({"success": False, "error": "Internal server error"}), 500
 
 
+def _check_idempotency_key(data: dict) -> tuple[Optional[dict], Optional[tuple]]:
+    """
+    Look up the request's Idempotency-Key header.
+
+    Returns:
+        (idempotency, response): idempotency is {"key", "request_hash"} to store with a
+        new result (None without a header); response is set when the request must not
+        create a result: a replay of the original result, or an error
+    """
+    key = request.headers.get("Idempotency-Key", "").strip()
+    if not key:
+        return None, None
+    if len(key) > 255:
+        return None, (jsonify({"success": False, "error": "Idempotency-Key is too long"}), 400)
+
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    idempotency = {"key": key, "request_hash": hashlib.sha256(encoded).hexdigest()}
+
+    record = db.session.get(IdempotencyKey, key)
+    if record is None:
+        return idempotency, None
+    ttl = timedelta(seconds=current_app.config["IDEMPOTENCY_KEY_TTL"])
+    if record.created_at < datetime.utcnow() - ttl:
+        db.session.delete(record)
+        db.session.commit()
+        return idempotency, None
+    if record.request_hash != idempotency["request_hash"]:
+        error = "Idempotency-Key was already used for a different request"
+        return None, (jsonify({"success": False, "error": error}), 422)
+
+    result = db.session.get(BigFiveResult, record.result_id)
+    if result is None:
+        # The result was deleted since; forget the key and handle this as a new request
+        db.session.delete(record)
+        db.session.commit()
+        return idempotency, None
+    logger.info(f"Replaying Big Five result {result.id} for a repeated Idempotency-Key")
+    scores_data = result.scores or {}
+    body = {
+        "success": True,
+        "status": result.status,
+        "access_token": result.access_token,
+        "status_url": url_for("main.big_five_result", access_token=result.access_token),
+        "scores": scores_data.get("scores", {}),
+        "percentiles": scores_data.get("percentiles", {}),
+    }
+    if result.status == "pending":
+        # Same shape as the original 202: the client streams or polls the report
+        body["stream_url"] = url_for("main.big_five_stream", access_token=result.access_token)
+        status_code = 202
+    else:
+        body["suggestions"] = (
+            result.suggestions if result.status in ("complete", "provisional") else None
+        )
+        status_code = 200
+    return None, (jsonify(body), status_code, {"Idempotent-Replayed": "true"})
+
+
+def _commit_new_result(idempotency: Optional[dict], result_id: int, data: dict) -> Optional[tuple]:
+    """
+    Commit a new result and job, together with the request's Idempotency-Key.
+
+    Returns:
+        None once committed, or the replay of the result of a concurrent request with
+        the same key that committed first (this request's result is rolled back)
+    """
+    if idempotency is None:
+        db.session.commit()
+        return None
+
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config["IDEMPOTENCY_KEY_TTL"])
+    IdempotencyKey.query.filter(IdempotencyKey.created_at < cutoff).delete(
+        synchronize_session=False
+    )
+    db.session.add(
+        IdempotencyKey(
+            key=idempotency["key"],
+            request_hash=idempotency["request_hash"],
+            result_id=result_id,
+        )
+    )
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        replay = _check_idempotency_key(data)[1]
+        if replay is None:
+            raise
+        return replay
+    return None
+
+
+def _run_report_job_inline(job_id: int, result: BigFiveResult) -> Optional[dict]:
+    """
+    Run a report job in this request, within the BIG_FIVE_LATENCY_BUDGET.
+
+    If the job misses the budget, the generic report is stored as a provisional
+    report and returned; the job keeps running in the background, replaces it
+    with the AI report and sends the report email.
+
+    Returns:
+        The job outcome if it finished in time, else None (result is refreshed either way)
+    """
+    config = current_app.config
+    claimed = claim_job(job_id, f"inline:{os.getpid()}")
+    if claimed is None:
+        outcome = None
+    elif config.get("BIG_FIVE_LATENCY_BUDGET", 0) <= 0:
+        outcome = run_job(
+            claimed, max_attempts=config["JOB_MAX_ATTEMPTS"], retry_delay=config["JOB_RETRY_DELAY"]
+        )
+    else:
+        outcome, finished = run_job_with_deadline(
+            claimed,
+            config["BIG_FIVE_LATENCY_BUDGET"],
+            max_attempts=config["JOB_MAX_ATTEMPTS"],
+            retry_delay=config["JOB_RETRY_DELAY"],
+        )
+        if not finished:
+            scores_data = result.scores or {}
+            store_provisional_report(
+                result.id,
+                generate_fallback_suggestions(
+                    scores_data.get("scores", {}), scores_data.get("percentiles", {})
+                ),
+            )
+    db.session.refresh(result)
+    return outcome
+
+
+def _get_result(access_token: str) -> Optional[BigFiveResult]:
+    """
+    The result behind a public result URL.
+
+    Result URLs carry the result's random access_token, never its sequential ID, so
+    one user's report cannot be found by counting through the others.
+    """
+    return BigFiveResult.query.filter_by(access_token=access_token).first()
+
+
+@main_bp.route("/big-five/result/<access_token>", methods=["GET"])
+def big_five_result(access_token):
+    """
+    Report status for a Big Five submission.
+
+    Returns the scores immediately and the AI report once the worker has stored it.
+    While the status is 'provisional', suggestions hold the generic report served
+    when the AI report missed the inline latency budget.
+    """
+    result = _get_result(access_token)
+    if result is None:
+        return jsonify({"success": False, "error": "Result not found"}), 404
+
+    scores_data = result.scores or {}
+    return jsonify(
+        {
+            "success": True,
+            "status": result.status,
+            "access_token": result.access_token,
+            "scores": scores_data.get("scores", {}),
+            "percentiles": scores_data.get("percentiles", {}),
+            "suggestions": (
+                result.suggestions if result.status in ("complete", "provisional") else None
+            ),
+        }
+    )
+
+
+@main_bp.route("/big-five/result/<access_token>/similar", methods=["GET"])
+def big_five_similar(access_token):
+    """
+    "People like you": the K results with the closest trait scores.
+
+    Query params:
+        k: Number of similar profiles (default 10, at most SIMILARITY_MAX_K)
+
+    Returns:
+        JSON with anonymized profiles (scores and distance, nearest first) and the
+        aggregated profession / career stage / purpose of the people behind them
+    """
+    max_k = current_app.config.get("SIMILARITY_MAX_K", 50)
+    k = request.args.get("k", 10, type=int)
+    if k < 1 or k > max_k:
+        return jsonify({"success": False, "error": f"k must be between 1 and {max_k}"}), 400
+
+    result = _get_result(access_token)
+    if result is None:
+        return jsonify({"success": False, "error": "Result not found"}), 404
+
+    try:
+        data = get_similarity_index().similar(result.id, k)
+    except Exception as e:
+        logger.error(f"Error finding results similar to {result.id}: {str(e)}")
+        return jsonify({"success": False, "error": "Failed to find similar profiles"}), 500
+
+    if data is None:
+        return jsonify({"success": False, "error": "Result not found"}), 404
+    return jsonify({"success": True, "k": k, "data": data})
+
+
+def _mask_email(email: str) -> str:
+    """j***@example.com - the PDF URL only needs the access token, so don't leak the address."""
+    local, _, domain = email.partition("@")
+    return f"{local[:1]}***@{domain}" if domain else "***"
+
+
+@main_bp.route("/big-five/result/<access_token>/pdf", methods=["GET"])
+def big_five_result_pdf(access_token):
+    """
+    Download the Big Five report as a PDF.
+
+    Rendering runs in the PDF process pool; this thread only waits on the result,
+    so other requests keep being served. Rendered PDFs are cached per result and report
+    text, so the generic provisional report is replaced once the AI report lands.
+    """
+    result = _get_result(access_token)
+    if result is None:
+        return jsonify({"success": False, "error": "Result not found"}), 404
+    # A pending result may hold the worker's partial text; only finished reports are rendered
+    if result.status not in ("complete", "provisional") or not result.suggestions:
+        return jsonify({"success": False, "error": "Report is not ready yet"}), 409
+
+    customer = db.session.get(Customer, result.customer_id) if result.customer_id else None
+    scores_data = result.scores or {}
+    try:
+        pdf_bytes = get_pdf_renderer().render(
+            user_email=_mask_email(customer.email_id) if customer else "Focused Room member",
+            scores=scores_data.get("scores", {}),
+            percentiles=scores_data.get("percentiles", {}),
+            suggestions=result.suggestions,
+            result_id=result.id,
+            timeout=current_app.config.get("PDF_RENDER_TIMEOUT", 30.0),
+        )
+    except (PDFRenderQueueFullError, FutureTimeoutError) as e:
+        logger.warning(f"PDF render for result {result.id} deferred: {str(e) or 'timed out'}")
+        return (
+            jsonify({"success": False, "error": "Report PDF is busy, please retry shortly"}),
+            503,
+            {"Retry-After": "5"},
+        )
+    except Exception as e:
+        logger.error(f"Error rendering PDF for result {result.id}: {str(e)}")
+        return jsonify({"success": False, "error": "Internal server error"}), 500
+
+    return Response(
+        pdf_bytes,
+        mimetype="application/pdf",
+        headers={"Content-Disposition": "attachment; filename=personality_report.pdf"},
+    )
+
+
+# Seconds a stream relays a report before the browser falls back to polling; kept below
+# the gunicorn --timeout so a slow report never gets its worker killed mid-response
+STREAM_WAIT_TIMEOUT = 90
+STREAM_POLL_INTERVAL = 0.5
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event (JSON data keeps markdown newlines intact)."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _stream_report_events(result_id: int):
+    """
+    Generate SSE events for a result's AI report.
+
+    The background worker generates the report and publishes its partial text on the
+    pending result (see app.worker.publish_report_progress); this only relays new text
+    as it appears, so an open stream costs a DB read per poll, never a Gemini call.
+    """
+    sent = ""
+    deadline = time.monotonic() + STREAM_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        db.session.rollback()  # End the transaction so we see the worker's commits
+        result = db.session.get(BigFiveResult, result_id)
+        if result is None or result.status == "failed":
+            # A deleted result ends the stream the same way as a failed report
+            yield _sse("error", {"error": "Report generation failed"})
+            return
+
+        # A provisional result holds the generic stand-in, not the AI report's progress
+        text = (result.suggestions or "") if result.status in ("pending", "complete") else ""
+        if text and text != sent:
+            if text.startswith(sent):
+                yield _sse("chunk", {"text": text[len(sent) :]})
+            else:
+                # The worker started the report over (retry) or tidied the final text
+                yield _sse("replace", {"text": text})
+            sent = text
+        if result.status == "complete":
+            yield _sse("done", {"status": "complete"})
+            return
+
+        yield ": keepalive\n\n"
+        time.sleep(STREAM_POLL_INTERVAL)
+
+    yield _sse("error", {"error": "Timed out waiting for report"})
+
+
+@main_bp.route("/big-five/stream/<access_token>", methods=["GET"])
+def big_five_stream(access_token):
+    """
+    Stream the AI report for a Big Five result as Server-Sent Events.
+
+    Events:
+        chunk:   {"text": "<markdown>"} - append to the report
+        replace: {"text": "<markdown>"} - the report so far, replacing what was sent
+        done:    {"status": "complete"} - report stored on the result
+        error: {"error": "..."}       - fall back to polling /big-five/result/<access_token>
+    """
+    result = _get_result(access_token)
+    if result is None:
+        return jsonify({"success": False, "error": "Result not found"}), 404
+
+    return Response(
+        stream_with_context(_stream_report_events(result.id)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # commenting out the placeholder suggestions for now
 ''' def _generate_placeholder_suggestions(scores: dict) -> str:
     """
@@ -436,83 +776,139 @@ def health_check():
     return jsonify(health_data), status_code
 
 
+# Rows fetched per round trip (server-side cursor on PostgreSQL)
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_HEADER = [
+    "ID",
+    "Email",
+    "Opt-In",
+    "Subscription Date",
+    "Total Big Five Tests",
+    "Latest Test Date",
+]
+
+
+def _format_export_date(value) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else "N/A"
+
+
+def _iter_subscriber_csv(batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Yield the subscriber CSV one batch of rows at a time.
+
+    A single LEFT JOIN + GROUP BY query supplies each customer's test count and
+    latest test date; yield_per streams it so memory stays flat for any size.
+    """
+    import csv
+    from io import StringIO
+
+    query = (
+        select(
+            Customer.customer_id,
+            Customer.email_id,
+            Customer.opt_in,
+            Customer.create_dt,
+            func.count(BigFiveResult.id).label("test_count"),
+            func.max(BigFiveResult.created_at).label("latest_test"),
+        )
+        .outerjoin(BigFiveResult, BigFiveResult.customer_id == Customer.customer_id)
+        .group_by(Customer.customer_id)
+        .order_by(Customer.create_dt.desc(), Customer.customer_id.desc())
+        .execution_options(yield_per=batch_size)
+    )
+
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADER)
+    yield buffer.getvalue()
+
+    exported = 0
+    try:
+        for rows in db.session.execute(query).partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(
+                [
+                    row.customer_id,
+                    row.email_id,
+                    "Yes" if row.opt_in else "No",
+                    _format_export_date(row.create_dt),
+                    row.test_count,
+                    _format_export_date(row.latest_test),
+                ]
+                for row in rows
+            )
+            exported += len(rows)
+            yield buffer.getvalue()
+    except Exception as e:
+        # Headers are already sent, so the download is cut short rather than a 500
+        logger.error(f"Error exporting subscribers after {exported} rows: {str(e)}")
+        raise
+
+    logger.info(f"CSV export complete: {exported} subscribers")
+
+
 @main_bp.route("/admin/subscribers/export")
 def export_subscribers():
     """
     Export all subscribers to CSV format.
 
     Returns:
-        CSV file download with subscriber data including:
+        CSV file download (streamed) with subscriber data including:
         - Email, opt-in status, subscription date
         - Big Five test count and latest test date
 
     TODO: Add authentication/admin protection in production.
     """
-    import csv
-    from io import StringIO
+    filename = f'focused_room_subscribers_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    logger.info(f"Exporting subscribers to CSV: {filename}")
 
-    try:
-        # Query all subscribers with their Big Five results
-        subscribers = Subscriber.query.order_by(Subscriber.created_at.desc()).all()
-
-        logger.info(f"Exporting {len(subscribers)} subscribers to CSV")
-
-        # Create CSV in memory
-        output = StringIO()
-        writer = csv.writer(output)
-
-        # Write header
-        writer.writerow(
-            [
-                "ID",
-                "Email",
-                "Opt-In",
-                "Subscription Date",
-                "Total Big Five Tests",
-                "Latest Test Date",
-            ]
-        )
+    return Response(
+        stream_with_context(_iter_subscriber_csv()),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
 
-        # Write data
-        for sub in subscribers:
-            # Count associated Big Five results
-            test_count = sub.big_five_results.count() if hasattr(sub, "big_five_results") else 0
 
-            # Get latest test date
-            if test_count > 0:
-                latest_test = sub.big_five_results.order_by(BigFiveResult.created_at.desc()).first()
-                latest_test_date = (
-                    latest_test.created_at.strftime("%Y-%m-%d %H:%M:%S") if latest_test else "N/A"
-                )
-            else:
-                latest_test_date = "N/A"
+@main_bp.route("/admin/gemini/stats")
+@admin_required
+def gemini_stats():
+    """
+    Gemini client counters (report cache hits/misses, provider).
 
-            writer.writerow(
-                [
-                    sub.id,
-                    sub.email,
-                    "Yes" if sub.opt_in else "No",
-                    sub.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                    test_count,
-                    latest_test_date,
-                ]
-            )
+    Requires the ADMIN_TOKEN bearer token.
+    """
+    return jsonify({"success": True, "data": get_gemini_client().get_stats()})
 
-        # Prepare response
-        output.seek(0)
-        filename = f'focused_room_subscribers_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
 
-        logger.info(f"CSV export complete: {filename}")
+@main_bp.route("/admin/psychometrics")
+@admin_required
+def psychometrics_report():
+    """
+    Questionnaire reliability and response-quality report over all stored results.
 
-        return Response(
-            output.getvalue(),
-            mimetype="text/csv",
-            headers={"Content-Disposition": f"attachment; filename={filename}"},
-        )
+    Query params (optional):
+        straightline_run: Longstring that flags a test as straight-lined
+        min_consistency: Even-odd consistency below which a test is flagged as random
+
+    Returns:
+        JSON with per-trait Cronbach's alpha, item-total correlations and
+        response-style flag counts, per test length
 
+    Requires the ADMIN_TOKEN bearer token; the report reads every stored result, so
+    prefer ``python -m app.tools.psychometrics`` on large databases.
+    """
+    straightline_run = request.args.get("straightline_run", DEFAULT_STRAIGHTLINE_RUN, type=int)
+    min_consistency = request.args.get("min_consistency", DEFAULT_MIN_CONSISTENCY, type=float)
+    try:
+        report = compute_quality_report(
+            straightline_run=straightline_run, min_consistency=min_consistency
+        )
+        return jsonify({"success": True, "data": report})
     except Exception as e:
-        logger.error(f"Error exporting subscribers: {str(e)}")
-        return jsonify({"success": False, "error": "Failed to export subscribers"}), 500
+        logger.error(f"Error computing psychometric report: {str(e)}")
+        return jsonify({"success": False, "error": "Failed to compute report"}), 500
 
 
 # ============================================
@@ -524,13 +920,7 @@ def export_subscribers():
 def blog_list():
     """Display blog post listing."""
     try:
-        # Load blog data from JSON
-        blog_data_path = Path(__file__).parent / "static" / "blog_data.json"
-        with open(blog_data_path, encoding="utf-8") as f:
-            blog_data = json.load(f)
-
-        posts = blog_data.get("posts", [])
-        logger.info(f"Loaded {len(posts)} blog posts")
+        posts = blog_catalog.get_posts()
 
         return render_template("blog_list.html", posts=posts)
 
@@ -543,30 +933,18 @@ def blog_list():
 def blog_post(slug):
     """Display individual blog post."""
     try:
-        # Load blog data
-        blog_data_path = Path(__file__).parent / "static" / "blog_data.json"
-        with open(blog_data_path, encoding="utf-8") as f:
-            blog_data = json.load(f)
-
-        # Find the post
-        posts = blog_data.get("posts", [])
-        post = next((p for p in posts if p["slug"] == slug), None)
+        # Find the post (in-memory catalog, reloaded when blog files change)
+        post = blog_catalog.get_post(slug)
 
         if not post:
             logger.warning(f"Blog post not found: {slug}")
             return "Blog post not found", 404
 
-        # Load post content
-        content_path = Path(__file__).parent / "blog_content" / f"{slug}.html"
-        if not content_path.exists():
-            logger.error(f"Blog content file not found: {content_path}")
+        content = blog_catalog.get_content(slug)
+        if content is None:
             return "Blog content not found", 404
 
-        with open(content_path, encoding="utf-8") as f:
-            content = f.read()
-
-        # Get related posts (all posts except current)
-        related_posts = [p for p in posts if p["slug"] != slug]
+        related_posts = blog_catalog.get_related_posts(slug)
 
         logger.info(f"Serving blog post: {slug}")
 
@@ -599,59 +977,10 @@ def _get_user_identifier():
 def get_blog_engagement(slug):
     """Get engagement stats for a blog post."""
     try:
-        from sqlalchemy import func
-
-        # Get counts for each engagement type
-        likes_count = (
-            db.session.query(func.count(BlogEngagement.id))
-            .filter(BlogEngagement.post_slug == slug)
-            .filter(BlogEngagement.engagement_type == "like")
-            .scalar()
-            or 0
-        )
-
-        helpful_yes_count = (
-            db.session.query(func.count(BlogEngagement.id))
-            .filter(BlogEngagement.post_slug == slug)
-            .filter(BlogEngagement.engagement_type == "helpful_yes")
-            .scalar()
-            or 0
-        )
-
-        helpful_no_count = (
-            db.session.query(func.count(BlogEngagement.id))
-            .filter(BlogEngagement.post_slug == slug)
-            .filter(BlogEngagement.engagement_type == "helpful_no")
-            .scalar()
-            or 0
-        )
-
-        # Check if current user has engaged
-        user_id = _get_user_identifier()
-        user_engagement = (
-            db.session.query(BlogEngagement)
-            .filter(BlogEngagement.post_slug == slug)
-            .filter(BlogEngagement.user_identifier == user_id)
-            .all()
-        )
-
-        user_liked = any(e.engagement_type == "like" for e in user_engagement)
-        user_voted_helpful = any(
-            e.engagement_type in ["helpful_yes", "helpful_no"] for e in user_engagement
-        )
+        # Counts + current user's state in one query (blog_engagement_counter)
+        summary = get_engagement_summary(slug, _get_user_identifier())
 
-        return jsonify(
-            {
-                "success": True,
-                "data": {
-                    "likes": likes_count,
-                    "helpful_yes": helpful_yes_count,
-                    "helpful_no": helpful_no_count,
-                    "user_liked": user_liked,
-                    "user_voted_helpful": user_voted_helpful,
-                },
-            }
-        )
+        return jsonify({"success": True, "data": summary})
 
     except Exception as e:
         logger.error(f"Error getting engagement for {slug}: {str(e)}")
@@ -659,45 +988,45 @@ def get_blog_engagement(slug):
 
 
 @main_bp.route("/api/blog/engagement/<slug>/like", methods=["POST"])
-@rate_limit(limit=10, window=60)
+@rate_limit(limit=10, window=60, algorithm="gcra")
 def toggle_blog_like(slug):
     """Toggle like on a blog post."""
     try:
         user_id = _get_user_identifier()
 
-        # Check if user already liked
-        existing_like = (
+        # Unlike if a like exists; the DELETE's row count (not a prior SELECT)
+        # decides, so two concurrent unlikes decrement the counter only once
+        removed = (
             db.session.query(BlogEngagement)
             .filter(BlogEngagement.post_slug == slug)
             .filter(BlogEngagement.engagement_type == "like")
             .filter(BlogEngagement.user_identifier == user_id)
-            .first()
+            .delete(synchronize_session=False)
         )
 
-        if existing_like:
-            # Unlike
-            db.session.delete(existing_like)
-            db.session.commit()
+        if removed:
             action = "unliked"
+            likes_count = adjust_engagement_count(slug, "like", -removed)
         else:
             # Like
             new_like = BlogEngagement(
                 post_slug=slug, engagement_type="like", user_identifier=user_id
             )
             db.session.add(new_like)
-            db.session.commit()
+            try:
+                db.session.flush()
+            except IntegrityError:
+                # A concurrent request from this user liked first
+                db.session.rollback()
+                summary = get_engagement_summary(slug, user_id)
+                return jsonify(
+                    {"success": True, "data": {"action": "liked", "likes": summary["likes"]}}
+                )
             action = "liked"
+            likes_count = adjust_engagement_count(slug, "like", 1)
 
-        # Get updated count
-        from sqlalchemy import func
-
-        likes_count = (
-            db.session.query(func.count(BlogEngagement.id))
-            .filter(BlogEngagement.post_slug == slug)
-            .filter(BlogEngagement.engagement_type == "like")
-            .scalar()
-            or 0
-        )
+        # Engagement row and counter commit together
+        db.session.commit()
 
         return jsonify({"success": True, "data": {"action": action, "likes": likes_count}})
 
@@ -708,7 +1037,7 @@ def toggle_blog_like(slug):
 
 
 @main_bp.route("/api/blog/engagement/<slug>/helpful", methods=["POST"])
-@rate_limit(limit=5, window=60)
+@rate_limit(limit=5, window=60, algorithm="gcra")
 def vote_blog_helpful(slug):
     """Vote on whether blog post was helpful."""
     try:
@@ -739,6 +1068,14 @@ def vote_blog_helpful(slug):
             feedback_text=feedback if not is_helpful else None,
         )
         db.session.add(new_vote)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            # Same vote submitted concurrently
+            db.session.rollback()
+            return jsonify({"success": False, "error": "You already voted on this post"}), 400
+
+        adjust_engagement_count(slug, engagement_type, 1)
         db.session.commit()
 
         return jsonify({"success": True, "data": {"voted": engagement_type}})
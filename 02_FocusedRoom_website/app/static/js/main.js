@@ -1014,6 +1014,9 @@ function isValidEmail(email) {
       });
     }
 
+    let lastSubmittedBody = null;
+    let idempotencyKey = null;
+
     async function submitResults() {
       console.log('🚀 Big Five: Submitting results to backend...');
       console.log('📧 Email:', userEmail);
@@ -1030,16 +1033,28 @@ function isValidEmail(email) {
         const scores = calculateScores();
 
         // Submit to backend with demographics
+        const body = JSON.stringify({
+          answers: answers,
+          email: userEmail,
+          demographics: window.userDemographics || {}
+        });
+
+        // Retries of the same answers reuse the key, so the server returns the
+        // original result instead of generating a second report
+        if (body !== lastSubmittedBody) {
+          lastSubmittedBody = body;
+          idempotencyKey = window.crypto && crypto.randomUUID
+            ? crypto.randomUUID()
+            : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+        }
+
         const response = await fetch('/big-five', {
           method: 'POST',
           headers: {
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            'Idempotency-Key': idempotencyKey
           },
-          body: JSON.stringify({
-            answers: answers,
-            email: userEmail,
-            demographics: window.userDemographics || {}
-          })
+          body: body
         });
 
         console.log('📡 Response status:', response.status);
@@ -1050,17 +1065,36 @@ function isValidEmail(email) {
           throw new Error(errorData.error || 'Failed to submit results');
         }
 
-        const data = await response.json();
+        let data = await response.json();
         console.log('✅ Results received:', data);
 
-        // Hide loading, show results
+        // 202 Accepted: report is generated in the background - stream it, or poll
+        if (response.status === 202) {
+          if (window.EventSource && data.stream_url) {
+            data = await streamReport(data, loadingSection);
+          } else if (data.status_url) {
+            data = await waitForReport(data.status_url);
+          }
+        }
+
+        // Hide loading, show results (already visible if the report was streamed)
+        const alreadyShown = resultsSection.style.display === 'block';
         loadingSection.style.display = 'none';
         resultsSection.style.display = 'block';
-        resultsSection.scrollIntoView({ behavior: 'smooth' });
+        if (!alreadyShown) {
+          resultsSection.scrollIntoView({ behavior: 'smooth' });
+        }
 
         // Display results
         displayResults(data);
 
+        // Inline mode over its latency budget: generic report now, AI report when ready
+        if (data.status === 'provisional' && data.status_url) {
+          waitForReport(data.status_url)
+            .then(upgraded => displayAIInsights(upgraded.suggestions))
+            .catch(err => console.warn('⚠️ Full report not available yet:', err.message));
+        }
+
         // Clear localStorage
         localStorage.removeItem('bigfive_answers');
         console.log('✅ Big Five: Test complete!');
@@ -1073,6 +1107,81 @@ function isValidEmail(email) {
       }
     }
 
+    function streamReport(initialData, loadingSection) {
+      return new Promise((resolve, reject) => {
+        const source = new EventSource(initialData.stream_url);
+        let report = '';
+        let renderScheduled = false;
+
+        const showReport = () => {
+          if (resultsSection.style.display !== 'block') {
+            // First chunk: show results right away
+            loadingSection.style.display = 'none';
+            resultsSection.style.display = 'block';
+            resultsSection.scrollIntoView({ behavior: 'smooth' });
+            displayResults({ ...initialData, suggestions: report });
+          } else if (!renderScheduled) {
+            // Re-render the insights at most every 250ms while text streams in
+            renderScheduled = true;
+            setTimeout(() => {
+              renderScheduled = false;
+              displayAIInsights(report);
+            }, 250);
+          }
+        };
+
+        source.addEventListener('chunk', (event) => {
+          report += JSON.parse(event.data).text;
+          showReport();
+        });
+
+        // The worker started the report over (a retried attempt): show its new text
+        source.addEventListener('replace', (event) => {
+          report = JSON.parse(event.data).text;
+          showReport();
+        });
+
+        source.addEventListener('done', () => {
+          source.close();
+          resolve({ ...initialData, suggestions: report, status: 'complete' });
+        });
+
+        source.addEventListener('error', () => {
+          // Server-reported error or dropped connection: fall back to polling
+          source.close();
+          console.warn('⚠️ Report stream interrupted, polling for the report instead');
+          waitForReport(initialData.status_url).then(resolve, reject);
+        });
+      });
+    }
+
+    async function waitForReport(statusUrl) {
+      const POLL_INTERVAL_MS = 2000;
+      const MAX_WAIT_MS = 180000;
+      const startedAt = Date.now();
+
+      while (Date.now() - startedAt < MAX_WAIT_MS) {
+        await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS));
+
+        const statusResponse = await fetch(statusUrl);
+        if (!statusResponse.ok) {
+          throw new Error('Failed to fetch report status');
+        }
+
+        const statusData = await statusResponse.json();
+        console.log('⏳ Report status:', statusData.status);
+
+        if (statusData.status === 'complete') {
+          return statusData;
+        }
+        if (statusData.status === 'failed') {
+          throw new Error('Report generation failed');
+        }
+      }
+
+      throw new Error('Timed out waiting for your report');
+    }
+
     function calculateScores() {
       const traitScores = {
         openness: [],
@@ -0,0 +1,85 @@
+"""
+Psychometric Report Tool for Focused Room Website
+
+Prints the questionnaire quality report from app/utils/psychometrics.py
+(Cronbach's alpha, item-total correlations, response-style flags) for every
+stored result with raw answers.
+
+Usage:
+    python -m app.tools.psychometrics            # readable summary
+    python -m app.tools.psychometrics --json     # full report as JSON
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Any, Optional
+
+from app.utils.psychometrics import (
+    DEFAULT_MIN_CONSISTENCY,
+    DEFAULT_STRAIGHTLINE_RUN,
+    compute_quality_report,
+)
+
+
+def format_report(report: dict[str, Any]) -> str:
+    """Human-readable summary: alpha per trait, weakest item and flag rates per test length."""
+    lines = [f"{report['results']:,} tests analyzed ({report['skipped']:,} without raw answers)"]
+    for n_items, section in report["by_length"].items():
+        lines.append("")
+        lines.append(f"{n_items}-item test ({section['tests']:,} tests)")
+        lines.append(f"  {'trait':<18} {'alpha':>6}  weakest item (item-total r)")
+        for trait, stats in section["traits"].items():
+            rated = [item for item in stats["items"] if item["item_total_r"] is not None]
+            weakest = min(rated, key=lambda item: item["item_total_r"], default=None)
+            alpha = "n/a" if stats["alpha"] is None else f"{stats['alpha']:.3f}"
+            weakest_text = (
+                f"#{weakest['item']} ({weakest['item_total_r']:.3f})" if weakest else "n/a"
+            )
+            lines.append(f"  {trait:<18} {alpha:>6}  {weakest_text}")
+        for flag, stats in section["flags"].items():
+            lines.append(f"  {flag}: {stats['count']:,} ({(stats['rate'] or 0) * 100:.2f}%)")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command-line entry point for ``python -m app.tools.psychometrics``."""
+    from dotenv import load_dotenv
+
+    # Load .env like run.py does, before the app reads its Config
+    load_dotenv(dotenv_path=Path(__file__).parent.parent.parent / ".env")
+
+    parser = argparse.ArgumentParser(description="Big Five questionnaire quality report")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Results per fetch")
+    parser.add_argument(
+        "--straightline-run",
+        type=int,
+        default=DEFAULT_STRAIGHTLINE_RUN,
+        help=f"Longstring flagged as straight-lining (default {DEFAULT_STRAIGHTLINE_RUN})",
+    )
+    parser.add_argument(
+        "--min-consistency",
+        type=float,
+        default=DEFAULT_MIN_CONSISTENCY,
+        help=f"Even-odd consistency flagged as random below (default {DEFAULT_MIN_CONSISTENCY})",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from app import create_app
+
+    with create_app().app_context():
+        report = compute_quality_report(
+            batch_size=args.batch_size,
+            straightline_run=args.straightline_run,
+            min_consistency=args.min_consistency,
+        )
+
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
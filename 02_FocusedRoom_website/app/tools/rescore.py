@@ -0,0 +1,259 @@
+"""
+Bulk Rescoring Tool for Focused Room Website
+
+Recomputes the stored ``BigFiveResult.scores`` JSON from the packed raw
+answers after the question mapping, scoring or norms in app/utils/bigfive.py
+change.
+
+- Results are read in keyset-paginated chunks (``id > last_id``), each
+  streamed with ``yield_per``, so memory stays flat at a million rows.
+- Each chunk is decoded with unpack_answers_batch and scored with
+  compute_bigfive_scores_batch, then only rows whose JSON changed are written
+  back with a single executemany UPDATE and committed.
+- After every commit the last result ID is saved to a checkpoint file; an
+  interrupted run picks up from there, and a completed run removes it.
+  Rescoring is idempotent, so a crash between commit and checkpoint only
+  redoes one chunk.
+- Results without raw answers (stored before raw_answers existed, or with
+  fractional answers) cannot be rescored and are counted as skipped.
+
+Usage:
+    python -m app.tools.rescore                    # rescore everything (resumes)
+    python -m app.tools.rescore --restart          # ignore the checkpoint
+    python -m app.tools.rescore --dry-run          # count changes without writing
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Optional
+
+from sqlalchemy import func, select, update
+
+from app.models import BigFiveResult, Customer, db
+from app.utils.answer_packing import unpack_answers_batch
+from app.utils.bigfive import compute_bigfive_scores_batch, get_batch_result
+from app.utils.norms import apply_norms
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+CHECKPOINT_FILENAME = "rescore_checkpoint.json"
+
+
+def load_checkpoint(path: str) -> Optional[dict[str, Any]]:
+    """Checkpoint saved by an earlier run, or None if there is none (or it is unreadable)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable rescore checkpoint {path}: {str(e)}")
+        return None
+
+
+def save_checkpoint(path: str, state: dict[str, Any]) -> None:
+    """Write the checkpoint atomically (a crash never leaves a half-written file)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def rescore_results(
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    checkpoint_path: Optional[str] = None,
+    restart: bool = False,
+    dry_run: bool = False,
+    use_norms: Optional[bool] = None,
+) -> dict[str, Any]:
+    """
+    Recompute stored scores for every result that has raw answers.
+
+    Args:
+        chunk_size: Results read, scored and written per round trip
+        checkpoint_path: File recording progress (None = no checkpointing)
+        restart: Start from the first result even if a checkpoint exists
+        dry_run: Score and count changes, but write nothing
+        use_norms: Apply empirical percentile norms (default: NORMS_ENABLED)
+
+    Returns:
+        Dict with 'rows' (results read), 'updated', 'skipped' (no raw answers),
+        'last_id', 'elapsed' (seconds) and 'rows_per_sec'
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if use_norms is None:
+        from flask import current_app
+
+        use_norms = bool(current_app.config.get("NORMS_ENABLED"))
+
+    state = None if restart or checkpoint_path is None else load_checkpoint(checkpoint_path)
+    if state is None:
+        # Results created after the run starts are already scored by the current code
+        max_id = db.session.execute(select(func.max(BigFiveResult.id))).scalar() or 0
+        state = {"last_id": 0, "max_id": max_id, "rows": 0, "updated": 0, "skipped": 0}
+    else:
+        logger.info(f"Resuming rescore after result #{state['last_id']}")
+
+    start = time.perf_counter()
+    rows_this_run = 0
+    while state["last_id"] < state["max_id"]:
+        rows, updated, skipped, last_id = _rescore_chunk(
+            state["last_id"], state["max_id"], chunk_size, dry_run, use_norms
+        )
+        if rows == 0:
+            break
+
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+
+        state["last_id"] = last_id
+        state["rows"] += rows
+        state["updated"] += updated
+        state["skipped"] += skipped
+        rows_this_run += rows
+        if checkpoint_path and not dry_run:
+            save_checkpoint(checkpoint_path, state)
+
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Rescored up to #{last_id}/{state['max_id']}: {state['rows']} rows, "
+            f"{state['updated']} updated ({rows_this_run / elapsed:,.0f} rows/sec)"
+        )
+
+    # Finished: the next run (e.g. after another scoring change) starts from the top
+    if checkpoint_path and not dry_run and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": state["rows"],
+        "updated": state["updated"],
+        "skipped": state["skipped"],
+        "last_id": state["last_id"],
+        "elapsed": round(elapsed, 3),
+        "rows_per_sec": round(rows_this_run / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+def _rescore_chunk(
+    after_id: int, max_id: int, chunk_size: int, dry_run: bool, use_norms: bool
+) -> tuple[int, int, int, int]:
+    """
+    Rescore the next chunk_size results after after_id (the caller commits).
+
+    Returns:
+        (rows read, rows updated, rows skipped, highest result ID read)
+    """
+    query = (
+        select(
+            BigFiveResult.id,
+            BigFiveResult.scores,
+            BigFiveResult.raw_answers,
+            Customer.profession,
+            Customer.career_stage,
+        )
+        .outerjoin(Customer, BigFiveResult.customer_id == Customer.customer_id)
+        .where(BigFiveResult.id > after_id, BigFiveResult.id <= max_id)
+        .order_by(BigFiveResult.id)
+        .limit(chunk_size)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    # 44- and 50-item tests pack to different sizes; decode each size as one array
+    groups: dict[int, list] = defaultdict(list)
+    rows = skipped = 0
+    last_id = after_id
+    for partition in db.session.execute(query).partitions():
+        for row in partition:
+            if row.raw_answers:
+                groups[len(row.raw_answers)].append(row)
+            else:
+                skipped += 1
+        rows += len(partition)
+        last_id = partition[-1].id
+
+    changes = []
+    for group in groups.values():
+        answers = unpack_answers_batch([row.raw_answers for row in group])
+        batch = compute_bigfive_scores_batch(answers)
+        for index, row in enumerate(group):
+            result_data = get_batch_result(batch, index)
+            if use_norms:
+                apply_norms(result_data, row.profession, row.career_stage)
+            scores = {
+                "scores": result_data["scores"],
+                "percentiles": result_data["percentiles"],
+                "raw_scores": result_data["raw_scores"],
+            }
+            if scores != row.scores:
+                changes.append({"id": row.id, "scores": scores})
+
+    if changes and not dry_run:
+        # ORM bulk UPDATE by primary key: one executemany for the whole chunk
+        db.session.execute(update(BigFiveResult), changes)
+    return rows, len(changes), skipped, last_id
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command-line entry point for ``python -m app.tools.rescore``."""
+    from dotenv import load_dotenv
+
+    # Load .env like run.py does, before the app reads its Config
+    load_dotenv(dotenv_path=Path(__file__).parent.parent.parent / ".env")
+
+    parser = argparse.ArgumentParser(description="Recompute stored Big Five scores")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Results per read/write round trip (default {DEFAULT_CHUNK_SIZE})",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help=f"Progress file (default: <instance folder>/{CHECKPOINT_FILENAME})",
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="Ignore the checkpoint and start over"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Count changed results without writing"
+    )
+    parser.add_argument(
+        "--no-norms", action="store_true", help="Use the built-in percentile curve only"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from app import create_app
+
+    app = create_app()
+    checkpoint_path = args.checkpoint or os.path.join(app.instance_path, CHECKPOINT_FILENAME)
+    with app.app_context():
+        summary = rescore_results(
+            chunk_size=args.chunk_size,
+            checkpoint_path=checkpoint_path,
+            restart=args.restart,
+            dry_run=args.dry_run,
+            use_norms=False if args.no_norms else None,
+        )
+
+    print(
+        f"Rescored {summary['rows']:,} results ({summary['updated']:,} updated, "
+        f"{summary['skipped']:,} without raw answers) in {summary['elapsed']:.1f}s "
+        f"({summary['rows_per_sec']:,.0f} rows/sec)"
+    )
+
+
+if __name__ == "__main__":
+    main()
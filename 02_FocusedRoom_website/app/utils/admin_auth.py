@@ -0,0 +1,47 @@
+"""
+Admin Endpoint Protection for Focused Room Website
+
+Admin routes are closed unless ``ADMIN_TOKEN`` is configured, and then only answer
+requests that send it as ``Authorization: Bearer <token>``. Without a token the
+routes answer 404, so a deployment that never set one doesn't advertise them.
+"""
+
+import functools
+import hmac
+import logging
+
+from flask import current_app, jsonify, request
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def _request_token() -> str:
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return token.strip() if scheme.lower() == "bearer" else ""
+
+
+def admin_required(func):
+    """
+    Decorator that restricts a Flask endpoint to callers holding ``ADMIN_TOKEN``.
+
+    Returns:
+        Decorated function answering 404 when no token is configured and 401 when
+        the request's bearer token doesn't match
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        expected = current_app.config.get("ADMIN_TOKEN")
+        if not expected:
+            return jsonify({"success": False, "error": "Not found"}), 404
+        if not hmac.compare_digest(_request_token().encode(), expected.encode()):
+            logger.warning(f"Rejected admin request to {request.path} from {request.remote_addr}")
+            return (
+                jsonify({"success": False, "error": "Unauthorized"}),
+                401,
+                {"WWW-Authenticate": "Bearer"},
+            )
+        return func(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,102 @@
+"""
+Answer Packing Module for Focused Room Website
+
+Compact storage for raw Big Five questionnaire answers on
+``BigFiveResult.raw_answers``, so results can be rescored or analyzed later.
+
+Format (big-endian bit order):
+- 1 header byte: number of items (44 or 50)
+- 3 bits per answer (Likert 1-5), zero-padded to a whole byte
+
+A 44-item test takes 18 bytes and a 50-item test 20 bytes. Unpacking decodes
+straight into NumPy arrays; unpack_answers_batch decodes many results with a
+single np.unpackbits call.
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+BITS_PER_ANSWER = 3
+HEADER_BYTES = 1
+MIN_ANSWER = 1
+MAX_ANSWER = 5
+
+# Place values of the 3 bits of each answer, most significant first
+_BIT_WEIGHTS = np.array([4, 2, 1], dtype=np.uint8)
+_SHIFTS = np.array([2, 1, 0], dtype=np.uint8)
+
+
+def packed_size(n_items: int) -> int:
+    """Bytes used by a packed test with n_items answers."""
+    return HEADER_BYTES + (n_items * BITS_PER_ANSWER + 7) // 8
+
+
+def pack_answers(answers: Sequence[Any]) -> bytes:
+    """
+    Pack whole-number Likert answers (1-5) into 3 bits each.
+
+    Args:
+        answers: 44 or 50 responses (ints, or floats/strings holding whole numbers)
+
+    Returns:
+        Packed bytes (header + bit-packed answers)
+
+    Raises:
+        ValueError: If an answer is not a whole number from 1 to 5
+    """
+    try:
+        values = np.asarray(answers, dtype=np.float64)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"All answers must be numeric values: {e}") from e
+    if values.ndim != 1 or not 0 < len(values) < 256:
+        raise ValueError(f"Expected a flat list of 1-255 answers, got shape {values.shape}")
+    if np.any(~((values >= MIN_ANSWER) & (values <= MAX_ANSWER))):
+        raise ValueError("All answers must be in the range 1-5")
+    if np.any(values != np.rint(values)):
+        raise ValueError("Only whole-number answers can be packed")
+
+    codes = values.astype(np.uint8)
+    bits = (codes[:, None] >> _SHIFTS) & 1
+    return bytes([len(codes)]) + np.packbits(bits.ravel()).tobytes()
+
+
+def unpack_answers(packed: bytes) -> np.ndarray:
+    """
+    Decode one packed test.
+
+    Returns:
+        int8 array of answers (length 44 or 50)
+    """
+    return unpack_answers_batch([packed])[0]
+
+
+def unpack_answers_batch(packed_rows: Sequence[bytes]) -> np.ndarray:
+    """
+    Decode many packed tests of the same length into an (N, n_items) array.
+
+    Tests of different lengths (44 vs 50 items) pack to different sizes;
+    group rows by ``len(packed)`` before calling this.
+
+    Returns:
+        int8 array of shape (N, n_items)
+
+    Raises:
+        ValueError: If rows are malformed or have different item counts
+    """
+    if not packed_rows:
+        return np.empty((0, 0), dtype=np.int8)
+
+    n_items = packed_rows[0][0] if packed_rows[0] else 0
+    size = packed_size(n_items)
+    if n_items == 0 or any(len(row) != size or row[0] != n_items for row in packed_rows):
+        raise ValueError("Packed answers must be non-empty and have the same item count")
+
+    buffer = np.frombuffer(b"".join(packed_rows), dtype=np.uint8).reshape(len(packed_rows), size)
+    bits = np.unpackbits(buffer[:, HEADER_BYTES:], axis=1)[:, : n_items * BITS_PER_ANSWER]
+    codes = bits.reshape(len(packed_rows), n_items, BITS_PER_ANSWER) @ _BIT_WEIGHTS
+
+    if np.any((codes < MIN_ANSWER) | (codes > MAX_ANSWER)):
+        raise ValueError("Packed answers contain values outside 1-5")
+    return codes.astype(np.int8)
@@ -0,0 +1,538 @@
+"""
+API Limiter Module for Focused Room Website
+
+Bounds outgoing calls to a rate-limited API (Gemini) across all gunicorn workers
+and background workers, so a traffic spike waits in line instead of turning
+into a wave of 429s:
+
+- at most ``max_concurrent`` calls in flight (leases; a lease from a crashed
+  process expires after ``lease_ttl`` seconds)
+- ``requests_per_minute`` and ``tokens_per_minute`` token buckets that refill
+  continuously and allow bursts of up to one minute's budget. Calls reserve
+  their estimated prompt tokens plus ``max_output_tokens`` and the unused part
+  is refunded when the call finishes.
+
+Callers that cannot start immediately take a ticket in a FIFO queue kept in the
+shared state and poll until they reach the front and the budget allows, or
+until their deadline passes (``LimiterTimeoutError``). Tickets of callers that stop
+polling are dropped after ``ticket_ttl`` seconds.
+
+State lives in a pluggable store selected by ``GEMINI_LIMITER_BACKEND``:
+- ``memory``: per-process
+- ``database``: one JSON row per limiter in ``api_limiter_state``, updated with a
+  compare-and-set on its ``version`` column (default)
+- ``redis``: one JSON value per limiter, updated with WATCH/MULTI
+
+Like the rate limiter, the limiter fails open: if its store is unreachable, the
+call proceeds and a warning is logged. A store that is only contended (the
+database compare-and-set kept losing) is not an outage: the caller keeps waiting.
+"""
+
+import bisect
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import Callable
+from typing import Any, Optional
+
+from flask import has_app_context
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the cumulative wait-time histogram buckets
+WAIT_BUCKETS = [0.0, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+# Waits kept per process for percentiles
+RECENT_WAITS = 1000
+
+# (new state or None for "unchanged") given the current state
+Transition = Callable[[dict[str, Any]], Optional[dict[str, Any]]]
+
+
+def initial_state() -> dict[str, Any]:
+    """State of a limiter nobody has used yet (buckets start full)."""
+    return {"leases": {}, "queue": [], "requests": None, "tokens": None}
+
+
+def refill(bucket: Optional[list], per_minute: int, now: float) -> float:
+    """Level of a [level, updated_at] token bucket at now (full when unseen)."""
+    if bucket is None:
+        return float(per_minute)
+    level, updated_at = bucket
+    return min(float(per_minute), level + max(0.0, now - updated_at) * per_minute / 60.0)
+
+
+class LimiterTimeoutError(Exception):
+    """Raised when no slot was granted before the caller's deadline."""
+
+
+class LimiterConflictError(RuntimeError):
+    """Raised by a store whose compare-and-set kept losing to other writers."""
+
+
+class LimiterStore:
+    """
+    Storage interface for limiter state.
+
+    ``update`` applies a transition atomically with respect to every other
+    process sharing the store and returns ``(state, changed)``.
+    """
+
+    name = "base"
+
+    def read(self, name: str) -> dict[str, Any]:
+        """Return the current state (initial_state() for an unknown limiter)."""
+        raise NotImplementedError
+
+    def update(self, name: str, transition: Transition) -> tuple[dict[str, Any], bool]:
+        """Apply transition to the current state; None from it leaves the state alone."""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Forget all limiter state."""
+        raise NotImplementedError
+
+
+class MemoryStore(LimiterStore):
+    """Per-process limiter state."""
+
+    name = "memory"
+
+    def __init__(self):
+        self.states: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def read(self, name: str) -> dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps(self.states.get(name) or initial_state()))
+
+    def update(self, name: str, transition: Transition) -> tuple[dict[str, Any], bool]:
+        with self._lock:
+            # Round-trip through JSON so transitions see the same types as shared stores
+            current = json.loads(json.dumps(self.states.get(name) or initial_state()))
+            new = transition(current)
+            if new is None:
+                return current, False
+            self.states[name] = new
+            return json.loads(json.dumps(new)), True
+
+    def reset(self) -> None:
+        with self._lock:
+            self.states.clear()
+
+
+class DatabaseStore(LimiterStore):
+    """
+    Limiter state as a JSON row in the ``api_limiter_state`` table.
+
+    Updates are ``UPDATE ... WHERE version = :read_version``; a writer that lost
+    the race re-reads and re-applies its transition. Outside an app context
+    state is kept per process.
+    """
+
+    name = "database"
+
+    def __init__(self, max_attempts: int = 10):
+        self.max_attempts = max_attempts
+        self._local = MemoryStore()
+
+    def read(self, name: str) -> dict[str, Any]:
+        if not has_app_context():
+            return self._local.read(name)
+
+        from app.models import ApiLimiterState, db
+
+        table = ApiLimiterState.__table__
+        with db.engine.connect() as connection:
+            row = connection.execute(table.select().where(table.c.name == name)).first()
+        return row.state if row is not None else initial_state()
+
+    def update(self, name: str, transition: Transition) -> tuple[dict[str, Any], bool]:
+        if not has_app_context():
+            return self._local.update(name, transition)
+
+        from app.models import ApiLimiterState, db
+
+        table = ApiLimiterState.__table__
+        for _attempt in range(self.max_attempts):
+            with db.engine.begin() as connection:
+                row = connection.execute(table.select().where(table.c.name == name)).first()
+                if row is None:
+                    # Create the row (unless another worker just did), then compare-and-set it
+                    connection.execute(
+                        self._insert()(table)
+                        .values(name=name, state=initial_state(), updated_at=time.time(), version=0)
+                        .on_conflict_do_nothing(index_elements=[table.c.name])
+                    )
+                    continue
+
+                new = transition(row.state)
+                if new is None:
+                    return row.state, False
+
+                result = connection.execute(
+                    table.update()
+                    .where(table.c.name == name, table.c.version == row.version)
+                    .values(state=new, updated_at=time.time(), version=row.version + 1)
+                )
+                if result.rowcount == 1:
+                    return new, True
+
+        raise LimiterConflictError(f"API limiter '{name}' update kept conflicting")
+
+    def reset(self) -> None:
+        self._local.reset()
+        if not has_app_context():
+            return
+
+        from app.models import ApiLimiterState, db
+
+        with db.engine.begin() as connection:
+            connection.execute(ApiLimiterState.__table__.delete())
+
+    def _insert(self):
+        from app.models import db
+
+        dialect = db.engine.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise NotImplementedError(f"Database API limiting is not supported on {dialect}")
+        return insert
+
+
+class RedisStore(LimiterStore):
+    """Limiter state as one JSON value per limiter, updated with WATCH/MULTI."""
+
+    name = "redis"
+
+    def __init__(
+        self, url: Optional[str] = None, client=None, prefix: str = "focusedroom:limiter:"
+    ):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(
+                url or "redis://localhost:6379/0", socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+        self.client = client
+        self.prefix = prefix
+
+    def read(self, name: str) -> dict[str, Any]:
+        stored = self.client.get(self.prefix + name)
+        return json.loads(stored) if stored else initial_state()
+
+    def update(self, name: str, transition: Transition) -> tuple[dict[str, Any], bool]:
+        from redis.exceptions import WatchError
+
+        redis_key = self.prefix + name
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(redis_key)
+                    stored = pipe.get(redis_key)
+                    current = json.loads(stored) if stored else initial_state()
+                    new = transition(current)
+                    if new is None:
+                        pipe.unwatch()
+                        return current, False
+                    pipe.multi()
+                    pipe.set(redis_key, json.dumps(new))
+                    pipe.execute()
+                    return new, True
+                except WatchError:
+                    continue
+
+    def reset(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def create_limiter_store(name: str, redis_url: Optional[str] = None) -> LimiterStore:
+    """
+    Build the store named by GEMINI_LIMITER_BACKEND.
+
+    Falls back to the in-memory store (with an error log) if the name is
+    unknown or the redis library is missing.
+    """
+    name = (name or "memory").lower()
+    if name == "database":
+        return DatabaseStore()
+    if name == "redis":
+        try:
+            return RedisStore(url=redis_url)
+        except ImportError:
+            logger.error("redis library not installed. Install with: pip install redis")
+            return MemoryStore()
+    if name != "memory":
+        logger.error(f"Unknown API limiter backend '{name}', using in-memory state")
+    return MemoryStore()
+
+
+class WaitMetrics:
+    """Per-process queue wait times: cumulative histogram, totals and recent percentiles."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bucket_counts = [0] * (len(WAIT_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.timeouts = 0
+        self.recent: deque = deque(maxlen=RECENT_WAITS)
+
+    def observe(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+            self.timeouts += int(timed_out)
+            self.recent.append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self.recent)
+            cumulative, buckets = 0, {}
+            for bound, count in zip([*map(str, WAIT_BUCKETS), "+Inf"], self.bucket_counts):
+                cumulative += count
+                buckets[bound] = cumulative
+
+            def percentile(q: float) -> Optional[float]:
+                if not recent:
+                    return None
+                return round(recent[min(len(recent) - 1, int(q * len(recent)))], 4)
+
+            return {
+                "count": self.count,
+                "sum_seconds": round(self.total, 4),
+                "max_seconds": round(self.max, 4),
+                "p50_seconds": percentile(0.50),
+                "p95_seconds": percentile(0.95),
+                "p99_seconds": percentile(0.99),
+                "timeouts": self.timeouts,
+                # Cumulative counts per upper bound in seconds, Prometheus-style
+                "buckets": buckets,
+            }
+
+
+class ApiLimiter:
+    """
+    Shared concurrency limit plus request and token budgets for one API.
+
+    Usage::
+
+        lease = limiter.acquire(tokens=estimated_tokens)  # may raise LimiterTimeoutError
+        try:
+            ...call the API...
+        finally:
+            limiter.release(lease, used_tokens=actual_tokens)
+
+    A limit of 0 disables that limit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        store: Optional[LimiterStore] = None,
+        max_concurrent: int = 8,
+        requests_per_minute: int = 60,
+        tokens_per_minute: int = 1_000_000,
+        queue_timeout: float = 10.0,
+        lease_ttl: float = 300.0,
+        ticket_ttl: float = 5.0,
+        poll_interval: float = 0.1,
+    ):
+        self.name = name
+        self.store = store or MemoryStore()
+        self.max_concurrent = max_concurrent
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.queue_timeout = queue_timeout
+        self.lease_ttl = lease_ttl
+        self.ticket_ttl = ticket_ttl
+        self.poll_interval = poll_interval
+
+        self.metrics = WaitMetrics()
+        self.store_errors = 0
+
+    # ------------------------------------------------------------------
+    # Acquire / release
+    # ------------------------------------------------------------------
+
+    def acquire(self, tokens: int = 0, timeout: Optional[float] = None) -> dict:
+        """
+        Wait for a slot, queueing behind earlier callers, until timeout seconds.
+
+        Args:
+            tokens: Tokens to reserve against tokens_per_minute
+            timeout: Queue deadline in seconds (default: queue_timeout)
+
+        Returns:
+            Lease dict to pass to release()
+
+        Raises:
+            LimiterTimeoutError: If no slot was granted before the deadline
+        """
+        lease = {"id": uuid.uuid4().hex, "tokens": self._cost(tokens)}
+        started = time.monotonic()
+        deadline = started + (self.queue_timeout if timeout is None else timeout)
+
+        while True:
+            now = time.time()
+            try:
+                state, _changed = self.store.update(self.name, self._grant(lease, now))
+            except LimiterConflictError as e:
+                # The store is busy, not down: other callers are updating it, so keep waiting
+                logger.debug(f"API limiter '{self.name}' contended, retrying: {e}")
+                state = None
+            except Exception as e:
+                self._store_error(e)
+                self.metrics.observe(time.monotonic() - started)
+                return {**lease, "id": None}
+
+            if state is not None and lease["id"] in state["leases"]:
+                self.metrics.observe(time.monotonic() - started)
+                return lease
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._leave_queue(lease["id"])
+                self.metrics.observe(time.monotonic() - started, timed_out=True)
+                raise LimiterTimeoutError(
+                    f"No '{self.name}' API slot within {time.monotonic() - started:.1f}s"
+                )
+            wait = self.poll_interval
+            if state is not None:
+                wait = max(wait, self._budget_wait(state, lease["tokens"], now))
+            # Jitter so waiters polling a shared store don't all collide
+            time.sleep(min(remaining, wait * random.uniform(0.5, 1.5)))
+
+    def release(self, lease: dict, used_tokens: Optional[int] = None) -> None:
+        """
+        End a lease; tokens reserved but not used are returned to the budget.
+
+        Args:
+            lease: Dict returned by acquire()
+            used_tokens: Tokens actually used (default: the whole reservation)
+        """
+        if lease.get("id") is None:
+            return
+        refund = max(0, lease["tokens"] - (lease["tokens"] if used_tokens is None else used_tokens))
+        now = time.time()
+
+        def finish(state: dict[str, Any]) -> dict[str, Any]:
+            state["leases"].pop(lease["id"], None)
+            if refund and self.tokens_per_minute:
+                level = refill(state["tokens"], self.tokens_per_minute, now) + refund
+                state["tokens"] = [min(float(self.tokens_per_minute), level), now]
+            return state
+
+        try:
+            self.store.update(self.name, finish)
+        except Exception as e:
+            self._store_error(e)
+
+    def _cost(self, tokens: int) -> int:
+        # A reservation above the whole per-minute budget could never be granted
+        if self.tokens_per_minute:
+            return min(max(0, int(tokens)), self.tokens_per_minute)
+        return max(0, int(tokens))
+
+    def _grant(self, lease: dict, now: float) -> Transition:
+        """Transition that grants lease if it is at the front and within every limit."""
+
+        def transition(state: dict[str, Any]) -> dict[str, Any]:
+            leases = {k: v for k, v in state["leases"].items() if v > now}
+            queue = [ticket for ticket in state["queue"] if ticket[1] > now - self.ticket_ttl]
+            requests = refill(state["requests"], self.requests_per_minute, now)
+            tokens = refill(state["tokens"], self.tokens_per_minute, now)
+            ids = [ticket[0] for ticket in queue]
+
+            first = not ids or ids[0] == lease["id"]
+            fits = (
+                (not self.max_concurrent or len(leases) < self.max_concurrent)
+                and (not self.requests_per_minute or requests >= 1)
+                and (not self.tokens_per_minute or tokens >= lease["tokens"])
+            )
+            if first and fits:
+                leases[lease["id"]] = now + self.lease_ttl
+                queue = [ticket for ticket in queue if ticket[0] != lease["id"]]
+                requests -= 1
+                tokens -= lease["tokens"]
+            elif lease["id"] in ids:
+                queue[ids.index(lease["id"])][1] = now  # Still waiting
+            else:
+                queue.append([lease["id"], now])
+
+            return {
+                "leases": leases,
+                "queue": queue,
+                "requests": [requests, now] if self.requests_per_minute else None,
+                "tokens": [tokens, now] if self.tokens_per_minute else None,
+            }
+
+        return transition
+
+    def _budget_wait(self, state: dict[str, Any], tokens: int, now: float) -> float:
+        """Seconds until the request and token buckets could cover one more call."""
+        wait = 0.0
+        if self.requests_per_minute:
+            missing = 1 - refill(state["requests"], self.requests_per_minute, now)
+            wait = max(wait, missing * 60.0 / self.requests_per_minute)
+        if self.tokens_per_minute:
+            missing = tokens - refill(state["tokens"], self.tokens_per_minute, now)
+            wait = max(wait, missing * 60.0 / self.tokens_per_minute)
+        return wait
+
+    def _leave_queue(self, lease_id: str) -> None:
+        def leave(state: dict[str, Any]) -> Optional[dict[str, Any]]:
+            queue = [ticket for ticket in state["queue"] if ticket[0] != lease_id]
+            if len(queue) == len(state["queue"]):
+                return None
+            return {**state, "queue": queue}
+
+        try:
+            self.store.update(self.name, leave)
+        except LimiterConflictError:
+            pass  # The abandoned ticket is dropped after ticket_ttl anyway
+        except Exception as e:
+            self._store_error(e)
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> dict:
+        """Limits, shared in-flight/queued counts and this process's wait-time metrics."""
+        now = time.time()
+        try:
+            state = self.store.read(self.name)
+            in_flight = sum(1 for expires in state["leases"].values() if expires > now)
+            queued = sum(1 for ticket in state["queue"] if ticket[1] > now - self.ticket_ttl)
+        except Exception as e:
+            self._store_error(e)
+            in_flight = queued = None
+        return {
+            "backend": self.store.name,
+            "max_concurrent": self.max_concurrent,
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "queue_timeout": self.queue_timeout,
+            "in_flight": in_flight,
+            "queued": queued,
+            "wait": self.metrics.snapshot(),
+            "store_errors": self.store_errors,
+        }
+
+    def _store_error(self, error: Exception) -> None:
+        self.store_errors += 1
+        logger.warning(f"API limiter store unavailable, allowing call: {error}")
@@ -0,0 +1,380 @@
+"""
+Archetypes Module for Focused Room Website
+
+Most Big Five submissions fall into a few hundred trait-level combinations, so the
+expensive, personality-only part of the AI report is written once per combination
+("archetype") and reused:
+
+- cluster_results() buckets stored results by their five ``get_trait_level`` levels
+  (5**5 = 3125 possible archetypes) with vectorized bincounts, and returns the most
+  common ones with their centroids.
+- refresh_archetypes() (run off-peak by the background worker) upserts the selected
+  archetypes into ``archetype_report`` and asks Gemini for the base report of each
+  archetype that does not have one yet.
+- ArchetypeLibrary keeps each worker's reports in memory and maps a submission to the
+  nearest archetype. GeminiClient then only generates a short personal overlay
+  (quote, intro, life domains) around the stored base report.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models import ArchetypeReport, BigFiveResult, db
+from app.utils.bigfive import TRAIT_LEVEL_THRESHOLDS, TRAIT_LEVELS, TRAITS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Short codes for TRAIT_LEVELS, used in archetype keys
+LEVEL_CODES = ["VL", "L", "M", "H", "VH"]
+
+DEFAULT_MIN_MEMBERS = 20
+DEFAULT_MAX_ARCHETYPES = 100
+
+_N_LEVELS = len(LEVEL_CODES)
+_N_BUCKETS = _N_LEVELS ** len(TRAITS)
+# Base-5 place value of each trait's level in the bucket number
+_PLACES = _N_LEVELS ** np.arange(len(TRAITS) - 1, -1, -1)
+
+
+def level_indices(scores: dict[str, float]) -> list[int]:
+    """Index into TRAIT_LEVELS of each trait's score, in TRAITS order."""
+    levels = np.searchsorted(TRAIT_LEVEL_THRESHOLDS, [scores.get(t, 0) for t in TRAITS], "right")
+    return levels.tolist()
+
+
+def archetype_key(scores: dict[str, float]) -> str:
+    """
+    Archetype of a set of trait scores.
+
+    Example:
+        >>> archetype_key({"openness": 62, "conscientiousness": 50, "extraversion": 40,
+        ...                "agreeableness": 80, "neuroticism": 50})
+        'H-M-L-VH-M'
+    """
+    return "-".join(LEVEL_CODES[level] for level in level_indices(scores))
+
+
+def parse_archetype_key(key: str) -> list[int]:
+    """Level indices of an archetype key (inverse of archetype_key)."""
+    levels = [LEVEL_CODES.index(code) for code in key.split("-")]
+    if len(levels) != len(TRAITS):
+        raise ValueError(f"Invalid archetype key: {key}")
+    return levels
+
+
+def describe_archetype(key: str) -> dict[str, str]:
+    """Trait -> verbal level, e.g. {"openness": "High", ...}."""
+    return {trait: TRAIT_LEVELS[level] for trait, level in zip(TRAITS, parse_archetype_key(key))}
+
+
+def _bucket_key(bucket: int) -> str:
+    digits = (bucket // _PLACES) % _N_LEVELS
+    return "-".join(LEVEL_CODES[digit] for digit in digits)
+
+
+def _score_rows(rows: list) -> tuple[np.ndarray, np.ndarray]:
+    """(n, 5) scores and percentiles of rows with complete scores; NaN for missing percentiles."""
+    scores, percentiles = [], []
+    for row in rows:
+        data = row.scores or {}
+        trait_scores = data.get("scores") or {}
+        if not all(isinstance(trait_scores.get(trait), (int, float)) for trait in TRAITS):
+            continue
+        trait_percentiles = data.get("percentiles") or {}
+        scores.append([trait_scores[trait] for trait in TRAITS])
+        percentiles.append([trait_percentiles.get(trait, np.nan) for trait in TRAITS])
+    return (
+        np.array(scores, dtype=np.float64).reshape(-1, len(TRAITS)),
+        np.array(percentiles, dtype=np.float64).reshape(-1, len(TRAITS)),
+    )
+
+
+def cluster_results(
+    batch_size: int = 5000,
+    min_members: int = DEFAULT_MIN_MEMBERS,
+    max_archetypes: int = DEFAULT_MAX_ARCHETYPES,
+) -> dict[str, Any]:
+    """
+    Group stored results into trait-level archetypes.
+
+    Results are streamed in batches of ``batch_size``; memory use does not grow with
+    the number of results.
+
+    Args:
+        batch_size: Results fetched per round trip
+        min_members: Results an archetype needs before it is selected
+        max_archetypes: Most common archetypes to return
+
+    Returns:
+        {"results": scored results, "covered": results in the selected archetypes,
+         "archetypes": [{"key", "member_count", "centroid": {"scores", "percentiles"}}]}
+        with archetypes ordered by member count, largest first
+    """
+    counts = np.zeros(_N_BUCKETS, dtype=np.int64)
+    score_sums = np.zeros((len(TRAITS), _N_BUCKETS))
+    percentile_sums = np.zeros((len(TRAITS), _N_BUCKETS))
+    percentile_counts = np.zeros((len(TRAITS), _N_BUCKETS), dtype=np.int64)
+
+    query = select(BigFiveResult.scores).execution_options(yield_per=batch_size)
+    for rows in db.session.execute(query).partitions():
+        scores, percentiles = _score_rows(rows)
+        if not len(scores):
+            continue
+        buckets = np.searchsorted(TRAIT_LEVEL_THRESHOLDS, scores, "right") @ _PLACES
+        counts += np.bincount(buckets, minlength=_N_BUCKETS)
+        known = ~np.isnan(percentiles)
+        for column in range(len(TRAITS)):
+            score_sums[column] += np.bincount(
+                buckets, weights=scores[:, column], minlength=_N_BUCKETS
+            )
+            percentile_sums[column] += np.bincount(
+                buckets[known[:, column]],
+                weights=percentiles[known[:, column], column],
+                minlength=_N_BUCKETS,
+            )
+            percentile_counts[column] += np.bincount(
+                buckets[known[:, column]], minlength=_N_BUCKETS
+            )
+
+    eligible = np.flatnonzero(counts >= max(min_members, 1))
+    # Largest first; ties broken by bucket number so the selection is deterministic
+    selected = eligible[np.lexsort((eligible, -counts[eligible]))][:max_archetypes]
+
+    archetypes = []
+    for bucket in selected.tolist():
+        centroid_percentiles = {
+            trait: round(
+                float(percentile_sums[column, bucket] / percentile_counts[column, bucket]), 1
+            )
+            for column, trait in enumerate(TRAITS)
+            if percentile_counts[column, bucket]
+        }
+        archetypes.append(
+            {
+                "key": _bucket_key(bucket),
+                "member_count": int(counts[bucket]),
+                "centroid": {
+                    "scores": {
+                        trait: round(float(score_sums[column, bucket] / counts[bucket]), 1)
+                        for column, trait in enumerate(TRAITS)
+                    },
+                    "percentiles": centroid_percentiles,
+                },
+            }
+        )
+
+    return {
+        "results": int(counts.sum()),
+        "covered": int(counts[selected].sum()),
+        "archetypes": archetypes,
+    }
+
+
+def refresh_archetypes(
+    client=None,
+    min_members: int = DEFAULT_MIN_MEMBERS,
+    max_archetypes: int = DEFAULT_MAX_ARCHETYPES,
+    max_reports: Optional[int] = None,
+    regenerate: bool = False,
+    batch_size: int = 5000,
+) -> dict[str, Any]:
+    """
+    Re-cluster stored results and generate missing archetype base reports.
+
+    Archetypes that are no longer selected are removed. Reports are committed one
+    at a time, so an interrupted run keeps what it generated; failed generations
+    are retried on the next run.
+
+    Args:
+        client: GeminiClient used for the base reports (default: the shared client)
+        min_members: Results an archetype needs before it gets a report
+        max_archetypes: Most common archetypes to keep
+        max_reports: Upper bound on Gemini calls in this run (None = no limit)
+        regenerate: Rewrite existing reports as well (e.g. after a prompt change)
+        batch_size: Results fetched per round trip while clustering
+
+    Returns:
+        Summary dict with results, covered, archetypes, removed, generated and failed
+    """
+    started = time.monotonic()
+    clusters = cluster_results(batch_size, min_members, max_archetypes)
+    now = datetime.utcnow()
+
+    existing = {row.archetype_key: row for row in db.session.scalars(select(ArchetypeReport))}
+    selected_keys = [archetype["key"] for archetype in clusters["archetypes"]]
+    for archetype in clusters["archetypes"]:
+        row = existing.get(archetype["key"])
+        if row is None:
+            row = ArchetypeReport(archetype_key=archetype["key"])
+            db.session.add(row)
+        row.member_count = archetype["member_count"]
+        row.centroid = archetype["centroid"]
+        row.updated_at = now
+    removed = db.session.execute(
+        delete(ArchetypeReport).where(ArchetypeReport.archetype_key.not_in(selected_keys))
+    ).rowcount
+    db.session.commit()
+
+    pending = [
+        key
+        for key in selected_keys
+        if regenerate or existing.get(key) is None or not existing[key].report
+    ]
+    if max_reports is not None:
+        pending = pending[:max_reports]
+
+    if pending and client is None:
+        from app.utils.gemini_client import get_gemini_client
+
+        client = get_gemini_client()
+
+    generated = failed = 0
+    for key in pending:
+        row = db.session.get(ArchetypeReport, key)
+        report = client.generate_archetype_report(describe_archetype(key), row.centroid)
+        if not report:
+            failed += 1
+            continue
+        row.report = report
+        row.generated_at = row.updated_at = datetime.utcnow()
+        db.session.commit()
+        generated += 1
+
+    summary = {
+        "results": clusters["results"],
+        "covered": clusters["covered"],
+        "archetypes": len(selected_keys),
+        "removed": removed,
+        "generated": generated,
+        "failed": failed,
+        "elapsed": round(time.monotonic() - started, 3),
+    }
+    logger.info(f"Archetype refresh: {summary}")
+    return summary
+
+
+class ArchetypeLibrary:
+    """
+    Per-worker, in-memory view of the archetype base reports.
+
+    The archetype_report version (row count + latest update) is checked at most every
+    ``check_interval`` seconds and reports are reloaded only when it changed.
+    """
+
+    def __init__(self, check_interval: float = 300.0, max_distance: int = 1):
+        """
+        Args:
+            check_interval: Minimum seconds between version checks (0 = every lookup)
+            max_distance: Largest total level difference (L1 over the five traits)
+                between a submission and the archetype whose report it may reuse
+        """
+        self.check_interval = check_interval
+        self.max_distance = max_distance
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._last_check = 0.0
+        self._version: Optional[tuple] = None
+        # (keys, levels, reports), ordered by member count; replaced as a whole on reload
+        self._snapshot: tuple = ([], np.zeros((0, len(TRAITS)), dtype=np.int8), [])
+
+        self.reloads = 0
+
+    def __len__(self) -> int:
+        return len(self._snapshot[0])
+
+    def nearest(self, scores: dict[str, float]) -> Optional[dict[str, Any]]:
+        """
+        Archetype report closest to scores in trait levels.
+
+        Among equally close archetypes the one with most members wins.
+
+        Returns:
+            {"key", "report", "distance"}, or None if no archetype is within max_distance
+        """
+        self._refresh()
+        keys, levels, reports = self._snapshot
+        if not keys:
+            return None
+
+        distances = np.abs(levels - np.array(level_indices(scores))).sum(axis=1)
+        best = int(np.argmin(distances))  # rows are ordered by member count
+        if distances[best] > self.max_distance:
+            return None
+        return {"key": keys[best], "report": reports[best], "distance": int(distances[best])}
+
+    def invalidate(self) -> None:
+        """Force a reload on next lookup."""
+        with self._lock:
+            self._loaded = False
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._loaded and now - self._last_check < self.check_interval:
+            return
+
+        with self._lock:
+            if self._loaded and now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+            try:
+                # Own session so a failed lookup never rolls back the caller's transaction
+                with Session(db.engine) as session:
+                    self._reload_if_changed(session)
+            except Exception as e:
+                # Keep serving the last reports (or full reports only) if the DB hiccups
+                logger.warning(f"Archetype report reload failed: {str(e)}")
+
+    def _reload_if_changed(self, session: Session) -> None:
+        """Call with self._lock held."""
+        ready = ArchetypeReport.report.is_not(None)
+        version = tuple(
+            session.execute(
+                select(func.count(), func.max(ArchetypeReport.updated_at)).where(ready)
+            ).one()
+        )
+        if self._loaded and version == self._version:
+            return
+
+        rows = session.execute(
+            select(ArchetypeReport.archetype_key, ArchetypeReport.report)
+            .where(ready)
+            .order_by(ArchetypeReport.member_count.desc(), ArchetypeReport.archetype_key)
+        ).all()
+        levels = [parse_archetype_key(row.archetype_key) for row in rows]
+        self._snapshot = (
+            [row.archetype_key for row in rows],
+            np.array(levels, dtype=np.int8).reshape(-1, len(TRAITS)),
+            [row.report for row in rows],
+        )
+        self._version = version
+        self._loaded = True
+        self.reloads += 1
+        logger.info(f"Loaded {len(rows)} archetype reports")
+
+
+_archetype_library: Optional[ArchetypeLibrary] = None
+_archetype_library_lock = threading.Lock()
+
+
+def get_archetype_library() -> ArchetypeLibrary:
+    """Return the process-wide ArchetypeLibrary, configured from the Flask config on first use."""
+    global _archetype_library
+
+    with _archetype_library_lock:
+        if _archetype_library is None:
+            from flask import current_app
+
+            _archetype_library = ArchetypeLibrary(
+                check_interval=current_app.config.get("ARCHETYPE_CHECK_INTERVAL", 300.0),
+                max_distance=current_app.config.get("ARCHETYPE_MAX_DISTANCE", 1),
+            )
+        return _archetype_library
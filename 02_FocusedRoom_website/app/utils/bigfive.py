@@ -8,11 +8,47 @@ Standard Big Five tests typically use 44-50 questions with Likert scale response
 """
 
 import statistics
-from typing import Dict, List, Optional, Union
+from bisect import bisect_right
+from functools import cache
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
 
 # Big Five trait keys
 TRAITS = ["openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism"]
 
+# Default question mappings by test length
+# Based on standard IPIP Big Five markers
+# Each trait gets roughly equal number of questions
+DEFAULT_QUESTION_MAPPINGS: Dict[int, Dict[str, List[int]]] = {
+    44: {
+        "openness": [4, 9, 14, 19, 24, 29, 34, 39, 43],  # 9 questions
+        "conscientiousness": [3, 8, 13, 18, 23, 28, 33, 38],  # 8 questions
+        "extraversion": [0, 5, 10, 15, 20, 25, 30, 35, 40],  # 9 questions
+        "agreeableness": [2, 7, 12, 17, 22, 27, 32, 37, 42],  # 9 questions
+        "neuroticism": [1, 6, 11, 16, 21, 26, 31, 36, 41],  # 9 questions
+    },
+    50: {
+        "openness": [4, 9, 14, 19, 24, 29, 34, 39, 44, 49],  # 10 questions
+        "conscientiousness": [3, 8, 13, 18, 23, 28, 33, 38, 43, 48],  # 10 questions
+        "extraversion": [0, 5, 10, 15, 20, 25, 30, 35, 40, 45],  # 10 questions
+        "agreeableness": [2, 7, 12, 17, 22, 27, 32, 37, 42, 47],  # 10 questions
+        "neuroticism": [1, 6, 11, 16, 21, 26, 31, 36, 41, 46],  # 10 questions
+    },
+}
+
+# Verbal levels used in AI prompts and PDF reports, lowest first, with the score
+# (0-100) at which each level above "Very Low" starts
+TRAIT_LEVELS = ["Very Low", "Low", "Moderate", "High", "Very High"]
+TRAIT_LEVEL_THRESHOLDS = [30, 45, 55, 70]
+
+# Rows scored per step by compute_bigfive_scores_batch (bounds temporary arrays)
+BATCH_CHUNK_ROWS = 65536
+
+# Answers that are multiples of 1/1024 sum exactly in float64, so sum / count is
+# rounded exactly like statistics.mean; other rows are scored with statistics.mean
+_EXACT_STEP = 1024.0
+
 
 def compute_bigfive_scores(
     answers: List[Union[int, float]], question_mapping: Optional[Dict[str, List[int]]] = None
@@ -56,32 +92,15 @@ def compute_bigfive_scores(
     try:
         numeric_answers = [float(x) for x in answers]
     except (TypeError, ValueError) as e:
-        raise ValueError(f"All answers must be numeric values: {e}")
+        raise ValueError(f"All answers must be numeric values: {e}") from e
 
     # Validate answer range (assuming 1-5 Likert scale)
     if any(x < 1 or x > 5 for x in numeric_answers):
         raise ValueError("All answers must be in the range 1-5")
 
-    # Default question mapping for 44-question Big Five test
-    # Based on standard IPIP Big Five markers
-    # Each trait gets roughly equal number of questions
+    # Default question mapping for the test length (built once at import time)
     if question_mapping is None:
-        if len(answers) == 44:
-            question_mapping = {
-                "openness": [4, 9, 14, 19, 24, 29, 34, 39, 43],  # 9 questions
-                "conscientiousness": [3, 8, 13, 18, 23, 28, 33, 38],  # 8 questions
-                "extraversion": [0, 5, 10, 15, 20, 25, 30, 35, 40],  # 9 questions
-                "agreeableness": [2, 7, 12, 17, 22, 27, 32, 37, 42],  # 9 questions
-                "neuroticism": [1, 6, 11, 16, 21, 26, 31, 36, 41],  # 9 questions
-            }
-        else:  # 50 questions
-            question_mapping = {
-                "openness": [4, 9, 14, 19, 24, 29, 34, 39, 44, 49],  # 10 questions
-                "conscientiousness": [3, 8, 13, 18, 23, 28, 33, 38, 43, 48],  # 10 questions
-                "extraversion": [0, 5, 10, 15, 20, 25, 30, 35, 40, 45],  # 10 questions
-                "agreeableness": [2, 7, 12, 17, 22, 27, 32, 37, 42, 47],  # 10 questions
-                "neuroticism": [1, 6, 11, 16, 21, 26, 31, 36, 41, 46],  # 10 questions
-            }
+        question_mapping = DEFAULT_QUESTION_MAPPINGS[len(answers)]
 
     # Compute raw scores for each trait
     raw_scores = {}
@@ -143,6 +162,168 @@ def _calculate_percentiles(normalized_scores: Dict[str, float]) -> Dict[str, flo
     return percentiles
 
 
+def compute_bigfive_scores_batch(
+    answers: Any, question_mapping: Optional[Dict[str, List[int]]] = None
+) -> Dict[str, Any]:
+    """
+    Score many Big Five tests at once with NumPy.
+
+    Produces the same values as calling compute_bigfive_scores on each row,
+    using index arrays precomputed per question mapping instead of per-row
+    Python loops.
+
+    Args:
+        answers: Array-like of shape (N, 44) or (N, 50), responses on a 1-5 scale
+        question_mapping: Optional custom mapping of trait names to question indices
+                         (same meaning as in compute_bigfive_scores)
+
+    Returns:
+        Dictionary containing:
+        - 'traits': Trait names, in column order
+        - 'scores': float64 array (N, traits) of normalized scores (0-100)
+        - 'percentiles': float64 array (N, traits) of percentile ranks
+        - 'raw_scores': float64 array (N, traits) of mean item responses
+        - 'valid': True
+
+    Raises:
+        ValueError: If the array has the wrong shape or non-numeric/out-of-range values
+
+    Example:
+        >>> batch = compute_bigfive_scores_batch(np.full((1000, 44), 3))
+        >>> batch["scores"][:, batch["traits"].index("openness")]
+        array([50., 50., ...])
+    """
+    answers = np.asarray(answers)
+    if answers.dtype.kind not in "biuf":
+        try:
+            answers = answers.astype(np.float64)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"All answers must be numeric values: {e}") from e
+
+    if answers.ndim != 2 or answers.shape[1] not in (44, 50):
+        raise ValueError(f"Expected an (N, 44) or (N, 50) array, got shape {answers.shape}")
+
+    # Written as "not in range" so NaN is rejected too
+    if np.any(~((answers >= 1) & (answers <= 5))):
+        raise ValueError("All answers must be in the range 1-5")
+
+    n_items = answers.shape[1]
+    if question_mapping is None:
+        traits, order, starts, counts = _default_trait_index(n_items)
+    else:
+        traits, order, starts, counts = _build_trait_index(question_mapping, n_items)
+
+    raw_scores = np.zeros((answers.shape[0], len(traits)), dtype=np.float64)
+    for begin in range(0, answers.shape[0], BATCH_CHUNK_ROWS):
+        chunk = answers[begin : begin + BATCH_CHUNK_ROWS].astype(np.float64, copy=False)
+        raw_scores[begin : begin + len(chunk)] = _trait_means(chunk, order, starts, counts)
+
+    # Normalize scores to 0-100 scale (same expression as the scalar path)
+    normalized_scores = ((raw_scores - 1) / 4) * 100
+
+    return {
+        "valid": True,
+        "traits": traits,
+        "scores": normalized_scores,
+        "percentiles": _calculate_percentiles_array(normalized_scores),
+        "raw_scores": raw_scores,
+    }
+
+
+def get_batch_result(batch: Dict[str, Any], row: int) -> Dict[str, Any]:
+    """
+    One row of a compute_bigfive_scores_batch result in compute_bigfive_scores format.
+
+    Args:
+        batch: Return value of compute_bigfive_scores_batch
+        row: Row index
+
+    Returns:
+        Dictionary with 'valid', 'scores', 'percentiles' and 'raw_scores' per trait
+    """
+    traits = batch["traits"]
+    return {
+        "valid": True,
+        "scores": dict(zip(traits, batch["scores"][row].tolist())),
+        "percentiles": dict(zip(traits, batch["percentiles"][row].tolist())),
+        "raw_scores": dict(zip(traits, batch["raw_scores"][row].tolist())),
+    }
+
+
+def _build_trait_index(
+    question_mapping: Dict[str, List[int]], n_items: int
+) -> tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Flatten a question mapping into index arrays for np.add.reduceat.
+
+    Returns:
+        (traits, order, starts, counts): answers[:, order] lays every trait's
+        questions out contiguously; trait t's segment begins at starts[t] and
+        holds counts[t] questions
+    """
+    traits = list(question_mapping)
+    indices = [[i for i in question_mapping[trait] if i < n_items] for trait in traits]
+    counts = np.array([len(trait_indices) for trait_indices in indices], dtype=np.intp)
+    order = np.array([i for trait_indices in indices for i in trait_indices], dtype=np.intp)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.intp)
+    return traits, order, starts, counts
+
+
+@cache
+def _default_trait_index(n_items: int) -> tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    return _build_trait_index(DEFAULT_QUESTION_MAPPINGS[n_items], n_items)
+
+
+def _trait_means(
+    answers: np.ndarray, order: np.ndarray, starts: np.ndarray, counts: np.ndarray
+) -> np.ndarray:
+    """Per-trait mean of each row (0.0 for traits without questions, like the scalar path)."""
+    means = np.zeros((answers.shape[0], len(counts)), dtype=np.float64)
+    present = counts > 0
+    if not present.any():
+        return means
+
+    # Empty segments are dropped so reduceat doesn't return a stray element for them
+    sums = np.add.reduceat(answers[:, order], starts[present], axis=1)
+    means[:, present] = sums / counts[present]
+
+    scaled = answers * _EXACT_STEP
+    inexact = np.flatnonzero(~np.all(scaled == np.rint(scaled), axis=1))
+    if inexact.size:
+        segments = np.split(order, np.cumsum(counts)[:-1])
+        for row in inexact:
+            values = answers[row]
+            for column, indices in enumerate(segments):
+                if indices.size:
+                    means[row, column] = statistics.mean(values[indices].tolist())
+    return means
+
+
+def _calculate_percentiles_array(normalized_scores: np.ndarray) -> np.ndarray:
+    """Vectorized _calculate_percentiles (same piecewise-linear approximation)."""
+    percentiles = np.select(
+        [normalized_scores <= 25, normalized_scores <= 50, normalized_scores <= 75],
+        [
+            normalized_scores * 0.8,
+            20 + (normalized_scores - 25) * 1.2,
+            50 + (normalized_scores - 50) * 1.2,
+        ],
+        default=80 + (normalized_scores - 75) * 0.8,
+    )
+    return np.minimum(100, np.maximum(0, percentiles))
+
+
+def get_trait_level(score: float) -> str:
+    """
+    Verbal level of a 0-100 score ("Very Low" to "Very High").
+
+    Example:
+        >>> get_trait_level(62.5)
+        'High'
+    """
+    return TRAIT_LEVELS[bisect_right(TRAIT_LEVEL_THRESHOLDS, score)]
+
+
 def get_trait_interpretation(trait: str, score: float) -> str:
     """
     Get a human-readable interpretation of a trait score.
@@ -0,0 +1,171 @@
+"""
+Blog Catalog Module for Focused Room Website
+
+Keeps blog metadata (``static/blog_data.json``) and post bodies
+(``blog_content/<slug>.html``) in memory so blog pages don't open, read and
+parse files on every request.
+
+- Loaded lazily once per worker process
+- Slug -> post dict for O(1) lookups
+- Related posts precomputed per slug (most shared tags first)
+- Reloaded only when a file's mtime changes; mtimes are checked at most
+  every ``check_interval`` seconds
+"""
+
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+
+class BlogCatalog:
+    """In-memory, mtime-invalidated view of the blog posts and their content."""
+
+    def __init__(
+        self,
+        data_path: Path = APP_DIR / "static" / "blog_data.json",
+        content_dir: Path = APP_DIR / "blog_content",
+        check_interval: float = 2.0,
+    ):
+        """
+        Args:
+            data_path: Path to blog_data.json
+            content_dir: Directory holding <slug>.html bodies
+            check_interval: Minimum seconds between mtime checks (0 = every access)
+        """
+        self.data_path = Path(data_path)
+        self.content_dir = Path(content_dir)
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._last_check = 0.0
+        self._data_mtime: Optional[int] = None
+
+        self._posts: list[dict[str, Any]] = []
+        self._by_slug: dict[str, dict[str, Any]] = {}
+        self._related: dict[str, list[dict[str, Any]]] = {}
+        # slug -> (mtime_ns, html); None html means the file is missing
+        self._content: dict[str, tuple[Optional[int], Optional[str]]] = {}
+
+        self.reloads = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get_posts(self) -> list[dict[str, Any]]:
+        """All posts in blog_data.json order."""
+        self._refresh()
+        return self._posts
+
+    def get_post(self, slug: str) -> Optional[dict[str, Any]]:
+        """Post metadata for slug, or None if unknown."""
+        self._refresh()
+        return self._by_slug.get(slug)
+
+    def get_content(self, slug: str) -> Optional[str]:
+        """HTML body for slug, or None if the content file is missing."""
+        self._refresh()
+        entry = self._content.get(slug)
+        return entry[1] if entry else None
+
+    def get_related_posts(self, slug: str) -> list[dict[str, Any]]:
+        """Every other post, ordered by number of tags shared with slug."""
+        self._refresh()
+        return self._related.get(slug, [])
+
+    def invalidate(self) -> None:
+        """Force a full reload on next access."""
+        with self._lock:
+            self._loaded = False
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._loaded and now - self._last_check < self.check_interval:
+            return
+
+        with self._lock:
+            if self._loaded and now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+
+            data_mtime = self._mtime(self.data_path)
+            if not self._loaded or data_mtime != self._data_mtime:
+                self._load(data_mtime)
+            else:
+                self._refresh_content()
+
+    def _load(self, data_mtime: Optional[int]) -> None:
+        """Rebuild every index from blog_data.json (call with self._lock held)."""
+        try:
+            with open(self.data_path, encoding="utf-8") as f:
+                posts = json.load(f).get("posts", [])
+        except (OSError, ValueError) as e:
+            if not self._loaded:
+                raise
+            # Keep serving the last good catalog while the file is being edited
+            logger.error(f"Failed to reload blog catalog, keeping previous version: {str(e)}")
+            self._data_mtime = data_mtime
+            return
+
+        by_slug = {post["slug"]: post for post in posts}
+        related = {post["slug"]: self._rank_related(post, posts) for post in posts}
+        content = {slug: self._read_content(slug, self._content.get(slug)) for slug in by_slug}
+
+        # Swap in complete indexes so readers never see a half-built catalog
+        self._posts = posts
+        self._by_slug = by_slug
+        self._related = related
+        self._content = content
+        self._data_mtime = data_mtime
+        self._loaded = True
+        self.reloads += 1
+        logger.info(f"Loaded {len(posts)} blog posts into catalog")
+
+    def _refresh_content(self) -> None:
+        """Re-read only the bodies whose files changed (call with self._lock held)."""
+        content = {slug: self._read_content(slug, entry) for slug, entry in self._content.items()}
+        self._content = content
+
+    def _read_content(
+        self, slug: str, cached: Optional[tuple[Optional[int], Optional[str]]]
+    ) -> tuple[Optional[int], Optional[str]]:
+        path = self.content_dir / f"{slug}.html"
+        mtime = self._mtime(path)
+        if cached is not None and cached[0] == mtime:
+            return cached
+        if mtime is None:
+            logger.error(f"Blog content file not found: {path}")
+            return None, None
+        with open(path, encoding="utf-8") as f:
+            return mtime, f.read()
+
+    @staticmethod
+    def _rank_related(post: dict[str, Any], posts: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        tags = set(post.get("tags", []))
+        others = [p for p in posts if p["slug"] != post["slug"]]
+        # Stable sort keeps blog_data.json order among equally related posts
+        return sorted(others, key=lambda p: -len(tags.intersection(p.get("tags", []))))
+
+    @staticmethod
+    def _mtime(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+
+# Global catalog instance (one per worker process)
+blog_catalog = BlogCatalog()
@@ -0,0 +1,117 @@
+"""
+Blog Engagement Module for Focused Room Website
+
+Maintains the denormalized ``blog_engagement_counter`` table alongside the
+per-user ``blog_engagement`` rows, so reading a post's stats is one small
+query instead of a COUNT per engagement type.
+
+Counters are changed with an atomic upsert (``count = count + delta``) in the
+same transaction as the engagement row insert/delete, so they commit or roll
+back together and concurrent toggles cannot lose updates.
+"""
+
+import logging
+from typing import Any
+
+from sqlalchemy import and_, case, exists, func, select
+
+from app.models import BlogEngagement, BlogEngagementCounter, db
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ENGAGEMENT_TYPES = ["like", "helpful_yes", "helpful_no"]
+HELPFUL_TYPES = ["helpful_yes", "helpful_no"]
+
+
+def _insert():
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Engagement counters are not supported on {dialect}")
+    return insert
+
+
+def adjust_engagement_count(slug: str, engagement_type: str, delta: int) -> int:
+    """
+    Add delta to a post's counter inside the current transaction.
+
+    The caller commits (together with the engagement row change).
+
+    Returns:
+        The counter value after the change
+    """
+    table = BlogEngagementCounter.__table__
+    stmt = _insert()(table).values(
+        post_slug=slug, engagement_type=engagement_type, count=max(delta, 0)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.post_slug, table.c.engagement_type],
+        set_={"count": case((table.c.count + delta < 0, 0), else_=table.c.count + delta)},
+    ).returning(table.c.count)
+    return db.session.execute(stmt).scalar_one()
+
+
+def get_engagement_summary(slug: str, user_identifier: str) -> dict[str, Any]:
+    """
+    Counts and the current user's own state for a post in one query.
+
+    Returns:
+        Dict with likes, helpful_yes, helpful_no, user_liked, user_voted_helpful
+    """
+    user_engaged = exists().where(
+        and_(
+            BlogEngagement.post_slug == BlogEngagementCounter.post_slug,
+            BlogEngagement.engagement_type == BlogEngagementCounter.engagement_type,
+            BlogEngagement.user_identifier == user_identifier,
+        )
+    )
+    rows = db.session.execute(
+        select(
+            BlogEngagementCounter.engagement_type,
+            BlogEngagementCounter.count,
+            user_engaged.label("user_engaged"),
+        ).where(BlogEngagementCounter.post_slug == slug)
+    ).all()
+
+    counts = {engagement_type: 0 for engagement_type in ENGAGEMENT_TYPES}
+    mine = set()
+    for engagement_type, count, engaged in rows:
+        counts[engagement_type] = count
+        if engaged:
+            mine.add(engagement_type)
+
+    return {
+        "likes": counts["like"],
+        "helpful_yes": counts["helpful_yes"],
+        "helpful_no": counts["helpful_no"],
+        "user_liked": "like" in mine,
+        "user_voted_helpful": any(t in mine for t in HELPFUL_TYPES),
+    }
+
+
+def rebuild_engagement_counters() -> int:
+    """
+    Recompute every counter from blog_engagement (backfill or repair).
+
+    Returns:
+        Number of counter rows written
+    """
+    db.session.query(BlogEngagementCounter).delete(synchronize_session=False)
+    totals = (
+        db.session.query(
+            BlogEngagement.post_slug, BlogEngagement.engagement_type, func.count(BlogEngagement.id)
+        )
+        .group_by(BlogEngagement.post_slug, BlogEngagement.engagement_type)
+        .all()
+    )
+    db.session.add_all(
+        BlogEngagementCounter(post_slug=slug, engagement_type=engagement_type, count=count)
+        for slug, engagement_type, count in totals
+    )
+    db.session.commit()
+    logger.info(f"Rebuilt {len(totals)} blog engagement counters")
+    return len(totals)
@@ -0,0 +1,442 @@
+"""
+Circuit Breaker Module for Focused Room Website
+
+Stops calling an upstream API (Gemini) while it is failing, so an outage costs
+each request one cheap state read instead of a timeout plus retries.
+
+- ``closed``: calls go through; ``failure_threshold`` consecutive failures open
+  the circuit.
+- ``open``: calls are rejected without touching the API until ``cooldown``
+  seconds have passed since it opened.
+- ``half_open``: exactly one caller (across all workers) gets to send a probe.
+  Success closes the circuit, failure re-opens it for another cool-down. If the
+  probe never reports back, another caller may probe after ``probe_timeout``; a
+  caller that claimed the probe but never made the call hands it back with
+  ``cancel_probe()``.
+
+State lives in a pluggable store selected by ``GEMINI_BREAKER_BACKEND``:
+- ``memory``: per-process
+- ``database``: one row per breaker in ``circuit_breaker_state``, updated with an
+  optimistic compare-and-set on its ``version`` column (default)
+- ``redis``: one JSON value per breaker, updated with WATCH/MULTI
+
+Like the rate limiter, the breaker fails open: if its store is unreachable,
+calls are allowed and a warning is logged.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, Optional
+
+from flask import has_app_context
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# (new state or None for "unchanged") given the current state
+Transition = Callable[[dict[str, Any]], Optional[dict[str, Any]]]
+
+
+def initial_state() -> dict[str, Any]:
+    """State of a breaker that has never failed."""
+    return {"state": CLOSED, "failures": 0, "opened_at": 0.0, "probe_until": 0.0}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit is open."""
+
+
+class BreakerStore:
+    """
+    Storage interface for breaker state.
+
+    ``update`` applies a transition atomically with respect to every other
+    process sharing the store and returns ``(state, changed)``.
+    """
+
+    name = "base"
+
+    def read(self, name: str) -> dict[str, Any]:
+        """Return the current state (initial_state() for an unknown breaker)."""
+        raise NotImplementedError
+
+    def update(self, name: str, transition: Transition) -> tuple[dict[str, Any], bool]:
+        """Apply transition to the current state; None from it leaves the state alone."""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Forget all breaker state."""
+        raise NotImplementedError
+
+
+class MemoryStore(BreakerStore):
+    """Per-process breaker state."""
+
+    name = "memory"
+
+    def __init__(self):
+        self.states: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def read(self, name: str) -> dict[str, Any]:
+        with self._lock:
+            return dict(self.states.get(name) or initial_state())
+
+    def update(self, name: str, transition: Transition) -> tuple[dict[str, Any], bool]:
+        with self._lock:
+            current = self.states.get(name) or initial_state()
+            new = transition(dict(current))
+            if new is None:
+                return dict(current), False
+            self.states[name] = new
+            return dict(new), True
+
+    def reset(self) -> None:
+        with self._lock:
+            self.states.clear()
+
+
+class DatabaseStore(BreakerStore):
+    """
+    Breaker state in the ``circuit_breaker_state`` table.
+
+    Updates are ``UPDATE ... WHERE version = :read_version``; a writer that lost
+    the race re-reads and re-applies its transition. Outside an app context
+    (scripts, unit tests without the app) state is kept per process.
+    """
+
+    name = "database"
+
+    def __init__(self, max_attempts: int = 5):
+        self.max_attempts = max_attempts
+        self._local = MemoryStore()
+
+    def read(self, name: str) -> dict[str, Any]:
+        if not has_app_context():
+            return self._local.read(name)
+
+        from app.models import CircuitBreakerState, db
+
+        table = CircuitBreakerState.__table__
+        with db.engine.connect() as connection:
+            row = connection.execute(table.select().where(table.c.name == name)).first()
+        return self._row_state(row)
+
+    def update(self, name: str, transition: Transition) -> tuple[dict[str, Any], bool]:
+        if not has_app_context():
+            return self._local.update(name, transition)
+
+        from app.models import CircuitBreakerState, db
+
+        table = CircuitBreakerState.__table__
+        for _attempt in range(self.max_attempts):
+            with db.engine.begin() as connection:
+                row = connection.execute(table.select().where(table.c.name == name)).first()
+                if row is None:
+                    # Create the row (unless another worker just did), then compare-and-set it
+                    connection.execute(
+                        self._insert()(table)
+                        .values(name=name, version=0, updated_at=time.time(), **initial_state())
+                        .on_conflict_do_nothing(index_elements=[table.c.name])
+                    )
+                    continue
+
+                current = self._row_state(row)
+                new = transition(dict(current))
+                if new is None:
+                    return current, False
+
+                values = {**new, "updated_at": time.time()}
+                result = connection.execute(
+                    table.update()
+                    .where(table.c.name == name, table.c.version == row.version)
+                    .values(version=row.version + 1, **values)
+                )
+                if result.rowcount == 1:
+                    return new, True
+
+        raise RuntimeError(f"Circuit breaker '{name}' update kept conflicting")
+
+    def reset(self) -> None:
+        self._local.reset()
+        if not has_app_context():
+            return
+
+        from app.models import CircuitBreakerState, db
+
+        with db.engine.begin() as connection:
+            connection.execute(CircuitBreakerState.__table__.delete())
+
+    def _insert(self):
+        from app.models import db
+
+        dialect = db.engine.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise NotImplementedError(f"Database circuit breaker is not supported on {dialect}")
+        return insert
+
+    @staticmethod
+    def _row_state(row) -> dict[str, Any]:
+        if row is None:
+            return initial_state()
+        return {
+            "state": row.state,
+            "failures": row.failures,
+            "opened_at": row.opened_at,
+            "probe_until": row.probe_until,
+        }
+
+
+class RedisStore(BreakerStore):
+    """Breaker state as one JSON value per breaker, updated with WATCH/MULTI."""
+
+    name = "redis"
+
+    def __init__(
+        self, url: Optional[str] = None, client=None, prefix: str = "focusedroom:breaker:"
+    ):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(
+                url or "redis://localhost:6379/0", socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+        self.client = client
+        self.prefix = prefix
+
+    def read(self, name: str) -> dict[str, Any]:
+        stored = self.client.get(self.prefix + name)
+        return json.loads(stored) if stored else initial_state()
+
+    def update(self, name: str, transition: Transition) -> tuple[dict[str, Any], bool]:
+        from redis.exceptions import WatchError
+
+        redis_key = self.prefix + name
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(redis_key)
+                    stored = pipe.get(redis_key)
+                    current = json.loads(stored) if stored else initial_state()
+                    new = transition(dict(current))
+                    if new is None:
+                        pipe.unwatch()
+                        return current, False
+                    pipe.multi()
+                    pipe.set(redis_key, json.dumps(new))
+                    pipe.execute()
+                    return new, True
+                except WatchError:
+                    continue
+
+    def reset(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def create_store(name: str, redis_url: Optional[str] = None) -> BreakerStore:
+    """
+    Build the store named by GEMINI_BREAKER_BACKEND.
+
+    Falls back to the in-memory store (with an error log) if the name is
+    unknown or the redis library is missing.
+    """
+    name = (name or "memory").lower()
+    if name == "database":
+        return DatabaseStore()
+    if name == "redis":
+        try:
+            return RedisStore(url=redis_url)
+        except ImportError:
+            logger.error("redis library not installed. Install with: pip install redis")
+            return MemoryStore()
+    if name != "memory":
+        logger.error(f"Unknown circuit breaker backend '{name}', using in-memory state")
+    return MemoryStore()
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker over a (possibly shared) store.
+
+    Usage::
+
+        if not breaker.allow():
+            raise CircuitOpenError(...)
+        try:
+            result = call()
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+    """
+
+    def __init__(
+        self,
+        name: str,
+        store: Optional[BreakerStore] = None,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        probe_timeout: float = 120.0,
+    ):
+        self.name = name
+        self.store = store or MemoryStore()
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+
+        # probe_until of the half-open probe the calling thread's last allow() claimed
+        self._claimed = threading.local()
+
+        # Per-process counters for get_stats()
+        self.rejected = 0
+        self.opened = 0
+        self.store_errors = 0
+
+    # ------------------------------------------------------------------
+    # Gate
+    # ------------------------------------------------------------------
+
+    def allow(self) -> bool:
+        """Return True if a call may be made now (claims the probe when half-open)."""
+        now = time.time()
+        self._claimed.probe_until = None
+        try:
+            state = self.store.read(self.name)
+            if state["state"] == CLOSED:
+                return True
+            if not self._probe_due(state, now):
+                self.rejected += 1
+                return False
+
+            def claim_probe(current: dict[str, Any]) -> Optional[dict[str, Any]]:
+                if current["state"] == CLOSED or not self._probe_due(current, now):
+                    return None
+                return {**current, "state": HALF_OPEN, "probe_until": now + self.probe_timeout}
+
+            state, claimed = self.store.update(self.name, claim_probe)
+        except Exception as e:
+            self._store_error(e)
+            return True
+
+        if claimed:
+            logger.info(f"Circuit '{self.name}' half-open: sending a probe")
+            self._claimed.probe_until = state["probe_until"]
+            return True
+        if state["state"] == CLOSED:
+            return True
+        self.rejected += 1
+        return False
+
+    def _probe_due(self, state: dict[str, Any], now: float) -> bool:
+        if state["state"] == OPEN:
+            return now >= state["opened_at"] + self.cooldown
+        return now >= state["probe_until"]
+
+    # ------------------------------------------------------------------
+    # Outcomes
+    # ------------------------------------------------------------------
+
+    def cancel_probe(self) -> None:
+        """
+        Hand back the probe claimed by this thread's last allow() without an outcome,
+        because the call was never made (e.g. no API limiter slot); the next caller
+        may probe right away. A no-op if no probe was claimed or it was replaced.
+        """
+        probe_until = getattr(self._claimed, "probe_until", None)
+        self._claimed.probe_until = None
+        if probe_until is None:
+            return
+
+        def cancel(current: dict[str, Any]) -> Optional[dict[str, Any]]:
+            if current["state"] != HALF_OPEN or current["probe_until"] != probe_until:
+                return None
+            return {**current, "probe_until": 0.0}
+
+        try:
+            self.store.update(self.name, cancel)
+        except Exception as e:
+            self._store_error(e)
+
+    def record_success(self) -> None:
+        """Close the circuit and reset the consecutive failure count."""
+
+        def close(current: dict[str, Any]) -> Optional[dict[str, Any]]:
+            if current["state"] == CLOSED and current["failures"] == 0:
+                return None
+            return initial_state()
+
+        try:
+            state = self.store.read(self.name)
+            if state["state"] == CLOSED and state["failures"] == 0:
+                return
+            _state, changed = self.store.update(self.name, close)
+        except Exception as e:
+            self._store_error(e)
+            return
+        if changed and state["state"] != CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+
+    def record_failure(self) -> None:
+        """Count a failure; open the circuit at the threshold or after a failed probe."""
+        now = time.time()
+
+        def fail(current: dict[str, Any]) -> Optional[dict[str, Any]]:
+            if current["state"] == OPEN:
+                return None  # A call that started before the circuit opened
+            failures = current["failures"] + 1
+            if current["state"] == HALF_OPEN or failures >= self.failure_threshold:
+                return {"state": OPEN, "failures": failures, "opened_at": now, "probe_until": 0.0}
+            return {**current, "failures": failures}
+
+        try:
+            state, changed = self.store.update(self.name, fail)
+        except Exception as e:
+            self._store_error(e)
+            return
+        if changed and state["state"] == OPEN:
+            self.opened += 1
+            logger.warning(
+                f"Circuit '{self.name}' open after {state['failures']} consecutive failures; "
+                f"next probe in {self.cooldown:.0f}s"
+            )
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def state(self) -> str:
+        """Current state name ('closed', 'open' or 'half_open'); 'unknown' if unreadable."""
+        try:
+            return self.store.read(self.name)["state"]
+        except Exception as e:
+            self._store_error(e)
+            return "unknown"
+
+    def get_stats(self) -> dict:
+        """State plus this process's counters."""
+        return {
+            "state": self.state(),
+            "backend": self.store.name,
+            "failure_threshold": self.failure_threshold,
+            "cooldown": self.cooldown,
+            "rejected": self.rejected,
+            "opened": self.opened,
+            "store_errors": self.store_errors,
+        }
+
+    def _store_error(self, error: Exception) -> None:
+        self.store_errors += 1
+        logger.warning(f"Circuit breaker store unavailable, allowing call: {error}")
@@ -5,9 +5,13 @@ This module provides email functionality for newsletter subscriptions,
 confirmations, and other automated emails using SendGrid with fallback options.
 """
 
+import atexit
 import logging
 import os
-from typing import Any
+import threading
+from typing import Any, Optional
+
+from .smtp_pool import SMTPConnectionPool
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -30,6 +34,11 @@ class EmailService:
         self.mail_port = os.environ.get("MAIL_PORT")
         self.mail_username = os.environ.get("MAIL_USERNAME")
         self.mail_password = os.environ.get("MAIL_PASSWORD")
+        self.mail_use_tls = os.environ.get("MAIL_USE_TLS", "true").lower() == "true"
+
+        # Persistent SMTP connections, created on first SMTP send
+        self._smtp_pool: Optional[SMTPConnectionPool] = None
+        self._smtp_pool_lock = threading.Lock()
 
         # Primary sender with display name
         self.mail_sender = "Focused Room <founder@focusedroom.com>"
@@ -253,12 +262,32 @@ class EmailService:
             logger.error(f"SendGrid error: {str(e)}")
             return {"success": False, "error": str(e), "provider": "sendgrid"}
 
+    def _get_smtp_pool(self) -> SMTPConnectionPool:
+        """Create the shared SMTP connection pool on first use."""
+        with self._smtp_pool_lock:
+            if self._smtp_pool is None:
+                self._smtp_pool = SMTPConnectionPool(
+                    host=self.mail_server,
+                    port=int(self.mail_port),
+                    username=self.mail_username,
+                    password=self.mail_password,
+                    use_tls=self.mail_use_tls,
+                    max_size=int(os.environ.get("SMTP_POOL_SIZE", "4")),
+                    max_messages_per_connection=int(
+                        os.environ.get("SMTP_MAX_MESSAGES_PER_CONNECTION", "100")
+                    ),
+                    idle_check_after=float(os.environ.get("SMTP_IDLE_CHECK_AFTER", "30")),
+                    timeout=float(os.environ.get("SMTP_TIMEOUT", "30")),
+                )
+                # Say QUIT to the server instead of dropping sockets on shutdown
+                atexit.register(self._smtp_pool.close)
+            return self._smtp_pool
+
     def _send_via_smtp(
         self, to_email: str, subject: str, html_content: str, text_content: str, sender: str = None
     ) -> dict[str, Any]:
-        """Send email via SMTP."""
+        """Send email via SMTP over a pooled, persistent connection."""
         try:
-            import smtplib
             from email.mime.multipart import MIMEMultipart
             from email.mime.text import MIMEText
 
@@ -275,11 +304,8 @@ class EmailService:
             msg.attach(text_part)
             msg.attach(html_part)
 
-            # Send email
-            with smtplib.SMTP(self.mail_server, int(self.mail_port)) as server:
-                server.starttls()
-                server.login(self.mail_username, self.mail_password)
-                server.send_message(msg)
+            # Send email (reuses an open connection; reconnects if the server dropped it)
+            self._get_smtp_pool().send_message(msg)
 
             logger.info(f"Email sent via SMTP to {to_email}")
 
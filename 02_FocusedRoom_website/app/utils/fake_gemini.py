@@ -0,0 +1,154 @@
+"""
+Fake Gemini Module for Focused Room Website
+
+A local stand-in for ``google.generativeai.GenerativeModel`` so the report
+pipeline (caching, sections, breaker, limiter, streaming) can be load-tested
+without calling or paying for the real API. ``GeminiClient`` uses it instead
+of Gemini when ``GEMINI_FAKE_MODEL=true``.
+
+Behaviour is configured from the environment:
+- ``GEMINI_FAKE_LATENCY_MEDIAN`` / ``GEMINI_FAKE_LATENCY_SIGMA``: log-normal
+  latency per call (median seconds, sigma of the underlying normal)
+- ``GEMINI_FAKE_ERROR_RATE``: probability a call raises FakeGeminiError
+- ``GEMINI_FAKE_OUTPUT_TOKENS``: approximate response length (capped by the
+  call's ``max_output_tokens``)
+- ``GEMINI_FAKE_SEED``: seed for reproducible runs
+
+Streamed calls wait ``GEMINI_FAKE_FIRST_CHUNK_FRACTION`` of the sampled latency
+before the first chunk and spread the rest over the remaining chunks.
+"""
+
+import copy
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections.abc import Iterator
+from typing import Optional
+
+# Roughly 4 characters per token, as in gemini_client._estimate_tokens
+CHARS_PER_TOKEN = 4
+
+FILLER = (
+    "Your scores point to a consistent pattern in how you approach work, people and "
+    "change. Small, specific habits that fit this pattern will compound faster than "
+    "broad resolutions, so start with one routine and protect it for two weeks. "
+)
+
+
+class FakeGeminiError(Exception):
+    """Simulated API failure (what the real client raises on 429/500 responses)."""
+
+
+class FakeResponse:
+    """Response or stream chunk with the ``.text`` attribute GeminiClient reads."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    Drop-in for ``genai.GenerativeModel`` (only ``generate_content`` is used).
+
+    The response echoes the markdown section headers requested in the system
+    instruction and prompt, each followed by filler text, so splitting, splicing
+    and name extraction behave like they do with real reports.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "fake-gemini",
+        latency_median: float = 2.0,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        output_tokens: int = 1500,
+        first_chunk_fraction: float = 0.2,
+        chunk_chars: int = 200,
+        seed: Optional[int] = None,
+        system_instruction: Optional[str] = None,
+    ):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.output_tokens = output_tokens
+        self.first_chunk_fraction = first_chunk_fraction
+        self.chunk_chars = chunk_chars
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts = {"calls": 0, "errors": 0}
+
+    @classmethod
+    def from_env(cls, model_name: str = "fake-gemini") -> "FakeGenerativeModel":
+        """Build a fake model configured by the GEMINI_FAKE_* variables."""
+        seed = os.environ.get("GEMINI_FAKE_SEED")
+        return cls(
+            model_name=model_name,
+            latency_median=float(os.environ.get("GEMINI_FAKE_LATENCY_MEDIAN", "2.0")),
+            latency_sigma=float(os.environ.get("GEMINI_FAKE_LATENCY_SIGMA", "0.5")),
+            error_rate=float(os.environ.get("GEMINI_FAKE_ERROR_RATE", "0")),
+            output_tokens=int(os.environ.get("GEMINI_FAKE_OUTPUT_TOKENS", "1500")),
+            first_chunk_fraction=float(os.environ.get("GEMINI_FAKE_FIRST_CHUNK_FRACTION", "0.2")),
+            seed=int(seed) if seed else None,
+        )
+
+    def with_system_instruction(self, system_instruction: str) -> "FakeGenerativeModel":
+        """Same fake model (and call counters) with a system instruction attached."""
+        model = copy.copy(self)
+        model.system_instruction = system_instruction
+        return model
+
+    def generate_content(
+        self, prompt: str, generation_config: Optional[dict] = None, stream: bool = False
+    ):
+        """Sleep for a sampled latency, then return (or stream) a fake report."""
+        with self._lock:
+            self._counts["calls"] += 1
+            latency = self._random.lognormvariate(
+                math.log(max(self.latency_median, 1e-6)), self.latency_sigma
+            )
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self._counts["errors"] += 1
+
+        max_tokens = (generation_config or {}).get("max_output_tokens", self.output_tokens)
+        text = self._report(
+            f"{self.system_instruction or ''}\n{prompt}",
+            min(self.output_tokens, max_tokens) * CHARS_PER_TOKEN,
+        )
+        if stream:
+            return self._stream(text, latency, failed)
+
+        time.sleep(latency)
+        if failed:
+            raise FakeGeminiError("429 Resource has been exhausted (fake)")
+        return FakeResponse(text)
+
+    def _stream(self, text: str, latency: float, failed: bool) -> Iterator[FakeResponse]:
+        chunks = [text[i : i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        time.sleep(latency * self.first_chunk_fraction)
+        if failed:
+            raise FakeGeminiError("503 The model is overloaded (fake)")
+
+        interval = latency * (1 - self.first_chunk_fraction) / max(1, len(chunks) - 1)
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(interval)
+            yield FakeResponse(chunk)
+
+    @staticmethod
+    def _report(prompt: str, max_chars: int) -> str:
+        """Requested '## ' headers (or a generic one), each with an equal share of filler."""
+        headers = [line.strip() for line in re.findall(r"^## .+$", prompt, re.M)]
+        headers = list(dict.fromkeys(headers)) or ["## Your Personality Profile"]
+        share = max(len(FILLER), max_chars // len(headers))
+        body = (FILLER * (share // len(FILLER) + 1))[:share].strip()
+        return "\n\n".join(f"{header}\n\n{body}" for header in headers)
+
+    def get_stats(self) -> dict:
+        """Calls and simulated failures so far."""
+        return dict(self._counts)
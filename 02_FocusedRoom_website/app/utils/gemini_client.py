@@ -7,9 +7,23 @@ with graceful fallback to generic suggestions when the API is unavailable.
 
 import logging
 import os
+import random
+import re
+import threading
 import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
 from typing import Optional
 
+from .api_limiter import ApiLimiter, LimiterTimeoutError, create_limiter_store
+from .bigfive import TRAIT_LEVELS, TRAITS, get_trait_level
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, create_store
+from .fake_gemini import FakeGenerativeModel
+from .report_cache import ReportCache, build_cache_key, build_fragment_key
+from .single_flight import SingleFlight
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -26,259 +40,260 @@ except ImportError:
     GEMINI_AVAILABLE = False
     logger.warning("google-generativeai package not installed. Using fallback suggestions.")
 
-
-class GeminiClient:
+# Generation settings shared by the blocking and streaming calls
+GENERATION_CONFIG = {
+    "temperature": 0.9,  # Higher for more creative, human, personal tone
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": 8192,  # MAXIMUM for daily routine + 90-day plan + life domains
+}
+
+# Personal overlay around a pre-generated archetype report (see archetypes.py)
+OVERLAY_GENERATION_CONFIG = {**GENERATION_CONFIG, "max_output_tokens": 2048}
+
+# Sectioned mode: the report's ## sections are requested concurrently in these groups, in
+# report order. A ## block of the prompt belongs to the first group with a keyword in its
+# header (unmatched blocks join the previous block's group).
+REPORT_SECTIONS = [
+    {
+        "key": "introduction",
+        "keywords": ["QUOTE", "Personality Blueprint"],
+        "words": "80-120",
+        "max_output_tokens": 512,
+    },
+    {
+        "key": "traits",
+        "keywords": ["Trait Deep-Dive", "Superpowers", "Growth Edges", "Productivity System"],
+        "words": "800-1100",
+        "max_output_tokens": 3072,
+        "trait_only": True,
+    },
+    {
+        "key": "life_domains",
+        "keywords": ["Life Domain"],
+        "words": "800-1100",
+        "max_output_tokens": 3072,
+    },
+    {
+        "key": "daily_routine",
+        "keywords": ["Daily Routine"],
+        "words": "400-600",
+        "max_output_tokens": 2048,
+    },
+    {"key": "plan", "keywords": ["90-Day"], "words": "600-900", "max_output_tokens": 3072},
+    {
+        "key": "focused_room",
+        "keywords": ["Focused Room"],
+        "words": "150-250",
+        "max_output_tokens": 1024,
+        "trait_only": True,
+    },
+    {
+        "key": "final_insight",
+        "keywords": ["Final Insight"],
+        "words": "60-100",
+        "max_output_tokens": 512,
+    },
+]
+
+# Sections marked "trait_only" above read nothing but the trait levels, so with the fragment
+# cache on they are written from a levels-only prompt and shared by everyone with those levels
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+# Generic text for a section whose call failed (the traits section uses the full fallback)
+SECTION_FALLBACKS = {
+    "introduction": (
+        '"We are what we repeatedly do. Excellence, then, is not an act, but a habit."'
+        " — Will Durant"
+    ),
+    "life_domains": (
+        "Use the strengths above in each area of your life: pick one small, concrete step "
+        "for your work, relationships, health, finances and personal growth this week."
+    ),
+    "daily_routine": (
+        "- Protect your first 90 minutes for your most important task\n"
+        "- Take a real break at midday, away from screens\n"
+        "- End the day with a 5-minute review and tomorrow's top three priorities"
+    ),
+    "plan": (
+        "- **Month 1**: Build one daily focus habit and track it\n"
+        "- **Month 2**: Extend your focus sessions and remove your biggest distraction\n"
+        "- **Month 3**: Review what worked and set your next 90-day goal"
+    ),
+    "focused_room": (
+        "Start with 25-minute focus sessions with social media blocked, and use the streak "
+        "tracking to build a daily habit."
+    ),
+    "final_insight": (
+        "Small, consistent steps that fit your personality compound into real change. "
+        "Start with one today."
+    ),
+}
+
+
+def split_prompt_sections(prompt: str) -> tuple[str, list[str], str]:
     """
-    Gemini AI client for generating personalized personality suggestions.
+    Split a full report prompt into its shared parts and its ## output format blocks.
 
-    Supports:
-    - Gemini API (primary)
-    - Generic fallback suggestions (when API unavailable)
+    Returns:
+        (preamble, blocks, guidelines): everything before the first ## block, the ##
+        blocks in order (header line first), and everything from the critical
+        guidelines on
     """
-
-    def __init__(self):
-        """Initialize Gemini client with configuration from environment."""
-        self.api_key = os.environ.get("GEMINI_API_KEY")
-        self.model_name = "gemini-2.0-flash-exp"  # Updated for Gemini 2.5
-        self.model = None
-        self.provider = self._determine_provider()
-
-        if self.provider == "gemini":
-            self._initialize_gemini()
-
-        logger.info(f"Gemini client initialized with provider: {self.provider}")
-
-    def _determine_provider(self) -> str:
-        """Determine which provider to use based on available credentials."""
-        if not GEMINI_AVAILABLE:
-            return "fallback"
-        elif self.api_key and self.api_key.strip():
-            return "gemini"
+    format_end = prompt.find("\nCRITICAL GUIDELINES")
+    if format_end < 0:
+        format_end = len(prompt)
+    body, guidelines = prompt[:format_end], prompt[format_end:]
+
+    preamble, blocks = [], []
+    for line in body.split("\n"):
+        if line.startswith("## "):
+            blocks.append([line])
+        elif blocks:
+            blocks[-1].append(line)
         else:
-            return "fallback"
-
-    def _initialize_gemini(self) -> None:
-        """Initialize Gemini AI model with API key."""
-        try:
-            genai.configure(api_key=self.api_key)  # type: ignore
-            self.model = genai.GenerativeModel(self.model_name)  # type: ignore
-            logger.info(f"Gemini model '{self.model_name}' initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize Gemini model: {str(e)}")
-            self.provider = "fallback"
-            self.model = None
-
-    def generate_personality_suggestions(
-        self,
-        scores: dict[str, float],
-        percentiles: dict[str, float],
-        demographics: dict = None,
-        max_retries: int = 2,
-        timeout: int = 30,
-    ) -> str:
-        """
-        Generate personalized personality suggestions based on Big Five scores.
-
-        Args:
-            scores: Dictionary of Big Five trait scores (0-100)
-            percentiles: Dictionary of Big Five trait percentiles (0-100)
-            demographics: User demographic and life pillar data (optional)
-            max_retries: Maximum number of API retry attempts
-            timeout: API call timeout in seconds
-
-        Returns:
-            String containing personality suggestions
-        """
-        if demographics is None:
-            demographics = {}
-
-        if self.provider == "fallback":
-            logger.info("Using fallback suggestions (Gemini API not available)")
-            return self._generate_fallback_suggestions(scores, percentiles)
+            preamble.append(line)
+    return "\n".join(preamble), ["\n".join(block).strip() for block in blocks], guidelines
 
-        # Try Gemini API with retry logic
-        for attempt in range(max_retries):
-            try:
-                suggestions = self._call_gemini_api(scores, percentiles, demographics, timeout)
-                logger.info("Successfully generated suggestions using Gemini API")
-                return suggestions
-            except Exception as e:
-                logger.warning(f"Gemini API attempt {attempt + 1}/{max_retries} failed: {str(e)}")
-                if attempt < max_retries - 1:
-                    time.sleep(2**attempt)  # Exponential backoff: 1s, 2s, 4s
-                else:
-                    logger.error("All Gemini API attempts failed, using fallback")
-                    return self._generate_fallback_suggestions(scores, percentiles)
 
-    def _call_gemini_api(
-        self,
-        scores: dict[str, float],
-        percentiles: dict[str, float],
-        demographics: dict,
-        timeout: int,
-    ) -> str:
-        """
-        Call Gemini API to generate personality suggestions.
+def group_report_sections(blocks: list[str]) -> list[list[str]]:
+    """Assign ## blocks to the REPORT_SECTIONS groups (see REPORT_SECTIONS)."""
+    groups: list[list[str]] = [[] for _ in REPORT_SECTIONS]
+    current = 0
+    for block in blocks:
+        header = block.split("\n", 1)[0]
+        for index, section in enumerate(REPORT_SECTIONS):
+            if any(keyword in header for keyword in section["keywords"]):
+                current = index
+                break
+        groups[current].append(block)
+    return groups
 
-        Args:
-            scores: Big Five trait scores
-            percentiles: Big Five trait percentiles
-            demographics: User demographic and life pillar data
-            timeout: API timeout in seconds
 
-        Returns:
-            Generated suggestions string
+# Placeholder the overlay writes where the archetype base report is inserted
+ARCHETYPE_BASE_MARKER = "[[ARCHETYPE_REPORT]]"
 
-        Raises:
-            Exception: If API call fails
-        """
-        if not self.model:
-            raise Exception("Gemini model not initialized")
 
-        # Construct prompt for Gemini with demographics
-        prompt = self._build_gemini_prompt(scores, percentiles, demographics)
+def _splice_archetype_stream(chunks: Iterator[str], base_report: str) -> Iterator[str]:
+    """
+    Insert base_report at ARCHETYPE_BASE_MARKER in a stream of overlay chunks.
 
-        # Call Gemini API with maximum token limit for comprehensive report
-        response = self.model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.9,  # Higher for more creative, human, personal tone
-                "top_p": 0.95,
-                "top_k": 40,
-                "max_output_tokens": 8192,  # MAXIMUM for daily routine + 90-day plan + life domains
-            },
-        )
+    The marker may be split across chunks, so the tail of the text that could be the
+    start of a marker is held back until the next chunk. If the overlay never writes
+    the marker, the base report is appended at the end.
+    """
+    base = f"\n\n{base_report.strip()}\n\n"
+    keep = len(ARCHETYPE_BASE_MARKER) - 1
+    pending = ""
+    spliced = False
+    for text in chunks:
+        if spliced:
+            yield text
+            continue
+        pending += text
+        index = pending.find(ARCHETYPE_BASE_MARKER)
+        if index >= 0:
+            before, pending = pending[:index], pending[index + len(ARCHETYPE_BASE_MARKER) :]
+            spliced = True
+            if before:
+                yield before
+            yield base
+            if pending:
+                yield pending
+            pending = ""
+        elif len(pending) > keep:
+            yield pending[:-keep]
+            pending = pending[-keep:]
+    if pending:
+        yield pending
+    if not spliced:
+        yield base
+
+
+def _bind_app_context(func: Callable) -> Callable:
+    """
+    Wrap func to run in the caller's Flask app context (if there is one), so pool
+    threads see the same database-backed state (e.g. the circuit breaker).
+    """
+    from flask import current_app, has_app_context
 
-        # Extract and validate response
-        if not response or not response.text:
-            raise Exception("Empty response from Gemini API")
+    if not has_app_context():
+        return func
+    app = current_app._get_current_object()
 
-        return response.text.strip()
+    def run(*args, **kwargs):
+        with app.app_context():
+            return func(*args, **kwargs)
 
-    def _build_gemini_prompt(
-        self, scores: dict[str, float], percentiles: dict[str, float], demographics: dict = None
-    ) -> str:
-        """
-        Build a comprehensive, world-class prompt for Gemini API.
+    return run
 
-        Inspired by professional personality reports, this generates insights that are:
-        - Deeply personalized to the unique score combination
-        - Actionable across multiple life domains
-        - Grounded in psychological research
-        - Focused on productivity and personal growth
-        - Hyper-personalized with demographic and life pillar data
 
-        Args:
-            scores: Big Five trait scores (0-100 scale)
-            percentiles: Big Five trait percentiles (0-100 scale)
-            demographics: User demographic and life pillar satisfaction data
+class GeminiUnavailableError(Exception):
+    """Raised instead of returning fallback suggestions when the caller asked for that."""
 
-        Returns:
-            Formatted prompt string optimized for Gemini 2.0 Flash
-        """
-        if demographics is None:
-            demographics = {}
-        openness_score = scores.get("openness", 0)
-        conscientiousness_score = scores.get("conscientiousness", 0)
-        extraversion_score = scores.get("extraversion", 0)
-        agreeableness_score = scores.get("agreeableness", 0)
-        neuroticism_score = scores.get("neuroticism", 0)
 
-        openness_pct = percentiles.get("openness", 0)
-        conscientiousness_pct = percentiles.get("conscientiousness", 0)
-        extraversion_pct = percentiles.get("extraversion", 0)
-        agreeableness_pct = percentiles.get("agreeableness", 0)
-        neuroticism_pct = percentiles.get("neuroticism", 0)
+def splice_archetype_report(overlay: str, base_report: str) -> str:
+    """Full report: the overlay with base_report inserted at ARCHETYPE_BASE_MARKER."""
+    return "".join(_splice_archetype_stream(iter([overlay]), base_report)).strip()
 
-        # Extract demographics
-        name = demographics.get("name", "friend")
-        age = demographics.get("age", "your age")
-        career = demographics.get("career", "your field")
-        career_stage = demographics.get("careerStage", "your career stage")
-        primary_goal = demographics.get("primaryGoal", "personal growth")
 
-        # Extract life pillar satisfaction
-        life_pillars = demographics.get("lifePillars", {})
-        career_sat = life_pillars.get("career", "Not specified")
-        relationship_sat = life_pillars.get("relationships", "Not specified")
-        health_sat = life_pillars.get("health", "Not specified")
-        financial_sat = life_pillars.get("finances", "Not specified")
-        growth_sat = life_pillars.get("growth", "Not specified")
+# ------------------------------------------------------------------
+# Full report prompt: one static instruction plus a small per-user block
+# ------------------------------------------------------------------
 
-        # Determine trait levels for contextual analysis
-        def get_level(score):
-            if score >= 70:
-                return "Very High"
-            elif score >= 55:
-                return "High"
-            elif score >= 45:
-                return "Moderate"
-            elif score >= 30:
-                return "Low"
-            else:
-                return "Very Low"
-
-        prompt = f"""You are Dr. Sarah Chen, a world-renowned personality psychologist and productivity expert who has consulted for Fortune 500 companies, Olympic athletes, and leading entrepreneurs. You combine deep psychological insight with practical, evidence-based strategies. Your writing is warm, human, and deeply personal - like speaking directly to a friend.  # nosec B608
-
-PERSON YOU'RE ANALYZING:
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Name: {name}
-Age: {age}
-Career: {career} ({career_stage})
-Primary Goal: {primary_goal}
+# Matches the <placeholders> in REPORT_INSTRUCTION
+PLACEHOLDER_PATTERN = re.compile(r"<([a-z_]+)>")
+# Start of a placeholder at the end of a streamed chunk, possibly closed by the next one
+PARTIAL_PLACEHOLDER_PATTERN = re.compile(r"<[a-z_]*$")
 
-CURRENT LIFE SATISFACTION:
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-💼 Work/Studies: {career_sat}
-❤️ Relationships: {relationship_sat}
-🏥 Health: {health_sat}
-💰 Finances: {financial_sat}
-🌱 Personal Growth: {growth_sat}
+# Static part of the full report prompt. The person's data appears as <placeholders>: filled
+# in for self-contained prompts (sectioned mode), or left in place when the instruction is
+# registered once as the model's system instruction and only the profile is sent per request.
+REPORT_INSTRUCTION = """You are Dr. Sarah Chen, a world-renowned personality psychologist and productivity expert who has consulted for Fortune 500 companies, Olympic athletes, and leading entrepreneurs. You combine deep psychological insight with practical, evidence-based strategies. Your writing is warm, human, and deeply personal - like speaking directly to a friend.
 
-BIG FIVE PERSONALITY PROFILE:
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Openness to Experience: {openness_score:.1f}/100 ({get_level(openness_score)}) — {openness_pct:.0f}th percentile
-Conscientiousness: {conscientiousness_score:.1f}/100 ({get_level(conscientiousness_score)}) — {conscientiousness_pct:.0f}th percentile
-Extraversion: {extraversion_score:.1f}/100 ({get_level(extraversion_score)}) — {extraversion_pct:.0f}th percentile
-Agreeableness: {agreeableness_score:.1f}/100 ({get_level(agreeableness_score)}) — {agreeableness_pct:.0f}th percentile
-Emotional Stability: {100 - neuroticism_score:.1f}/100 ({get_level(100 - neuroticism_score)}) — {100 - neuroticism_pct:.0f}th percentile
+<profile>
 
 YOUR MISSION:
-Create a comprehensive, deeply personalized productivity and self-development analysis that will genuinely transform {name}'s life. This is NOT a generic report - you have their EXACT personality scores AND their current life satisfaction across all domains. Use this to create insights that feel like you've known them for years.
+Create a comprehensive, deeply personalized productivity and self-development analysis that will genuinely transform <name>'s life. This is NOT a generic report - you have their EXACT personality scores AND their current life satisfaction across all domains. Use this to create insights that feel like you've known them for years.
 
 CRITICAL REQUIREMENTS:
-1. Address {name} by name throughout (use "you" and "your" but sprinkle their name 3-5 times)
+1. Address <name> by name throughout (use "you" and "your" but sprinkle their name 3-5 times)
 2. Reference their SPECIFIC life pillar satisfaction (career, relationships, health, finances, growth)
 3. Connect personality traits to their ACTUAL current challenges
-4. Make every recommendation actionable for their {career_stage} in {career}
-5. Speak to their primary goal: {primary_goal}
+4. Make every recommendation actionable for their <career_stage> in <career>
+5. Speak to their primary goal: <primary_goal>
 6. Be deeply empathetic about struggles (e.g., if they hate their job, acknowledge the pain)
 7. Write like a $10,000 executive coaching session - transformative, not generic
 
 REQUIRED OUTPUT FORMAT (Use EXACT Markdown structure with ## and ### headers, ** for bold, - for lists):
 
 ## QUOTE
-[Select ONE profound quote (15-25 words) that perfectly captures {name}'s personality essence AND current life situation. Choose from philosophers, psychologists, authors, or thought leaders. Format: "Quote text" — Author Name]
+[Select ONE profound quote (15-25 words) that perfectly captures <name>'s personality essence AND current life situation. Choose from philosophers, psychologists, authors, or thought leaders. Format: "Quote text" — Author Name]
 
-## 🎯 {name}, Here's Your Unique Personality Blueprint
+## 🎯 <name>, Here's Your Unique Personality Blueprint
 
-[2-3 sentences that capture the ESSENCE of this specific combination AND their current life context. Reference at least ONE life pillar. Example: "You are a strategic visionary who operates at the intersection of creativity and discipline, which explains why you feel {career_sat} about your work - your personality craves both innovation and structure..." Make it profound and personally resonant.]
+[2-3 sentences that capture the ESSENCE of this specific combination AND their current life context. Reference at least ONE life pillar. Example: "You are a strategic visionary who operates at the intersection of creativity and discipline, which explains why you feel <career_satisfaction> about your work - your personality craves both innovation and structure..." Make it profound and personally resonant.]
 
 ## 📊 Your Trait Deep-Dive
 
-### Openness to Experience: {openness_score:.0f}/100
+### Openness to Experience: <openness>/100
 [Write 3-4 sentences in second person ("You...") about how THIS EXACT score manifests in their daily life. Be specific about HOW they think, what situations they thrive/struggle in, and what this means for their work style. Make it feel like you're reading their mind. Example: "You approach new ideas with measured curiosity - not a wild experimenter, but not rigid either. You appreciate creativity when it has purpose, which is why brainstorming sessions excite you when there's a clear goal, but frustrate you when they feel aimless. This balance means you're the person who can both generate innovative solutions AND ensure they actually get implemented."]
 
-### Conscientiousness: {conscientiousness_score:.0f}/100
+### Conscientiousness: <conscientiousness>/100
 [Same format - 3-4 personal sentences about organization, discipline, goal-setting behavior. Connect to real scenarios: "When you commit to something, you...", "Your workspace probably...", "You feel most productive when..."]
 
-### Extraversion: {extraversion_score:.0f}/100
+### Extraversion: <extraversion>/100
 [Same format - 3-4 personal sentences about energy, social needs, work environment preferences. Example: "You recharge through... You're at your best when... After a long social event, you..."]
 
-### Agreeableness: {agreeableness_score:.0f}/100
+### Agreeableness: <agreeableness>/100
 [Same format - 3-4 personal sentences about relationships, conflict style, empathy. Example: "In disagreements, you tend to... You value harmony, but... When someone asks for help, you..."]
 
-### Emotional Stability: {100 - neuroticism_score:.0f}/100
+### Emotional Stability: <emotional_stability>/100
 [Same format - 3-4 personal sentences about stress response, resilience, emotional patterns. Example: "Under pressure, you... Your emotional baseline is... When things go wrong, you..."]
 
 ## 💪 Your Natural Superpowers
@@ -303,22 +318,22 @@ REQUIRED OUTPUT FORMAT (Use EXACT Markdown structure with ## and ### headers, **
 ## 🌍 Your Life Domain Blueprint
 
 ### 💼 Career & Professional Growth
-**Current Status:** {career_sat}
+**Current Status:** <career_satisfaction>
 
 [CRITICAL: Start by acknowledging their current career satisfaction. If negative (hate/dislike), be deeply empathetic. If positive (love/like), celebrate it. Then provide 4-5 sentences about:
 - WHY their personality explains their current career feelings
 - Specific career moves aligned with their traits
-- Ideal roles/industries for {career} at {career_stage}
+- Ideal roles/industries for <career> at <career_stage>
 - Work environment preferences
-- Concrete next steps for their {primary_goal}]
+- Concrete next steps for their <primary_goal>]
 
 **Recommended Resources:**
-- **Book**: [Title by Author] - [Why perfect for {name}'s profile + career stage]
+- **Book**: [Title by Author] - [Why perfect for <name>'s profile + career stage]
 - **YouTube**: [Channel Name] - [Specific skills they'll gain]
 - **Action**: [One concrete action for THIS WEEK]
 
 ### ❤️ Relationships & Communication
-**Current Status:** {relationship_sat}
+**Current Status:** <relationship_satisfaction>
 
 [CRITICAL: Acknowledge their relationship satisfaction. Connect their personality traits to relationship patterns. 4-5 sentences about:
 - How their agreeableness + extraversion show up in relationships
@@ -333,7 +348,7 @@ REQUIRED OUTPUT FORMAT (Use EXACT Markdown structure with ## and ### headers, **
 - **Action**: [One concrete action for THIS WEEK]
 
 ### 🏥 Health & Stress Management
-**Current Status:** {health_sat}
+**Current Status:** <health_satisfaction>
 
 [CRITICAL: Acknowledge their health status with empathy. 4-5 sentences about:
 - How their emotional stability affects stress response
@@ -348,14 +363,14 @@ REQUIRED OUTPUT FORMAT (Use EXACT Markdown structure with ## and ### headers, **
 - **Action**: [One concrete action for THIS WEEK]
 
 ### 💰 Wealth & Financial Success
-**Current Status:** {financial_sat}
+**Current Status:** <financial_satisfaction>
 
 [CRITICAL: Acknowledge financial stress/comfort. 4-5 sentences about:
 - How conscientiousness affects money habits
 - Spending/saving patterns for their profile
 - Risk tolerance (openness + emotional stability)
 - Why they feel this way financially
-- Practical money moves for {career_stage}]
+- Practical money moves for <career_stage>]
 
 **Recommended Resources:**
 - **Book**: [Finance book for their situation]
@@ -363,7 +378,7 @@ REQUIRED OUTPUT FORMAT (Use EXACT Markdown structure with ## and ### headers, **
 - **Action**: [One concrete action for THIS WEEK]
 
 ### 🌱 Personal Growth & Learning
-**Current Status:** {growth_sat}
+**Current Status:** <growth_satisfaction>
 
 [CRITICAL: Acknowledge growth feelings. 4-5 sentences about:
 - How openness affects learning style
@@ -379,13 +394,13 @@ REQUIRED OUTPUT FORMAT (Use EXACT Markdown structure with ## and ### headers, **
 
 ## 📅 Your Personalized Daily Routine
 
-{name}, here's a daily routine scientifically designed for YOUR personality + life situation. This isn't generic advice - it's built specifically for your {conscientiousness_score:.0f}/100 conscientiousness, {openness_score:.0f}/100 openness, and {100 - neuroticism_score:.0f}/100 emotional stability.
+<name>, here's a daily routine scientifically designed for YOUR personality + life situation. This isn't generic advice - it's built specifically for your <conscientiousness>/100 conscientiousness, <openness>/100 openness, and <emotional_stability>/100 emotional stability.
 
 ### 🌅 Morning Routine (5:30 AM - 9:00 AM)
 [Based on their personality + life pillars, create a specific morning routine. Example:
-"**5:30 AM - Wake Up & Mindfulness** (10 min): Your {100 - neuroticism_score:.0f}/100 emotional stability means you handle early mornings well. Start with 10 deep breaths.
-**5:40 AM - Movement** (20 min): Given {health_sat}, [specific exercise recommendation]
-**6:00 AM - Deep Work Block** (90 min): Your peak focus time. Tackle your most important {primary_goal} task.
+"**5:30 AM - Wake Up & Mindfulness** (10 min): Your <emotional_stability>/100 emotional stability means you handle early mornings well. Start with 10 deep breaths.
+**5:40 AM - Movement** (20 min): Given <health_satisfaction>, [specific exercise recommendation]
+**6:00 AM - Deep Work Block** (90 min): Your peak focus time. Tackle your most important <primary_goal> task.
 **7:30 AM - Breakfast & Connection** (30 min): [Based on relationship_sat and extraversion]
 **8:00 AM - Commute/Transition** (30 min): [Based on career and career_stage]
 **8:30 AM - Work Begins**: [Specific strategy for their career situation]"]
@@ -399,50 +414,50 @@ REQUIRED OUTPUT FORMAT (Use EXACT Markdown structure with ## and ### headers, **
 ### 🌙 Night Routine (10:00 PM - 10:30 PM)
 [Wind-down ritual based on emotional stability + sleep needs]
 
-**KEY PRINCIPLES FOR {name}:**
+**KEY PRINCIPLES FOR <name>:**
 - [3-4 principles based on their Big Five scores and life satisfaction]
 - Example: "Your moderate conscientiousness (XX/100) means rigid routines will fail. Build in 20% flexibility."
 
 ## 🎯 90-Day Incremental Improvement Plan
 
-This is your roadmap from {career_sat}, {relationship_sat}, {health_sat}, {financial_sat}, and {growth_sat} to where you want to be. Small, daily actions compound into massive change.
+This is your roadmap from <career_satisfaction>, <relationship_satisfaction>, <health_satisfaction>, <financial_satisfaction>, and <growth_satisfaction> to where you want to be. Small, daily actions compound into massive change.
 
 ### Month 1: Stabilize & Build Foundation
 
-**💼 Career ({career_sat} → Better)**
+**💼 Career (<career_satisfaction> → Better)**
 - **Week 1**: [Specific micro-action based on their career and personality]
 - **Week 2**: [Next step building on Week 1]
 - **Week 3**: [Momentum builder]
 - **Week 4**: [Milestone checkpoint]
 - **Daily Habit**: [5-min daily action for their career stage]
 
-**❤️ Relationships ({relationship_sat} → Better)**
+**❤️ Relationships (<relationship_satisfaction> → Better)**
 - **Week 1**: [Based on agreeableness + extraversion]
 - **Week 2-4**: [Progressive actions]
 - **Daily Habit**: [Connection ritual for their personality]
 
-**🏥 Health ({health_sat} → Better)**
+**🏥 Health (<health_satisfaction> → Better)**
 - **Week 1**: [Based on emotional stability]
 - **Week 2-4**: [Progressive actions]
 - **Daily Habit**: [Health action for their stress level]
 
-**💰 Finances ({financial_sat} → Better)**
+**💰 Finances (<financial_satisfaction> → Better)**
 - **Week 1**: [Based on conscientiousness]
 - **Week 2-4**: [Progressive money actions]
 - **Daily Habit**: [5-min money management]
 
-**🌱 Growth ({growth_sat} → Better)**
+**🌱 Growth (<growth_satisfaction> → Better)**
 - **Week 1**: [Based on openness to experience]
 - **Week 2-4**: [Progressive learning]
 - **Daily Habit**: [Growth ritual]
 
 ### Month 2: Momentum & Optimization
-[For each pillar: intermediate challenges that build on Month 1 foundation. More specific to their {primary_goal}]
+[For each pillar: intermediate challenges that build on Month 1 foundation. More specific to their <primary_goal>]
 
 ### Month 3: Transformation & Integration
 [For each pillar: advanced actions that require the foundation from Months 1-2. Show how pillars interconnect.]
 
-**🎯 Success Metrics for {name}:**
+**🎯 Success Metrics for <name>:**
 [3-5 specific, measurable outcomes they should see in 90 days based on their starting point and personality]
 
 ## 🛠️ Focused Room: Your Personalized Setup
@@ -455,24 +470,24 @@ This is your roadmap from {career_sat}, {relationship_sat}, {health_sat}, {finan
 
 Example: "Your high conscientiousness means you'll love the streak tracking — set a goal of 5 focused sessions per week. Your moderate openness suggests you'll benefit from blocking social media but ALLOWING educational YouTube for learning breaks..."]
 
-## 💎 Final Insight for {name}
+## 💎 Final Insight for <name>
 
-[One profound, memorable takeaway that synthesizes EVERYTHING - their personality, current life situation, and transformation potential. Address {name} directly. Reference at least ONE life pillar. Make them feel DEEPLY SEEN and EMPOWERED. 3-4 sentences maximum. This should be the most powerful paragraph in the entire report.]
+[One profound, memorable takeaway that synthesizes EVERYTHING - their personality, current life situation, and transformation potential. Address <name> directly. Reference at least ONE life pillar. Make them feel DEEPLY SEEN and EMPOWERED. 3-4 sentences maximum. This should be the most powerful paragraph in the entire report.]
 
 CRITICAL GUIDELINES FOR THE ENTIRE REPORT:
-1. **USE THEIR NAME**: Address {name} by name 3-5 times throughout the report
+1. **USE THEIR NAME**: Address <name> by name 3-5 times throughout the report
 2. **REFERENCE LIFE PILLARS**: Explicitly mention their career, relationship, health, financial, and growth satisfaction
 3. **BE DEEPLY EMPATHETIC**: If they're struggling (hate job, isolated, burned out, stressed), acknowledge the PAIN first
 4. **CONNECT DOTS**: Show how personality traits EXPLAIN their current life satisfaction
 5. **Write like a human friend, not a robot**: Use contractions ("you're", "don't"), colloquial language
 6. **Analyze INTERACTIONS**: Never describe traits in isolation - show how they combine with life context
-7. **Be ULTRA-SPECIFIC**: Use exact scores, percentiles, time blocks, concrete examples for {career} at {career_stage}
+7. **Be ULTRA-SPECIFIC**: Use exact scores, percentiles, time blocks, concrete examples for <career> at <career_stage>
 8. **Sound like you're reading their mind**: "You probably...", "You might notice...", "When X happens, you tend to..."
 9. **Include REAL resources**: Actual book titles and YouTube channels that exist and match their profile
 10. **Balance warmth with honesty**: Affirm strengths genuinely, address weaknesses compassionately
 11. **Focus on PRODUCTIVITY**: This is for the Focused Room extension - tie everything to focus and work
-12. **Make it personal**: Reference {career}, {age}, {career_stage}, and their {primary_goal}
-13. **Use second person with name**: "You are...", "{name}, you...", never "they" or "one"
+12. **Make it personal**: Reference <career>, <age>, <career_stage>, and their <primary_goal>
+13. **Use second person with name**: "You are...", "<name>, you...", never "they" or "one"
 14. **$10,000 consultation quality**: Every sentence must provide unique, actionable value
 15. **NO GENERIC FLUFF**: Every insight must be traceable to their specific data
 
@@ -484,105 +499,1439 @@ TONE EXAMPLES:
 ✅ GOOD: "Try time-blocking your mornings in 90-minute chunks. Your conscientiousness loves the structure, but leave your afternoons loose — that's when your openness needs room to explore."
 
 ❌ BAD: "You may be experiencing career dissatisfaction."
-✅ GOOD: "{name}, the fact that you feel {career_sat} about your work makes complete sense given your {conscientiousness_score:.0f}/100 conscientiousness - you crave structure and achievement, and your current role isn't providing that."
+✅ GOOD: "<name>, the fact that you feel <career_satisfaction> about your work makes complete sense given your <conscientiousness>/100 conscientiousness - you crave structure and achievement, and your current role isn't providing that."
 
 Length: 2500-3500 words (with daily routine + 90-day plan). NO LENGTH LIMIT if needed to be comprehensive. Every section must be COMPLETE - don't cut short. Dense. Valuable. Transformative. Life-changing. This is a $10,000 executive coaching + therapy + productivity consultation."""
 
-        return prompt
+# Stands in for <profile> in the system instruction (the profile is in each user message)
+REPORT_PROFILE_LEGEND = """THE PERSON YOU'RE ANALYZING:
+Each message gives you one person's profile: name, age, career and career stage, primary goal, current life satisfaction (Work/Studies, Relationships, Health, Finances, Personal Growth) and Big Five scores with percentiles.
 
-    def _generate_fallback_suggestions(
-        self, scores: dict[str, float], percentiles: dict[str, float]
-    ) -> str:
-        """
-        Generate generic fallback suggestions when Gemini API is unavailable.
+Below, replace every placeholder with that person's value from the profile, and never write a placeholder into the report:
+- <name>, <age>, <career>, <career_stage>, <primary_goal>
+- <career_satisfaction>, <relationship_satisfaction>, <health_satisfaction>, <financial_satisfaction>, <growth_satisfaction>: their Work/Studies, Relationships, Health, Finances and Personal Growth satisfaction
+- <openness>, <conscientiousness>, <extraversion>, <agreeableness>, <emotional_stability>: their scores out of 100, as whole numbers"""
 
-        Args:
-            scores: Big Five trait scores
-            percentiles: Big Five trait percentiles
 
-        Returns:
-            Generic suggestions string
-        """
-        suggestions = []
+def fill_report_placeholders(template: str, values: dict[str, str]) -> str:
+    """Replace <placeholders> that have a value; others are left as they are."""
+    return PLACEHOLDER_PATTERN.sub(
+        lambda match: str(values.get(match.group(1), match.group(0))), template
+    )
 
-        # Header
-        suggestions.append("## Your Personality Profile\n")
-        suggestions.append(
-            "Here are some insights based on your Big Five personality assessment.\n"
-        )
 
-        # Trait-specific suggestions
-        trait_suggestions = {
-            "openness": {
-                "high": (
-                    "Your high openness suggests you enjoy creativity and new "
-                    "experiences. Try exploring diverse content and creative "
-                    "problem-solving."
-                ),
-                "low": (
-                    "Your preference for routine and practicality can help maintain "
-                    "consistent focus. Stick to structured work environments."
-                ),
-            },
-            "conscientiousness": {
-                "high": (
-                    "Your strong conscientiousness indicates excellent organization "
-                    "skills. Use detailed to-do lists and time-blocking techniques."
-                ),
-                "low": (
-                    "Consider using simple productivity tools to build better "
-                    "organizational habits gradually."
-                ),
-            },
-            "extraversion": {
-                "high": (
-                    "Your extraverted nature thrives on interaction. Balance social "
-                    "activities with focused work sessions."
-                ),
-                "low": (
-                    "Your introspective nature is great for deep work. Create quiet, "
-                    "distraction-free environments."
-                ),
-            },
-            "agreeableness": {
-                "high": (
-                    "Your cooperative nature makes you a great team player. Set clear "
-                    "boundaries to protect your focus time."
-                ),
-                "low": (
-                    "Your assertiveness helps maintain personal boundaries. Use this "
-                    "strength to protect your productivity time."
-                ),
-            },
-            "neuroticism": {
-                "high": (
-                    "Managing stress is important. Use the Focused Room extension to "
-                    "create calm, controlled work sessions."
-                ),
-                "low": (
-                    "Your emotional stability is an asset. Leverage it during "
-                    "high-pressure situations."
-                ),
-            },
-        }
+def _fill_report_stream(chunks: Iterator[str], values: dict[str, str]) -> Iterator[str]:
+    """
+    fill_report_placeholders over a stream of report chunks.
 
-        # Add personalized suggestions based on scores
-        suggestions.append("\n### Key Insights\n")
-        for trait, score in scores.items():
-            level = "high" if score > 60 else "low"
-            suggestion = trait_suggestions.get(trait, {}).get(
-                level, f"Your {trait} score is {score:.1f}"
-            )
-            suggestions.append(f"**{trait.capitalize()}**: {suggestion}\n")
+    A placeholder may be split across chunks, so a trailing "<..." that could still
+    become one is held back until the next chunk.
+    """
+    pending = ""
+    for text in chunks:
+        text = pending + text
+        partial = PARTIAL_PLACEHOLDER_PATTERN.search(text)
+        if partial:
+            text, pending = text[: partial.start()], text[partial.start() :]
+        else:
+            pending = ""
+        if text:
+            yield fill_report_placeholders(text, values)
+    if pending:
+        yield pending
 
-        # Generic productivity tips
-        suggestions.append("\n### Productivity Tips for Focused Room\n")
-        suggestions.append("- Set clear daily goals before starting work sessions\n")
-        suggestions.append("- Use website blocking to eliminate distractions\n")
-        suggestions.append("- Take regular breaks to maintain mental freshness\n")
-        suggestions.append("- Track your progress to stay motivated\n")
 
-        return "".join(suggestions)
+REPORT_SYSTEM_INSTRUCTION = fill_report_placeholders(
+    REPORT_INSTRUCTION, {"profile": REPORT_PROFILE_LEGEND}
+)
+SYSTEM_INSTRUCTION_TOKENS = _estimate_tokens(REPORT_SYSTEM_INSTRUCTION)
+
+
+class GeminiClient:
+    """
+    Gemini AI client for generating personalized personality suggestions.
+
+    Supports:
+    - Gemini API (primary)
+    - Fake local model for load tests (GEMINI_FAKE_MODEL, see fake_gemini.py)
+    - Generic fallback suggestions (when API unavailable)
+    """
+
+    def __init__(self):
+        """Initialize Gemini client with configuration from environment."""
+        self.api_key = os.environ.get("GEMINI_API_KEY")
+        self.model_name = "gemini-2.0-flash-exp"  # Updated for Gemini 2.5
+        self.model = None
+        self.provider = self._determine_provider()
+
+        # Content-addressed report cache (see report_cache.py)
+        self.cache_bucket = float(os.environ.get("REPORT_CACHE_BUCKET", "5"))
+        self.cache: Optional[ReportCache] = None
+        if os.environ.get("REPORT_CACHE_ENABLED", "true").lower() == "true":
+            self.cache = ReportCache(
+                ttl=int(os.environ.get("REPORT_CACHE_TTL", str(30 * 24 * 3600))),
+                max_entries=int(os.environ.get("REPORT_CACHE_MAX_ENTRIES", "256")),
+                max_bytes=int(os.environ.get("REPORT_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+            )
+
+        # Pre-generated archetype base reports + short personal overlay (see archetypes.py)
+        self.archetypes_enabled = (
+            os.environ.get("ARCHETYPE_REPORTS_ENABLED", "true").lower() == "true"
+        )
+        self.archetype_hits = 0
+        self.archetype_misses = 0
+        self.archetype_overlay_failures = 0
+
+        # Sectioned mode: report sections generated concurrently (see REPORT_SECTIONS)
+        self.sectioned = os.environ.get("REPORT_SECTIONS_PARALLEL", "false").lower() == "true"
+        self.section_timeout = float(os.environ.get("REPORT_SECTION_TIMEOUT", "60"))
+        self.section_workers = int(os.environ.get("REPORT_SECTION_WORKERS", "12"))
+        self._section_pool: Optional[ThreadPoolExecutor] = None
+        self._section_pool_lock = threading.Lock()
+        self.section_failures = 0
+
+        # Trait-only sections shared by everyone with the same trait levels
+        self.fragment_cache: Optional[ReportCache] = None
+        if self.sectioned and os.environ.get("REPORT_FRAGMENT_CACHE_ENABLED", "true").lower() == (
+            "true"
+        ):
+            self.fragment_cache = ReportCache(
+                ttl=int(os.environ.get("REPORT_CACHE_TTL", str(30 * 24 * 3600))),
+                max_entries=int(os.environ.get("REPORT_FRAGMENT_CACHE_MAX_ENTRIES", "2048")),
+            )
+        self.fragment_prompt_tokens_saved = 0
+        self.fragment_output_tokens_saved = 0
+
+        # Circuit breaker shared by all workers (see circuit_breaker.py); 0 disables it
+        self.breaker: Optional[CircuitBreaker] = None
+        failure_threshold = int(os.environ.get("GEMINI_BREAKER_FAILURE_THRESHOLD", "5"))
+        if failure_threshold > 0:
+            self.breaker = CircuitBreaker(
+                "gemini",
+                store=create_store(
+                    os.environ.get("GEMINI_BREAKER_BACKEND", "database"),
+                    os.environ.get("GEMINI_BREAKER_REDIS_URL", os.environ.get("REDIS_URL")),
+                ),
+                failure_threshold=failure_threshold,
+                cooldown=float(os.environ.get("GEMINI_BREAKER_COOLDOWN", "30")),
+                probe_timeout=float(os.environ.get("GEMINI_BREAKER_PROBE_TIMEOUT", "120")),
+            )
+
+        # Concurrency, requests/min and tokens/min budget shared by all workers (see
+        # api_limiter.py); calls queue for a slot until GEMINI_QUEUE_TIMEOUT
+        self.limiter = ApiLimiter(
+            "gemini",
+            store=create_limiter_store(
+                os.environ.get("GEMINI_LIMITER_BACKEND", "database"),
+                os.environ.get("GEMINI_LIMITER_REDIS_URL", os.environ.get("REDIS_URL")),
+            ),
+            max_concurrent=int(os.environ.get("GEMINI_MAX_CONCURRENT", "8")),
+            requests_per_minute=int(os.environ.get("GEMINI_REQUESTS_PER_MINUTE", "60")),
+            tokens_per_minute=int(os.environ.get("GEMINI_TOKENS_PER_MINUTE", "1000000")),
+            queue_timeout=float(os.environ.get("GEMINI_QUEUE_TIMEOUT", "10")),
+        )
+
+        # Identical concurrent reports (double clicks, client retries) share one generation,
+        # across workers through a lease row (see single_flight.py); "none" disables it
+        self.single_flight: Optional[SingleFlight] = None
+        single_flight_backend = os.environ.get("GEMINI_SINGLE_FLIGHT_BACKEND", "database")
+        if single_flight_backend != "none":
+            self.single_flight = SingleFlight(
+                "gemini_report",
+                shared=single_flight_backend == "database",
+                lease_ttl=float(os.environ.get("GEMINI_SINGLE_FLIGHT_LEASE_TTL", "180")),
+                result_ttl=float(os.environ.get("GEMINI_SINGLE_FLIGHT_RESULT_TTL", "30")),
+                wait_timeout=float(os.environ.get("GEMINI_SINGLE_FLIGHT_WAIT", "120")),
+            )
+
+        # Full reports: REPORT_SYSTEM_INSTRUCTION is registered once on a second model (as
+        # cached content with GEMINI_CONTEXT_CACHE_TTL) and each request sends only the profile
+        self.use_system_instruction = (
+            os.environ.get("GEMINI_SYSTEM_INSTRUCTION", "true").lower() == "true"
+        )
+        self.context_cache_ttl = int(os.environ.get("GEMINI_CONTEXT_CACHE_TTL", "0"))
+        self.report_model = None
+        self._context_cache = None
+        self._context_cache_expires = 0.0
+        self._report_model_lock = threading.Lock()
+
+        if self.provider == "gemini":
+            self._initialize_gemini()
+        elif self.provider == "fake":
+            self.model = FakeGenerativeModel.from_env(self.model_name)
+            if self.use_system_instruction:
+                self.report_model = self.model.with_system_instruction(REPORT_SYSTEM_INSTRUCTION)
+
+        logger.info(f"Gemini client initialized with provider: {self.provider}")
+
+    def _determine_provider(self) -> str:
+        """Determine which provider to use based on available credentials."""
+        if os.environ.get("GEMINI_FAKE_MODEL", "false").lower() == "true":
+            return "fake"
+        elif not GEMINI_AVAILABLE:
+            return "fallback"
+        elif self.api_key and self.api_key.strip():
+            return "gemini"
+        else:
+            return "fallback"
+
+    def _initialize_gemini(self) -> None:
+        """Initialize Gemini AI model with API key."""
+        try:
+            genai.configure(api_key=self.api_key)  # type: ignore
+            self.model = genai.GenerativeModel(self.model_name)  # type: ignore
+            if self.use_system_instruction:
+                self.report_model = self._create_report_model()
+            logger.info(f"Gemini model '{self.model_name}' initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize Gemini model: {str(e)}")
+            self.provider = "fallback"
+            self.model = None
+            self.report_model = None
+
+    def _create_report_model(self):
+        """
+        Model carrying REPORT_SYSTEM_INSTRUCTION.
+
+        With GEMINI_CONTEXT_CACHE_TTL set, the instruction is stored once as cached content
+        (billed at the cached-token rate per request); if that fails, e.g. below the model's
+        minimum cacheable size, it is sent as a plain system instruction.
+        """
+        if self.context_cache_ttl > 0:
+            try:
+                self._context_cache = genai.caching.CachedContent.create(  # type: ignore
+                    model=f"models/{self.model_name}",
+                    display_name="focusedroom-report-instruction",
+                    system_instruction=REPORT_SYSTEM_INSTRUCTION,
+                    ttl=timedelta(seconds=self.context_cache_ttl),
+                )
+                self._context_cache_expires = time.time() + self.context_cache_ttl
+                logger.info(
+                    f"Registered report instruction as cached content for {self.model_name}"
+                )
+                return genai.GenerativeModel.from_cached_content(  # type: ignore
+                    cached_content=self._context_cache
+                )
+            except Exception as e:
+                logger.warning(f"Context cache unavailable, using a system instruction: {str(e)}")
+                self._context_cache = None
+        return genai.GenerativeModel(  # type: ignore
+            self.model_name, system_instruction=REPORT_SYSTEM_INSTRUCTION
+        )
+
+    def _get_report_model(self):
+        """The system-instruction model, re-registering its cached content shortly before expiry."""
+        if self._context_cache is not None and time.time() > self._context_cache_expires - 60:
+            with self._report_model_lock:
+                if time.time() > self._context_cache_expires - 60:
+                    self.report_model = self._create_report_model()
+        return self.report_model
+
+    def generate_personality_suggestions(
+        self,
+        scores: dict[str, float],
+        percentiles: dict[str, float],
+        demographics: dict = None,
+        max_retries: int = 1,
+        timeout: int = 30,
+        raise_on_failure: bool = False,
+        on_progress: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        Generate personalized personality suggestions based on Big Five scores.
+
+        Failed calls are not retried in-process by default: retries belong to the
+        background job queue, which reschedules the job with jittered backoff (see
+        raise_on_failure). While the circuit breaker is open, no call is made at all.
+
+        With on_progress, the report is generated through the streaming API and
+        on_progress receives the text so far after every chunk (the background
+        worker publishes it for /big-five/stream). Callers sharing another caller's
+        generation (single-flight) only get the finished report.
+
+        Args:
+            scores: Dictionary of Big Five trait scores (0-100)
+            percentiles: Dictionary of Big Five trait percentiles (0-100)
+            demographics: User demographic and life pillar data (optional)
+            max_retries: Maximum number of API attempts (jittered backoff between them)
+            timeout: API call timeout in seconds
+            raise_on_failure: Raise GeminiUnavailableError instead of returning
+                fallback suggestions when Gemini fails or the circuit is open
+            on_progress: Called with the report text generated so far
+
+        Returns:
+            String containing personality suggestions
+
+        Raises:
+            GeminiUnavailableError: If raise_on_failure is set and no report was generated
+        """
+        if demographics is None:
+            demographics = {}
+
+        if self.provider == "fallback":
+            logger.info("Using fallback suggestions (Gemini API not available)")
+            return self._generate_fallback_suggestions(scores, percentiles)
+
+        # Serve repeat/near-identical submissions from the report cache
+        cache_key, cached = self._lookup_cache(scores, percentiles, demographics)
+        if cached is not None:
+            return cached
+
+        def generate() -> Optional[str]:
+            if on_progress is not None:
+                return self._stream_report(
+                    scores, percentiles, demographics, cache_key, on_progress
+                )
+            return self._generate_report(
+                scores, percentiles, demographics, cache_key, max_retries, timeout
+            )
+
+        if self.single_flight is None:
+            suggestions = generate()
+        else:
+            # Exact inputs (no bucketing): only true duplicates share a generation
+            flight_key = build_cache_key(scores, percentiles, demographics, bucket=0)
+            suggestions = self.single_flight.do(flight_key, generate)
+        if suggestions is not None:
+            return suggestions
+
+        return self._fallback_or_raise(scores, percentiles, raise_on_failure)
+
+    def _generate_report(
+        self,
+        scores: dict[str, float],
+        percentiles: dict[str, float],
+        demographics: dict,
+        cache_key: Optional[str],
+        max_retries: int,
+        timeout: int,
+    ) -> Optional[str]:
+        """
+        Generate a report (archetype overlay, sectioned or full).
+
+        Returns:
+            The report, or None if Gemini failed or the circuit is open
+        """
+        # Close to a pre-generated archetype: only the short personal overlay is generated
+        archetype = self._lookup_archetype(scores)
+        if archetype is not None:
+            return self._personalize_archetype(
+                scores, percentiles, demographics, archetype, cache_key
+            )
+
+        if self.sectioned:
+            return self._generate_sectioned_report(scores, percentiles, demographics, cache_key)
+        return self._generate_full_report(
+            scores, percentiles, demographics, cache_key, max_retries, timeout
+        )
+
+    def _generate_full_report(
+        self,
+        scores: dict[str, float],
+        percentiles: dict[str, float],
+        demographics: dict,
+        cache_key: Optional[str],
+        max_retries: int,
+        timeout: int,
+    ) -> Optional[str]:
+        """
+        Generate the full report in one Gemini call.
+
+        Returns:
+            The report, or None if every attempt failed or the circuit is open
+        """
+        for attempt in range(max_retries):
+            try:
+                suggestions = self._call_gemini_api(scores, percentiles, demographics, timeout)
+                logger.info("Successfully generated suggestions using Gemini API")
+                if cache_key is not None:
+                    self.cache.set(cache_key, suggestions)
+                return suggestions
+            except (CircuitOpenError, LimiterTimeoutError) as e:
+                logger.warning(f"Gemini call not attempted: {str(e)}")
+                return None
+            except Exception as e:
+                logger.warning(f"Gemini API attempt {attempt + 1}/{max_retries} failed: {str(e)}")
+                if attempt < max_retries - 1:
+                    # Full jitter so clients that failed together don't retry together
+                    time.sleep(random.uniform(0, 2**attempt))
+
+        logger.error("All Gemini API attempts failed")
+        return None
+
+    def _stream_report(
+        self,
+        scores: dict[str, float],
+        percentiles: dict[str, float],
+        demographics: dict,
+        cache_key: Optional[str],
+        on_progress: Callable[[str], None],
+    ) -> Optional[str]:
+        """
+        Generate a report through the streaming API, passing the text so far to on_progress.
+
+        Returns:
+            The report; None if the stream broke off after partial output (so a
+            truncated report is never stored), produced nothing, or failed with only
+            generic text to offer, so the caller can retry instead of storing it
+        """
+        stream, replacement, complete = self._open_report_stream(scores, percentiles, demographics)
+        text = ""
+        try:
+            for chunk in stream:
+                text += chunk
+                on_progress(text)
+        except Exception as e:
+            if text:
+                logger.error(f"Gemini stream failed after partial output: {str(e)}")
+                return None
+            logger.error(f"Gemini stream failed: {str(e)}")
+            return replacement()
+
+        report = text.strip()
+        if not report:
+            logger.error("Empty stream from Gemini API")
+            return None
+
+        logger.info("Successfully streamed suggestions using Gemini API")
+        if cache_key is not None and complete():
+            self.cache.set(cache_key, report)
+        return report
+
+    def stream_personality_suggestions(
+        self,
+        scores: dict[str, float],
+        percentiles: dict[str, float],
+        demographics: dict = None,
+        raise_on_failure: bool = False,
+    ) -> Iterator[str]:
+        """
+        Stream personality suggestions as markdown chunks while Gemini generates them.
+
+        Cache hits and fallback suggestions are yielded as a single chunk. If the
+        stream fails before any text arrives, the archetype base report or fallback
+        suggestions are yielded instead; a failure after partial output is re-raised
+        so callers don't persist a truncated report.
+
+        Args:
+            scores: Dictionary of Big Five trait scores (0-100)
+            percentiles: Dictionary of Big Five trait percentiles (0-100)
+            demographics: User demographic and life pillar data (optional)
+            raise_on_failure: Raise GeminiUnavailableError instead of yielding
+                fallback suggestions, so the caller can retry rather than store them
+
+        Yields:
+            Markdown text chunks; joined they form the full report
+
+        Raises:
+            GeminiUnavailableError: If raise_on_failure is set and no report was generated
+        """
+        if demographics is None:
+            demographics = {}
+
+        if self.provider == "fallback":
+            logger.info("Using fallback suggestions (Gemini API not available)")
+            yield self._generate_fallback_suggestions(scores, percentiles)
+            return
+
+        cache_key, cached = self._lookup_cache(scores, percentiles, demographics)
+        if cached is not None:
+            yield cached
+            return
+
+        stream, replacement, complete = self._open_report_stream(scores, percentiles, demographics)
+        chunks = []
+        try:
+            for text in stream:
+                chunks.append(text)
+                yield text
+        except Exception as e:
+            if chunks:
+                logger.error(f"Gemini stream failed after partial output: {str(e)}")
+                raise
+            logger.error(f"Gemini stream failed: {str(e)}")
+            report = replacement()
+            yield report or self._fallback_or_raise(scores, percentiles, raise_on_failure)
+            return
+
+        report = "".join(chunks).strip()
+        if not report:
+            logger.error("Empty stream from Gemini API")
+            yield self._fallback_or_raise(scores, percentiles, raise_on_failure)
+            return
+
+        logger.info("Successfully streamed suggestions using Gemini API")
+        if cache_key is not None and complete():
+            self.cache.set(cache_key, report)
+
+    def _fallback_or_raise(
+        self, scores: dict[str, float], percentiles: dict[str, float], raise_on_failure: bool
+    ) -> str:
+        """Fallback suggestions, or GeminiUnavailableError if the caller would rather retry."""
+        if raise_on_failure:
+            raise GeminiUnavailableError("Gemini report generation failed")
+        return self._generate_fallback_suggestions(scores, percentiles)
+
+    def _personalize_archetype(
+        self,
+        scores: dict[str, float],
+        percentiles: dict[str, float],
+        demographics: dict,
+        archetype: dict,
+        cache_key: Optional[str],
+    ) -> str:
+        """
+        Archetype base report with the personal overlay spliced in.
+
+        If the overlay call fails the base report is returned on its own (and not
+        cached): still a full personality report, just without the personal sections.
+        """
+        try:
+            overlay = self._call_gemini_overlay(scores, percentiles, demographics, archetype)
+        except Exception as e:
+            logger.warning(f"Archetype overlay failed, using base report: {str(e)}")
+            self.archetype_overlay_failures += 1
+            return archetype["report"]
+
+        suggestions = splice_archetype_report(overlay, archetype["report"])
+        logger.info("Successfully generated archetype overlay using Gemini API")
+        if cache_key is not None:
+            self.cache.set(cache_key, suggestions)
+        return suggestions
+
+    def _open_report_stream(
+        self, scores: dict[str, float], percentiles: dict[str, float], demographics: dict
+    ) -> tuple[Iterator[str], Callable[[], Optional[str]], Callable[[], bool]]:
+        """
+        Start streaming a report: an archetype overlay if one is close enough, else the
+        full report (in sections when sectioned mode is on).
+
+        Returns:
+            (chunks, replacement, complete); replacement() gives the report to serve
+            instead if the stream fails before any text arrives (None when only generic
+            fallback text is left, which callers treat as a failure), complete() tells
+            after the stream whether the report may be cached
+        """
+        archetype = self._lookup_archetype(scores)
+        if archetype is None:
+            if self.sectioned:
+                chunks, complete = self._stream_sectioned_report(scores, percentiles, demographics)
+                return chunks, lambda: None, complete
+            return (
+                self._stream_gemini_api(scores, percentiles, demographics),
+                lambda: None,
+                lambda: True,
+            )
+
+        def base_report() -> str:
+            self.archetype_overlay_failures += 1
+            return archetype["report"]
+
+        prompt = self._build_overlay_prompt(scores, percentiles, demographics, archetype)
+        chunks = self._stream_prompt(prompt, OVERLAY_GENERATION_CONFIG)
+        return _splice_archetype_stream(chunks, archetype["report"]), base_report, lambda: True
+
+    # ------------------------------------------------------------------
+    # Sectioned mode
+    # ------------------------------------------------------------------
+
+    def _generate_sectioned_report(
+        self,
+        scores: dict[str, float],
+        percentiles: dict[str, float],
+        demographics: dict,
+        cache_key: Optional[str],
+    ) -> Optional[str]:
+        """
+        Full report from concurrently generated sections, assembled in report order.
+
+        Reports with fallback sections are returned but not cached; None if every
+        section failed.
+        """
+        sections = list(self._iter_report_sections(scores, percentiles, demographics))
+        if not any(generated for _, generated in sections):
+            logger.error("All report sections failed")
+            return None
+
+        suggestions = "\n\n".join(text.strip() for text, _ in sections)
+        if all(generated for _, generated in sections):
+            logger.info("Successfully generated sectioned suggestions using Gemini API")
+            if cache_key is not None:
+                self.cache.set(cache_key, suggestions)
+        return suggestions
+
+    def _stream_sectioned_report(
+        self, scores: dict[str, float], percentiles: dict[str, float], demographics: dict
+    ) -> tuple[Iterator[str], Callable[[], bool]]:
+        """
+        Stream sections in report order as each one completes. If every section fell
+        back to generic text, GeminiUnavailableError is raised after the last one, like
+        any stream that breaks off, so the generic report is never stored as the result.
+
+        Returns:
+            (chunks, complete); complete() is True once every section was generated
+        """
+        generated: list[bool] = []
+
+        def chunks() -> Iterator[str]:
+            for text, ok in self._iter_report_sections(scores, percentiles, demographics):
+                yield f"\n\n{text.strip()}" if generated else text.strip()
+                generated.append(ok)
+            if not any(generated):
+                raise GeminiUnavailableError("All report sections failed")
+
+        return chunks(), lambda: bool(generated) and all(generated)
+
+    def _iter_report_sections(
+        self, scores: dict[str, float], percentiles: dict[str, float], demographics: dict
+    ) -> Iterator[tuple[str, bool]]:
+        """
+        Request all report sections concurrently and yield them in report order.
+
+        Sections are waited for until one shared REPORT_SECTION_TIMEOUT deadline, so the
+        wall-clock time is bounded by the slowest section. A section that failed or is
+        not ready by then is replaced by generic text.
+
+        Yields:
+            (markdown, generated) per section; generated is False for fallback text
+        """
+        sections = self._build_section_prompts(scores, percentiles, demographics)
+        pool = self._get_section_pool()
+        futures = [self._submit_section(pool, section) for section in sections]
+
+        deadline = time.monotonic() + self.section_timeout
+        for section, future in zip(sections, futures):
+            try:
+                text = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except Exception as e:
+                future.cancel()
+                self.section_failures += 1
+                logger.warning(f"Report section '{section['key']}' failed, using fallback: {e!r}")
+                yield self._section_fallback(section, scores, percentiles), False
+                continue
+            if section.get("fragment_key") and not section.get("cached"):
+                self.fragment_cache.set(section["fragment_key"], text)
+            yield text, True
+
+    def _submit_section(self, pool: ThreadPoolExecutor, section: dict) -> Future:
+        """Start generating a section, or resolve it from the fragment cache."""
+        if section.get("fragment_key"):
+            cached = self.fragment_cache.get(section["fragment_key"])
+            if cached is not None:
+                section["cached"] = True
+                self.fragment_prompt_tokens_saved += _estimate_tokens(section["prompt"])
+                self.fragment_output_tokens_saved += _estimate_tokens(cached)
+                future: Future = Future()
+                future.set_result(cached)
+                return future
+        return pool.submit(
+            _bind_app_context(self._generate_text), section["prompt"], section["generation_config"]
+        )
+
+    def _build_section_prompts(
+        self, scores: dict[str, float], percentiles: dict[str, float], demographics: dict
+    ) -> list[dict]:
+        """
+        Split the full report prompt into one smaller prompt per REPORT_SECTIONS group.
+
+        Each prompt keeps the shared context (person, scores, guidelines) but only the
+        output format of its own sections, with a matching length and token limit.
+        With the fragment cache on, trait-only sections get a levels-only prompt and a
+        fragment_key instead.
+
+        Returns:
+            [{"key", "header", "prompt", "generation_config", "fragment_key"}] in
+            report order
+        """
+        prompt = self._build_gemini_prompt(scores, percentiles, demographics)
+        preamble, blocks, guidelines = split_prompt_sections(prompt)
+        levels = {trait: get_trait_level(scores.get(trait, 0)) for trait in TRAITS}
+
+        sections = []
+        for spec, group in zip(REPORT_SECTIONS, group_report_sections(blocks)):
+            if not group:
+                continue
+            headers = [block.split("\n", 1)[0] for block in group]
+            section_format = "\n\n".join(group)
+            sections.append(
+                {
+                    "key": spec["key"],
+                    "header": headers[0],
+                    "prompt": f"""{preamble}
+{section_format}
+{guidelines}
+
+THIS REQUEST: Write ONLY the section(s) above ({", ".join(headers)}). The rest of the report is written separately, so don't add other sections, an introduction or a sign-off. Start directly with "{headers[0]}". Length: {spec["words"]} words for these sections (this replaces the overall report length above).""",
+                    "generation_config": {
+                        **GENERATION_CONFIG,
+                        "max_output_tokens": spec["max_output_tokens"],
+                    },
+                    "fragment_key": None,
+                }
+            )
+            if spec.get("trait_only") and self.fragment_cache is not None:
+                fragment_prompt = self._build_archetype_prompt(
+                    levels, sections=[spec["key"]], words=spec["words"]
+                )
+                sections[-1]["prompt"] = fragment_prompt
+                sections[-1]["fragment_key"] = build_fragment_key(
+                    spec["key"], tuple(levels.values()), fragment_prompt
+                )
+        return sections
+
+    def _section_fallback(
+        self, section: dict, scores: dict[str, float], percentiles: dict[str, float]
+    ) -> str:
+        """Generic text standing in for a failed section."""
+        if section["key"] not in SECTION_FALLBACKS:
+            return self._generate_fallback_suggestions(scores, percentiles)
+        return f"{section['header']}\n\n{SECTION_FALLBACKS[section['key']]}"
+
+    def _get_section_pool(self) -> ThreadPoolExecutor:
+        """Thread pool shared by all sectioned reports of this client (created on first use)."""
+        with self._section_pool_lock:
+            if self._section_pool is None:
+                self._section_pool = ThreadPoolExecutor(
+                    max_workers=self.section_workers, thread_name_prefix="report-section"
+                )
+            return self._section_pool
+
+    def _lookup_cache(
+        self, scores: dict[str, float], percentiles: dict[str, float], demographics: dict
+    ) -> tuple[Optional[str], Optional[str]]:
+        """
+        Look up a report in the cache.
+
+        Returns:
+            (cache_key, cached_report); cache_key is None when caching is disabled
+        """
+        if self.cache is None:
+            return None, None
+
+        cache_key = build_cache_key(scores, percentiles, demographics, self.cache_bucket)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.info("Served personality suggestions from report cache")
+        return cache_key, cached
+
+    def _lookup_archetype(self, scores: dict[str, float]) -> Optional[dict]:
+        """
+        Nearest pre-generated archetype report for scores.
+
+        Only available inside a Flask app context (the library lives in the database).
+
+        Returns:
+            ArchetypeLibrary.nearest() result, or None to generate a full report
+        """
+        if not self.archetypes_enabled:
+            return None
+
+        from flask import has_app_context
+
+        if not has_app_context():
+            return None
+
+        try:
+            from .archetypes import get_archetype_library
+
+            archetype = get_archetype_library().nearest(scores)
+        except Exception as e:
+            logger.warning(f"Archetype lookup failed: {str(e)}")
+            archetype = None
+
+        if archetype is None:
+            self.archetype_misses += 1
+        else:
+            self.archetype_hits += 1
+            logger.info(f"Using archetype report {archetype['key']}")
+        return archetype
+
+    def get_stats(self) -> dict:
+        """Operational counters for the admin stats endpoint."""
+        return {
+            "provider": self.provider,
+            "report_cache": self.cache.stats() if self.cache is not None else None,
+            "archetypes": {
+                "enabled": self.archetypes_enabled,
+                "hits": self.archetype_hits,
+                "misses": self.archetype_misses,
+                "overlay_failures": self.archetype_overlay_failures,
+            },
+            "sections": {
+                "enabled": self.sectioned,
+                "failures": self.section_failures,
+            },
+            "breaker": self.breaker.get_stats() if self.breaker is not None else None,
+            "limiter": self.limiter.get_stats(),
+            "fake_model": self.model.get_stats() if self.provider == "fake" else None,
+            "single_flight": (
+                self.single_flight.get_stats() if self.single_flight is not None else None
+            ),
+            "system_instruction": {
+                "enabled": self.report_model is not None,
+                "context_cache": self._context_cache is not None,
+                "tokens": SYSTEM_INSTRUCTION_TOKENS,
+            },
+            "fragments": (
+                {
+                    **self.fragment_cache.stats(),
+                    # Estimated tokens not sent/generated thanks to fragment cache hits
+                    "prompt_tokens_saved": self.fragment_prompt_tokens_saved,
+                    "output_tokens_saved": self.fragment_output_tokens_saved,
+                }
+                if self.fragment_cache is not None
+                else None
+            ),
+        }
+
+    def _call_gemini_api(
+        self,
+        scores: dict[str, float],
+        percentiles: dict[str, float],
+        demographics: dict,
+        timeout: int,
+    ) -> str:
+        """
+        Call Gemini API to generate personality suggestions.
+
+        Args:
+            scores: Big Five trait scores
+            percentiles: Big Five trait percentiles
+            demographics: User demographic and life pillar data
+            timeout: API timeout in seconds
+
+        Returns:
+            Generated suggestions string
+
+        Raises:
+            Exception: If API call fails
+        """
+        # Construct prompt for Gemini with demographics
+        prompt, system_instruction = self._build_report_prompt(scores, percentiles, demographics)
+
+        # Call Gemini API with maximum token limit for comprehensive report
+        report = self._generate_text(prompt, GENERATION_CONFIG, system_instruction)
+        return fill_report_placeholders(
+            report, self._output_values(scores, percentiles, demographics)
+        )
+
+    def _call_gemini_overlay(
+        self,
+        scores: dict[str, float],
+        percentiles: dict[str, float],
+        demographics: dict,
+        archetype: dict,
+    ) -> str:
+        """
+        Generate the personal overlay written around an archetype base report.
+
+        Raises:
+            Exception: If API call fails
+        """
+        prompt = self._build_overlay_prompt(scores, percentiles, demographics, archetype)
+        return self._generate_text(prompt, OVERLAY_GENERATION_CONFIG)
+
+    def generate_archetype_report(
+        self, levels: dict[str, str], centroid: Optional[dict] = None
+    ) -> Optional[str]:
+        """
+        Generate the shared base report of a trait-level archetype.
+
+        Used by archetypes.refresh_archetypes(); failures are logged and retried on the
+        next refresh rather than stored, so fallback text never becomes a base report.
+
+        Args:
+            levels: Trait -> verbal level (see archetypes.describe_archetype)
+            centroid: Mean {"scores", "percentiles"} of the archetype's members
+
+        Returns:
+            Markdown report, or None if Gemini is unavailable or the call failed
+        """
+        if self.provider == "fallback":
+            return None
+
+        try:
+            return self._generate_text(
+                self._build_archetype_prompt(levels, centroid or {}), GENERATION_CONFIG
+            )
+        except Exception as e:
+            logger.error(f"Archetype report generation failed: {str(e)}")
+            return None
+
+    def _generate_text(
+        self, prompt: str, generation_config: dict, system_instruction: bool = False
+    ) -> str:
+        """
+        Blocking Gemini call returning the stripped response text.
+
+        With system_instruction, the call goes to the model carrying
+        REPORT_SYSTEM_INSTRUCTION (see _build_report_prompt).
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open (no call is made)
+            LimiterTimeoutError: If no limiter slot was free before GEMINI_QUEUE_TIMEOUT
+            Exception: If the model is not initialized or the response is empty
+        """
+        if not self.model:
+            raise Exception("Gemini model not initialized")
+
+        model = self._get_report_model() if system_instruction else self.model
+        with self._guarded_call(prompt, generation_config, system_instruction) as call:
+            response = model.generate_content(prompt, generation_config=generation_config)
+
+            # Extract and validate response
+            if not response or not response.text:
+                raise Exception("Empty response from Gemini API")
+            call["output"] = response.text
+
+        return response.text.strip()
+
+    @contextmanager
+    def _guarded_call(
+        self, prompt: str, generation_config: dict, system_instruction: bool = False
+    ) -> Iterator[dict]:
+        """
+        Wrap one Gemini call: circuit breaker check, a slot from the shared limiter
+        (reserving prompt + max_output_tokens), then the outcome reported to the
+        breaker and the unused tokens refunded to the limiter. The system instruction
+        counts towards the prompt (cached tokens still count against the quota).
+        The breaker is checked first so an open circuit never spends limiter budget;
+        a half-open probe that gets no limiter slot is handed back unused.
+
+        Yields:
+            Dict whose "output" the caller sets to the generated text
+        """
+        if self.breaker is not None and not self.breaker.allow():
+            raise CircuitOpenError("Gemini circuit breaker is open")
+
+        prompt_tokens = _estimate_tokens(prompt)
+        if system_instruction:
+            prompt_tokens += SYSTEM_INSTRUCTION_TOKENS
+        try:
+            lease = self.limiter.acquire(
+                prompt_tokens + generation_config.get("max_output_tokens", 0)
+            )
+        except LimiterTimeoutError:
+            if self.breaker is not None:
+                self.breaker.cancel_probe()
+            raise
+        call = {"output": ""}
+        try:
+            yield call
+        except Exception:
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            raise
+        else:
+            if self.breaker is not None:
+                self.breaker.record_success()
+        finally:
+            self.limiter.release(
+                lease, used_tokens=prompt_tokens + _estimate_tokens(call["output"])
+            )
+
+    def _stream_gemini_api(
+        self,
+        scores: dict[str, float],
+        percentiles: dict[str, float],
+        demographics: dict,
+    ) -> Iterator[str]:
+        """
+        Call the Gemini streaming API and yield text chunks as they arrive.
+
+        Raises:
+            Exception: If the model is not initialized or the stream fails
+        """
+        prompt, system_instruction = self._build_report_prompt(scores, percentiles, demographics)
+        return _fill_report_stream(
+            self._stream_prompt(prompt, GENERATION_CONFIG, system_instruction),
+            self._output_values(scores, percentiles, demographics),
+        )
+
+    def _build_report_prompt(
+        self, scores: dict[str, float], percentiles: dict[str, float], demographics: dict
+    ) -> tuple[str, bool]:
+        """
+        Prompt for a full report.
+
+        Returns:
+            (prompt, system_instruction); system_instruction is True when the prompt is
+            only the per-user message for the model carrying REPORT_SYSTEM_INSTRUCTION
+        """
+        if self.report_model is None:
+            return self._build_gemini_prompt(scores, percentiles, demographics), False
+        return self._build_report_message(scores, percentiles, demographics), True
+
+    def _stream_prompt(
+        self, prompt: str, generation_config: dict, system_instruction: bool = False
+    ) -> Iterator[str]:
+        """Stream a prompt and yield text chunks as they arrive (see _generate_text)."""
+        if not self.model:
+            raise Exception("Gemini model not initialized")
+
+        model = self._get_report_model() if system_instruction else self.model
+        with self._guarded_call(prompt, generation_config, system_instruction) as call:
+            response = model.generate_content(
+                prompt, generation_config=generation_config, stream=True
+            )
+
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without text parts (e.g. safety metadata) raise on .text
+                    continue
+                if text:
+                    call["output"] += text
+                    yield text
+
+    def _build_gemini_prompt(
+        self, scores: dict[str, float], percentiles: dict[str, float], demographics: dict = None
+    ) -> str:
+        """
+        Build a comprehensive, world-class prompt for Gemini API.
+
+        Inspired by professional personality reports, this generates insights that are:
+        - Deeply personalized to the unique score combination
+        - Actionable across multiple life domains
+        - Grounded in psychological research
+        - Focused on productivity and personal growth
+        - Hyper-personalized with demographic and life pillar data
+
+        Args:
+            scores: Big Five trait scores (0-100 scale)
+            percentiles: Big Five trait percentiles (0-100 scale)
+            demographics: User demographic and life pillar satisfaction data
+
+        This is the self-contained prompt (REPORT_INSTRUCTION with every placeholder
+        filled), used where the instruction can't be sent separately: sectioned mode and
+        GEMINI_SYSTEM_INSTRUCTION=false. See _build_report_message otherwise.
+
+        Returns:
+            Formatted prompt string optimized for Gemini 2.0 Flash
+        """
+        return fill_report_placeholders(
+            REPORT_INSTRUCTION, self._report_values(scores, percentiles, demographics)
+        )
+
+    def _build_report_message(
+        self, scores: dict[str, float], percentiles: dict[str, float], demographics: dict = None
+    ) -> str:
+        """
+        Per-user part of the full report prompt, sent to the model that carries
+        REPORT_SYSTEM_INSTRUCTION (a few hundred tokens instead of the whole prompt).
+        """
+        values = self._report_values(scores, percentiles, demographics)
+        return (
+            f"{values['profile']}\n\n"
+            f"Write the complete report for {values['name']} now, following the output format "
+            "and guidelines in your instructions."
+        )
+
+    @classmethod
+    def _output_values(
+        cls, scores: dict[str, float], percentiles: dict[str, float], demographics: dict = None
+    ) -> dict[str, str]:
+        """
+        Values for placeholders the model copied from REPORT_SYSTEM_INSTRUCTION into its
+        report (e.g. a "## 🎯 <name>, Here's..." header) despite being told not to.
+        """
+        values = cls._report_values(scores, percentiles, demographics)
+        values.pop("profile")
+        return values
+
+    @staticmethod
+    def _report_values(
+        scores: dict[str, float], percentiles: dict[str, float], demographics: dict = None
+    ) -> dict[str, str]:
+        """Values for the REPORT_INSTRUCTION placeholders, including the profile block."""
+        if demographics is None:
+            demographics = {}
+        openness_score = scores.get("openness", 0)
+        conscientiousness_score = scores.get("conscientiousness", 0)
+        extraversion_score = scores.get("extraversion", 0)
+        agreeableness_score = scores.get("agreeableness", 0)
+        neuroticism_score = scores.get("neuroticism", 0)
+
+        openness_pct = percentiles.get("openness", 0)
+        conscientiousness_pct = percentiles.get("conscientiousness", 0)
+        extraversion_pct = percentiles.get("extraversion", 0)
+        agreeableness_pct = percentiles.get("agreeableness", 0)
+        neuroticism_pct = percentiles.get("neuroticism", 0)
+
+        # Extract demographics
+        name = demographics.get("name", "friend")
+        age = demographics.get("age", "your age")
+        career = demographics.get("career", "your field")
+        career_stage = demographics.get("careerStage", "your career stage")
+        primary_goal = demographics.get("primaryGoal", "personal growth")
+
+        # Extract life pillar satisfaction
+        life_pillars = demographics.get("lifePillars", {})
+        career_sat = life_pillars.get("career", "Not specified")
+        relationship_sat = life_pillars.get("relationships", "Not specified")
+        health_sat = life_pillars.get("health", "Not specified")
+        financial_sat = life_pillars.get("finances", "Not specified")
+        growth_sat = life_pillars.get("growth", "Not specified")
+
+        profile = f"""PERSON YOU'RE ANALYZING:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Name: {name}
+Age: {age}
+Career: {career} ({career_stage})
+Primary Goal: {primary_goal}
+
+CURRENT LIFE SATISFACTION:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+💼 Work/Studies: {career_sat}
+❤️ Relationships: {relationship_sat}
+🏥 Health: {health_sat}
+💰 Finances: {financial_sat}
+🌱 Personal Growth: {growth_sat}
+
+BIG FIVE PERSONALITY PROFILE:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Openness to Experience: {openness_score:.1f}/100 ({get_trait_level(openness_score)}) — {openness_pct:.0f}th percentile
+Conscientiousness: {conscientiousness_score:.1f}/100 ({get_trait_level(conscientiousness_score)}) — {conscientiousness_pct:.0f}th percentile
+Extraversion: {extraversion_score:.1f}/100 ({get_trait_level(extraversion_score)}) — {extraversion_pct:.0f}th percentile
+Agreeableness: {agreeableness_score:.1f}/100 ({get_trait_level(agreeableness_score)}) — {agreeableness_pct:.0f}th percentile
+Emotional Stability: {100 - neuroticism_score:.1f}/100 ({get_trait_level(100 - neuroticism_score)}) — {100 - neuroticism_pct:.0f}th percentile"""
+
+        return {
+            "profile": profile,
+            "name": name,
+            "age": age,
+            "career": career,
+            "career_stage": career_stage,
+            "primary_goal": primary_goal,
+            "career_satisfaction": career_sat,
+            "relationship_satisfaction": relationship_sat,
+            "health_satisfaction": health_sat,
+            "financial_satisfaction": financial_sat,
+            "growth_satisfaction": growth_sat,
+            "openness": f"{openness_score:.0f}",
+            "conscientiousness": f"{conscientiousness_score:.0f}",
+            "extraversion": f"{extraversion_score:.0f}",
+            "agreeableness": f"{agreeableness_score:.0f}",
+            "emotional_stability": f"{100 - neuroticism_score:.0f}",
+        }
+
+    def _build_archetype_prompt(
+        self,
+        levels: dict[str, str],
+        centroid: Optional[dict] = None,
+        sections: Optional[list[str]] = None,
+        words: str = "1200-1800",
+    ) -> str:
+        """
+        Build a levels-only prompt for the personality-only sections of the report.
+
+        Only trait levels are given, never a person's scores or demographics, so the
+        text can be reused for everyone with the same levels: as an archetype's base
+        report (all sections; the overlay adds the rest) or as a cached fragment.
+
+        Args:
+            levels: Trait -> verbal level ("Very Low" to "Very High")
+            centroid: Mean {"scores", "percentiles"} of the archetype's members
+            sections: REPORT_SECTIONS keys to write (default: all trait-only sections)
+            words: Target length
+
+        Returns:
+            Formatted prompt string
+        """
+        # Reports show Emotional Stability, the inverse of neuroticism
+        neuroticism_level = levels.get("neuroticism", "Moderate")
+        stability_level = TRAIT_LEVELS[
+            len(TRAIT_LEVELS) - 1 - TRAIT_LEVELS.index(neuroticism_level)
+        ]
+        members = ", ".join(
+            f"{trait} {score:.0f}/100"
+            for trait, score in (centroid or {}).get("scores", {}).items()
+        )
+
+        prompt = f"""You are Dr. Sarah Chen, a world-renowned personality psychologist and productivity expert. Your writing is warm, human, and speaks directly to the reader in second person ("you").
+
+You are writing the shared core of a personality report for EVERYONE with this Big Five profile. Another writer adds a personal introduction, quote and life-domain advice around your text, so do NOT use a name, age, career, goals or life satisfaction, and do NOT invent any.
+
+BIG FIVE PROFILE (levels):
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Openness to Experience: {levels.get("openness", "Moderate")}
+Conscientiousness: {levels.get("conscientiousness", "Moderate")}
+Extraversion: {levels.get("extraversion", "Moderate")}
+Agreeableness: {levels.get("agreeableness", "Moderate")}
+Emotional Stability: {stability_level}
+{f"(Typical scores in this group: {members})" if members else ""}
+
+REQUIRED OUTPUT FORMAT (Use EXACT Markdown structure with ## and ### headers, ** for bold, - for lists). Start directly with the first header:
+
+## 📊 Your Trait Deep-Dive
+
+### Openness to Experience: {levels.get("openness", "Moderate")}
+[3-4 sentences in second person about how this level shows up in daily life and work style]
+
+### Conscientiousness: {levels.get("conscientiousness", "Moderate")}
+[Same format]
+
+### Extraversion: {levels.get("extraversion", "Moderate")}
+[Same format]
+
+### Agreeableness: {levels.get("agreeableness", "Moderate")}
+[Same format]
+
+### Emotional Stability: {stability_level}
+[Same format - stress response, resilience, emotional patterns]
+
+## 💪 Your Natural Superpowers
+
+[3-4 concrete strengths that emerge from THIS combination of levels]
+
+## ⚠️ Your Growth Edges
+
+[2-3 challenges unique to this combination, framed as opportunities, with triggers and early warning signs]
+
+## 🚀 Productivity System Designed for YOUR Brain
+
+### Deep Work & Focus
+[Specific focus strategies: time blocks, environment setup]
+
+### Energy Management
+[Energy sources/drains and optimal daily rhythm]
+
+### Task Management
+[Specific productivity tools/methods]
+
+## 🛠️ Focused Room: Your Personalized Setup
+
+[3-4 specific recommendations for using the Focused Room Chrome extension: blocking categories, deep work session length, friction override vs hard blocks, gamification features]
+
+CRITICAL GUIDELINES:
+1. Analyze how the traits COMBINE - never describe them in isolation
+2. Write like a human friend: contractions, colloquial language, "You probably...", "When X happens, you tend to..."
+3. No exact scores or percentiles; describe levels in words
+4. Length: {words} words. Every section must be COMPLETE."""
+
+        if sections is None:
+            return prompt
+        preamble, blocks, guidelines = split_prompt_sections(prompt)
+        selected = [
+            block
+            for spec, group in zip(REPORT_SECTIONS, group_report_sections(blocks))
+            if spec["key"] in sections
+            for block in group
+        ]
+        return f"{preamble}\n" + "\n\n".join(selected) + f"\n{guidelines}"
+
+    def _build_overlay_prompt(
+        self,
+        scores: dict[str, float],
+        percentiles: dict[str, float],
+        demographics: dict,
+        archetype: dict,
+    ) -> str:
+        """
+        Build the short prompt for the personal sections around an archetype report.
+
+        The overlay writes the quote and introduction, then ARCHETYPE_BASE_MARKER
+        (replaced by the base report), then life-domain advice and the final insight.
+        The introduction header is kept identical to the full report so names can
+        still be extracted from it.
+
+        Returns:
+            Formatted prompt string
+        """
+        name = demographics.get("name", "friend")
+        age = demographics.get("age", "your age")
+        career = demographics.get("career", "your field")
+        career_stage = demographics.get("careerStage", "your career stage")
+        primary_goal = demographics.get("primaryGoal", "personal growth")
+
+        life_pillars = demographics.get("lifePillars", {})
+        career_sat = life_pillars.get("career", "Not specified")
+        relationship_sat = life_pillars.get("relationships", "Not specified")
+        health_sat = life_pillars.get("health", "Not specified")
+        financial_sat = life_pillars.get("finances", "Not specified")
+        growth_sat = life_pillars.get("growth", "Not specified")
+
+        profile = "\n".join(
+            f"{label}: {score:.1f}/100 ({get_trait_level(score)}) — {pct:.0f}th percentile"
+            for label, score, pct in [
+                (
+                    "Openness to Experience",
+                    scores.get("openness", 0),
+                    percentiles.get("openness", 0),
+                ),
+                (
+                    "Conscientiousness",
+                    scores.get("conscientiousness", 0),
+                    percentiles.get("conscientiousness", 0),
+                ),
+                ("Extraversion", scores.get("extraversion", 0), percentiles.get("extraversion", 0)),
+                (
+                    "Agreeableness",
+                    scores.get("agreeableness", 0),
+                    percentiles.get("agreeableness", 0),
+                ),
+                (
+                    "Emotional Stability",
+                    100 - scores.get("neuroticism", 0),
+                    100 - percentiles.get("neuroticism", 0),
+                ),
+            ]
+        )
+
+        return f"""You are Dr. Sarah Chen, a world-renowned personality psychologist and productivity expert. Your writing is warm, human, and deeply personal - like speaking directly to a friend.
+
+A detailed trait analysis and productivity system for {name}'s personality archetype is already written. Write ONLY the personal sections around it.
+
+PERSON:
+Name: {name}
+Age: {age}
+Career: {career} ({career_stage})
+Primary Goal: {primary_goal}
+
+CURRENT LIFE SATISFACTION:
+💼 Work/Studies: {career_sat}
+❤️ Relationships: {relationship_sat}
+🏥 Health: {health_sat}
+💰 Finances: {financial_sat}
+🌱 Personal Growth: {growth_sat}
+
+BIG FIVE PERSONALITY PROFILE:
+{profile}
+
+REQUIRED OUTPUT FORMAT (EXACT Markdown, nothing before the first header):
+
+## QUOTE
+[ONE profound quote (15-25 words) that captures {name}'s personality AND current life situation. Format: "Quote text" — Author Name]
+
+## 🎯 {name}, Here's Your Unique Personality Blueprint
+
+[2-3 sentences capturing the essence of this profile AND their life context. Reference at least ONE life pillar.]
+
+{ARCHETYPE_BASE_MARKER}
+
+## 🌍 Your Life Domain Blueprint
+
+### 💼 Career & Professional Growth
+**Current Status:** {career_sat}
+[2-3 sentences: why their personality explains how they feel about work, and the best next step for {career} at {career_stage} toward {primary_goal}]
+- **Action**: [One concrete action for THIS WEEK]
+
+### ❤️ Relationships & Communication
+**Current Status:** {relationship_sat}
+[Same format]
+
+### 🏥 Health & Stress Management
+**Current Status:** {health_sat}
+[Same format]
+
+### 💰 Wealth & Financial Success
+**Current Status:** {financial_sat}
+[Same format]
+
+### 🌱 Personal Growth & Learning
+**Current Status:** {growth_sat}
+[Same format]
+
+## 💎 Final Insight for {name}
+
+[3-4 sentences that synthesize their personality, life situation and potential. Address {name} directly.]
+
+Write the line {ARCHETYPE_BASE_MARKER} exactly once, exactly where shown, on its own line. Be empathetic about struggles, use contractions, and keep it under 700 words."""
+
+    def _generate_fallback_suggestions(
+        self, scores: dict[str, float], percentiles: dict[str, float]
+    ) -> str:
+        """
+        Generate generic fallback suggestions when Gemini API is unavailable.
+
+        Args:
+            scores: Big Five trait scores
+            percentiles: Big Five trait percentiles
+
+        Returns:
+            Generic suggestions string
+        """
+        suggestions = []
+
+        # Header
+        suggestions.append("## Your Personality Profile\n")
+        suggestions.append(
+            "Here are some insights based on your Big Five personality assessment.\n"
+        )
+
+        # Trait-specific suggestions
+        trait_suggestions = {
+            "openness": {
+                "high": (
+                    "Your high openness suggests you enjoy creativity and new "
+                    "experiences. Try exploring diverse content and creative "
+                    "problem-solving."
+                ),
+                "low": (
+                    "Your preference for routine and practicality can help maintain "
+                    "consistent focus. Stick to structured work environments."
+                ),
+            },
+            "conscientiousness": {
+                "high": (
+                    "Your strong conscientiousness indicates excellent organization "
+                    "skills. Use detailed to-do lists and time-blocking techniques."
+                ),
+                "low": (
+                    "Consider using simple productivity tools to build better "
+                    "organizational habits gradually."
+                ),
+            },
+            "extraversion": {
+                "high": (
+                    "Your extraverted nature thrives on interaction. Balance social "
+                    "activities with focused work sessions."
+                ),
+                "low": (
+                    "Your introspective nature is great for deep work. Create quiet, "
+                    "distraction-free environments."
+                ),
+            },
+            "agreeableness": {
+                "high": (
+                    "Your cooperative nature makes you a great team player. Set clear "
+                    "boundaries to protect your focus time."
+                ),
+                "low": (
+                    "Your assertiveness helps maintain personal boundaries. Use this "
+                    "strength to protect your productivity time."
+                ),
+            },
+            "neuroticism": {
+                "high": (
+                    "Managing stress is important. Use the Focused Room extension to "
+                    "create calm, controlled work sessions."
+                ),
+                "low": (
+                    "Your emotional stability is an asset. Leverage it during "
+                    "high-pressure situations."
+                ),
+            },
+        }
+
+        # Add personalized suggestions based on scores
+        suggestions.append("\n### Key Insights\n")
+        for trait, score in scores.items():
+            level = "high" if score > 60 else "low"
+            suggestion = trait_suggestions.get(trait, {}).get(
+                level, f"Your {trait} score is {score:.1f}"
+            )
+            suggestions.append(f"**{trait.capitalize()}**: {suggestion}\n")
+
+        # Generic productivity tips
+        suggestions.append("\n### Productivity Tips for Focused Room\n")
+        suggestions.append("- Set clear daily goals before starting work sessions\n")
+        suggestions.append("- Use website blocking to eliminate distractions\n")
+        suggestions.append("- Take regular breaks to maintain mental freshness\n")
+        suggestions.append("- Track your progress to stay motivated\n")
+
+        return "".join(suggestions)
 
 
 # Singleton instance for reuse across requests
@@ -602,11 +1951,17 @@ def get_gemini_client() -> GeminiClient:
     return _gemini_client_instance
 
 
+def generate_fallback_suggestions(scores: dict[str, float], percentiles: dict[str, float]) -> str:
+    """Generic suggestions without calling Gemini (e.g. to answer before the AI report is ready)."""
+    return get_gemini_client()._generate_fallback_suggestions(scores, percentiles)
+
+
 def generate_personality_suggestions(
     scores: dict[str, float],
     percentiles: dict[str, float],
     demographics: dict = None,
     fallback: bool = True,
+    on_progress: Optional[Callable[[str], None]] = None,
 ) -> str:
     """
     Convenience function to generate personality suggestions.
@@ -615,10 +1970,18 @@ def generate_personality_suggestions(
         scores: Dictionary of Big Five trait scores (0-100)
         percentiles: Dictionary of Big Five trait percentiles (0-100)
         demographics: User demographic and life pillar data (optional)
-        fallback: Whether to use fallback if API fails (default: True)
+        fallback: Whether to use fallback if API fails (default: True); with False,
+            GeminiUnavailableError is raised so the caller can retry later
+        on_progress: Called with the report text generated so far (streams the report)
 
     Returns:
         String containing personality suggestions
     """
     client = get_gemini_client()
-    return client.generate_personality_suggestions(scores, percentiles, demographics or {})
+    return client.generate_personality_suggestions(
+        scores,
+        percentiles,
+        demographics or {},
+        raise_on_failure=not fallback,
+        on_progress=on_progress,
+    )
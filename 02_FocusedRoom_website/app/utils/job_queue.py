@@ -0,0 +1,248 @@
+"""
+Background Job Queue Module for Focused Room Website
+
+A small DB-backed job queue so slow work (Gemini calls, emails) runs in a
+separate ``python -m app.worker`` process instead of a gunicorn request thread.
+
+Claiming strategy:
+- PostgreSQL: ``SELECT ... FOR UPDATE SKIP LOCKED`` so concurrent workers never
+  block on (or double-claim) the same row
+- SQLite: process-local lock plus a compare-and-set ``UPDATE`` on the job status;
+  SQLite serializes writers, so only one worker's update can match the row
+
+A running job's ``locked_at`` is refreshed by its worker's heartbeat (see
+``heartbeat_job``); a job whose lock is older than ``lock_timeout`` belongs to a
+worker that died and is claimed again.
+"""
+
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import and_, or_
+
+from app.models import BackgroundJob, db
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Job lifecycle states
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Job kinds
+BIG_FIVE_REPORT_JOB = "big_five_report"
+
+# Serializes claims between threads of one process on backends without SKIP LOCKED
+_claim_lock = threading.Lock()
+
+# How many candidate rows to try per claim on the compare-and-set path
+_CLAIM_CANDIDATES = 10
+
+
+def enqueue_job(
+    kind: str, payload: Optional[dict[str, Any]] = None, result_id: Optional[int] = None
+) -> BackgroundJob:
+    """
+    Add a job to the current session.
+
+    The caller commits, so the job becomes visible to workers atomically with
+    whatever rows it refers to (e.g. the pending BigFiveResult).
+
+    Args:
+        kind: Job type (e.g. BIG_FIVE_REPORT_JOB)
+        payload: JSON-serializable job arguments
+        result_id: Optional BigFiveResult the job works on
+
+    Returns:
+        The new (uncommitted) BackgroundJob
+    """
+    now = datetime.utcnow()
+    job = BackgroundJob(
+        kind=kind,
+        result_id=result_id,
+        payload=payload or {},
+        status=JOB_PENDING,
+        attempts=0,
+        run_after=now,
+        created_at=now,
+        updated_at=now,
+    )
+    db.session.add(job)
+    return job
+
+
+def _claimable_filter(now: datetime, lock_timeout: int):
+    """Jobs that are due, plus running jobs whose lock was last refreshed before lock_timeout."""
+    stale_before = now - timedelta(seconds=lock_timeout)
+    return or_(
+        and_(BackgroundJob.status == JOB_PENDING, BackgroundJob.run_after <= now),
+        and_(BackgroundJob.status == JOB_RUNNING, BackgroundJob.locked_at < stale_before),
+    )
+
+
+def claim_next_job(worker_id: str, lock_timeout: int = 300) -> Optional[BackgroundJob]:
+    """
+    Atomically claim the oldest due job for this worker.
+
+    Args:
+        worker_id: Identifier stored on the job while it is running
+        lock_timeout: Seconds after which a running job is considered abandoned
+
+    Returns:
+        The claimed job (status 'running', attempts incremented) or None
+    """
+    now = datetime.utcnow()
+    claimable = _claimable_filter(now, lock_timeout)
+
+    if db.engine.dialect.name == "postgresql":
+        job = (
+            BackgroundJob.query.filter(claimable)
+            .order_by(BackgroundJob.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            db.session.rollback()
+            return None
+
+        job.status = JOB_RUNNING
+        job.locked_by = worker_id
+        job.locked_at = now
+        job.attempts = (job.attempts or 0) + 1
+        job.updated_at = now
+        db.session.commit()
+        return job
+
+    # Lock-based fallback (SQLite and other backends without SKIP LOCKED)
+    with _claim_lock:
+        candidate_ids = [
+            row.id
+            for row in db.session.query(BackgroundJob.id)
+            .filter(claimable)
+            .order_by(BackgroundJob.id)
+            .limit(_CLAIM_CANDIDATES)
+        ]
+
+        for job_id in candidate_ids:
+            job = _compare_and_set_claim(job_id, worker_id, now, claimable)
+            if job is not None:
+                return job
+
+    return None
+
+
+def claim_job(job_id: int, worker_id: str, lock_timeout: int = 300) -> Optional[BackgroundJob]:
+    """
+    Claim one specific job (used when the web process runs a job inline).
+
+    Returns:
+        The claimed job, or None if another worker already holds it
+    """
+    now = datetime.utcnow()
+    with _claim_lock:
+        return _compare_and_set_claim(job_id, worker_id, now, _claimable_filter(now, lock_timeout))
+
+
+def _compare_and_set_claim(
+    job_id: int, worker_id: str, now: datetime, claimable
+) -> Optional[BackgroundJob]:
+    """Flip a job to 'running' only if it is still claimable; atomic on every backend."""
+    claimed = (
+        db.session.query(BackgroundJob)
+        .filter(BackgroundJob.id == job_id, claimable)
+        .update(
+            {
+                "status": JOB_RUNNING,
+                "locked_by": worker_id,
+                "locked_at": now,
+                "attempts": BackgroundJob.attempts + 1,
+                "updated_at": now,
+            },
+            synchronize_session=False,
+        )
+    )
+    db.session.commit()
+    if not claimed:
+        return None
+
+    job = db.session.get(BackgroundJob, job_id)
+    db.session.refresh(job)
+    return job
+
+
+def heartbeat_job(job_id: int, worker_id: str) -> bool:
+    """
+    Refresh a running job's lock so it isn't reclaimed while its worker is still busy.
+
+    Runs on its own connection, so it can be called from a thread next to the one
+    running the job (whose session may be mid-transaction).
+
+    Returns:
+        False if the job is no longer running under worker_id
+    """
+    table = BackgroundJob.__table__
+    with db.engine.begin() as connection:
+        updated = connection.execute(
+            table.update()
+            .where(
+                (table.c.id == job_id)
+                & (table.c.status == JOB_RUNNING)
+                & (table.c.locked_by == worker_id)
+            )
+            .values(locked_at=datetime.utcnow())
+        )
+    return updated.rowcount == 1
+
+
+def complete_job(job: BackgroundJob) -> None:
+    """Mark a job as successfully finished."""
+    job.status = JOB_DONE
+    job.locked_by = None
+    job.locked_at = None
+    job.last_error = None
+    job.updated_at = datetime.utcnow()
+    db.session.commit()
+
+
+def fail_job(job: BackgroundJob, error: str, max_attempts: int = 3, retry_delay: int = 30) -> bool:
+    """
+    Record a failed attempt and reschedule the job with jittered exponential backoff.
+
+    The delay is drawn from [backoff/2, backoff] ("equal jitter"), so jobs that
+    failed together during an outage don't all retry in the same second.
+
+    Args:
+        job: The job that failed
+        error: Error description stored on the job
+        max_attempts: Attempts after which the job is marked 'failed'
+        retry_delay: Base backoff in seconds (doubles per attempt)
+
+    Returns:
+        True if the job will be retried, False if it is permanently failed
+    """
+    now = datetime.utcnow()
+    job.last_error = error
+    job.locked_by = None
+    job.locked_at = None
+    job.updated_at = now
+
+    will_retry = (job.attempts or 0) < max_attempts
+    if will_retry:
+        job.status = JOB_PENDING
+        backoff = retry_delay * 2 ** max(0, job.attempts - 1)
+        job.run_after = now + timedelta(seconds=backoff / 2 + random.uniform(0, backoff / 2))
+        logger.warning(
+            f"Job {job.id} ({job.kind}) attempt {job.attempts}/{max_attempts} failed, "
+            f"retrying at {job.run_after.isoformat()}: {error}"
+        )
+    else:
+        job.status = JOB_FAILED
+        logger.error(f"Job {job.id} ({job.kind}) failed permanently: {error}")
+
+    db.session.commit()
+    return will_retry
@@ -0,0 +1,351 @@
+"""
+Norms Module for Focused Room Website
+
+Empirical percentile norms for Big Five scores, built from stored
+``BigFiveResult.scores``. Once a trait has enough results they replace the
+hard-coded curve in ``bigfive._calculate_percentiles``.
+
+- refresh_norms() folds results newer than the stored watermark into one KLL
+  sketch per (trait, segment), then rebuilds that sketch's lookup table.
+  Segments are "all", "profession:<name>" and "career_stage:<name>".
+- Sketches and tables live in ``norm_table``, so every worker shares the same
+  norms. If two refreshes run at once, the second one fails its version check
+  and rolls back.
+- NormLookup keeps each worker's tables in memory and answers percentile
+  lookups with bisect in O(log n). It reloads only when the tables change.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.models import BigFiveResult, Customer, NormTable, db
+from app.utils.bigfive import TRAITS
+from app.utils.quantile_sketch import KLLSketch
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SEGMENT_ALL = "all"
+DEFAULT_SKETCH_K = 200
+
+
+def _normalize_segment_value(value: Any) -> Optional[str]:
+    """Collapse whitespace and case so 'Software  Engineer' and 'software engineer' match."""
+    if value in (None, ""):
+        return None
+    text = " ".join(str(value).split()).casefold()
+    return text[:200] or None
+
+
+def result_segments(profession: Any = None, career_stage: Any = None) -> list[str]:
+    """
+    Segments a result contributes to (and is looked up in), most specific first.
+
+    Returns:
+        e.g. ["profession:designer", "career_stage:mid-level", "all"]
+    """
+    segments = []
+    profession = _normalize_segment_value(profession)
+    if profession:
+        segments.append(f"profession:{profession}")
+    career_stage = _normalize_segment_value(career_stage)
+    if career_stage:
+        segments.append(f"career_stage:{career_stage}")
+    segments.append(SEGMENT_ALL)
+    return segments
+
+
+def build_lookup_table(sketch: KLLSketch) -> dict[str, Any]:
+    """
+    Turn a sketch into sorted arrays for bisect lookups.
+
+    Returns:
+        Dict with:
+        - 'values': distinct scores, ascending
+        - 'below': percent of results scoring strictly below each value
+        - 'mid': mid-rank percentile of each value (below + half of the ties)
+        - 'n': number of results summarized
+    """
+    values: list[float] = []
+    weights: list[int] = []
+    for value, weight in sketch.weighted_values():
+        if values and values[-1] == value:
+            weights[-1] += weight
+        else:
+            values.append(value)
+            weights.append(weight)
+
+    total = sketch.n or 1
+    below, mid = [], []
+    cumulative = 0
+    for weight in weights:
+        below.append(round(100 * cumulative / total, 4))
+        mid.append(round(100 * (cumulative + weight / 2) / total, 4))
+        cumulative += weight
+    return {"values": values, "below": below, "mid": mid, "n": sketch.n}
+
+
+def lookup_percentile(table: dict[str, Any], score: float) -> float:
+    """Percentile of score in a lookup table (binary search, O(log n))."""
+    values = table["values"]
+    index = bisect_left(values, score)
+    if index == len(values):
+        return 100.0
+    if values[index] == score:
+        return table["mid"][index]
+    # Between two stored values: everything at or below the lower one ranks below score
+    return table["below"][index]
+
+
+def refresh_norms(batch_size: int = 1000, sketch_k: int = DEFAULT_SKETCH_K) -> dict[str, Any]:
+    """
+    Fold Big Five results added since the last refresh into the norm tables.
+
+    New scores are summarized into delta sketches while streaming the results,
+    then merged into the stored sketches (KLL sketches are mergeable) in one
+    transaction.
+
+    Args:
+        batch_size: Results fetched per round trip
+        sketch_k: KLL accuracy parameter for newly created sketches
+
+    Returns:
+        Dict with 'results' (results folded in), 'tables' (rows written),
+        'watermark' (last result ID included) and 'conflict' (another
+        worker refreshed concurrently; nothing was written)
+    """
+    # The 'all' rows are written on every refresh, so their version columns
+    # detect a concurrent refresh that started from the same watermark
+    base_rows = {row.trait: row for row in NormTable.query.filter_by(segment=SEGMENT_ALL).all()}
+    watermark = max((row.last_result_id for row in base_rows.values()), default=0)
+
+    deltas, processed, last_id = _scan_new_results(watermark, batch_size, sketch_k)
+    if processed == 0:
+        return {"results": 0, "tables": 0, "watermark": watermark, "conflict": False}
+
+    _store_sketches(deltas, base_rows, last_id)
+    try:
+        db.session.commit()
+    except (StaleDataError, IntegrityError):
+        db.session.rollback()
+        logger.info("Norm tables were refreshed by another worker, skipping")
+        return {"results": 0, "tables": 0, "watermark": watermark, "conflict": True}
+
+    logger.info(f"Refreshed {len(deltas)} norm tables with {processed} results (up to #{last_id})")
+    return {"results": processed, "tables": len(deltas), "watermark": last_id, "conflict": False}
+
+
+def _scan_new_results(
+    watermark: int, batch_size: int, sketch_k: int
+) -> tuple[dict[tuple[str, str], KLLSketch], int, int]:
+    """
+    Summarize scores of results after watermark into one sketch per (trait, segment).
+
+    Returns:
+        (delta sketches, number of results read, highest result ID read)
+    """
+    query = (
+        select(BigFiveResult.id, BigFiveResult.scores, Customer.profession, Customer.career_stage)
+        .outerjoin(Customer, BigFiveResult.customer_id == Customer.customer_id)
+        .where(BigFiveResult.id > watermark)
+        .order_by(BigFiveResult.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    deltas: dict[tuple[str, str], KLLSketch] = {}
+    processed = 0
+    last_id = watermark
+    for rows in db.session.execute(query).partitions():
+        pending: dict[tuple[str, str], list[float]] = defaultdict(list)
+        for row in rows:
+            scores = (row.scores or {}).get("scores") or {}
+            segments = result_segments(row.profession, row.career_stage)
+            for trait in TRAITS:
+                if scores.get(trait) is not None:
+                    for segment in segments:
+                        pending[(trait, segment)].append(scores[trait])
+        processed += len(rows)
+        last_id = rows[-1].id
+        for key, values in pending.items():
+            deltas.setdefault(key, KLLSketch(k=sketch_k)).update_many(values)
+    return deltas, processed, last_id
+
+
+def _store_sketches(
+    deltas: dict[tuple[str, str], KLLSketch], base_rows: dict[str, NormTable], last_id: int
+) -> None:
+    """Merge delta sketches into their norm_table rows (the caller commits)."""
+    now = datetime.utcnow()
+    for (trait, segment), delta in deltas.items():
+        if segment == SEGMENT_ALL:
+            row = base_rows.get(trait)
+        else:
+            row = db.session.get(NormTable, (trait, segment))
+
+        if row is None:
+            row = NormTable(trait=trait, segment=segment)
+            db.session.add(row)
+            if segment == SEGMENT_ALL:
+                base_rows[trait] = row
+            sketch = delta
+        else:
+            sketch = KLLSketch.from_dict(row.sketch)
+            sketch.merge(delta)
+
+        row.sketch = sketch.to_dict()
+        row.table = build_lookup_table(sketch)
+        row.sample_count = sketch.n
+        row.last_result_id = last_id
+        row.updated_at = now
+
+    # Advance the watermark even for traits that had no new scores
+    for row in base_rows.values():
+        row.last_result_id = last_id
+        row.updated_at = now
+
+
+class NormLookup:
+    """
+    Per-worker, in-memory view of the norm lookup tables.
+
+    Only tables with at least ``min_samples`` results are loaded. The
+    norm_table version (row count + latest update) is checked at most every
+    ``check_interval`` seconds and tables are reloaded only when it changed.
+    """
+
+    def __init__(self, min_samples: int = 200, check_interval: float = 60.0):
+        """
+        Args:
+            min_samples: Results a table needs before it replaces the built-in curve
+            check_interval: Minimum seconds between version checks (0 = every lookup)
+        """
+        self.min_samples = min_samples
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._last_check = 0.0
+        self._version: Optional[tuple] = None
+        self._tables: dict[tuple[str, str], dict[str, Any]] = {}
+
+        self.reloads = 0
+
+    def percentile(self, trait: str, score: float, segments: list[str]) -> Optional[tuple]:
+        """
+        Empirical percentile of score, from the first segment that has a table.
+
+        Returns:
+            (percentile, segment), or None if no segment has enough results
+        """
+        self._refresh()
+        for segment in segments:
+            table = self._tables.get((trait, segment))
+            if table is not None:
+                return lookup_percentile(table, score), segment
+        return None
+
+    def apply(
+        self, result_data: dict[str, Any], profession: Any = None, career_stage: Any = None
+    ) -> dict[str, str]:
+        """
+        Replace curve percentiles in a compute_bigfive_scores result with empirical ones.
+
+        Traits without a table keep their curve percentile.
+
+        Returns:
+            Trait -> segment whose norms were used
+        """
+        segments = result_segments(profession, career_stage)
+        used = {}
+        for trait, score in result_data["scores"].items():
+            found = self.percentile(trait, score, segments)
+            if found is not None:
+                result_data["percentiles"][trait], used[trait] = found
+        return used
+
+    def invalidate(self) -> None:
+        """Force a reload on next lookup."""
+        with self._lock:
+            self._loaded = False
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._loaded and now - self._last_check < self.check_interval:
+            return
+
+        with self._lock:
+            if self._loaded and now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+            try:
+                # Own session so a failed lookup never rolls back the caller's transaction
+                with Session(db.engine) as session:
+                    self._reload_if_changed(session)
+            except Exception as e:
+                # Keep serving the last tables (or the built-in curve) if the DB hiccups
+                logger.warning(f"Norm table reload failed: {str(e)}")
+
+    def _reload_if_changed(self, session: Session) -> None:
+        """Call with self._lock held."""
+        ready = NormTable.sample_count >= self.min_samples
+        version = tuple(
+            session.execute(select(func.count(), func.max(NormTable.updated_at)).where(ready)).one()
+        )
+        if self._loaded and version == self._version:
+            return
+
+        rows = session.execute(
+            select(NormTable.trait, NormTable.segment, NormTable.table).where(ready)
+        ).all()
+        self._tables = {(row.trait, row.segment): row.table for row in rows}
+        self._version = version
+        self._loaded = True
+        self.reloads += 1
+        logger.info(f"Loaded {len(rows)} norm tables")
+
+
+_norm_lookup: Optional[NormLookup] = None
+_norm_lookup_lock = threading.Lock()
+
+
+def get_norm_lookup() -> NormLookup:
+    """Return the process-wide NormLookup, configured from the Flask config on first use."""
+    global _norm_lookup
+
+    with _norm_lookup_lock:
+        if _norm_lookup is None:
+            from flask import current_app
+
+            _norm_lookup = NormLookup(
+                min_samples=current_app.config.get("NORMS_MIN_SAMPLES", 200),
+                check_interval=current_app.config.get("NORMS_CHECK_INTERVAL", 60.0),
+            )
+        return _norm_lookup
+
+
+def apply_norms(
+    result_data: dict[str, Any], profession: Any = None, career_stage: Any = None
+) -> dict[str, str]:
+    """
+    Use empirical percentiles in result_data where norm tables are available.
+
+    Never raises: on any error the built-in curve percentiles are kept.
+
+    Returns:
+        Trait -> segment whose norms were used (empty if none)
+    """
+    try:
+        return get_norm_lookup().apply(result_data, profession, career_stage)
+    except Exception as e:
+        logger.warning(f"Falling back to built-in percentiles: {str(e)}")
+        return {}
@@ -0,0 +1,328 @@
+"""
+PDF Renderer Module for Focused Room Website
+
+Runs ``generate_bigfive_report_pdf`` in a pool of worker processes so the
+CPU-bound ReportLab work never holds the GIL of a web worker. Request threads
+submit a render and wait on a future; other threads keep serving meanwhile.
+
+Features:
+- Warmed ``ProcessPoolExecutor`` (ReportLab imported and report styles built
+  once per process, before the first real render)
+- Bounded queue: at most ``max_pending`` renders queued or running; callers
+  wait up to ``queue_timeout`` for a slot, then get ``PDFRenderQueueFullError``
+- Rendered bytes cached in-process by content hash (result_id + every input)
+- Concurrent requests for the same report share one render
+- Pool rebuilt transparently if a worker process dies
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class PDFRenderQueueFullError(RuntimeError):
+    """Raised when the render queue stays full for longer than the caller will wait."""
+
+
+def _warm_worker() -> None:
+    """Process initializer: import ReportLab and build the shared stylesheet."""
+    from app.utils.report_generator import get_report_styles
+
+    get_report_styles()
+
+
+def _render_report(
+    user_email: str,
+    scores: dict[str, float],
+    percentiles: dict[str, float],
+    suggestions: str,
+    result_id: Optional[int],
+) -> bytes:
+    from app.utils.report_generator import generate_bigfive_report_pdf
+
+    return generate_bigfive_report_pdf(
+        user_email=user_email,
+        scores=scores,
+        percentiles=percentiles,
+        suggestions=suggestions,
+        result_id=result_id,
+    )
+
+
+def build_pdf_cache_key(
+    user_email: str,
+    scores: dict[str, float],
+    percentiles: dict[str, float],
+    suggestions: str,
+    result_id: Optional[int] = None,
+) -> str:
+    """Hex SHA-256 of everything that ends up in the PDF."""
+    material = {
+        "result_id": result_id,
+        "user_email": user_email,
+        "scores": scores,
+        "percentiles": percentiles,
+        "suggestions": suggestions,
+    }
+    encoded = json.dumps(material, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class PDFRenderer:
+    """
+    Process-pool PDF rendering service with a bounded queue and byte cache.
+
+    Usage:
+        renderer = PDFRenderer(max_workers=2)
+        pdf_bytes = renderer.render(email, scores, percentiles, suggestions, result_id=7)
+
+        # Or without blocking (futures can be awaited via asyncio.wrap_future)
+        future = renderer.submit(email, scores, percentiles, suggestions, result_id=7)
+        pdf_bytes = future.result(timeout=30)
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_pending: int = 16,
+        queue_timeout: float = 5.0,
+        cache_entries: int = 64,
+        cache_max_bytes: int = 32 * 1024 * 1024,
+        start_method: str = "spawn",
+        render_func: Callable[..., bytes] = _render_report,
+    ):
+        """
+        Args:
+            max_workers: Worker processes in the pool
+            max_pending: Maximum renders queued or running at once
+            queue_timeout: Seconds submit() waits for a queue slot before giving up
+            cache_entries: Maximum PDFs kept in the byte cache
+            cache_max_bytes: Maximum total size of cached PDFs
+            start_method: multiprocessing start method ("spawn" is safe in threaded servers)
+            render_func: Picklable callable run in the workers (injectable for tests)
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.cache_entries = cache_entries
+        self.cache_max_bytes = cache_max_bytes
+        self.start_method = start_method
+        self.render_func = render_func
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._inflight: dict[str, Future] = {}
+        # key -> PDF bytes, least recently used first
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cache_bytes = 0
+
+        # Counters exposed via stats()
+        self.rendered = 0
+        self.failed = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the worker processes now instead of on the first render."""
+        with self._lock:
+            executor = self._get_executor()
+        # One no-op per worker so every process runs its initializer up front
+        for _ in range(self.max_workers):
+            executor.submit(int)
+
+    def submit(
+        self,
+        user_email: str,
+        scores: dict[str, float],
+        percentiles: dict[str, float],
+        suggestions: str,
+        result_id: Optional[int] = None,
+    ) -> Future:
+        """
+        Queue a render and return a Future resolving to the PDF bytes.
+
+        Cached reports resolve immediately; a report already being rendered
+        returns the in-flight future.
+
+        Raises:
+            PDFRenderQueueFullError: If no queue slot frees up within queue_timeout
+        """
+        key = build_pdf_cache_key(user_email, scores, percentiles, suggestions, result_id)
+
+        with self._lock:
+            existing = self._existing(key)
+        if existing is not None:
+            return existing
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise PDFRenderQueueFullError(f"PDF render queue is full ({self.max_pending} pending)")
+
+        try:
+            with self._lock:
+                # Another thread may have rendered or queued the same report while we waited
+                existing = self._existing(key)
+                if existing is not None:
+                    self._slots.release()
+                    return existing
+                future = self._get_executor().submit(
+                    self.render_func, user_email, scores, percentiles, suggestions, result_id
+                )
+                self._inflight[key] = future
+        except BaseException:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda f: self._on_done(key, f))
+        return future
+
+    def render(
+        self,
+        user_email: str,
+        scores: dict[str, float],
+        percentiles: dict[str, float],
+        suggestions: str,
+        result_id: Optional[int] = None,
+        timeout: Optional[float] = 30.0,
+    ) -> bytes:
+        """Submit a render and wait for the PDF bytes (the GIL is free while waiting)."""
+        future = self.submit(user_email, scores, percentiles, suggestions, result_id)
+        return future.result(timeout=timeout)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker processes; the next submit() starts a fresh pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def clear_cache(self) -> None:
+        """Drop every cached PDF."""
+        with self._lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+
+    def stats(self) -> dict:
+        """Queue, cache and render counters for monitoring."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": len(self._inflight),
+                "rendered": self.rendered,
+                "failed": self.failed,
+                "cache_hits": self.cache_hits,
+                "coalesced": self.coalesced,
+                "rejected": self.rejected,
+                "cache_entries": len(self._cache),
+                "cache_bytes": self._cache_bytes,
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the pool on first use (call with self._lock held)."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_warm_worker,
+            )
+        return self._executor
+
+    def _existing(self, key: str) -> Optional[Future]:
+        """Cached or in-flight future for key (call with self._lock held)."""
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return self._completed(cached)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+        return inflight
+
+    def _on_done(self, key: str, future: Future) -> None:
+        self._slots.release()
+        error = None if future.cancelled() else future.exception()
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            if future.cancelled():
+                return
+            if error is None:
+                self.rendered += 1
+                self._store(key, future.result())
+                return
+            self.failed += 1
+            if isinstance(error, BrokenProcessPool) and self._executor is not None:
+                # A worker died (OOM, segfault); the next submit() builds a new pool
+                broken, self._executor = self._executor, None
+                broken.shutdown(wait=False, cancel_futures=True)
+
+        logger.error(f"PDF render failed: {str(error)}")
+
+    def _store(self, key: str, pdf_bytes: bytes) -> None:
+        """Add to the LRU byte cache (call with self._lock held)."""
+        size = len(pdf_bytes)
+        if size > self.cache_max_bytes or self.cache_entries <= 0:
+            return
+        self._cache[key] = pdf_bytes
+        self._cache_bytes += size
+        while len(self._cache) > self.cache_entries or self._cache_bytes > self.cache_max_bytes:
+            _oldest, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted)
+
+    @staticmethod
+    def _completed(pdf_bytes: bytes) -> Future:
+        future: Future = Future()
+        future.set_result(pdf_bytes)
+        return future
+
+
+_renderer: Optional[PDFRenderer] = None
+_renderer_lock = threading.Lock()
+
+
+def get_pdf_renderer() -> PDFRenderer:
+    """
+    Return the process-wide renderer, creating (and warming) it on first use.
+
+    Settings come from the Flask config when an app context is available.
+    """
+    global _renderer
+
+    with _renderer_lock:
+        if _renderer is None:
+            from flask import current_app, has_app_context
+
+            config = current_app.config if has_app_context() else {}
+            _renderer = PDFRenderer(
+                max_workers=int(config.get("PDF_RENDER_WORKERS", 2)),
+                max_pending=int(config.get("PDF_RENDER_MAX_PENDING", 16)),
+                queue_timeout=float(config.get("PDF_RENDER_QUEUE_TIMEOUT", 5.0)),
+                cache_entries=int(config.get("PDF_CACHE_ENTRIES", 64)),
+            )
+            _renderer.start()
+            # Stop worker processes cleanly when the web worker exits
+            atexit.register(_renderer.shutdown, False)
+        return _renderer
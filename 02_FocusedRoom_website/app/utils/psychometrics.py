@@ -0,0 +1,325 @@
+"""
+Psychometrics Module for Focused Room Website
+
+Reliability and response-quality checks for the Big Five questionnaire,
+computed with NumPy over the raw answers stored on ``BigFiveResult``.
+
+- Per trait: Cronbach's alpha, corrected item-total correlations and
+  alpha-if-item-deleted. All of them follow from the item covariance matrix,
+  which is accumulated chunk by chunk (sums and X^T X), so a million results
+  never have to be in memory at once.
+- Per result: response-style flags.
+  - Straight-lining: the longest run of identical consecutive answers
+    ("longstring") reaches ``straightline_run`` items.
+  - Random responding: even-odd consistency (each trait's even and odd items
+    scored as two half-scales, then correlated across traits per person) is
+    below ``min_consistency``. Attentive respondents answer both halves of a
+    trait alike; random answers do not.
+
+44- and 50-item tests have different item sets and are reported separately.
+"""
+
+import logging
+import math
+from collections import defaultdict
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from app.models import BigFiveResult, db
+from app.utils.answer_packing import unpack_answers_batch
+from app.utils.bigfive import DEFAULT_QUESTION_MAPPINGS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Longstring at which a test is flagged as straight-lined
+DEFAULT_STRAIGHTLINE_RUN = 10
+# Even-odd consistency below which a test is flagged as random responding. With only
+# five traits to correlate over, 0 (halves that disagree) keeps false positives low
+DEFAULT_MIN_CONSISTENCY = 0.0
+# Result IDs listed per flag in a report (counts are always complete)
+DEFAULT_MAX_FLAGGED_IDS = 100
+
+
+def _finite_or_none(value: float, digits: int = 4) -> Optional[float]:
+    """Round for JSON; NaN/inf (e.g. zero-variance items) become None."""
+    value = float(value)
+    return round(value, digits) if math.isfinite(value) else None
+
+
+def cronbach_alpha_from_cov(cov: np.ndarray) -> float:
+    """
+    Cronbach's alpha of a scale from its item covariance matrix.
+
+    alpha = k / (k - 1) * (1 - sum of item variances / variance of the total)
+
+    Returns:
+        Alpha, or NaN for fewer than 2 items or a zero-variance total
+    """
+    k = cov.shape[0]
+    total_variance = cov.sum()
+    if k < 2 or total_variance <= 0:
+        return float("nan")
+    return float(k / (k - 1) * (1 - np.trace(cov) / total_variance))
+
+
+def item_statistics_from_cov(cov: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Corrected item-total correlations and alpha-if-item-deleted for one scale.
+
+    The corrected correlation compares each item with the total of the other
+    items, so an item is not correlated with itself.
+
+    Returns:
+        Dict with 'item_total' and 'alpha_if_deleted' arrays (one value per item;
+        NaN where undefined)
+    """
+    k = cov.shape[0]
+    diagonal = np.diag(cov)
+    row_sums = cov.sum(axis=1)
+    total_variance = cov.sum()
+
+    # Variance of (total - item) and covariance of item with (total - item)
+    rest_variance = total_variance - 2 * row_sums + diagonal
+    with np.errstate(divide="ignore", invalid="ignore"):
+        item_total = (row_sums - diagonal) / np.sqrt(diagonal * rest_variance)
+        if k > 2:
+            alpha_if_deleted = (k - 1) / (k - 2) * (1 - (np.trace(cov) - diagonal) / rest_variance)
+        else:
+            alpha_if_deleted = np.full(k, np.nan)
+    return {"item_total": item_total, "alpha_if_deleted": alpha_if_deleted}
+
+
+def cronbach_alpha(answers: Any) -> float:
+    """Cronbach's alpha of an (N, items) answer array for a single scale."""
+    answers = np.asarray(answers, dtype=np.float64)
+    if answers.ndim != 2 or answers.shape[0] < 2:
+        raise ValueError(f"Expected an (N, items) array with N >= 2, got shape {answers.shape}")
+    return cronbach_alpha_from_cov(np.cov(answers, rowvar=False))
+
+
+def longstring(answers: np.ndarray) -> np.ndarray:
+    """Longest run of identical consecutive answers in each row."""
+    if answers.shape[1] < 2:
+        return np.ones(answers.shape[0], dtype=np.intp)
+    same = answers[:, 1:] == answers[:, :-1]
+    # Running count of equal neighbours, reset wherever two neighbours differ
+    counts = np.cumsum(same, axis=1)
+    resets = np.maximum.accumulate(np.where(same, 0, counts), axis=1)
+    return (counts - resets).max(axis=1) + 1
+
+
+def even_odd_consistency(answers: np.ndarray, question_mapping: dict[str, list[int]]) -> np.ndarray:
+    """
+    Per-row correlation between even-item and odd-item half-scale scores across traits.
+
+    Returns:
+        float64 array; NaN where either half has no variance across traits
+        (e.g. straight-lined tests)
+    """
+    halves = [
+        (indices[0::2], indices[1::2]) for indices in question_mapping.values() if len(indices) >= 2
+    ]
+    even = np.stack([answers[:, idx].mean(axis=1) for idx, _ in halves], axis=1)
+    odd = np.stack([answers[:, idx].mean(axis=1) for _, idx in halves], axis=1)
+    even -= even.mean(axis=1, keepdims=True)
+    odd -= odd.mean(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (even * odd).sum(axis=1) / np.sqrt((even**2).sum(axis=1) * (odd**2).sum(axis=1))
+
+
+def response_style_flags(
+    answers: Any,
+    question_mapping: Optional[dict[str, list[int]]] = None,
+    straightline_run: int = DEFAULT_STRAIGHTLINE_RUN,
+    min_consistency: float = DEFAULT_MIN_CONSISTENCY,
+) -> dict[str, np.ndarray]:
+    """
+    Response-style indices and flags for each test.
+
+    Args:
+        answers: (N, 44) or (N, 50) answers on a 1-5 scale
+        question_mapping: Trait -> item indices (default: the scoring mapping)
+        straightline_run: Longstring that flags a test as straight-lined
+        min_consistency: Even-odd consistency below which a test is flagged as random
+
+    Returns:
+        Dict of per-row arrays: 'longstring', 'even_odd', 'straight_lining', 'random_responding'
+    """
+    answers = np.asarray(answers, dtype=np.float64)
+    if question_mapping is None:
+        question_mapping = DEFAULT_QUESTION_MAPPINGS[answers.shape[1]]
+
+    runs = longstring(answers)
+    consistency = even_odd_consistency(answers, question_mapping)
+    return {
+        "longstring": runs,
+        "even_odd": consistency,
+        "straight_lining": runs >= straightline_run,
+        # NaN (no variance) is not random responding; straight-lining covers it
+        "random_responding": np.nan_to_num(consistency, nan=1.0) < min_consistency,
+    }
+
+
+class PsychometricAccumulator:
+    """
+    Streaming quality statistics for tests of one length.
+
+    Usage:
+        acc = PsychometricAccumulator(n_items=44)
+        for ids, answers in chunks:
+            acc.update(answers, ids)
+        acc.report()
+    """
+
+    def __init__(
+        self,
+        n_items: int,
+        question_mapping: Optional[dict[str, list[int]]] = None,
+        straightline_run: int = DEFAULT_STRAIGHTLINE_RUN,
+        min_consistency: float = DEFAULT_MIN_CONSISTENCY,
+        max_flagged_ids: int = DEFAULT_MAX_FLAGGED_IDS,
+    ):
+        """
+        Args:
+            n_items: Test length (44 or 50)
+            question_mapping: Trait -> item indices (default: the scoring mapping)
+            straightline_run: Longstring that flags a test as straight-lined
+            min_consistency: Even-odd consistency below which a test is flagged as random
+            max_flagged_ids: Result IDs kept per flag for the report
+        """
+        self.n_items = n_items
+        self.question_mapping = question_mapping or DEFAULT_QUESTION_MAPPINGS[n_items]
+        self.straightline_run = straightline_run
+        self.min_consistency = min_consistency
+        self.max_flagged_ids = max_flagged_ids
+
+        self.n = 0
+        self._sums = np.zeros(n_items, dtype=np.float64)
+        self._cross = np.zeros((n_items, n_items), dtype=np.float64)
+        self._flag_counts: dict[str, int] = defaultdict(int)
+        self._flagged_ids: dict[str, list[int]] = defaultdict(list)
+
+    def update(self, answers: np.ndarray, ids: Optional[np.ndarray] = None) -> None:
+        """Add an (N, n_items) chunk of answers (ids: matching result IDs, for the report)."""
+        answers = np.asarray(answers, dtype=np.float64)
+        if answers.ndim != 2 or answers.shape[1] != self.n_items:
+            raise ValueError(f"Expected an (N, {self.n_items}) array, got shape {answers.shape}")
+
+        self.n += answers.shape[0]
+        self._sums += answers.sum(axis=0)
+        self._cross += answers.T @ answers
+
+        flags = response_style_flags(
+            answers, self.question_mapping, self.straightline_run, self.min_consistency
+        )
+        for flag in ("straight_lining", "random_responding"):
+            rows = np.flatnonzero(flags[flag])
+            self._flag_counts[flag] += int(rows.size)
+            room = self.max_flagged_ids - len(self._flagged_ids[flag])
+            if ids is not None and room > 0:
+                self._flagged_ids[flag].extend(int(i) for i in np.asarray(ids)[rows[:room]])
+
+    def covariance(self) -> np.ndarray:
+        """Sample covariance matrix of the items (N - 1 denominator)."""
+        if self.n < 2:
+            return np.full((self.n_items, self.n_items), np.nan)
+        means = self._sums / self.n
+        return (self._cross - self.n * np.outer(means, means)) / (self.n - 1)
+
+    def report(self) -> dict[str, Any]:
+        """
+        JSON-serializable quality report.
+
+        Returns:
+            Dict with 'tests', 'traits' (alpha and per-item statistics, items
+            numbered from 1 as on the questionnaire) and 'flags' (count, rate
+            and sample result IDs per response-style flag)
+        """
+        cov = self.covariance()
+        means = self._sums / self.n if self.n else np.full(self.n_items, np.nan)
+
+        traits = {}
+        for trait, indices in self.question_mapping.items():
+            indices = [i for i in indices if i < self.n_items]
+            scale = cov[np.ix_(indices, indices)]
+            stats = item_statistics_from_cov(scale)
+            traits[trait] = {
+                "alpha": _finite_or_none(cronbach_alpha_from_cov(scale)),
+                "items": [
+                    {
+                        "item": index + 1,
+                        "mean": _finite_or_none(means[index]),
+                        "item_total_r": _finite_or_none(stats["item_total"][position]),
+                        "alpha_if_deleted": _finite_or_none(stats["alpha_if_deleted"][position]),
+                    }
+                    for position, index in enumerate(indices)
+                ],
+            }
+
+        flags = {
+            flag: {
+                "count": self._flag_counts[flag],
+                "rate": _finite_or_none(self._flag_counts[flag] / self.n if self.n else 0.0),
+                "result_ids": self._flagged_ids[flag],
+            }
+            for flag in ("straight_lining", "random_responding")
+        }
+        return {"tests": self.n, "traits": traits, "flags": flags}
+
+
+def compute_quality_report(
+    batch_size: int = 10000,
+    straightline_run: int = DEFAULT_STRAIGHTLINE_RUN,
+    min_consistency: float = DEFAULT_MIN_CONSISTENCY,
+    max_flagged_ids: int = DEFAULT_MAX_FLAGGED_IDS,
+) -> dict[str, Any]:
+    """
+    Psychometric quality report over every stored result with raw answers.
+
+    Results are streamed with yield_per and decoded a chunk at a time, so
+    memory use depends on batch_size, not on the number of results.
+
+    Returns:
+        Dict with 'results' (tests analyzed), 'skipped' (results without raw
+        answers), 'settings' and 'by_length' (one PsychometricAccumulator
+        report per test length, keyed "44"/"50")
+    """
+    query = (
+        select(BigFiveResult.id, BigFiveResult.raw_answers)
+        .order_by(BigFiveResult.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    accumulators: dict[int, PsychometricAccumulator] = {}
+    skipped = 0
+    for rows in db.session.execute(query).partitions():
+        groups: dict[int, list] = defaultdict(list)
+        for row in rows:
+            if row.raw_answers:
+                groups[len(row.raw_answers)].append(row)
+            else:
+                skipped += 1
+
+        for group in groups.values():
+            answers = unpack_answers_batch([row.raw_answers for row in group])
+            n_items = answers.shape[1]
+            if n_items not in DEFAULT_QUESTION_MAPPINGS:
+                skipped += len(group)
+                continue
+            if n_items not in accumulators:
+                accumulators[n_items] = PsychometricAccumulator(
+                    n_items, None, straightline_run, min_consistency, max_flagged_ids
+                )
+            accumulators[n_items].update(answers, np.array([row.id for row in group]))
+
+    total = sum(acc.n for acc in accumulators.values())
+    logger.info(f"Psychometric report over {total} tests ({skipped} without raw answers)")
+    return {
+        "results": total,
+        "skipped": skipped,
+        "settings": {"straightline_run": straightline_run, "min_consistency": min_consistency},
+        "by_length": {str(n): acc.report() for n, acc in sorted(accumulators.items())},
+    }
@@ -0,0 +1,195 @@
+"""
+Quantile Sketch Module for Focused Room Website
+
+KLL quantile sketch (Karnin, Lang & Liberty, 2016) used by the norms
+subsystem to summarize millions of trait scores in a few kilobytes.
+
+- Streaming: update() / update_many() in amortized O(1)
+- Mergeable: sketches built by different workers or batches combine with merge()
+- Exact until the first compaction (``k`` values or so), then rank error of
+  roughly 1.7 / k with high probability
+- JSON-serializable via to_dict() / from_dict()
+
+Each level ("compactor") holds values of weight 2**level. When the sketch is
+full, a level is sorted and every other value (random offset) is promoted to
+the next level, halving its size while keeping the total weight equal to n.
+"""
+
+import math
+import random
+from collections.abc import Iterable
+from typing import Any, Optional
+
+# Each lower level's capacity shrinks by this factor (the KLL paper's c)
+CAPACITY_DECAY = 2 / 3
+
+
+class KLLSketch:
+    """
+    Mergeable streaming quantile sketch.
+
+    Usage:
+        sketch = KLLSketch(k=200)
+        sketch.update_many(scores)
+        sketch.quantile(0.5)          # approximate median
+        sketch.merge(other_sketch)    # combine two sketches
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        """
+        Args:
+            k: Accuracy parameter (top-level capacity); memory is about 3k values
+            seed: Seed for the compaction coin flips (for reproducible sketches)
+        """
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.n = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._rng = random.Random(seed)
+        self._compactors: list[list[float]] = []
+        self._size = 0
+        self._max_size = 0
+        self._grow()
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def update(self, value: float) -> None:
+        """Add one value."""
+        self.update_many((value,))
+
+    def update_many(self, values: Iterable[float]) -> None:
+        """Add many values (same result as calling update() for each, but faster)."""
+        values = [float(value) for value in values]
+        if not values:
+            return
+
+        low, high = min(values), max(values)
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+        start = 0
+        while start < len(values):
+            # Fill level 0 up to the point where a single update() would compress
+            room = max(self._max_size - self._size, 1)
+            chunk = values[start : start + room]
+            self._compactors[0].extend(chunk)
+            self._size += len(chunk)
+            self.n += len(chunk)
+            start += len(chunk)
+            if self._size >= self._max_size:
+                self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        """Fold another sketch into this one (other is left unchanged)."""
+        if other.n == 0:
+            return
+        while len(self._compactors) < len(other._compactors):
+            self._grow()
+        for level, items in enumerate(other._compactors):
+            self._compactors[level].extend(items)
+
+        self.n += other.n
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._size = sum(len(items) for items in self._compactors)
+        while self._size >= self._max_size:
+            self._compress()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def weighted_values(self) -> list[tuple[float, int]]:
+        """Retained (value, weight) pairs sorted by value; weights sum to n."""
+        pairs = [
+            (value, 1 << level) for level, items in enumerate(self._compactors) for value in items
+        ]
+        pairs.sort()
+        return pairs
+
+    def rank(self, value: float) -> float:
+        """Approximate number of values <= value."""
+        return sum(weight for item, weight in self.weighted_values() if item <= value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate value at quantile q (0-1), or None for an empty sketch."""
+        if self.n == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        target = q * self.n
+        cumulative = 0
+        for value, weight in self.weighted_values():
+            cumulative += weight
+            if cumulative >= target:
+                return value
+        return self.max
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-serializable state."""
+        return {
+            "k": self.k,
+            "n": self.n,
+            "min": self.min,
+            "max": self.max,
+            "compactors": [list(items) for items in self._compactors],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], seed: Optional[int] = None) -> "KLLSketch":
+        """Rebuild a sketch saved with to_dict()."""
+        sketch = cls(k=data["k"], seed=seed)
+        compactors = data.get("compactors") or [[]]
+        while len(sketch._compactors) < len(compactors):
+            sketch._grow()
+        sketch._compactors = [[float(value) for value in items] for items in compactors]
+        sketch.n = data["n"]
+        sketch.min = data.get("min")
+        sketch.max = data.get("max")
+        sketch._size = sum(len(items) for items in sketch._compactors)
+        while sketch._size >= sketch._max_size:
+            sketch._compress()
+        return sketch
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._compactors) - level - 1
+        return int(math.ceil(self.k * CAPACITY_DECAY**depth)) + 1
+
+    def _grow(self) -> None:
+        self._compactors.append([])
+        self._max_size = sum(self._capacity(level) for level in range(len(self._compactors)))
+
+    def _compress(self) -> None:
+        for level in range(len(self._compactors)):
+            if len(self._compactors[level]) >= self._capacity(level):
+                if level + 1 >= len(self._compactors):
+                    self._grow()
+                self._compactors[level + 1].extend(self._compact(level))
+                self._size = sum(len(items) for items in self._compactors)
+                # Lazy: stop as soon as there is room again
+                if self._size < self._max_size:
+                    break
+
+    def _compact(self, level: int) -> list[float]:
+        """Halve a level: promote every other sorted value, starting at a random offset."""
+        items = self._compactors[level]
+        items.sort()
+        # With an odd count the largest value stays behind at this level
+        leftover = [items.pop()] if len(items) % 2 else []
+        offset = self._rng.randrange(2)
+        self._compactors[level] = leftover
+        return items[offset::2]
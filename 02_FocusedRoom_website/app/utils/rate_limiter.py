@@ -3,29 +3,483 @@ Rate Limiting Module for API Endpoints
 
 This module provides IP-based rate limiting functionality to prevent abuse
 and ensure fair usage of API endpoints.
+
+Counters live in a pluggable backend selected by ``RATE_LIMIT_BACKEND``:
+- ``memory``: per-process sliding window (default; each gunicorn worker
+  counts separately and counters reset on restart)
+- ``database``: fixed-window counters in the ``rate_limit_counter`` table,
+  updated with one atomic upsert per request (SQLite/PostgreSQL)
+- ``redis``: fixed-window counters in Redis (``RATE_LIMIT_REDIS_URL``)
+
+Two algorithms can be chosen per route with ``rate_limit(algorithm=...)``:
+- ``window`` (default): sliding window in memory, fixed window when shared
+- ``gcra``: generic cell rate algorithm; stores a single "theoretical
+  arrival time" float per key instead of one timestamp per request, allows
+  bursts of up to ``limit`` and refills continuously at ``limit/window``
+
+The shared backends fail open: if the store is unreachable the request is
+allowed and a warning is logged, so an outage never takes the site down.
 """
 
+import logging
+import math
+import threading
 import time
-from collections import defaultdict, deque
-from typing import Dict, Optional
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, Dict, Optional, Tuple
 
 from flask import jsonify, request
+from sqlalchemy import case
 
+# Configure logging
+logger = logging.getLogger(__name__)
 
-class RateLimiter:
+# Rate limiting algorithms selectable per route
+ALGORITHM_WINDOW = "window"
+ALGORITHM_GCRA = "gcra"
+
+
+def gcra_update(tat: Optional[float], now: float, limit: int, window: int) -> Tuple[bool, float]:
+    """
+    Apply one request to a GCRA state.
+
+    Args:
+        tat: Stored theoretical arrival time (None for an unseen key)
+        now: Current Unix time
+        limit: Requests allowed per window (also the burst size)
+        window: Window in seconds
+
+    Returns:
+        (allowed, new_tat) - new_tat equals the old state when denied
+    """
+    interval = window / limit
+    if tat is None or tat < now:
+        tat = now
+    if tat - now <= window - interval:
+        return True, tat + interval
+    return False, tat
+
+
+def gcra_result(allowed: bool, tat: float, now: float, limit: int, window: int) -> Dict[str, Any]:
+    """
+    Describe a GCRA state in the same shape as the window backends.
+
+    ``reset_time`` is when the next request will be allowed (if denied) or when
+    the full burst is available again (if allowed).
+    """
+    interval = window / limit
+    if allowed:
+        remaining = int((now + window - tat) / interval + 1e-9)
+        reset_time = tat
+    else:
+        remaining = 0
+        reset_time = tat - (window - interval)
+    return {
+        "allowed": allowed,
+        "remaining": max(0, min(limit, remaining)),
+        "reset_time": math.ceil(reset_time),
+    }
+
+
+class RateLimitBackend:
+    """
+    Storage interface for rate limit counters.
+
+    hit/peek/gcra return a dict with ``allowed``, ``remaining`` and
+    ``reset_time`` (Unix timestamp when the window frees up).
+    """
+
+    name = "base"
+
+    def hit(self, key: str, limit: int, window: int) -> Dict[str, Any]:
+        """Count a request against key and report whether it is allowed."""
+        raise NotImplementedError
+
+    def peek(self, key: str, limit: int, window: int) -> Dict[str, Any]:
+        """Report the current state for key without counting a request."""
+        raise NotImplementedError
+
+    def gcra(self, key: str, limit: int, window: int) -> Dict[str, Any]:
+        """Count a request against key using GCRA (see gcra_update)."""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Forget all counters."""
+        raise NotImplementedError
+
+
+class MemoryBackend(RateLimitBackend):
     """
-    Simple in-memory rate limiter using sliding window approach.
+    Per-process counters.
 
-    In production, consider using Redis for distributed rate limiting.
+    Window mode keeps a deque of request timestamps per key; GCRA mode keeps
+    one float per key in an LRU-ordered dict bounded by ``max_keys``. Idle keys
+    of both modes are swept every ``sweep_interval`` seconds.
     """
 
-    def __init__(self):
-        # Store request timestamps per IP address
+    name = "memory"
+
+    def __init__(self, max_keys: int = 100_000, sweep_interval: int = 60):
+        # Store request timestamps per key
         self.requests: Dict[str, deque] = defaultdict(deque)
+        # GCRA theoretical arrival time per key, least recently used first
+        self.tats: "OrderedDict[str, float]" = OrderedDict()
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self._max_window = 0
+        self._last_sweep = time.time()
+        self._lock = threading.Lock()
+
+    def _prune(self, key: str, window: int, current_time: float) -> deque:
+        key_requests = self.requests[key]
+        # Remove requests outside the time window
+        while key_requests and key_requests[0] <= current_time - window:
+            key_requests.popleft()
+        return key_requests
+
+    def _state(self, key_requests: deque, limit: int, window: int, allowed: bool) -> dict:
+        reset_time = key_requests[0] + window if key_requests else time.time()
+        return {
+            "allowed": allowed,
+            "remaining": max(0, limit - len(key_requests)),
+            "reset_time": int(reset_time),
+        }
+
+    def hit(self, key: str, limit: int, window: int) -> Dict[str, Any]:
+        current_time = time.time()
+        with self._lock:
+            self._max_window = max(self._max_window, window)
+            self._maybe_sweep(current_time)
+            key_requests = self._prune(key, window, current_time)
+
+            # Check if limit exceeded
+            if len(key_requests) >= limit:
+                return self._state(key_requests, limit, window, allowed=False)
+
+            # Add current request
+            key_requests.append(current_time)
+            return self._state(key_requests, limit, window, allowed=True)
+
+    def peek(self, key: str, limit: int, window: int) -> Dict[str, Any]:
+        with self._lock:
+            key_requests = self._prune(key, window, time.time())
+            return self._state(key_requests, limit, window, allowed=len(key_requests) < limit)
+
+    def gcra(self, key: str, limit: int, window: int) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            self._maybe_sweep(now)
+            tats = self.tats
+            allowed, tat = gcra_update(tats.get(key), now, limit, window)
+            tats[key] = tat
+            tats.move_to_end(key)
+            # LRU bound: an evicted key simply starts again with a full burst
+            if len(tats) > self.max_keys:
+                tats.popitem(last=False)
+        return gcra_result(allowed, tat, now, limit, window)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.tats.clear()
+
+    def _maybe_sweep(self, now: float) -> None:
+        """Drop keys that no longer limit anything (call with self._lock held)."""
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+
+        # A GCRA key whose TAT has passed is indistinguishable from an unseen key
+        for key in [key for key, tat in self.tats.items() if tat <= now]:
+            del self.tats[key]
+        # No route's window reaches back past the largest window seen
+        cutoff = now - self._max_window
+        for key in [
+            key for key, stamps in self.requests.items() if not stamps or stamps[-1] <= cutoff
+        ]:
+            del self.requests[key]
+
+
+class DatabaseBackend(RateLimitBackend):
+    """
+    Fixed-window counters in the ``rate_limit_counter`` table.
+
+    Each request is a single ``INSERT ... ON CONFLICT DO UPDATE ... RETURNING``
+    that either starts a new window or increments the current one, so
+    concurrent workers can never lose an increment.
+    """
+
+    name = "database"
+
+    def __init__(self, purge_interval: int = 300):
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+
+    def _insert(self):
+        from app.models import db
+
+        dialect = db.engine.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise NotImplementedError(f"Database rate limiting is not supported on {dialect}")
+        return insert
+
+    def hit(self, key: str, limit: int, window: int) -> Dict[str, Any]:
+        from app.models import RateLimitCounter, db
+
+        table = RateLimitCounter.__table__
+        now = time.time()
+        expired = table.c.expires_at <= now
+
+        stmt = self._insert()(table).values(
+            key=key, window_start=now, expires_at=now + window, count=1
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={
+                "window_start": case((expired, now), else_=table.c.window_start),
+                "expires_at": case((expired, now + window), else_=table.c.expires_at),
+                "count": case((expired, 1), else_=table.c.count + 1),
+            },
+        ).returning(table.c.count, table.c.expires_at)
+
+        # Own connection/transaction so the counter commits independently of the request
+        with db.engine.begin() as connection:
+            count, expires_at = connection.execute(stmt).one()
+
+        self._maybe_purge(now)
+        return {
+            "allowed": count <= limit,
+            "remaining": max(0, limit - count),
+            "reset_time": int(expires_at),
+        }
+
+    def gcra(self, key: str, limit: int, window: int) -> Dict[str, Any]:
+        """
+        GCRA in one upsert: ``expires_at`` holds the TAT and ``count`` is set
+        to 1/0 so the returned row says whether this request was allowed.
+        """
+        from app.models import RateLimitCounter, db
+
+        table = RateLimitCounter.__table__
+        now = time.time()
+        interval = window / limit
+        tat = case((table.c.expires_at > now, table.c.expires_at), else_=now)
+        allowed = tat <= now + window - interval
+
+        stmt = self._insert()(table).values(
+            key=key, window_start=now, expires_at=now + interval, count=1
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={
+                "window_start": now,
+                "expires_at": case((allowed, tat + interval), else_=table.c.expires_at),
+                "count": case((allowed, 1), else_=0),
+            },
+        ).returning(table.c.count, table.c.expires_at)
+
+        with db.engine.begin() as connection:
+            count, new_tat = connection.execute(stmt).one()
+
+        self._maybe_purge(now)
+        return gcra_result(bool(count), new_tat, now, limit, window)
+
+    def peek(self, key: str, limit: int, window: int) -> Dict[str, Any]:
+        from app.models import RateLimitCounter, db
+
+        table = RateLimitCounter.__table__
+        now = time.time()
+        with db.engine.connect() as connection:
+            row = connection.execute(
+                table.select().where(table.c.key == key, table.c.expires_at > now)
+            ).first()
+
+        count = row.count if row else 0
+        return {
+            "allowed": count < limit,
+            "remaining": max(0, limit - count),
+            "reset_time": int(row.expires_at if row else now),
+        }
+
+    def reset(self) -> None:
+        from app.models import RateLimitCounter, db
+
+        with db.engine.begin() as connection:
+            connection.execute(RateLimitCounter.__table__.delete())
+
+    def _maybe_purge(self, now: float) -> None:
+        """Delete expired windows every purge_interval seconds (per process)."""
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+
+        from app.models import RateLimitCounter, db
+
+        table = RateLimitCounter.__table__
+        with db.engine.begin() as connection:
+            connection.execute(table.delete().where(table.c.expires_at <= now))
+
+
+class RedisBackend(RateLimitBackend):
+    """
+    Fixed-window counters in Redis (or any server speaking the Redis protocol).
+
+    One MULTI/EXEC round trip per request: ``SET key 0 PX window NX`` starts the
+    window with its expiry, ``INCR`` counts the request and ``PTTL`` gives the
+    reset time. Expired windows are removed by Redis itself.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self, url: Optional[str] = None, client=None, prefix: str = "focusedroom:ratelimit:"
+    ):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(
+                url or "redis://localhost:6379/0", socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+        self.client = client
+        self.prefix = prefix
+
+    def hit(self, key: str, limit: int, window: int) -> Dict[str, Any]:
+        redis_key = self.prefix + key
+        pipe = self.client.pipeline(transaction=True)
+        pipe.set(redis_key, 0, px=int(window * 1000), nx=True)
+        pipe.incr(redis_key)
+        pipe.pttl(redis_key)
+        _started, count, ttl_ms = pipe.execute()
+
+        return {
+            "allowed": count <= limit,
+            "remaining": max(0, limit - count),
+            "reset_time": int(time.time() + max(ttl_ms, 0) / 1000),
+        }
+
+    def gcra(self, key: str, limit: int, window: int) -> Dict[str, Any]:
+        """GCRA with an optimistic WATCH/MULTI transaction (retried on conflict)."""
+        from redis.exceptions import WatchError
+
+        redis_key = self.prefix + key
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(redis_key)
+                    stored = pipe.get(redis_key)
+                    now = time.time()
+                    allowed, tat = gcra_update(
+                        float(stored) if stored else None, now, limit, window
+                    )
+                    if not allowed:
+                        pipe.unwatch()
+                        break
+                    pipe.multi()
+                    pipe.set(redis_key, repr(tat), px=max(1, int((tat - now) * 1000)))
+                    pipe.execute()
+                    break
+                except WatchError:
+                    continue
+
+        return gcra_result(allowed, tat, now, limit, window)
+
+    def peek(self, key: str, limit: int, window: int) -> Dict[str, Any]:
+        redis_key = self.prefix + key
+        pipe = self.client.pipeline(transaction=True)
+        pipe.get(redis_key)
+        pipe.pttl(redis_key)
+        value, ttl_ms = pipe.execute()
+
+        count = int(value or 0)
+        return {
+            "allowed": count < limit,
+            "remaining": max(0, limit - count),
+            "reset_time": int(time.time() + max(ttl_ms, 0) / 1000),
+        }
+
+    def reset(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def create_backend(
+    name: str, redis_url: Optional[str] = None, max_keys: int = 100_000
+) -> RateLimitBackend:
+    """
+    Build the backend named by RATE_LIMIT_BACKEND.
+
+    Falls back to the in-memory backend (with an error log) if the name is
+    unknown or the redis library is missing.
+    """
+    name = (name or "memory").lower()
+    if name == "database":
+        return DatabaseBackend()
+    if name == "redis":
+        try:
+            return RedisBackend(url=redis_url)
+        except ImportError:
+            logger.error("redis library not installed. Install with: pip install redis")
+            return MemoryBackend(max_keys=max_keys)
+    if name != "memory":
+        logger.error(f"Unknown RATE_LIMIT_BACKEND '{name}', using in-memory rate limiting")
+    return MemoryBackend(max_keys=max_keys)
+
+
+class RateLimiter:
+    """
+    Rate limiter facade over a pluggable counter backend.
+
+    Defaults to the in-memory sliding window; ``init_app`` switches to the
+    backend configured for the app.
+    """
+
+    def __init__(self, backend: Optional[RateLimitBackend] = None):
+        self.backend = backend or MemoryBackend()
         # Default limits
         self.default_limit = 10  # requests
         self.default_window = 3600  # seconds (1 hour)
 
+    def init_app(self, app) -> None:
+        """Select the backend from RATE_LIMIT_BACKEND / RATE_LIMIT_REDIS_URL."""
+        self.backend = create_backend(
+            app.config.get("RATE_LIMIT_BACKEND", "memory"),
+            redis_url=app.config.get("RATE_LIMIT_REDIS_URL"),
+            max_keys=app.config.get("RATE_LIMIT_MAX_KEYS", 100_000),
+        )
+
+    @property
+    def requests(self) -> Dict[str, deque]:
+        """Per-key timestamps of the in-memory backend (empty for shared backends)."""
+        return getattr(self.backend, "requests", {})
+
+    def check(
+        self,
+        key: str,
+        limit: Optional[int] = None,
+        window: Optional[int] = None,
+        algorithm: str = ALGORITHM_WINDOW,
+    ) -> Dict[str, Any]:
+        """
+        Count a request and return ``allowed``, ``remaining`` and ``reset_time``.
+
+        Fails open if a shared backend is unavailable.
+        """
+        limit = limit or self.default_limit
+        window = window or self.default_window
+
+        try:
+            if algorithm == ALGORITHM_GCRA:
+                return self.backend.gcra(key, limit, window)
+            return self.backend.hit(key, limit, window)
+        except Exception as e:
+            logger.warning(f"Rate limit backend '{self.backend.name}' unavailable: {str(e)}")
+            return {"allowed": True, "remaining": limit, "reset_time": int(time.time())}
+
     def is_allowed(
         self, ip_address: str, limit: Optional[int] = None, window: Optional[int] = None
     ) -> bool:
@@ -40,23 +494,7 @@ class RateLimiter:
         Returns:
             True if request is allowed, False otherwise
         """
-        limit = limit or self.default_limit
-        window = window or self.default_window
-
-        current_time = time.time()
-        ip_requests = self.requests[ip_address]
-
-        # Remove requests outside the time window
-        while ip_requests and ip_requests[0] <= current_time - window:
-            ip_requests.popleft()
-
-        # Check if limit exceeded
-        if len(ip_requests) >= limit:
-            return False
-
-        # Add current request
-        ip_requests.append(current_time)
-        return True
+        return self.check(ip_address, limit, window)["allowed"]
 
     def get_remaining_requests(
         self, ip_address: str, limit: Optional[int] = None, window: Optional[int] = None
@@ -74,15 +512,7 @@ class RateLimiter:
         """
         limit = limit or self.default_limit
         window = window or self.default_window
-
-        current_time = time.time()
-        ip_requests = self.requests[ip_address]
-
-        # Remove requests outside the time window
-        while ip_requests and ip_requests[0] <= current_time - window:
-            ip_requests.popleft()
-
-        return max(0, limit - len(ip_requests))
+        return self.backend.peek(ip_address, limit, window)["remaining"]
 
     def get_reset_time(self, ip_address: str, window: Optional[int] = None) -> int:
         """
@@ -96,26 +526,31 @@ class RateLimiter:
             Unix timestamp when limit resets
         """
         window = window or self.default_window
+        return self.backend.peek(ip_address, self.default_limit, window)["reset_time"]
 
-        if ip_address in self.requests and self.requests[ip_address]:
-            oldest_request = self.requests[ip_address][0]
-            return int(oldest_request + window)
-
-        return int(time.time())
+    def reset(self) -> None:
+        """Clear all counters in the current backend."""
+        self.backend.reset()
 
 
 # Global rate limiter instance
 rate_limiter = RateLimiter()
 
 
-def rate_limit(limit: int = 10, window: int = 3600, per: str = "ip"):
+def rate_limit(
+    limit: int = 10, window: int = 3600, per: str = "ip", algorithm: str = ALGORITHM_WINDOW
+):
     """
     Decorator for rate limiting Flask endpoints.
 
+    Counters are kept per endpoint, so routes with different limits don't
+    share a budget.
+
     Args:
         limit: Maximum requests allowed
         window: Time window in seconds
         per: Rate limiting key ('ip', 'user', etc.)
+        algorithm: 'window' (timestamps per request) or 'gcra' (one float per key)
 
     Returns:
         Decorated function
@@ -130,10 +565,8 @@ def rate_limit(limit: int = 10, window: int = 3600, per: str = "ip"):
             else:
                 client_ip = "default"
 
-            if not rate_limiter.is_allowed(client_ip, limit, window):
-                remaining = rate_limiter.get_remaining_requests(client_ip, limit, window)
-                reset_time = rate_limiter.get_reset_time(client_ip, window)
-
+            result = rate_limiter.check(f"{func.__name__}:{client_ip}", limit, window, algorithm)
+            if not result["allowed"]:
                 return (
                     jsonify(
                         {
@@ -142,8 +575,8 @@ def rate_limit(limit: int = 10, window: int = 3600, per: str = "ip"):
                             "details": {
                                 "limit": limit,
                                 "window": window,
-                                "remaining": remaining,
-                                "reset_time": reset_time,
+                                "remaining": result["remaining"],
+                                "reset_time": result["reset_time"],
                             },
                         }
                     ),
@@ -0,0 +1,298 @@
+"""
+Report Cache Module for Focused Room Website
+
+Content-addressed cache for Gemini personality reports. Two users (or one user
+retaking the test) with near-identical trait vectors and the same demographics
+get the same report without a second API call.
+
+Layers:
+- In-process LRU with TTL, bounded by entry count and total bytes
+- Persistent ``report_cache`` table shared by all workers (used when an app
+  context is available; skipped silently otherwise)
+
+Keys are a SHA-256 of the scores and percentiles rounded to a configurable
+bucket plus the normalized demographics that ``_build_gemini_prompt`` reads.
+Report fragments that depend only on trait levels (see GeminiClient's sectioned
+mode) are keyed by section, level tuple and prompt instead.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from flask import has_app_context
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Demographic fields consumed by GeminiClient._build_gemini_prompt
+PROMPT_DEMOGRAPHIC_FIELDS = ["name", "age", "career", "careerStage", "primaryGoal"]
+PROMPT_LIFE_PILLAR_FIELDS = ["career", "relationships", "health", "finances", "growth"]
+
+
+def _quantize(value: float, bucket: float) -> float:
+    """Round a 0-100 value to the nearest multiple of bucket."""
+    if bucket <= 0:
+        return round(float(value), 4)
+    return round(round(float(value) / bucket) * bucket, 4)
+
+
+def _normalize_text(value, preserve_case: bool = False) -> str:
+    """Collapse whitespace (and case, unless preserved) so trivial variations share a key."""
+    text = " ".join(str(value).split())
+    return text if preserve_case else text.casefold()
+
+
+def normalize_demographics(demographics: Optional[dict]) -> dict:
+    """
+    Reduce demographics to the fields that influence the Gemini prompt.
+
+    The name keeps its case because it is echoed verbatim in the report.
+    """
+    demographics = demographics or {}
+    normalized = {}
+    for field in PROMPT_DEMOGRAPHIC_FIELDS:
+        value = demographics.get(field)
+        if value not in (None, ""):
+            normalized[field] = _normalize_text(value, preserve_case=(field == "name"))
+
+    life_pillars = demographics.get("lifePillars") or {}
+    pillars = {
+        field: _normalize_text(life_pillars[field])
+        for field in PROMPT_LIFE_PILLAR_FIELDS
+        if life_pillars.get(field) not in (None, "")
+    }
+    if pillars:
+        normalized["lifePillars"] = pillars
+    return normalized
+
+
+def build_cache_key(
+    scores: dict[str, float],
+    percentiles: dict[str, float],
+    demographics: Optional[dict] = None,
+    bucket: float = 5.0,
+) -> str:
+    """
+    Build the content address for a report request.
+
+    Args:
+        scores: Big Five trait scores (0-100)
+        percentiles: Big Five trait percentiles (0-100)
+        demographics: Raw demographics from the request
+        bucket: Quantization step for scores and percentiles
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    material = {
+        "scores": {trait: _quantize(v, bucket) for trait, v in sorted(scores.items())},
+        "percentiles": {trait: _quantize(v, bucket) for trait, v in sorted(percentiles.items())},
+        "demographics": normalize_demographics(demographics),
+    }
+    encoded = json.dumps(material, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def build_fragment_key(section: str, levels: tuple[str, ...], prompt: str) -> str:
+    """
+    Build the content address for a report fragment that depends only on trait levels.
+
+    The prompt is part of the key, so editing a fragment prompt never serves
+    fragments written for the old one.
+
+    Args:
+        section: REPORT_SECTIONS key, e.g. 'focused_room'
+        levels: Verbal level per trait, in TRAITS order
+        prompt: Levels-only prompt the fragment is generated from
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    material = {
+        "fragment": section,
+        "levels": list(levels),
+        "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+    }
+    encoded = json.dumps(material, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ReportCache:
+    """
+    Two-level report cache (in-process LRU + shared DB table).
+
+    Thread-safe; one instance lives on each GeminiClient.
+    """
+
+    def __init__(
+        self,
+        ttl: int = 30 * 24 * 3600,
+        max_entries: int = 256,
+        max_bytes: int = 16 * 1024 * 1024,
+        use_db: bool = True,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.use_db = use_db
+
+        # key -> (report, expires_at_monotonic, size_bytes)
+        self._entries: "OrderedDict[str, tuple[str, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached report for key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                report, expires_at, _size = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return report
+                self._remove(key)
+
+        report = self._db_get(key)
+        with self._lock:
+            if report is not None:
+                self.db_hits += 1
+                self._store(key, report, self.ttl)
+            else:
+                self.misses += 1
+        return report
+
+    def set(self, key: str, report: str) -> None:
+        """Store a report in both cache layers."""
+        with self._lock:
+            self._store(key, report, self.ttl)
+        self._db_set(key, report)
+
+    def clear(self) -> None:
+        """Drop the in-process layer (the DB layer is left intact)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size of the in-process layer."""
+        with self._lock:
+            lookups = self.hits + self.db_hits + self.misses
+            return {
+                "hits": self.hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.db_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    # ------------------------------------------------------------------
+    # In-process LRU (call with self._lock held)
+    # ------------------------------------------------------------------
+
+    def _store(self, key: str, report: str, ttl: float) -> None:
+        size = len(report.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (report, time.monotonic() + ttl, size)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _report, _expires_at, size = self._entries.pop(key)
+        self._bytes -= size
+
+    # ------------------------------------------------------------------
+    # Persistent layer
+    # ------------------------------------------------------------------
+
+    def _db_enabled(self) -> bool:
+        return self.use_db and has_app_context()
+
+    def _db_get(self, key: str) -> Optional[str]:
+        if not self._db_enabled():
+            return None
+        from app.models import ReportCacheEntry, db
+
+        try:
+            # Own session so cache traffic never commits the caller's transaction
+            with Session(db.engine) as session:
+                entry = session.get(ReportCacheEntry, key)
+                if entry is None:
+                    return None
+                if entry.expires_at <= datetime.utcnow():
+                    session.delete(entry)
+                    session.commit()
+                    return None
+                entry.hit_count = (entry.hit_count or 0) + 1
+                report = entry.report
+                session.commit()
+                return report
+        except Exception as e:
+            logger.warning(f"Report cache lookup failed: {str(e)}")
+            return None
+
+    def _db_set(self, key: str, report: str) -> None:
+        if not self._db_enabled():
+            return
+        from app.models import ReportCacheEntry, db
+
+        now = datetime.utcnow()
+        try:
+            with Session(db.engine) as session:
+                session.merge(
+                    ReportCacheEntry(
+                        cache_key=key,
+                        report=report,
+                        created_at=now,
+                        expires_at=now + timedelta(seconds=self.ttl),
+                        hit_count=0,
+                    )
+                )
+                session.commit()
+        except IntegrityError:
+            # Another worker stored the same key concurrently - its copy is equivalent
+            pass
+        except Exception as e:
+            logger.warning(f"Report cache store failed: {str(e)}")
+
+
+def purge_expired_reports() -> int:
+    """
+    Delete expired rows from the persistent report cache.
+
+    Returns:
+        Number of rows deleted
+    """
+    from app.models import ReportCacheEntry, db
+
+    deleted = ReportCacheEntry.query.filter(
+        ReportCacheEntry.expires_at <= datetime.utcnow()
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
@@ -18,85 +18,42 @@ Architecture:
 
 import io
 from datetime import datetime
+from functools import cache
 from typing import Optional
 
 from reportlab.lib import colors
 from reportlab.lib.colors import HexColor
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
 from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.styles import ParagraphStyle, StyleSheet1, getSampleStyleSheet
 from reportlab.lib.units import inch
 from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
-
-def generate_bigfive_report_pdf(
-    user_email: str,
-    scores: dict[str, float],
-    percentiles: dict[str, float],
-    suggestions: str,
-    result_id: Optional[int] = None,
-) -> bytes:
+from .bigfive import get_trait_level
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# DESIGN SYSTEM COLORS (From main.css)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+PRIMARY_TEAL = HexColor("#7A9E9F")
+PRIMARY_DARK = HexColor("#6B8B8C")
+TEXT_PRIMARY = HexColor("#2d3748")
+TEXT_SECONDARY = HexColor("#4a5568")
+TEXT_MUTED = HexColor("#718096")
+BG_LIGHT = HexColor("#F7FAFC")
+BORDER_COLOR = HexColor("#E2E8F0")
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# CUSTOM TYPOGRAPHY STYLES
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+@cache
+def get_report_styles() -> StyleSheet1:
     """
-    Generate a professional, comprehensive Big Five personality report PDF.
-
-    This creates a multi-page PDF with:
-    - Professional cover page
-    - Detailed trait scores with visual table
-    - AI-generated insights (parsed from markdown)
-    - Call-to-action for Focused Room extension
-    - Brand-consistent styling
-
-    Args:
-        user_email: User's email address for personalization
-        scores: Dictionary of Big Five trait scores (0-100 scale)
-                Keys: openness, conscientiousness, extraversion, agreeableness, neuroticism
-        percentiles: Dictionary of Big Five trait percentiles (0-100 scale)
-        suggestions: AI-generated personality insights (markdown formatted)
-        result_id: Optional database ID for tracking/support
+    Build the report stylesheet once per process.
 
-    Returns:
-        PDF file as bytes (can be written to file or emailed as attachment)
-
-    Example:
-        >>> pdf_bytes = generate_bigfive_report_pdf(
-        ...     user_email="user@example.com",
-        ...     scores={"openness": 65.0, "conscientiousness": 80.0, ...},
-        ...     percentiles={"openness": 70, "conscientiousness": 85, ...},
-        ...     suggestions="## Your Profile\n\nYou are...",
-        ...     result_id=123
-        ... )
-        >>> with open("report.pdf", "wb") as f:
-        ...     f.write(pdf_bytes)
+    ``getSampleStyleSheet()`` and the custom ``ParagraphStyle`` objects are
+    read-only once built, so every report rendered in this process shares them.
     """
-    buffer = io.BytesIO()
-
-    # Document setup with custom margins
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        rightMargin=0.75 * inch,
-        leftMargin=0.75 * inch,
-        topMargin=0.75 * inch,
-        bottomMargin=0.75 * inch,
-        title="Big Five Personality Report - Focused Room",
-        author="Focused Room",
-    )
-
-    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    # DESIGN SYSTEM COLORS (From main.css)
-    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    PRIMARY_TEAL = HexColor("#7A9E9F")
-    PRIMARY_DARK = HexColor("#6B8B8C")
-    HexColor("#38a169")
-    TEXT_PRIMARY = HexColor("#2d3748")
-    TEXT_SECONDARY = HexColor("#4a5568")
-    TEXT_MUTED = HexColor("#718096")
-    BG_LIGHT = HexColor("#F7FAFC")
-    BORDER_COLOR = HexColor("#E2E8F0")
-
-    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    # CUSTOM TYPOGRAPHY STYLES
-    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     styles = getSampleStyleSheet()
 
     # Cover page styles
@@ -186,6 +143,99 @@ def generate_bigfive_report_pdf(
         )
     )
 
+    # Inline styles used by the insights, call-to-action and footer sections
+    styles.add(
+        ParagraphStyle(
+            name="MinorHeading",
+            parent=styles["BodyTextCustom"],
+            fontSize=12,
+            fontName="Helvetica-Bold",
+            spaceAfter=6,
+            textColor=PRIMARY_DARK,
+        )
+    )
+
+    styles.add(
+        ParagraphStyle(
+            name="CTA",
+            parent=styles["BodyTextCustom"],
+            fontSize=13,
+            alignment=TA_CENTER,
+            textColor=PRIMARY_DARK,
+            fontName="Helvetica-Bold",
+        )
+    )
+
+    styles.add(ParagraphStyle(name="Line", alignment=TA_CENTER, textColor=BORDER_COLOR, fontSize=8))
+
+    styles.add(
+        ParagraphStyle(
+            name="Footer",
+            fontSize=9,
+            alignment=TA_CENTER,
+            textColor=TEXT_MUTED,
+            spaceAfter=0,
+        )
+    )
+
+    return styles
+
+
+def generate_bigfive_report_pdf(
+    user_email: str,
+    scores: dict[str, float],
+    percentiles: dict[str, float],
+    suggestions: str,
+    result_id: Optional[int] = None,
+) -> bytes:
+    """
+    Generate a professional, comprehensive Big Five personality report PDF.
+
+    This creates a multi-page PDF with:
+    - Professional cover page
+    - Detailed trait scores with visual table
+    - AI-generated insights (parsed from markdown)
+    - Call-to-action for Focused Room extension
+    - Brand-consistent styling
+
+    Args:
+        user_email: User's email address for personalization
+        scores: Dictionary of Big Five trait scores (0-100 scale)
+                Keys: openness, conscientiousness, extraversion, agreeableness, neuroticism
+        percentiles: Dictionary of Big Five trait percentiles (0-100 scale)
+        suggestions: AI-generated personality insights (markdown formatted)
+        result_id: Optional database ID for tracking/support
+
+    Returns:
+        PDF file as bytes (can be written to file or emailed as attachment)
+
+    Example:
+        >>> pdf_bytes = generate_bigfive_report_pdf(
+        ...     user_email="user@example.com",
+        ...     scores={"openness": 65.0, "conscientiousness": 80.0, ...},
+        ...     percentiles={"openness": 70, "conscientiousness": 85, ...},
+        ...     suggestions="## Your Profile\n\nYou are...",
+        ...     result_id=123
+        ... )
+        >>> with open("report.pdf", "wb") as f:
+        ...     f.write(pdf_bytes)
+    """
+    buffer = io.BytesIO()
+
+    # Document setup with custom margins
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        rightMargin=0.75 * inch,
+        leftMargin=0.75 * inch,
+        topMargin=0.75 * inch,
+        bottomMargin=0.75 * inch,
+        title="Big Five Personality Report - Focused Room",
+        author="Focused Room",
+    )
+
+    styles = get_report_styles()
+
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     # BUILD PDF CONTENT
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -233,19 +283,6 @@ def generate_bigfive_report_pdf(
         "neuroticism": ("Emotional Stability", "🧘"),
     }
 
-    def get_level(score: float) -> str:
-        """Convert numeric score to verbal level."""
-        if score >= 70:
-            return "Very High"
-        elif score >= 55:
-            return "High"
-        elif score >= 45:
-            return "Moderate"
-        elif score >= 30:
-            return "Low"
-        else:
-            return "Very Low"
-
     for trait, (name, emoji) in trait_info.items():
         score = scores.get(trait, 0)
         pct = percentiles.get(trait, 0)
@@ -258,7 +295,7 @@ def generate_bigfive_report_pdf(
             display_score = score
             display_pct = pct
 
-        level = get_level(display_score)
+        level = get_trait_level(display_score)
         trait_data.append(
             [f"{emoji} {name}", f"{display_score:.0f}/100", f"{display_pct:.0f}th", level]
         )
@@ -354,14 +391,7 @@ def generate_bigfive_report_pdf(
             story.append(
                 Paragraph(
                     f"<b>{title}</b>",
-                    ParagraphStyle(
-                        name="MinorHeading",
-                        parent=styles["BodyTextCustom"],
-                        fontSize=12,
-                        fontName="Helvetica-Bold",
-                        spaceAfter=6,
-                        textColor=PRIMARY_DARK,
-                    ),
+                    styles["MinorHeading"],
                 )
             )
 
@@ -413,14 +443,7 @@ def generate_bigfive_report_pdf(
     story.append(
         Paragraph(
             '<b>Install Focused Room today</b> → <link href="https://chrome.google.com/webstore" color="#7A9E9F">chrome.google.com/webstore</link>',
-            ParagraphStyle(
-                name="CTA",
-                parent=styles["BodyTextCustom"],
-                fontSize=13,
-                alignment=TA_CENTER,
-                textColor=PRIMARY_DARK,
-                fontName="Helvetica-Bold",
-            ),
+            styles["CTA"],
         )
     )
 
@@ -429,20 +452,14 @@ def generate_bigfive_report_pdf(
     story.append(
         Paragraph(
             "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━",
-            ParagraphStyle(name="Line", alignment=TA_CENTER, textColor=BORDER_COLOR, fontSize=8),
+            styles["Line"],
         )
     )
     story.append(
         Paragraph(
             f"Report ID: {result_id if result_id else 'N/A'} | Generated by Focused Room<br/>"
             "Questions? Email support@focusedroom.com",
-            ParagraphStyle(
-                name="Footer",
-                fontSize=9,
-                alignment=TA_CENTER,
-                textColor=TEXT_MUTED,
-                spaceAfter=0,
-            ),
+            styles["Footer"],
         )
     )
 
@@ -0,0 +1,488 @@
+"""
+Similarity Module for Focused Room Website
+
+"People like you": nearest neighbours of a Big Five result in 5-D trait
+space (normalized scores, 0-100), plus the demographics of those people.
+
+- Each web worker keeps every result's score vector in one contiguous
+  float32 array (plus result and customer IDs), appended in ID order.
+- Most vectors are indexed by a KD-tree; results added since the last build
+  sit in a small tail that is scanned brute force. Only new results are
+  fetched on refresh, and the tree is rebuilt (in a background thread once
+  it exists) when the tail grows past ``rebuild_tail``, so queries stay
+  well under a millisecond as the table grows.
+- Neighbours exclude the query result and other results of the same customer.
+  Only bucketed scores, whole-point distances and aggregated demographics are
+  returned, never IDs, exact scores or contact details.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import BigFiveResult, Customer, db
+from app.utils.bigfive import TRAITS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEMOGRAPHIC_FIELDS = ("profession", "career_stage", "purpose")
+# Marks results without a customer in the customer ID array
+NO_CUSTOMER = -1
+# Defaults for what a "people like you" answer may reveal about other people
+DEFAULT_MIN_GROUP = 5
+DEFAULT_SCORE_BUCKET = 5.0
+
+
+class KDTree:
+    """
+    Static KD-tree over float32 points for exact k-nearest-neighbour queries.
+
+    Points are reordered so every leaf is a contiguous slice that is scanned
+    with NumPy; inner nodes split at the median of their widest dimension.
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 128):
+        """
+        Args:
+            points: (N, D) array of points
+            leaf_size: Maximum points per leaf
+        """
+        points = np.asarray(points, dtype=np.float32)
+        order = np.arange(len(points), dtype=np.intp)
+
+        # Node arrays: split dimension (-1 for leaves), split value, children, point range
+        dims: list[int] = []
+        splits: list[float] = []
+        children: list[list[int]] = []
+        ranges: list[tuple] = []
+
+        stack = [(0, len(points), None, 0)]
+        while stack:
+            lo, hi, parent, side = stack.pop()
+            node = len(dims)
+            if parent is not None:
+                children[parent][side] = node
+            ranges.append((lo, hi))
+            children.append([-1, -1])
+
+            segment = points[order[lo:hi]]
+            spread = segment.max(axis=0) - segment.min(axis=0) if hi > lo else None
+            if hi - lo <= leaf_size or not spread.any():
+                dims.append(-1)
+                splits.append(0.0)
+                continue
+
+            dim = int(spread.argmax())
+            mid = (lo + hi) // 2
+            # Median split: points left of mid are <= the split value, right ones >=
+            partition = np.argpartition(segment[:, dim], mid - lo)
+            order[lo:hi] = order[lo:hi][partition]
+            dims.append(dim)
+            splits.append(float(points[order[mid], dim]))
+            stack.append((mid, hi, node, 1))
+            stack.append((lo, mid, node, 0))
+
+        self.order = order
+        self.points = np.ascontiguousarray(points[order])
+        self._dims = dims
+        self._splits = splits
+        self._children = children
+        self._ranges = ranges
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def query(
+        self,
+        point: np.ndarray,
+        k: int,
+        reject: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        k nearest points to point (squared Euclidean distance).
+
+        Args:
+            point: (D,) query point
+            k: Number of neighbours
+            reject: Optional function mapping original point indices to a boolean
+                    mask of points that must not be returned
+
+        Returns:
+            (squared distances, original point indices), nearest first; fewer than k
+            if there are not enough eligible points
+        """
+        point = np.asarray(point, dtype=np.float32)
+        best_d = np.empty(0, dtype=np.float32)
+        best_i = np.empty(0, dtype=np.intp)
+        worst = np.inf
+
+        coordinates = point.tolist()
+        # (node, squared distance from point to the node's cell, per-axis offsets to the cell)
+        stack = [(0, 0.0, (0.0,) * len(coordinates))]
+        while stack:
+            node, bound, offsets = stack.pop()
+            if bound >= worst:
+                continue
+            dim = self._dims[node]
+            if dim < 0:
+                lo, hi = self._ranges[node]
+                distances = ((self.points[lo:hi] - point) ** 2).sum(axis=1)
+                keep = np.flatnonzero(distances < worst)
+                if keep.size:
+                    candidates = self.order[lo:hi][keep]
+                    distances = distances[keep]
+                    if reject is not None:
+                        distances[reject(candidates)] = np.inf
+                    best_d, best_i = _merge_best(best_d, best_i, distances, candidates, k)
+                    if len(best_d) == k:
+                        worst = float(best_d.max())
+                continue
+
+            diff = coordinates[dim] - self._splits[node]
+            left, right = self._children[node]
+            near, far = (left, right) if diff < 0 else (right, left)
+            # Crossing the split plane moves this axis' offset to |diff|
+            far_bound = bound - offsets[dim] ** 2 + diff * diff
+            if far_bound < worst:
+                far_offsets = offsets[:dim] + (abs(diff),) + offsets[dim + 1 :]
+                stack.append((far, far_bound, far_offsets))
+            stack.append((near, bound, offsets))
+
+        order = np.argsort(best_d, kind="stable")
+        return best_d[order], best_i[order]
+
+
+def _merge_best(
+    best_d: np.ndarray, best_i: np.ndarray, distances: np.ndarray, indices: np.ndarray, k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Keep the k smallest finite distances of two candidate sets."""
+    all_d = np.concatenate((best_d, distances))
+    all_i = np.concatenate((best_i, indices))
+    finite = np.isfinite(all_d)
+    all_d, all_i = all_d[finite], all_i[finite]
+    if len(all_d) > k:
+        keep = np.argpartition(all_d, k - 1)[:k]
+        all_d, all_i = all_d[keep], all_i[keep]
+    return all_d, all_i
+
+
+def _normalize_value(value: Any) -> Optional[str]:
+    """Collapse whitespace and case so free-text demographics group together."""
+    if value in (None, ""):
+        return None
+    text = " ".join(str(value).split()).casefold()
+    return text[:200] or None
+
+
+def summarize_demographics(
+    customers: list[dict[str, Any]], min_group: int = DEFAULT_MIN_GROUP
+) -> dict[str, Any]:
+    """
+    Aggregate demographics of a neighbour group.
+
+    Values shared by fewer than min_group people are only counted under
+    'other', so a single person's free-text answers are never echoed back.
+
+    Returns:
+        Dict with 'customers' and, per field, {'values': [{'value', 'count'}], 'other': n}
+    """
+    summary: dict[str, Any] = {"customers": len(customers)}
+    for field in DEMOGRAPHIC_FIELDS:
+        counts = Counter(
+            value for value in (_normalize_value(c.get(field)) for c in customers) if value
+        )
+        shared = [
+            {"value": value, "count": count}
+            for value, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+            if count >= min_group
+        ]
+        other = sum(counts.values()) - sum(item["count"] for item in shared)
+        summary[field] = {"values": shared, "other": other}
+    return summary
+
+
+class SimilarityIndex:
+    """
+    Per-worker nearest-neighbour index over stored Big Five score vectors.
+
+    Usage:
+        index = SimilarityIndex()
+        index.similar(result_id, k=10)
+    """
+
+    def __init__(
+        self,
+        check_interval: float = 30.0,
+        rebuild_tail: int = 4096,
+        leaf_size: int = 128,
+        min_group: int = DEFAULT_MIN_GROUP,
+        score_bucket: float = DEFAULT_SCORE_BUCKET,
+        background_rebuild: bool = True,
+    ):
+        """
+        Args:
+            check_interval: Minimum seconds between fetches of new results (0 = every query)
+            rebuild_tail: Unindexed results that trigger a KD-tree rebuild
+            leaf_size: KD-tree leaf size
+            min_group: Minimum people sharing a demographic value before it is shown
+            score_bucket: Step neighbours' scores are rounded to, so exact answers don't leak
+            background_rebuild: Rebuild the tree in a thread once a tree exists
+        """
+        self.check_interval = check_interval
+        self.rebuild_tail = rebuild_tail
+        self.leaf_size = leaf_size
+        self.min_group = min_group
+        self.score_bucket = score_bucket
+        self.background_rebuild = background_rebuild
+
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._last_check = 0.0
+        self._last_id = 0
+
+        # Growable storage; rows [0, size) are valid and never change once written
+        self._vectors = np.empty((1024, len(TRAITS)), dtype=np.float32)
+        self._ids = np.empty(1024, dtype=np.int64)
+        self._customers = np.empty(1024, dtype=np.int64)
+        # (tree, rows covered by the tree, size, vectors, ids, customers), swapped atomically
+        self._snapshot: tuple = (None, 0, 0, self._vectors, self._ids, self._customers)
+
+        self.rebuilds = 0
+
+    def __len__(self) -> int:
+        return self._snapshot[2]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def neighbours(self, result_id: int, k: int = 10) -> Optional[dict[str, Any]]:
+        """
+        The k results closest to result_id, excluding the same customer's results.
+
+        Returns:
+            Dict with 'scores' (the query vector), 'distances', 'vectors' (k, 5),
+            'result_ids' and 'customer_ids' (NO_CUSTOMER for anonymous results),
+            or None if result_id is not indexed (missing or incomplete scores)
+        """
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.refresh()
+        position = self._position(result_id)
+        if position is None:
+            # Possibly newer than the last refresh
+            self.refresh(force=True)
+            position = self._position(result_id)
+            if position is None:
+                return None
+
+        tree, built, size, vectors, ids, customers = self._snapshot
+        point = vectors[position]
+        customer = customers[position]
+
+        def reject(rows: np.ndarray) -> np.ndarray:
+            rejected = ids[rows] == result_id
+            if customer != NO_CUSTOMER:
+                rejected |= customers[rows] == customer
+            return rejected
+
+        best_d = np.empty(0, dtype=np.float32)
+        best_i = np.empty(0, dtype=np.intp)
+        if tree is not None:
+            best_d, best_i = tree.query(point, k, reject)
+        if size > built:
+            tail = np.arange(built, size)
+            distances = ((vectors[built:size] - point) ** 2).sum(axis=1)
+            distances[reject(tail)] = np.inf
+            best_d, best_i = _merge_best(best_d, best_i, distances, tail, k)
+
+        # Nearest first; ties broken by result ID so answers are stable
+        order = np.lexsort((ids[best_i], best_d))
+        best_d, best_i = best_d[order], best_i[order]
+        return {
+            "scores": point.copy(),
+            "distances": np.sqrt(best_d),
+            "vectors": vectors[best_i],
+            "result_ids": ids[best_i],
+            "customer_ids": customers[best_i],
+        }
+
+    def similar(self, result_id: int, k: int = 10) -> Optional[dict[str, Any]]:
+        """
+        JSON-ready "people like you" answer for result_id.
+
+        Returns:
+            Dict with 'profiles' (scores rounded to score_bucket and whole-point distance
+            per neighbour, nearest first),
+            'demographics' (see summarize_demographics) and 'index_size';
+            None if result_id is not indexed
+        """
+        found = self.neighbours(result_id, k)
+        if found is None:
+            return None
+
+        bucket = self.score_bucket
+        profiles = [
+            {
+                "distance": int(round(float(distance))),
+                "scores": {
+                    trait: float(bucket * round(float(v) / bucket))
+                    for trait, v in zip(TRAITS, vector)
+                },
+            }
+            for distance, vector in zip(found["distances"], found["vectors"])
+        ]
+
+        customer_ids = sorted({int(c) for c in found["customer_ids"] if c != NO_CUSTOMER})
+        customers = []
+        if customer_ids:
+            rows = db.session.execute(
+                select(Customer.profession, Customer.career_stage, Customer.purpose).where(
+                    Customer.customer_id.in_(customer_ids)
+                )
+            ).all()
+            customers = [row._asdict() for row in rows]
+
+        return {
+            "profiles": profiles,
+            "demographics": summarize_demographics(customers, self.min_group),
+            "index_size": len(self),
+        }
+
+    def _position(self, result_id: int) -> Optional[int]:
+        """Row of result_id (IDs are stored in ascending order)."""
+        _, _, size, _, ids, _ = self._snapshot
+        position = int(np.searchsorted(ids[:size], result_id))
+        if position < size and ids[position] == result_id:
+            return position
+        return None
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Append results added since the last refresh (at most every check_interval).
+
+        Returns:
+            Number of results appended
+        """
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return 0
+
+        with self._lock:
+            if not force and now - self._last_check < self.check_interval:
+                return 0
+            self._last_check = now
+            try:
+                # Own session so a failed refresh never rolls back the caller's transaction
+                with Session(db.engine) as session:
+                    added = self._append_new_results(session)
+            except Exception as e:
+                # Keep answering from the vectors already loaded
+                logger.warning(f"Similarity index refresh failed: {str(e)}")
+                return 0
+            tree, built, size = self._snapshot[:3]
+
+        if size - built > self.rebuild_tail:
+            if tree is not None and self.background_rebuild:
+                threading.Thread(target=self.rebuild, daemon=True).start()
+            else:
+                self.rebuild()
+        return added
+
+    def rebuild(self) -> None:
+        """Rebuild the KD-tree over every loaded vector (queries keep using the old one)."""
+        if not self._rebuild_lock.acquire(blocking=False):
+            return  # Another rebuild is already running
+        try:
+            _, _, size, vectors, ids, customers = self._snapshot
+            start = time.perf_counter()
+            tree = KDTree(vectors[:size], leaf_size=self.leaf_size) if size else None
+            with self._lock:
+                # Keep rows appended while building in the tail
+                current = self._snapshot
+                self._snapshot = (tree, size) + current[2:]
+            self.rebuilds += 1
+            logger.info(
+                f"Rebuilt similarity index over {size} results "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+        finally:
+            self._rebuild_lock.release()
+
+    def _append_new_results(self, session: Session) -> int:
+        """Call with self._lock held."""
+        query = (
+            select(BigFiveResult.id, BigFiveResult.customer_id, BigFiveResult.scores)
+            .where(BigFiveResult.id > self._last_id)
+            .order_by(BigFiveResult.id)
+            .execution_options(yield_per=10000)
+        )
+        tree, built, size = self._snapshot[:3]
+        added = 0
+        for rows in session.execute(query).partitions():
+            vectors, ids, customers = [], [], []
+            for row in rows:
+                scores = (row.scores or {}).get("scores") or {}
+                if all(isinstance(scores.get(trait), (int, float)) for trait in TRAITS):
+                    vectors.append([scores[trait] for trait in TRAITS])
+                    ids.append(row.id)
+                    customers.append(row.customer_id or NO_CUSTOMER)
+            self._last_id = rows[-1].id
+            if not ids:
+                continue
+
+            self._reserve(size + len(ids))
+            self._vectors[size : size + len(ids)] = vectors
+            self._ids[size : size + len(ids)] = ids
+            self._customers[size : size + len(ids)] = customers
+            size += len(ids)
+            added += len(ids)
+            # Publish as we go; readers only look at rows below size
+            self._snapshot = (tree, built, size, self._vectors, self._ids, self._customers)
+        return added
+
+    def _reserve(self, capacity: int) -> None:
+        """Grow storage geometrically; existing arrays stay valid for concurrent readers."""
+        if capacity <= len(self._ids):
+            return
+        new_capacity = max(capacity, 2 * len(self._ids))
+        for name in ("_vectors", "_ids", "_customers"):
+            old = getattr(self, name)
+            grown = np.empty((new_capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[: len(old)] = old
+            setattr(self, name, grown)
+
+
+_similarity_index: Optional[SimilarityIndex] = None
+_similarity_index_lock = threading.Lock()
+
+
+def get_similarity_index() -> SimilarityIndex:
+    """Return the process-wide SimilarityIndex, configured from the Flask config on first use."""
+    global _similarity_index
+
+    with _similarity_index_lock:
+        if _similarity_index is None:
+            from flask import current_app
+
+            _similarity_index = SimilarityIndex(
+                check_interval=current_app.config.get("SIMILARITY_CHECK_INTERVAL", 30.0),
+                rebuild_tail=current_app.config.get("SIMILARITY_REBUILD_TAIL", 4096),
+                min_group=current_app.config.get("SIMILARITY_MIN_GROUP", DEFAULT_MIN_GROUP),
+                score_bucket=current_app.config.get(
+                    "SIMILARITY_SCORE_BUCKET", DEFAULT_SCORE_BUCKET
+                ),
+            )
+        return _similarity_index
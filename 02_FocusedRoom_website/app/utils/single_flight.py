@@ -0,0 +1,219 @@
+"""
+Single-Flight Module for Focused Room Website
+
+Shares one in-flight call among identical concurrent requests, so a double
+click or a client retry on the Big Five form costs one Gemini report instead
+of two.
+
+- In-process: the first caller for a key (the leader) runs the call; callers
+  arriving while it runs wait for its result.
+- Across workers (``GEMINI_SINGLE_FLIGHT_BACKEND=database``, the default): the
+  leader also holds a lease row in ``single_flight_lease`` (``INSERT ... ON
+  CONFLICT DO NOTHING``). When it finishes it stores the result on the row for
+  ``result_ttl`` seconds, and other workers that found the lease poll the row
+  until the result appears.
+
+Followers never wait forever: a leader that fails releases its lease (workers
+still waiting then run the call themselves), a crashed leader's lease expires
+after ``lease_ttl``, and a follower gives up waiting after ``wait_timeout``.
+Like the circuit breaker, the lease table fails open: if it is unreachable,
+the call runs unshared and a warning is logged.
+"""
+
+import logging
+import socket
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from typing import Any, Optional
+
+from flask import has_app_context
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """An in-process call that followers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls (see module docstring).
+
+    Only results that are not None are shared across workers; None (a failed
+    report) is shared with in-process followers only.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        shared: bool = True,
+        lease_ttl: float = 180.0,
+        result_ttl: float = 30.0,
+        wait_timeout: float = 120.0,
+        poll_interval: float = 0.5,
+    ):
+        self.name = name
+        self.shared = shared
+        self.lease_ttl = lease_ttl
+        self.result_ttl = result_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+        self.leaders = 0
+        self.shared_in_process = 0
+        self.shared_across_workers = 0
+        self.wait_timeouts = 0
+        self.store_errors = 0
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        Return func()'s result, sharing it with identical concurrent calls.
+
+        Raises:
+            Exception: Whatever func raised (in-process followers get the same error)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(self.wait_timeout):
+                self.wait_timeouts += 1
+                logger.warning(f"Single-flight '{self.name}' leader too slow, running call")
+                return func()
+            self.shared_in_process += 1
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._do_shared(key, func)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _do_shared(self, key: str, func: Callable[[], Any]) -> Any:
+        """Run func as the leader across workers, or return the result another worker stored."""
+        if not self.shared or not has_app_context():
+            self.leaders += 1
+            return func()
+
+        owner = f"{socket.gethostname()}:{uuid.uuid4().hex[:12]}"
+        lease_key = f"{self.name}:{key}"
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            try:
+                claimed, result = self._claim(lease_key, owner)
+            except Exception as e:
+                self._store_error(e)
+                self.leaders += 1
+                return func()
+            if claimed:
+                break
+            if result is not None:
+                self.shared_across_workers += 1
+                return result
+            if time.monotonic() >= deadline:
+                self.wait_timeouts += 1
+                logger.warning(f"Single-flight '{self.name}' lease holder too slow, running call")
+                self.leaders += 1
+                return func()
+            time.sleep(self.poll_interval)
+
+        self.leaders += 1
+        result = None
+        try:
+            result = func()
+            return result
+        finally:
+            try:
+                self._release(lease_key, owner, result)
+            except Exception as e:
+                self._store_error(e)
+
+    def _claim(self, lease_key: str, owner: str) -> tuple[bool, Optional[str]]:
+        """
+        Take the lease for lease_key, or read the holder's stored result.
+
+        Returns:
+            (claimed, result); result is None while the holder is still running
+        """
+        from app.models import SingleFlightLease, db
+
+        table = SingleFlightLease.__table__
+        now = time.time()
+        with db.engine.begin() as connection:
+            # Expired leases and results go first, so a crashed leader's key can be re-taken
+            connection.execute(table.delete().where(table.c.expires_at < now))
+            inserted = connection.execute(
+                self._insert()(table)
+                .values(key=lease_key, owner=owner, expires_at=now + self.lease_ttl)
+                .on_conflict_do_nothing(index_elements=[table.c.key])
+            )
+            if inserted.rowcount == 1:
+                return True, None
+            row = connection.execute(table.select().where(table.c.key == lease_key)).first()
+        return False, row.result if row is not None else None
+
+    def _release(self, lease_key: str, owner: str, result: Optional[str]) -> None:
+        """Publish the leader's result on its lease row, or drop the lease if there is none."""
+        from app.models import SingleFlightLease, db
+
+        table = SingleFlightLease.__table__
+        mine = (table.c.key == lease_key) & (table.c.owner == owner)
+        with db.engine.begin() as connection:
+            if result is None:
+                connection.execute(table.delete().where(mine))
+            else:
+                connection.execute(
+                    table.update()
+                    .where(mine)
+                    .values(result=result, expires_at=time.time() + self.result_ttl)
+                )
+
+    def _insert(self):
+        from app.models import db
+
+        dialect = db.engine.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise NotImplementedError(f"Database single-flight is not supported on {dialect}")
+        return insert
+
+    def _store_error(self, error: Exception) -> None:
+        self.store_errors += 1
+        logger.warning(f"Single-flight lease table unavailable, running call unshared: {error}")
+
+    def get_stats(self) -> dict:
+        """This process's counters."""
+        with self._lock:
+            in_flight = len(self._calls)
+        return {
+            "backend": "database" if self.shared else "memory",
+            "in_flight": in_flight,
+            "leaders": self.leaders,
+            "shared_in_process": self.shared_in_process,
+            "shared_across_workers": self.shared_across_workers,
+            "wait_timeouts": self.wait_timeouts,
+            "store_errors": self.store_errors,
+        }
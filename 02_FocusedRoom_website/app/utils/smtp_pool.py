@@ -0,0 +1,256 @@
+"""
+SMTP Connection Pool Module for Focused Room Website
+
+Keeps authenticated SMTP connections open between messages so a burst of
+emails (campaigns, /big-five submissions) pays the TCP + STARTTLS + AUTH
+handshake once per connection instead of once per message.
+
+Features:
+- Thread-safe, bounded pool (idle connections reused LIFO)
+- NOOP health check before reusing a connection that sat idle
+- Recycling after a maximum number of messages per connection
+- Transparent reconnect when the server dropped the connection
+"""
+
+import contextlib
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+from email.message import Message
+from typing import Callable, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """
+    True if the connection itself is unusable (safe to retry on a new one).
+
+    smtplib.SMTPException subclasses OSError, so protocol replies such as a
+    refused recipient have to be told apart from socket-level failures.
+    """
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class PooledConnection:
+    """An open SMTP session plus the bookkeeping the pool needs."""
+
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.messages_sent = 0
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class SMTPConnectionPool:
+    """
+    Bounded pool of persistent SMTP connections.
+
+    Usage:
+        pool = SMTPConnectionPool("smtp.example.com", 587, "user", "secret")
+        pool.send_message(msg)
+        pool.close()
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        max_size: int = 4,
+        max_messages_per_connection: int = 100,
+        idle_check_after: float = 30.0,
+        timeout: float = 30.0,
+        smtp_factory: Optional[Callable[..., smtplib.SMTP]] = None,
+    ):
+        """
+        Args:
+            host: SMTP server hostname
+            port: SMTP server port
+            username: Login user (no AUTH if empty)
+            password: Login password
+            use_tls: Run STARTTLS after connecting
+            max_size: Maximum open connections (callers block beyond this)
+            max_messages_per_connection: Recycle a connection after this many messages
+            idle_check_after: Seconds idle after which a connection is NOOP-checked before reuse
+            timeout: Socket timeout and maximum wait for a free connection
+            smtp_factory: Callable(host, port, timeout=...) returning a connected SMTP
+                object (defaults to smtplib.SMTP; injectable for tests)
+        """
+        self.host = host
+        self.port = int(port)
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_size = max_size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_check_after = idle_check_after
+        self.timeout = timeout
+        self.smtp_factory = smtp_factory or smtplib.SMTP
+
+        self._idle: deque[PooledConnection] = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._closed = False
+
+        # Counters exposed via stats()
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.connections_recycled = 0
+        self.health_check_failures = 0
+        self.reconnects = 0
+        self.messages_sent = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def send_message(self, msg: Message) -> None:
+        """
+        Send a message on a pooled connection.
+
+        A connection-level failure (server hung up, socket error) is retried
+        once on a fresh connection. Message-level errors (refused recipient,
+        rejected data) are raised to the caller and the connection is kept.
+        """
+        for attempt in range(2):
+            conn = self._acquire()
+            try:
+                conn.smtp.send_message(msg)
+            except OSError as e:
+                if not is_connection_error(e):
+                    self._release(conn)
+                    raise
+                self._discard(conn)
+                if attempt == 0:
+                    with self._lock:
+                        self.reconnects += 1
+                    logger.warning(f"SMTP connection lost ({str(e)}), reconnecting")
+                    continue
+                raise
+            except BaseException:
+                self._discard(conn)
+                raise
+
+            conn.messages_sent += 1
+            conn.last_used = time.monotonic()
+            with self._lock:
+                self.messages_sent += 1
+            self._release(conn)
+            return
+
+    def close(self) -> None:
+        """QUIT every idle connection; connections in use are closed when released."""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn in idle:
+            self._quit(conn)
+
+    def stats(self) -> dict:
+        """Pool counters for monitoring."""
+        with self._lock:
+            return {
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                "connections_opened": self.connections_opened,
+                "connections_reused": self.connections_reused,
+                "connections_recycled": self.connections_recycled,
+                "health_check_failures": self.health_check_failures,
+                "reconnects": self.reconnects,
+                "messages_sent": self.messages_sent,
+            }
+
+    # ------------------------------------------------------------------
+    # Connection lifecycle
+    # ------------------------------------------------------------------
+
+    def _acquire(self) -> PooledConnection:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise smtplib.SMTPException("Timed out waiting for a free SMTP connection")
+
+        try:
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    return self._connect()
+                if self._is_healthy(conn):
+                    with self._lock:
+                        self.connections_reused += 1
+                    return conn
+                self._quit(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn: PooledConnection) -> None:
+        """Return a connection to the pool, or close it if it is due for recycling."""
+        try:
+            recycle = conn.messages_sent >= self.max_messages_per_connection
+            with self._lock:
+                keep = not recycle and not self._closed
+                if keep:
+                    self._idle.append(conn)
+                elif recycle:
+                    self.connections_recycled += 1
+            if not keep:
+                self._quit(conn)
+        finally:
+            self._slots.release()
+
+    def _discard(self, conn: PooledConnection) -> None:
+        """Drop a broken connection and free its slot."""
+        try:
+            self._close_socket(conn)
+        finally:
+            self._slots.release()
+
+    def _connect(self) -> PooledConnection:
+        smtp = self.smtp_factory(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+        with self._lock:
+            self.connections_opened += 1
+        return PooledConnection(smtp)
+
+    def _is_healthy(self, conn: PooledConnection) -> bool:
+        """NOOP-check connections that sat idle long enough for the server to drop them."""
+        if time.monotonic() - conn.last_used < self.idle_check_after:
+            return True
+        try:
+            code, _message = conn.smtp.noop()
+        except (smtplib.SMTPException, OSError):
+            code = None
+        if code == 250:
+            conn.last_used = time.monotonic()
+            return True
+        with self._lock:
+            self.health_check_failures += 1
+        return False
+
+    @staticmethod
+    def _quit(conn: PooledConnection) -> None:
+        try:
+            conn.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            SMTPConnectionPool._close_socket(conn)
+
+    @staticmethod
+    def _close_socket(conn: PooledConnection) -> None:
+        with contextlib.suppress(OSError):
+            conn.smtp.close()
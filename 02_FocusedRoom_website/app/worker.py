@@ -0,0 +1,572 @@
+"""
+Background Worker for Focused Room Website
+
+Drains the DB-backed job queue (see app/utils/job_queue.py) outside the web
+process, so Gemini calls and email delivery never pin a gunicorn worker.
+
+Usage:
+    python -m app.worker            # run until SIGTERM/SIGINT
+    python -m app.worker --once     # drain the queue once and exit
+    python -m app.worker --refresh-norms   # update percentile norm tables and exit
+    python -m app.worker --refresh-archetypes   # re-cluster and write archetype reports, exit
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from flask import current_app
+
+from .models import BackgroundJob, BigFiveResult, db
+from .utils.archetypes import refresh_archetypes
+from .utils.emailer import email_service
+from .utils.gemini_client import generate_personality_suggestions, get_gemini_client
+from .utils.job_queue import (
+    BIG_FIVE_REPORT_JOB,
+    claim_next_job,
+    complete_job,
+    fail_job,
+    heartbeat_job,
+)
+from .utils.norms import refresh_norms
+from .utils.report_cache import purge_expired_reports
+from .utils.validators import extract_name_from_big_five_report, extract_name_from_email
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds between writes of a report's partial text while it is generated
+REPORT_PROGRESS_INTERVAL = 0.5
+
+
+def in_hour_window(window: str, hour: int) -> bool:
+    """
+    Whether hour (0-23) falls in a "start-end" window of hours, end exclusive.
+
+    Windows may wrap midnight ("22-4"); an empty window matches every hour.
+
+    Example:
+        >>> in_hour_window("2-6", 5), in_hour_window("22-4", 1), in_hour_window("2-6", 6)
+        (True, True, False)
+    """
+    if not window or not window.strip():
+        return True
+    start, end = (int(part) % 24 for part in window.split("-", 1))
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def _get_gemini_provider() -> str:
+    """Helper function to get current Gemini provider for logging."""
+    try:
+        client = get_gemini_client()
+        return client.provider
+    except Exception:
+        return "unknown"
+
+
+def send_big_five_emails(
+    email: str, suggestions: str, scores: dict[str, float], is_new_subscriber: bool = False
+) -> bool:
+    """
+    Send the Welcome email (new subscribers only) and the Big Five report email.
+
+    Args:
+        email: Recipient email address
+        suggestions: Markdown report stored on the result
+        scores: Big Five trait scores (0-100)
+        is_new_subscriber: Whether this customer was created by this submission
+
+    Returns:
+        True if at least one email was sent successfully
+    """
+    welcome_email_sent = False
+    report_email_sent = False
+
+    try:
+        # Extract name from Big Five report (best source!)
+        user_name = extract_name_from_big_five_report(suggestions)
+        if not user_name:
+            # Fallback to email-based name extraction
+            user_name = extract_name_from_email(email)
+
+        # NEW SUBSCRIBERS: Send Welcome email first
+        if is_new_subscriber:
+            try:
+                welcome_result = email_service.send_welcome_vision_email(email, user_name)
+                welcome_email_sent = welcome_result.get("success", False)
+                if welcome_email_sent:
+                    logger.info(
+                        f"Sent Welcome email to new subscriber: {email} (Name: {user_name})"
+                    )
+                else:
+                    logger.error(
+                        f"Failed to send Welcome email to {email}: {welcome_result.get('error')}"
+                    )
+            except Exception as welcome_error:
+                logger.error(f"Exception sending Welcome email to {email}: {str(welcome_error)}")
+
+        # ALWAYS: Send Big Five Report email
+        email_result = email_service.send_big_five_report_email(
+            email=email, user_name=user_name, markdown_report=suggestions, scores=scores
+        )
+
+        report_email_sent = email_result.get("success", False)
+        if report_email_sent:
+            logger.info(f"Sent Big Five report email to {email} (Name: {user_name})")
+        else:
+            logger.error(f"Failed to send Big Five email to {email}: {email_result.get('error')}")
+
+    except Exception as email_error:
+        # Don't fail the job if email fails - just log it
+        logger.error(f"Exception sending emails to {email}: {str(email_error)}")
+
+    return welcome_email_sent or report_email_sent
+
+
+def publish_report_progress(result_id: int, text: Optional[str]) -> bool:
+    """
+    Store the text generated so far on a pending result (None clears it).
+
+    /big-five/stream relays it to the browser while the worker is still writing. Runs
+    on its own connection so the job's session is left alone; results that are no
+    longer pending (e.g. a provisional report was served) are not touched.
+
+    Returns:
+        True if the text was stored
+    """
+    table = BigFiveResult.__table__
+    with db.engine.begin() as connection:
+        updated = connection.execute(
+            table.update()
+            .where((table.c.id == result_id) & (table.c.status == "pending"))
+            .values(suggestions=text)
+        )
+    return updated.rowcount == 1
+
+
+def _report_progress_publisher(result_id: int) -> Callable[[str], None]:
+    """on_progress callback publishing the partial report every REPORT_PROGRESS_INTERVAL."""
+    last_published = 0.0
+
+    def publish(text: str) -> None:
+        nonlocal last_published
+        if time.monotonic() - last_published < REPORT_PROGRESS_INTERVAL:
+            return
+        last_published = time.monotonic()
+        try:
+            publish_report_progress(result_id, text)
+        except Exception as e:
+            logger.warning(f"Could not publish report progress for result {result_id}: {e}")
+
+    return publish
+
+
+def process_big_five_report_job(job: BackgroundJob) -> dict[str, Any]:
+    """
+    Generate, store and email the AI report for a pending BigFiveResult.
+
+    Safe to re-run: if the result already has its report (e.g. the worker died
+    after committing it), generation is skipped and only emails are sent.
+
+    In async mode the report is streamed from Gemini and its partial text published
+    on the result, which /big-five/stream relays to the browser.
+
+    Args:
+        job: Claimed BIG_FIVE_REPORT_JOB job
+
+    Returns:
+        Dict with the stored suggestions and whether an email was sent
+    """
+    result = db.session.get(BigFiveResult, job.result_id)
+    if result is None:
+        raise ValueError(f"BigFiveResult {job.result_id} not found")
+
+    payload = job.payload or {}
+    scores = result.scores.get("scores", {})
+    percentiles = result.scores.get("percentiles", {})
+
+    if result.status != "complete" or not result.suggestions:
+        # Generate AI-powered personality suggestions. While attempts remain, a Gemini
+        # failure (or open circuit) raises so the queue retries with backoff; the last
+        # attempt and inline mode (no worker to retry) use the generic fallback
+        config = current_app.config
+        last_attempt = (job.attempts or 0) >= config.get("JOB_MAX_ATTEMPTS", 3)
+        is_async = config.get("BIG_FIVE_ASYNC", True)
+        try:
+            result.suggestions = generate_personality_suggestions(
+                scores=scores,
+                percentiles=percentiles,
+                demographics=payload.get("demographics") or {},
+                fallback=last_attempt or not is_async,
+                on_progress=_report_progress_publisher(job.result_id) if is_async else None,
+            )
+        except Exception:
+            # Drop the partial text, so streams don't show a report that will be redone
+            db.session.rollback()
+            try:
+                publish_report_progress(job.result_id, None)
+            except Exception as e:
+                logger.warning(f"Could not clear report progress for result {job.result_id}: {e}")
+            raise
+        result.status = "complete"
+        db.session.commit()
+        logger.info(
+            f"Stored AI report for Big Five result {result.id} using {_get_gemini_provider()}"
+        )
+
+    email_sent = False
+    email = payload.get("email")
+    if email:
+        email_sent = send_big_five_emails(
+            email=email,
+            suggestions=result.suggestions,
+            scores=scores,
+            is_new_subscriber=payload.get("is_new_subscriber", False),
+        )
+
+    return {"suggestions": result.suggestions, "email_sent": email_sent}
+
+
+# Job kind -> handler
+JOB_HANDLERS = {
+    BIG_FIVE_REPORT_JOB: process_big_five_report_job,
+}
+
+
+@contextmanager
+def _job_heartbeat(job: BackgroundJob) -> Iterator[None]:
+    """Refresh the job's lock every JOB_LOCK_TIMEOUT / 3 seconds while the block runs."""
+    app = current_app._get_current_object()
+    interval = app.config.get("JOB_LOCK_TIMEOUT", 300) / 3
+    job_id, worker_id = job.id, job.locked_by
+    stop = threading.Event()
+
+    def beat() -> None:
+        with app.app_context():
+            while not stop.wait(interval):
+                try:
+                    if not heartbeat_job(job_id, worker_id):
+                        return
+                except Exception as e:
+                    logger.warning(f"Heartbeat for job {job_id} failed: {str(e)}")
+
+    thread = threading.Thread(target=beat, name=f"job-{job_id}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+
+
+def run_job(job: BackgroundJob, max_attempts: int = 3, retry_delay: int = 30) -> Optional[dict]:
+    """
+    Run a claimed job and record its outcome on the queue.
+
+    While the handler runs, a heartbeat keeps the job's lock fresh, so a report
+    that takes longer than JOB_LOCK_TIMEOUT is not claimed by a second worker.
+
+    Returns:
+        The handler's result, or None if the job failed
+    """
+    handler = JOB_HANDLERS.get(job.kind)
+    if handler is None:
+        fail_job(job, f"Unknown job kind: {job.kind}", max_attempts=0)
+        return None
+
+    try:
+        with _job_heartbeat(job):
+            outcome = handler(job)
+        complete_job(job)
+        return outcome
+    except Exception as e:
+        logger.error(f"Job {job.id} ({job.kind}) raised: {str(e)}")
+        db.session.rollback()
+        will_retry = fail_job(job, str(e), max_attempts=max_attempts, retry_delay=retry_delay)
+        if not will_retry and job.result_id:
+            result = db.session.get(BigFiveResult, job.result_id)
+            if result is not None and result.status == "pending":
+                result.status = "failed"
+                db.session.commit()
+            elif result is not None and result.status == "provisional":
+                # The generic report served while waiting becomes the final one
+                result.status = "complete"
+                db.session.commit()
+        return None
+
+
+# Threads finishing inline jobs that outlived their request's latency budget
+_deferred_pool: Optional[ThreadPoolExecutor] = None
+_deferred_pool_lock = threading.Lock()
+
+
+def _get_deferred_pool() -> ThreadPoolExecutor:
+    global _deferred_pool
+    with _deferred_pool_lock:
+        if _deferred_pool is None:
+            _deferred_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="deferred-job")
+        return _deferred_pool
+
+
+def _run_job_in_app_context(
+    app, job_id: int, max_attempts: int, retry_delay: int
+) -> Optional[dict]:
+    with app.app_context():
+        try:
+            job = db.session.get(BackgroundJob, job_id)
+            return run_job(job, max_attempts=max_attempts, retry_delay=retry_delay)
+        finally:
+            db.session.remove()
+
+
+def run_job_with_deadline(
+    job: BackgroundJob, budget: float, max_attempts: int = 3, retry_delay: int = 30
+) -> tuple[Optional[dict], bool]:
+    """
+    Run a claimed job in a background thread, waiting at most budget seconds for it.
+
+    A job that misses the deadline keeps running after the caller returns and
+    records its own outcome (stored report, emails) when it finishes.
+
+    Args:
+        job: Claimed job (committed, so the thread's own session can load it)
+        budget: Seconds to wait
+        max_attempts: Passed to run_job
+        retry_delay: Passed to run_job
+
+    Returns:
+        (outcome, finished); outcome is run_job's result when finished in time
+    """
+    future = _get_deferred_pool().submit(
+        _run_job_in_app_context,
+        current_app._get_current_object(),
+        job.id,
+        max_attempts,
+        retry_delay,
+    )
+    try:
+        return future.result(timeout=budget), True
+    except FutureTimeoutError:
+        logger.info(f"Job {job.id} ({job.kind}) over its {budget}s budget, finishing in background")
+        return None, False
+
+
+def store_provisional_report(result_id: int, suggestions: str) -> bool:
+    """
+    Store a stand-in report on a pending result (status 'provisional').
+
+    The update only applies while the result is still pending, so a report job
+    that finished in the meantime is never overwritten; the job replaces the
+    stand-in (status 'complete') when it finishes.
+
+    Returns:
+        True if the stand-in was stored
+    """
+    stored = (
+        BigFiveResult.query.filter_by(id=result_id, status="pending").update(
+            {"suggestions": suggestions, "status": "provisional"}, synchronize_session=False
+        )
+        == 1
+    )
+    db.session.commit()
+    return stored
+
+
+class Worker:
+    """Polling loop that claims and runs jobs until asked to stop."""
+
+    def __init__(self, app, worker_id: Optional[str] = None):
+        self.app = app
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = app.config["WORKER_POLL_INTERVAL"]
+        self.max_attempts = app.config["JOB_MAX_ATTEMPTS"]
+        self.retry_delay = app.config["JOB_RETRY_DELAY"]
+        self.lock_timeout = app.config["JOB_LOCK_TIMEOUT"]
+        self.norms_refresh_interval = app.config.get("NORMS_REFRESH_INTERVAL", 0)
+        self._next_norms_refresh = 0.0
+        self.report_cache_purge_interval = app.config.get("REPORT_CACHE_PURGE_INTERVAL", 0)
+        self._next_report_cache_purge = 0.0
+        self.archetype_refresh_interval = app.config.get("ARCHETYPE_REFRESH_INTERVAL", 0)
+        self.archetype_offpeak_hours = app.config.get("ARCHETYPE_OFFPEAK_HOURS", "")
+        self._next_archetype_refresh = 0.0
+        self.running = True
+
+    def stop(self, *_args) -> None:
+        """Finish the current job, then exit the loop."""
+        logger.info(f"Worker {self.worker_id} shutting down")
+        self.running = False
+
+    def run_once(self) -> int:
+        """
+        Drain all currently due jobs.
+
+        Returns:
+            Number of jobs processed
+        """
+        processed = 0
+        with self.app.app_context():
+            while self.running:
+                job = claim_next_job(self.worker_id, lock_timeout=self.lock_timeout)
+                if job is None:
+                    break
+                logger.info(f"Worker {self.worker_id} running job {job.id} ({job.kind})")
+                run_job(job, max_attempts=self.max_attempts, retry_delay=self.retry_delay)
+                processed += 1
+            db.session.remove()
+        return processed
+
+    def refresh_norms_if_due(self) -> Optional[dict]:
+        """
+        Fold new results into the norm tables every NORMS_REFRESH_INTERVAL seconds.
+
+        Returns:
+            refresh_norms() summary, or None if no refresh was due
+        """
+        if self.norms_refresh_interval <= 0 or time.monotonic() < self._next_norms_refresh:
+            return None
+        self._next_norms_refresh = time.monotonic() + self.norms_refresh_interval
+
+        with self.app.app_context():
+            try:
+                return refresh_norms()
+            except Exception as e:
+                logger.error(f"Norm refresh failed: {str(e)}")
+                db.session.rollback()
+                return None
+            finally:
+                db.session.remove()
+
+    def purge_report_cache_if_due(self) -> Optional[int]:
+        """
+        Delete expired report cache rows every REPORT_CACHE_PURGE_INTERVAL seconds.
+
+        Returns:
+            Number of rows deleted, or None if no purge was due
+        """
+        if (
+            self.report_cache_purge_interval <= 0
+            or time.monotonic() < self._next_report_cache_purge
+        ):
+            return None
+        self._next_report_cache_purge = time.monotonic() + self.report_cache_purge_interval
+
+        with self.app.app_context():
+            try:
+                deleted = purge_expired_reports()
+                if deleted:
+                    logger.info(f"Purged {deleted} expired report cache row(s)")
+                return deleted
+            except Exception as e:
+                logger.error(f"Report cache purge failed: {str(e)}")
+                db.session.rollback()
+                return None
+            finally:
+                db.session.remove()
+
+    def refresh_archetypes_if_due(self) -> Optional[dict]:
+        """
+        Re-cluster archetypes and write missing base reports every
+        ARCHETYPE_REFRESH_INTERVAL seconds, during ARCHETYPE_OFFPEAK_HOURS only.
+
+        Returns:
+            refresh_archetypes() summary, or None if no refresh was due
+        """
+        if self.archetype_refresh_interval <= 0 or time.monotonic() < self._next_archetype_refresh:
+            return None
+        if not in_hour_window(self.archetype_offpeak_hours, datetime.utcnow().hour):
+            return None
+        self._next_archetype_refresh = time.monotonic() + self.archetype_refresh_interval
+
+        with self.app.app_context():
+            try:
+                return self._refresh_archetypes()
+            except Exception as e:
+                logger.error(f"Archetype refresh failed: {str(e)}")
+                db.session.rollback()
+                return None
+            finally:
+                db.session.remove()
+
+    def _refresh_archetypes(self) -> dict:
+        """Call inside an app context."""
+        config = self.app.config
+        return refresh_archetypes(
+            min_members=config.get("ARCHETYPE_MIN_MEMBERS", 20),
+            max_archetypes=config.get("ARCHETYPE_MAX_ARCHETYPES", 100),
+            max_reports=config.get("ARCHETYPE_MAX_REPORTS_PER_RUN"),
+        )
+
+    def run_forever(self) -> None:
+        """Poll the queue until stopped."""
+        logger.info(f"Worker {self.worker_id} started (poll interval {self.poll_interval}s)")
+        while self.running:
+            try:
+                self.refresh_norms_if_due()
+                self.purge_report_cache_if_due()
+                self.refresh_archetypes_if_due()
+                if self.run_once() == 0:
+                    time.sleep(self.poll_interval)
+            except Exception as e:
+                # Keep the worker alive through transient DB errors
+                logger.error(f"Worker loop error: {str(e)}")
+                time.sleep(self.poll_interval)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command-line entry point for ``python -m app.worker``."""
+    from dotenv import load_dotenv
+
+    # Load .env like run.py does, before the app reads its Config
+    load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env")
+
+    parser = argparse.ArgumentParser(description="Focused Room background job worker")
+    parser.add_argument("--once", action="store_true", help="Drain the queue once and exit")
+    parser.add_argument(
+        "--refresh-norms",
+        action="store_true",
+        help="Fold new results into the percentile norm tables and exit",
+    )
+    parser.add_argument(
+        "--refresh-archetypes",
+        action="store_true",
+        help="Re-cluster results into archetypes, write missing base reports and exit",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from . import create_app
+
+    worker = Worker(create_app())
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+
+    if args.refresh_norms:
+        with worker.app.app_context():
+            summary = refresh_norms()
+        logger.info(f"Norm refresh: {summary}")
+    elif args.refresh_archetypes:
+        with worker.app.app_context():
+            summary = worker._refresh_archetypes()
+        logger.info(f"Archetype refresh: {summary}")
+    elif args.once:
+        processed = worker.run_once()
+        logger.info(f"Processed {processed} job(s)")
+    else:
+        worker.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Big Five Batch Scoring Benchmark for Focused Room Website
+
+Compares rows/sec of the per-answer scorer (Python lists + statistics.mean)
+with the vectorized NumPy batch scorer on random Likert answers:
+
+- scalar: compute_bigfive_scores called once per row
+- batch:  compute_bigfive_scores_batch called once for all rows
+
+Usage:
+    python -m benchmarks.bench_bigfive_batch --rows 1000000 --scalar-rows 20000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.utils.bigfive import compute_bigfive_scores, compute_bigfive_scores_batch
+
+
+def _rows_per_sec(func, rows: int) -> float:
+    start = time.perf_counter()
+    func()
+    return rows / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Big Five batch scoring")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--scalar-rows", type=int, default=20_000)
+    parser.add_argument("--items", type=int, choices=[44, 50], default=44)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    answers = rng.integers(1, 6, size=(args.rows, args.items), dtype=np.int8)
+    scalar_answers = answers[: args.scalar_rows].tolist()
+
+    scalar = _rows_per_sec(
+        lambda: [compute_bigfive_scores(row) for row in scalar_answers], len(scalar_answers)
+    )
+    batch = _rows_per_sec(lambda: compute_bigfive_scores_batch(answers), args.rows)
+
+    print(f"items={args.items} batch_rows={args.rows} scalar_rows={len(scalar_answers)}")
+    print(f"{'path':<8} {'rows/sec':>12}")
+    print(f"{'scalar':<8} {scalar:>12,.0f}")
+    print(f"{'batch':<8} {batch:>12,.0f}")
+    print(f"speedup: {batch / scalar:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Similarity Index Benchmark for Focused Room Website
+
+Query latency of the "people like you" KD-tree against a brute-force scan of
+the same contiguous float32 array, on synthetic trait vectors:
+
+- kdtree: KDTree.query (what SimilarityIndex uses for indexed results)
+- brute:  squared distances to every vector + argpartition
+
+Usage:
+    python -m benchmarks.bench_similarity --rows 1000000 --queries 500
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.utils.similarity import KDTree
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the similarity index")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Trait scores cluster around the middle and take discrete values (means of 1-5 answers)
+    vectors = np.rint(np.clip(rng.normal(50, 15, size=(args.rows, 5)), 0, 100) / 2.5) * 2.5
+    vectors = vectors.astype(np.float32)
+    queries = vectors[rng.integers(0, args.rows, args.queries)]
+
+    start = time.perf_counter()
+    tree = KDTree(vectors)
+    build = time.perf_counter() - start
+
+    timings = {"kdtree": [], "brute": []}
+    for query in queries:
+        start = time.perf_counter()
+        tree.query(query, args.k)
+        timings["kdtree"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        np.argpartition(((vectors - query) ** 2).sum(axis=1), args.k)[: args.k]
+        timings["brute"].append(time.perf_counter() - start)
+
+    print(f"rows={args.rows} queries={args.queries} k={args.k} build={build:.2f}s")
+    print(f"{'path':<8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, samples in timings.items():
+        p50, p99 = np.percentile(samples, [50, 99]) * 1000
+        print(f"{name:<8} {p50:>8.3f} {p99:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+SMTP Transport Benchmark for Focused Room Website
+
+Compares the old connect-per-message SMTP path with the pooled transport in
+app/utils/smtp_pool.py against a local aiosmtpd sink.
+
+The sink runs on loopback without TLS, so the per-message handshake measured
+here is only TCP + EHLO; against a real provider (STARTTLS + AUTH over the
+internet) the gap is considerably wider. Use --latency to add a simulated
+round-trip delay per SMTP command on the server side.
+
+Usage:
+    pip install aiosmtpd
+    python -m benchmarks.bench_smtp_pool --messages 500 --threads 4
+"""
+
+import argparse
+import asyncio
+import smtplib
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+
+from app.utils.smtp_pool import SMTPConnectionPool
+
+
+class SinkHandler:
+    """Accepts and discards every message, optionally delaying each SMTP command."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.messages = 0
+        self._lock = threading.Lock()
+
+    async def _delay(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):  # noqa: N802
+        await self._delay()
+        session.host_name = hostname
+        return responses
+
+    async def handle_MAIL(self, server, session, envelope, address, mail_options):  # noqa: N802
+        await self._delay()
+        envelope.mail_from = address
+        envelope.mail_options.extend(mail_options)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):  # noqa: N802
+        await self._delay()
+        with self._lock:
+            self.messages += 1
+        return "250 Message accepted for delivery"
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _message(index: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "Focused Room <noreply@focusedroom.com>"
+    msg["To"] = f"user{index}@example.com"
+    msg["Subject"] = "Your Big Five report"
+    msg.set_content("Benchmark body\n" * 40)
+    return msg
+
+
+def _run(send, messages: int, threads: int) -> float:
+    """Send `messages` messages with `threads` concurrent senders; returns messages/sec."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(send, range(messages)))
+    return messages / (time.perf_counter() - start)
+
+
+def main() -> None:
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError as e:
+        raise SystemExit("aiosmtpd is required: pip install aiosmtpd") from e
+
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs per-message SMTP")
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Simulated server delay per command (seconds)"
+    )
+    args = parser.parse_args()
+
+    handler = SinkHandler(latency=args.latency)
+    port = _free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+
+    try:
+
+        def send_per_connection(index: int) -> None:
+            # Previous EmailService._send_via_smtp behaviour: new session per message
+            with smtplib.SMTP("127.0.0.1", port) as server:
+                server.send_message(_message(index))
+
+        pool = SMTPConnectionPool("127.0.0.1", port, use_tls=False, max_size=args.pool_size)
+
+        def send_pooled(index: int) -> None:
+            pool.send_message(_message(index))
+
+        before = _run(send_per_connection, args.messages, args.threads)
+        after = _run(send_pooled, args.messages, args.threads)
+        pool.close()
+    finally:
+        controller.stop()
+
+    print(
+        f"messages={args.messages} threads={args.threads} pool_size={args.pool_size} "
+        f"latency={args.latency}s"
+    )
+    print(f"connect-per-message: {before:10.1f} msg/s")
+    print(f"pooled:              {after:10.1f} msg/s  ({after / before:.1f}x)")
+    print(f"pool stats: {pool.stats()}")
+    print(f"sink received {handler.messages} messages")
+
+
+if __name__ == "__main__":
+    main()
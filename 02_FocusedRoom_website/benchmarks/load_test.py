@@ -0,0 +1,209 @@
+"""
+Load Test Driver for Focused Room Website
+
+Fires concurrent requests at the main routes and reports p50/p95/p99/max
+latency and requests/sec per route:
+
+- big-five:  POST /big-five with 44 random answers
+- subscribe: POST /api/subscribe with a unique address
+- blog:      GET /blog and GET /blog/<slug> for the catalog's posts
+
+Two modes:
+
+- client: in-process Flask test client against a throwaway SQLite database,
+  with Gemini replaced by the fake model (app/utils/fake_gemini.py). Measures
+  application time only, no HTTP server or network.
+- http:   real HTTP against a running server, e.g. gunicorn started with the
+  fake model so reports don't hit the real API:
+
+      GEMINI_FAKE_MODEL=true GEMINI_FAKE_LATENCY_MEDIAN=2 \\
+          gunicorn --workers 4 --bind 127.0.0.1:5000 run:app
+      python -m benchmarks.load_test --mode http --base-url http://127.0.0.1:5000
+
+Every request carries a different X-Forwarded-For so the per-IP rate limit on
+/api/subscribe doesn't turn the run into a 429 benchmark. /big-five is
+enqueue-only with BIG_FIVE_ASYNC=true; pass --inline in client mode (or start
+the server with BIG_FIVE_ASYNC=false) to include report generation.
+
+Usage:
+    python -m benchmarks.load_test --requests 500 --concurrency 16
+    python -m benchmarks.load_test --routes big-five --inline --fake-latency 1.5
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+ROUTES = ("big-five", "subscribe", "blog")
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def _requests_for(route: str, count: int, slugs: list[str]) -> list[tuple[str, str, dict]]:
+    """(method, path, json body) for each request of a route."""
+    if route == "big-five":
+        return [
+            ("POST", "/big-five", {"answers": [random.randint(1, 5) for _ in range(44)]})
+            for _ in range(count)
+        ]
+    if route == "subscribe":
+        return [
+            ("POST", "/api/subscribe", {"email": f"load-{uuid.uuid4().hex[:12]}@example.com"})
+            for _ in range(count)
+        ]
+    paths = ["/blog"] + [f"/blog/{slug}" for slug in slugs]
+    return [("GET", paths[i % len(paths)], None) for i in range(count)]
+
+
+# ------------------------------------------------------------------
+# Senders: one per thread, returning the response status code
+# ------------------------------------------------------------------
+
+
+def _client_sender(app) -> Callable[[str, str, dict, dict], int]:
+    local = threading.local()
+
+    def send(method: str, path: str, body: dict, headers: dict) -> int:
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        return local.client.open(path, method=method, json=body, headers=headers).status_code
+
+    return send
+
+
+def _http_sender(base_url: str, timeout: float) -> Callable[[str, str, dict, dict], int]:
+    import requests
+
+    local = threading.local()
+
+    def send(method: str, path: str, body: dict, headers: dict) -> int:
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        response = local.session.request(
+            method, base_url.rstrip("/") + path, json=body, headers=headers, timeout=timeout
+        )
+        return response.status_code
+
+    return send
+
+
+def _run_route(send, requests_: list, concurrency: int) -> dict:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    lock = threading.Lock()
+
+    def one(index: int) -> None:
+        method, path, body = requests_[index]
+        headers = {"X-Forwarded-For": f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}"}
+        start = time.perf_counter()
+        try:
+            status = send(method, path, body, headers)
+        except Exception:
+            status = 0  # connection error / timeout
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(len(requests_))))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": sum(n for status, n in statuses.items() if status == 0 or status >= 400),
+        "statuses": {str(status): n for status, n in sorted(statuses.items())},
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        "rps": len(latencies) / wall if wall else 0.0,
+    }
+
+
+def _create_client_app(args):
+    """Build the app on a temp SQLite file with the fake model (env must be set first)."""
+    db_path = os.path.join(tempfile.mkdtemp(prefix="focusedroom-load-"), "load.db")
+    defaults = {
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "GEMINI_FAKE_MODEL": "true",
+        "GEMINI_FAKE_LATENCY_MEDIAN": str(args.fake_latency),
+        "GEMINI_FAKE_ERROR_RATE": str(args.fake_error_rate),
+        "BIG_FIVE_ASYNC": "false" if args.inline else "true",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+    from app import create_app
+
+    return create_app()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the main routes")
+    parser.add_argument("--mode", choices=("client", "http"), default="client")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--routes", default=",".join(ROUTES))
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=60.0, help="http mode only")
+    parser.add_argument("--inline", action="store_true", help="client mode: BIG_FIVE_ASYNC=false")
+    parser.add_argument("--fake-latency", type=float, default=2.0, help="client mode: median s")
+    parser.add_argument("--fake-error-rate", type=float, default=0.0, help="client mode")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    routes = [route.strip() for route in args.routes.split(",") if route.strip()]
+    unknown = set(routes) - set(ROUTES)
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(sorted(unknown))}")
+
+    if args.mode == "client":
+        send = _client_sender(_create_client_app(args))
+    else:
+        send = _http_sender(args.base_url, args.timeout)
+
+    # Imported after the client app so Config sees the load-test environment
+    from app.utils.blog_catalog import blog_catalog
+
+    slugs = [post["slug"] for post in blog_catalog.get_posts()]
+
+    results = {}
+    for route in routes:
+        results[route] = _run_route(
+            send, _requests_for(route, args.requests, slugs), args.concurrency
+        )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"mode={args.mode} requests/route={args.requests} concurrency={args.concurrency}")
+    print(
+        f"{'route':<10} {'requests':>8} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'p99 ms':>9} {'max ms':>9} {'req/s':>8}"
+    )
+    for route, r in results.items():
+        print(
+            f"{route:<10} {r['requests']:>8} {r['errors']:>7} {r['p50_ms']:>9.1f} "
+            f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['max_ms']:>9.1f} {r['rps']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
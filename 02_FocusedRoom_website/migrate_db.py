@@ -3,11 +3,54 @@
 Database Migration Script for Phase 2
 
 Adds subscriber_id foreign key to BigFiveResult table.
+Adds columns introduced after the initial schema (create_all never alters tables).
 Safe to run multiple times (idempotent).
 """
 
+from sqlalchemy import inspect, text
+
 from app import create_app
-from app.models import db
+from app.models import BlogEngagement, BlogEngagementCounter, db
+from app.utils.blog_engagement import rebuild_engagement_counters
+
+# (table, column, DDL type) added to existing tables after their initial creation.
+# The type may be a SQLAlchemy type when its DDL differs per dialect (BLOB vs BYTEA).
+NEW_COLUMNS = [
+    ("big_five_result", "status", "VARCHAR(20) NOT NULL DEFAULT 'complete'"),
+    ("big_five_result", "raw_answers", db.LargeBinary()),
+    ("big_five_result", "access_token", "VARCHAR(64)"),
+]
+
+# (index name, table, columns, unique) for indexes on NEW_COLUMNS
+NEW_INDEXES = [
+    ("ix_big_five_result_access_token", "big_five_result", "access_token", True),
+]
+
+
+def add_missing_columns():
+    """Add any NEW_COLUMNS that an existing database does not have yet."""
+    inspector = inspect(db.engine)
+    for table, column, ddl in NEW_COLUMNS:
+        existing = {col["name"] for col in inspector.get_columns(table)}
+        if column not in existing:
+            if not isinstance(ddl, str):
+                ddl = ddl.compile(dialect=db.engine.dialect)
+            db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+            print(f"   + {table}.{column}")
+    for name, table, columns, unique in NEW_INDEXES:
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            kind = "UNIQUE INDEX" if unique else "INDEX"
+            db.session.execute(text(f"CREATE {kind} {name} ON {table} ({columns})"))
+            print(f"   + {name}")
+    db.session.commit()
+
+
+def backfill_engagement_counters():
+    """Populate blog_engagement_counter from existing engagement rows (first run only)."""
+    if BlogEngagementCounter.query.first() is None and BlogEngagement.query.first() is not None:
+        rebuilt = rebuild_engagement_counters()
+        print(f"   + blog_engagement_counter backfilled ({rebuilt} rows)")
 
 
 def migrate_database():
@@ -19,6 +62,8 @@ def migrate_database():
 
         # Create all tables (idempotent - won't recreate existing tables)
         db.create_all()
+        add_missing_columns()
+        backfill_engagement_counters()
 
         print("✅ Database migration complete!")
         print("   - All tables created/updated")
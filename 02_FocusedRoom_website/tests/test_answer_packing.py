@@ -0,0 +1,92 @@
+"""
+Unit tests for bit-packed raw answer storage.
+
+Tests cover:
+- Pack/unpack round trips for 44 and 50 items
+- Packed sizes (3 bits per answer)
+- Batch decoding into NumPy arrays
+- Invalid input
+- /big-five storing packed answers on the result
+"""
+
+import numpy as np
+import pytest
+
+from app.models import BigFiveResult
+from app.utils.answer_packing import pack_answers, packed_size, unpack_answers, unpack_answers_batch
+
+ANSWERS = [3, 4, 2, 5, 3, 4, 2, 3, 4, 5, 3, 2, 4, 3, 5, 4, 2, 3, 4, 5, 3, 4] * 2
+
+
+class TestAnswerPacking:
+    """Test suite for pack_answers / unpack_answers."""
+
+    @pytest.mark.parametrize("n_items, size", [(44, 18), (50, 20)])
+    def test_round_trip_and_size(self, n_items, size):
+        """Test that answers survive packing in 3 bits each plus a header byte."""
+        answers = np.random.default_rng(n_items).integers(1, 6, size=n_items).tolist()
+
+        packed = pack_answers(answers)
+
+        assert len(packed) == size == packed_size(n_items)
+        decoded = unpack_answers(packed)
+        assert decoded.dtype == np.int8
+        assert decoded.tolist() == answers
+
+    def test_accepts_whole_number_floats_and_strings(self):
+        """Test the same inputs compute_bigfive_scores accepts, when they are whole numbers."""
+        assert unpack_answers(pack_answers(["3"] * 44)).tolist() == [3] * 44
+        assert unpack_answers(pack_answers([5.0] * 50)).tolist() == [5] * 50
+
+    def test_batch_decode(self):
+        """Test that many packed rows decode into one (N, items) array."""
+        answers = np.random.default_rng(0).integers(1, 6, size=(300, 50))
+        packed = [pack_answers(row) for row in answers]
+
+        decoded = unpack_answers_batch(packed)
+
+        assert decoded.shape == (300, 50)
+        assert np.array_equal(decoded, answers)
+
+    def test_batch_rejects_mixed_lengths(self):
+        """Test that 44- and 50-item rows must be decoded separately."""
+        with pytest.raises(ValueError):
+            unpack_answers_batch([pack_answers([3] * 44), pack_answers([3] * 50)])
+
+    def test_batch_rejects_corrupt_rows(self):
+        """Test that truncated rows and out-of-range codes are detected."""
+        packed = pack_answers([3] * 44)
+        with pytest.raises(ValueError):
+            unpack_answers_batch([packed[:-1]])
+        with pytest.raises(ValueError):
+            unpack_answers(bytes([44]) + b"\xff" * 17)
+
+    @pytest.mark.parametrize("answers", [[3.5] * 44, [0] * 44, [6] * 44, ["a"] * 44, []])
+    def test_invalid_answers_raise(self, answers):
+        """Test that values that don't fit the Likert codes are refused."""
+        with pytest.raises(ValueError):
+            pack_answers(answers)
+
+
+class TestBigFiveStoresRawAnswers:
+    """Test suite for raw answer storage in /big-five."""
+
+    def test_raw_answers_stored_packed(self, client):
+        """Test that a submission stores its answers in 18 bytes."""
+        token = client.post("/big-five", json={"answers": ANSWERS}).get_json()["access_token"]
+
+        result = BigFiveResult.query.filter_by(access_token=token).one()
+
+        assert len(result.raw_answers) == 18
+        assert unpack_answers(result.raw_answers).tolist() == ANSWERS
+
+    def test_fractional_answers_are_scored_but_not_stored(self, client):
+        """Test that non-whole-number answers still score, with raw_answers left empty."""
+        answers = [3, 3.5, 4, 2.5] * 11
+
+        response = client.post("/big-five", json={"answers": answers})
+
+        assert response.status_code == 202
+        token = response.get_json()["access_token"]
+        result = BigFiveResult.query.filter_by(access_token=token).one()
+        assert result.raw_answers is None
@@ -0,0 +1,299 @@
+"""
+Unit tests for the shared Gemini API limiter.
+
+Tests cover:
+- Concurrency leases, requests/min and tokens/min budgets (with refunds)
+- FIFO queueing with a deadline, stale tickets and expired leases
+- State shared between limiters through the database and a Redis-protocol store
+- Failing open when the store is unavailable, waiting when it is only contended
+- Wait-time metrics
+- GeminiClient falling back when no slot is free in time
+"""
+
+import os
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.models import ApiLimiterState, db
+from app.utils.api_limiter import (
+    ApiLimiter,
+    DatabaseStore,
+    LimiterConflictError,
+    LimiterTimeoutError,
+    MemoryStore,
+    RedisStore,
+    create_limiter_store,
+)
+from app.utils.circuit_breaker import HALF_OPEN, CircuitBreaker
+from app.utils.gemini_client import GeminiClient
+
+
+@pytest.fixture
+def redis_url():
+    """Run a Redis-protocol stand-in on a local port."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("redis")
+
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
+
+
+def _limiter(**kwargs):
+    options = {
+        "max_concurrent": 0,
+        "requests_per_minute": 0,
+        "tokens_per_minute": 0,
+        "poll_interval": 0.01,
+    }
+    return ApiLimiter("test", **{**options, **kwargs})
+
+
+class TestLimits:
+    """Test suite for the individual limits (in-memory store)."""
+
+    def test_concurrency(self):
+        """Test that a released lease frees its slot."""
+        limiter = _limiter(max_concurrent=1)
+        lease = limiter.acquire()
+
+        with pytest.raises(LimiterTimeoutError):
+            limiter.acquire(timeout=0.05)
+
+        limiter.release(lease)
+        limiter.release(limiter.acquire(timeout=0))
+        assert limiter.get_stats()["in_flight"] == 0
+
+    def test_requests_per_minute(self):
+        """Test that the request bucket allows a burst of one minute's budget."""
+        limiter = _limiter(requests_per_minute=2)
+        limiter.acquire(timeout=0)
+        limiter.acquire(timeout=0)
+
+        with pytest.raises(LimiterTimeoutError):
+            limiter.acquire(timeout=0.05)
+
+    def test_unused_tokens_are_refunded(self):
+        """Test that only the tokens a call used stay charged."""
+        limiter = _limiter(tokens_per_minute=1000)
+        lease = limiter.acquire(tokens=800, timeout=0)
+
+        with pytest.raises(LimiterTimeoutError):
+            limiter.acquire(tokens=800, timeout=0)
+
+        limiter.release(lease, used_tokens=200)
+        limiter.acquire(tokens=800, timeout=0)
+
+    def test_oversized_reservation_is_capped(self):
+        """Test that a call larger than the whole budget can still run on a full bucket."""
+        limiter = _limiter(tokens_per_minute=100)
+
+        assert limiter.acquire(tokens=5000, timeout=0)["tokens"] == 100
+
+    def test_expired_lease_is_reclaimed(self):
+        """Test that a lease from a crashed process stops counting after lease_ttl."""
+        limiter = _limiter(max_concurrent=1, lease_ttl=0.05)
+        limiter.acquire()
+
+        limiter.acquire(timeout=1)
+
+
+class TestQueue:
+    """Test suite for queueing behind earlier callers."""
+
+    def test_fifo(self):
+        """Test that a newcomer cannot jump ahead of a queued caller."""
+        limiter = _limiter(max_concurrent=1)
+        held = limiter.acquire()
+        granted = []
+        waiter = threading.Thread(target=lambda: granted.append(limiter.acquire(timeout=2)))
+        waiter.start()
+        while limiter.get_stats()["queued"] == 0:
+            time.sleep(0.005)
+
+        limiter.release(held)
+        with pytest.raises(LimiterTimeoutError):
+            limiter.acquire(timeout=0)
+        waiter.join()
+
+        assert len(granted) == 1
+        assert limiter.get_stats()["queued"] == 0
+
+    def test_stale_ticket_is_dropped(self):
+        """Test that a caller that stopped polling doesn't block the queue."""
+        limiter = _limiter(max_concurrent=1, ticket_ttl=0.05)
+        held = limiter.acquire()
+        with pytest.raises(LimiterTimeoutError):
+            limiter.acquire(timeout=0)
+        limiter.store.states["test"]["queue"].append(["gone", time.time()])
+
+        limiter.release(held)
+        time.sleep(0.06)
+
+        limiter.acquire(timeout=0)
+
+
+class TestSharedStores:
+    """Test suite for limiter state shared across workers."""
+
+    def test_database_store(self, app):
+        """Test that a slot held by one worker is unavailable to another."""
+        worker_a = _limiter(store=DatabaseStore(), max_concurrent=1, tokens_per_minute=1000)
+        worker_b = _limiter(store=DatabaseStore(), max_concurrent=1, tokens_per_minute=1000)
+
+        lease = worker_a.acquire(tokens=300)
+        with pytest.raises(LimiterTimeoutError):
+            worker_b.acquire(timeout=0.05)
+        worker_a.release(lease, used_tokens=100)
+        worker_b.acquire(timeout=0)
+
+        row = db.session.get(ApiLimiterState, "test")
+        assert len(row.state["leases"]) == 1
+        assert row.state["tokens"][0] == pytest.approx(900, abs=10)  # plus refill while waiting
+
+    def test_redis_store(self, redis_url):
+        """Test shared slots over the Redis protocol."""
+        worker_a = _limiter(store=RedisStore(url=redis_url), max_concurrent=1)
+        worker_b = _limiter(store=RedisStore(url=redis_url), max_concurrent=1)
+
+        lease = worker_a.acquire()
+        with pytest.raises(LimiterTimeoutError):
+            worker_b.acquire(timeout=0.05)
+        worker_a.release(lease)
+
+        worker_b.acquire(timeout=0)
+        assert worker_a.get_stats()["in_flight"] == 1
+
+    def test_store_errors_fail_open(self):
+        """Test that an unreachable store lets calls through."""
+        store = Mock()
+        store.name = "broken"
+        store.update.side_effect = ConnectionError("down")
+        limiter = _limiter(store=store, max_concurrent=1)
+
+        lease = limiter.acquire(timeout=0)
+        limiter.release(lease)
+
+        assert lease["id"] is None
+        assert limiter.store_errors == 1
+
+    def test_store_conflicts_keep_waiting(self):
+        """Test that a contended store delays the caller instead of letting it through."""
+        store = MemoryStore()
+        real_update = store.update
+        conflicts = iter([True, True])
+
+        def update(name, transition):
+            if next(conflicts, False):
+                raise LimiterConflictError("busy")
+            return real_update(name, transition)
+
+        store.update = update
+        limiter = _limiter(store=store, max_concurrent=1)
+
+        lease = limiter.acquire(timeout=1)
+
+        assert lease["id"] is not None
+        assert limiter.get_stats()["in_flight"] == 1
+        assert limiter.store_errors == 0
+
+    def test_database_conflicts_time_out(self, app):
+        """Test that a store that never wins its compare-and-set ends in a timeout, not a slot."""
+        limiter = _limiter(store=DatabaseStore(max_attempts=0), max_concurrent=1)
+
+        with pytest.raises(LimiterTimeoutError):
+            limiter.acquire(timeout=0.05)
+        assert limiter.store_errors == 0
+
+    def test_create_store(self):
+        """Test backend selection by name."""
+        assert create_limiter_store("database").name == "database"
+        assert isinstance(create_limiter_store("nonsense"), MemoryStore)
+
+
+class TestWaitMetrics:
+    """Test suite for exported wait-time metrics."""
+
+    def test_histogram_and_timeouts(self):
+        """Test cumulative buckets, percentiles and timeout counts."""
+        limiter = _limiter(max_concurrent=1)
+        held = limiter.acquire()
+        with pytest.raises(LimiterTimeoutError):
+            limiter.acquire(timeout=0.06)
+        limiter.release(held)
+
+        wait = limiter.get_stats()["wait"]
+
+        assert wait["count"] == 2 and wait["timeouts"] == 1
+        assert wait["buckets"]["0.05"] == 1
+        assert wait["buckets"]["+Inf"] == 2
+        assert wait["max_seconds"] >= 0.06
+        assert wait["p50_seconds"] is not None
+
+
+@patch.dict(
+    os.environ,
+    {
+        "GEMINI_API_KEY": "test-key",
+        "GEMINI_LIMITER_BACKEND": "memory",
+        "GEMINI_MAX_CONCURRENT": "1",
+        "GEMINI_QUEUE_TIMEOUT": "0",
+        "REPORT_CACHE_ENABLED": "false",
+        "ARCHETYPE_REPORTS_ENABLED": "false",
+    },
+    clear=False,
+)
+@patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+@patch("app.utils.gemini_client.genai")
+class TestGeminiClientLimiter:
+    """Test suite for GeminiClient calls going through the limiter."""
+
+    def test_no_slot_falls_back_without_calling(self, mock_genai):
+        """Test that a full limiter serves fallback and doesn't count as an API failure."""
+        mock_model = Mock()
+        mock_genai.GenerativeModel.return_value = mock_model
+        client = GeminiClient()
+        client.limiter.acquire()
+
+        report = client.generate_personality_suggestions({"openness": 70.0}, {"openness": 75.0})
+
+        assert "Your Personality Profile" in report
+        mock_model.generate_content.assert_not_called()
+        stats = client.get_stats()
+        assert stats["limiter"]["wait"]["timeouts"] == 1
+        assert stats["breaker"]["state"] == "closed"
+
+    def test_probe_without_slot_is_handed_back(self, mock_genai):
+        """Test that a half-open probe that got no limiter slot lets the next caller probe."""
+        mock_genai.GenerativeModel.return_value = Mock()
+        client = GeminiClient()
+        client.breaker = CircuitBreaker("test", failure_threshold=1, cooldown=0)
+        client.breaker.record_failure()
+        client.limiter.acquire()
+
+        client.generate_personality_suggestions({"openness": 70.0}, {"openness": 75.0})
+
+        assert client.breaker.state() == HALF_OPEN
+        assert CircuitBreaker("test", store=client.breaker.store, cooldown=0).allow() is True
+
+    def test_lease_released_after_call(self, mock_genai):
+        """Test that blocking and streamed calls give their slot back."""
+        mock_model = Mock()
+        mock_model.generate_content.side_effect = [
+            Mock(text="## Report"),
+            iter([Mock(text="## Streamed")]),
+        ]
+        mock_genai.GenerativeModel.return_value = mock_model
+        client = GeminiClient()
+
+        client.generate_personality_suggestions({"openness": 70.0}, {"openness": 75.0})
+        chunks = list(client.stream_personality_suggestions({"openness": 70.0}, {"openness": 75.0}))
+
+        assert chunks == ["## Streamed"]
+        assert client.get_stats()["limiter"]["in_flight"] == 0
@@ -0,0 +1,265 @@
+"""
+Unit tests for archetype base reports.
+
+Tests cover:
+- Trait levels and archetype keys
+- Clustering stored results (centroids, min members, incomplete scores)
+- Refreshing archetype rows and generating missing base reports
+- Nearest-archetype lookup
+- Splicing the personal overlay into the base report (blocking and streaming)
+- Off-peak gating of the worker refresh
+"""
+
+import os
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.models import ArchetypeReport, BigFiveResult, db
+from app.utils import archetypes
+from app.utils.archetypes import (
+    ArchetypeLibrary,
+    archetype_key,
+    cluster_results,
+    describe_archetype,
+    refresh_archetypes,
+)
+from app.utils.bigfive import TRAITS, get_trait_level
+from app.utils.gemini_client import (
+    ARCHETYPE_BASE_MARKER,
+    GeminiClient,
+    _splice_archetype_stream,
+    splice_archetype_report,
+)
+from app.worker import Worker, in_hour_window
+
+BASE_REPORT = "## 📊 Your Trait Deep-Dive\n\nShared analysis."
+OVERLAY = (
+    "## QUOTE\nA quote\n\n## 🎯 Alex, Here's Your Unique Personality Blueprint\n\nIntro.\n\n"
+    f"{ARCHETYPE_BASE_MARKER}\n\n## 💎 Final Insight for Alex\n\nInsight."
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_library(monkeypatch):
+    """Each test loads its own process-wide archetype library."""
+    monkeypatch.setattr(archetypes, "_archetype_library", None)
+
+
+def _add_results(scores, count, percentile=50.0):
+    for _ in range(count):
+        db.session.add(
+            BigFiveResult(
+                scores={
+                    "scores": dict(zip(TRAITS, scores)),
+                    "percentiles": dict.fromkeys(TRAITS, percentile),
+                }
+            )
+        )
+
+
+def _add_archetype(key, report, member_count=10):
+    db.session.add(
+        ArchetypeReport(
+            archetype_key=key, member_count=member_count, centroid={"scores": {}}, report=report
+        )
+    )
+
+
+class TestArchetypeKeys:
+    """Test suite for trait levels and archetype keys."""
+
+    @pytest.mark.parametrize(
+        "score,level",
+        [(0, "Very Low"), (29.9, "Very Low"), (30, "Low"), (45, "Moderate"), (70, "Very High")],
+    )
+    def test_trait_level_boundaries(self, score, level):
+        """Test that thresholds belong to the level above them."""
+        assert get_trait_level(score) == level
+
+    def test_key_round_trip(self):
+        """Test that a key lists each trait's level code in TRAITS order."""
+        key = archetype_key(dict(zip(TRAITS, [62, 50, 40, 80, 10])))
+
+        assert key == "H-M-L-VH-VL"
+        assert describe_archetype(key)["agreeableness"] == "Very High"
+
+
+class TestClustering:
+    """Test suite for cluster_results and refresh_archetypes."""
+
+    def test_cluster_results(self, app):
+        """Test member counts, centroids and min_members over streamed batches."""
+        _add_results([60, 50, 50, 50, 50], 3, percentile=40)
+        _add_results([64, 52, 50, 50, 50], 3, percentile=60)
+        _add_results([20, 20, 20, 20, 20], 2)
+        db.session.add(BigFiveResult(scores={"scores": {"openness": 50}}))
+        db.session.commit()
+
+        clusters = cluster_results(batch_size=2, min_members=3)
+
+        assert clusters["results"] == 8
+        assert clusters["covered"] == 6
+        [archetype] = clusters["archetypes"]
+        assert archetype["key"] == "H-M-M-M-M"
+        assert archetype["member_count"] == 6
+        assert archetype["centroid"]["scores"]["openness"] == 62.0
+        assert archetype["centroid"]["percentiles"]["openness"] == 50.0
+
+    def test_refresh_generates_missing_reports(self, app):
+        """Test upserts, removal of unselected archetypes and generation limits."""
+        _add_results([60, 50, 50, 50, 50], 3)
+        _add_results([20, 50, 50, 50, 50], 2)
+        _add_archetype("VH-VH-VH-VH-VH", "stale")
+        db.session.commit()
+        client = Mock()
+        client.generate_archetype_report.side_effect = ["Report A", None]
+
+        summary = refresh_archetypes(client, min_members=2, max_reports=5)
+
+        assert summary["archetypes"] == 2
+        assert summary["removed"] == 1
+        assert (summary["generated"], summary["failed"]) == (1, 1)
+        levels = client.generate_archetype_report.call_args_list[0].args[0]
+        assert levels["openness"] == "High"
+        rows = {row.archetype_key: row for row in ArchetypeReport.query.all()}
+        assert rows["H-M-M-M-M"].report == "Report A"
+        assert rows["H-M-M-M-M"].generated_at is not None
+        assert rows["VL-M-M-M-M"].report is None  # retried on the next run
+
+        client.generate_archetype_report.side_effect = ["Report B"]
+        assert refresh_archetypes(client, min_members=2)["generated"] == 1
+        assert client.generate_archetype_report.call_count == 3
+
+
+class TestArchetypeLibrary:
+    """Test suite for ArchetypeLibrary."""
+
+    def test_nearest_within_max_distance(self, app):
+        """Test exact matches, one-level neighbours, and ties going to larger archetypes."""
+        _add_archetype("H-M-M-M-M", "big", member_count=50)
+        _add_archetype("M-H-M-M-M", "small", member_count=5)
+        _add_archetype("VL-VL-VL-VL-VL", None)
+        db.session.commit()
+        library = ArchetypeLibrary(check_interval=0, max_distance=1)
+
+        exact = library.nearest(dict(zip(TRAITS, [60, 50, 50, 50, 50])))
+        tie = library.nearest(dict(zip(TRAITS, [50, 50, 50, 50, 50])))
+
+        assert len(library) == 2  # archetypes without a report are not loaded
+        assert exact == {"key": "H-M-M-M-M", "report": "big", "distance": 0}
+        assert tie["key"] == "H-M-M-M-M" and tie["distance"] == 1
+        assert library.nearest(dict(zip(TRAITS, [10, 10, 10, 10, 10]))) is None
+
+    def test_reload_only_when_changed(self, app):
+        """Test that new reports are picked up on the next version check."""
+        library = ArchetypeLibrary(check_interval=0)
+        assert library.nearest(dict.fromkeys(TRAITS, 50)) is None
+
+        _add_archetype("M-M-M-M-M", "report")
+        db.session.commit()
+
+        assert library.nearest(dict.fromkeys(TRAITS, 50))["report"] == "report"
+        library.nearest(dict.fromkeys(TRAITS, 50))
+        assert library.reloads == 2
+
+
+class TestOverlay:
+    """Test suite for personal overlays around archetype reports."""
+
+    def test_splice_at_marker(self):
+        """Test that the base report replaces the marker."""
+        report = splice_archetype_report(OVERLAY, BASE_REPORT)
+
+        assert ARCHETYPE_BASE_MARKER not in report
+        assert report.index("Intro.") < report.index("Shared analysis.") < report.index("Insight.")
+
+    @pytest.mark.parametrize("size", [1, 3, 7, 50])
+    def test_streamed_splice_matches_blocking(self, size):
+        """Test a marker split across chunk boundaries."""
+        chunks = [OVERLAY[i : i + size] for i in range(0, len(OVERLAY), size)]
+
+        streamed = "".join(_splice_archetype_stream(iter(chunks), BASE_REPORT)).strip()
+
+        assert streamed == splice_archetype_report(OVERLAY, BASE_REPORT)
+
+    def test_missing_marker_appends_base(self):
+        """Test that an overlay without the marker still includes the base report."""
+        assert splice_archetype_report("Intro.", BASE_REPORT).endswith("Shared analysis.")
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}, clear=False)
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_client_uses_short_overlay(self, mock_genai, app):
+        """Test that a submission near an archetype only asks Gemini for the overlay."""
+        _add_archetype("M-M-M-M-M", BASE_REPORT)
+        db.session.commit()
+        mock_model = Mock()
+        mock_model.generate_content.return_value = Mock(text=OVERLAY)
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        client = GeminiClient()
+        report = client.generate_personality_suggestions(
+            dict.fromkeys(TRAITS, 50.0), dict.fromkeys(TRAITS, 50.0), {"name": "Alex"}
+        )
+
+        assert "Shared analysis." in report and "Insight." in report
+        prompt = mock_model.generate_content.call_args.args[0]
+        assert ARCHETYPE_BASE_MARKER in prompt
+        config = mock_model.generate_content.call_args.kwargs["generation_config"]
+        assert config["max_output_tokens"] == 2048
+        assert client.get_stats()["archetypes"]["hits"] == 1
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}, clear=False)
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_failed_overlay_serves_base_report(self, mock_genai, app):
+        """Test that the uncached base report is served when the overlay fails."""
+        _add_archetype("M-M-M-M-M", BASE_REPORT)
+        db.session.commit()
+        mock_model = Mock()
+        mock_model.generate_content.side_effect = Exception("API down")
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        client = GeminiClient()
+        chunks = list(
+            client.stream_personality_suggestions(
+                dict.fromkeys(TRAITS, 50.0), dict.fromkeys(TRAITS, 50.0)
+            )
+        )
+
+        assert chunks == [BASE_REPORT]
+        assert client.get_stats()["archetypes"]["overlay_failures"] == 1
+
+
+class TestWorkerRefresh:
+    """Test suite for the off-peak archetype refresh in the worker."""
+
+    @pytest.mark.parametrize(
+        "window,hour,expected",
+        [
+            ("2-6", 2, True),
+            ("2-6", 6, False),
+            ("22-4", 23, True),
+            ("22-4", 12, False),
+            ("", 12, True),
+        ],
+    )
+    def test_in_hour_window(self, window, hour, expected):
+        """Test plain, wrapping and empty windows."""
+        assert in_hour_window(window, hour) is expected
+
+    @patch("app.worker.refresh_archetypes", return_value={"generated": 0})
+    def test_refresh_only_off_peak(self, mock_refresh, app):
+        """Test that the refresh waits for the window, then for the interval."""
+        app.config.update(ARCHETYPE_REFRESH_INTERVAL=3600, ARCHETYPE_OFFPEAK_HOURS="2-6")
+        worker = Worker(app, worker_id="test-worker")
+
+        with patch("app.worker.datetime") as mock_datetime:
+            mock_datetime.utcnow.return_value.hour = 12
+            assert worker.refresh_archetypes_if_due() is None
+            mock_datetime.utcnow.return_value.hour = 3
+            assert worker.refresh_archetypes_if_due() == {"generated": 0}
+            assert worker.refresh_archetypes_if_due() is None
+
+        assert mock_refresh.call_count == 1
@@ -6,13 +6,17 @@ Tests cover:
 - Edge cases (all min, all max, mixed values)
 - Invalid inputs (wrong length, non-numeric, out of range)
 - Helper functions (validation, interpretation)
+- Vectorized batch scoring (identical to the scalar path)
 """
 
+import numpy as np
 import pytest
 
 from app.utils.bigfive import (
     TRAITS,
     compute_bigfive_scores,
+    compute_bigfive_scores_batch,
+    get_batch_result,
     get_trait_interpretation,
     validate_answers,
 )
@@ -388,3 +392,77 @@ class TestEdgeCases:
         assert result["valid"] is True
         for trait in TRAITS:
             assert 0 <= result["scores"][trait] <= 100
+
+
+class TestComputeBigFiveScoresBatch:
+    """Test suite for compute_bigfive_scores_batch function."""
+
+    @pytest.mark.parametrize("n_items", [44, 50])
+    def test_matches_scalar_path(self, n_items):
+        """Test that every row equals the single-answer result exactly."""
+        answers = np.random.default_rng(42).integers(1, 6, size=(500, n_items))
+
+        batch = compute_bigfive_scores_batch(answers)
+
+        assert batch["traits"] == TRAITS
+        assert batch["scores"].shape == (500, 5)
+        for row in range(len(answers)):
+            assert get_batch_result(batch, row) == compute_bigfive_scores(answers[row].tolist())
+
+    def test_matches_scalar_path_for_fractional_answers(self):
+        """Test exact agreement for half-steps and arbitrary floats."""
+        rng = np.random.default_rng(7)
+        answers = np.vstack(
+            [
+                rng.integers(2, 11, size=(50, 44)) / 2,  # 1.0, 1.5, ... 5.0
+                rng.uniform(1, 5, size=(50, 44)),
+            ]
+        )
+
+        batch = compute_bigfive_scores_batch(answers)
+
+        for row in range(len(answers)):
+            assert get_batch_result(batch, row) == compute_bigfive_scores(answers[row].tolist())
+
+    def test_custom_question_mapping(self):
+        """Test a custom mapping, including an empty trait."""
+        mapping = {"openness": [0, 1, 2], "neuroticism": [43, 99], "extraversion": []}
+        answers = np.random.default_rng(1).integers(1, 6, size=(20, 44))
+
+        batch = compute_bigfive_scores_batch(answers, question_mapping=mapping)
+
+        assert batch["traits"] == ["openness", "neuroticism", "extraversion"]
+        for row in range(len(answers)):
+            expected = compute_bigfive_scores(answers[row].tolist(), question_mapping=mapping)
+            assert get_batch_result(batch, row) == expected
+
+    def test_chunked_scoring(self, monkeypatch):
+        """Test that results don't depend on the internal chunk size."""
+        answers = np.random.default_rng(3).integers(1, 6, size=(1000, 44), dtype=np.int8)
+        expected = compute_bigfive_scores_batch(answers)
+
+        monkeypatch.setattr("app.utils.bigfive.BATCH_CHUNK_ROWS", 64)
+        chunked = compute_bigfive_scores_batch(answers)
+
+        assert np.array_equal(chunked["scores"], expected["scores"])
+        assert np.array_equal(chunked["percentiles"], expected["percentiles"])
+
+    def test_empty_batch(self):
+        """Test that zero rows returns empty arrays."""
+        batch = compute_bigfive_scores_batch(np.empty((0, 50)))
+        assert batch["scores"].shape == (0, 5)
+
+    @pytest.mark.parametrize(
+        "answers",
+        [
+            np.full((3, 40), 3),  # wrong width
+            np.full(44, 3),  # not 2-D
+            np.full((3, 44), 6),  # out of range
+            np.full((3, 44), np.nan),  # NaN
+            [["a"] * 44],  # non-numeric
+        ],
+    )
+    def test_invalid_input_raises(self, answers):
+        """Test that invalid arrays raise ValueError."""
+        with pytest.raises(ValueError):
+            compute_bigfive_scores_batch(answers)
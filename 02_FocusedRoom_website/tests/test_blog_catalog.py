@@ -0,0 +1,129 @@
+"""
+Unit tests for the in-memory blog catalog.
+
+Tests cover:
+- Slug lookups, content bodies and related posts
+- Loading once and serving from memory
+- Reloading when blog_data.json or a content file changes
+- Keeping the last good catalog when the JSON is invalid
+- Blog routes served from the catalog
+"""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app.utils.blog_catalog import BlogCatalog
+
+POSTS = [
+    {"slug": "deep-work", "title": "Deep Work", "tags": ["focus", "work"]},
+    {"slug": "sleep", "title": "Sleep", "tags": ["health"]},
+    {"slug": "attention", "title": "Attention", "tags": ["focus"]},
+]
+
+
+def _bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+@pytest.fixture
+def blog_files(tmp_path):
+    """Write a small blog_data.json and content directory."""
+    data_path = tmp_path / "blog_data.json"
+    data_path.write_text(json.dumps({"posts": POSTS}), encoding="utf-8")
+    content_dir = tmp_path / "blog_content"
+    content_dir.mkdir()
+    for post in POSTS:
+        (content_dir / f"{post['slug']}.html").write_text(f"<p>{post['title']}</p>")
+    return data_path, content_dir
+
+
+class TestBlogCatalog:
+    """Test suite for BlogCatalog."""
+
+    def test_lookups(self, blog_files):
+        """Test slug lookup, content and related ranking."""
+        catalog = BlogCatalog(*blog_files, check_interval=0)
+
+        assert catalog.get_post("sleep")["title"] == "Sleep"
+        assert catalog.get_post("missing") is None
+        assert catalog.get_content("deep-work") == "<p>Deep Work</p>"
+        related = [p["slug"] for p in catalog.get_related_posts("deep-work")]
+        assert related == ["attention", "sleep"]
+
+    def test_files_read_once(self, blog_files):
+        """Test that repeated requests are served from memory."""
+        catalog = BlogCatalog(*blog_files, check_interval=60)
+        catalog.get_posts()
+
+        with patch("builtins.open", side_effect=AssertionError("disk read")):
+            for _ in range(10):
+                catalog.get_post("sleep")
+                catalog.get_content("sleep")
+
+        assert catalog.reloads == 1
+
+    def test_reload_on_json_change(self, blog_files):
+        """Test that an edited blog_data.json is picked up."""
+        data_path, content_dir = blog_files
+        catalog = BlogCatalog(data_path, content_dir, check_interval=0)
+        catalog.get_posts()
+
+        data_path.write_text(json.dumps({"posts": POSTS[:1]}), encoding="utf-8")
+        _bump_mtime(data_path)
+
+        assert [p["slug"] for p in catalog.get_posts()] == ["deep-work"]
+        assert catalog.reloads == 2
+
+    def test_reload_single_content_file(self, blog_files):
+        """Test that an edited body is re-read without a full reload."""
+        data_path, content_dir = blog_files
+        catalog = BlogCatalog(data_path, content_dir, check_interval=0)
+        catalog.get_posts()
+
+        body = content_dir / "sleep.html"
+        body.write_text("<p>Updated</p>")
+        _bump_mtime(body)
+
+        assert catalog.get_content("sleep") == "<p>Updated</p>"
+        assert catalog.reloads == 1
+
+    def test_invalid_json_keeps_previous_catalog(self, blog_files):
+        """Test that a half-written JSON file doesn't break the blog."""
+        data_path, content_dir = blog_files
+        catalog = BlogCatalog(data_path, content_dir, check_interval=0)
+        catalog.get_posts()
+
+        data_path.write_text("{not json", encoding="utf-8")
+        _bump_mtime(data_path)
+
+        assert len(catalog.get_posts()) == 3
+
+    def test_missing_content_returns_none(self, blog_files):
+        """Test that a post without a body file has no content."""
+        data_path, content_dir = blog_files
+        (content_dir / "sleep.html").unlink()
+
+        assert BlogCatalog(data_path, content_dir).get_content("sleep") is None
+
+
+class TestBlogRoutes:
+    """Test suite for blog pages served from the catalog."""
+
+    def test_blog_pages(self, client):
+        """Test the listing and a post page with the shipped blog data."""
+        from app.utils.blog_catalog import blog_catalog
+
+        slug = blog_catalog.get_posts()[0]["slug"]
+
+        assert client.get("/blog").status_code == 200
+        response = client.get(f"/blog/{slug}")
+        assert response.status_code == 200
+        assert blog_catalog.get_post(slug)["title"].encode() in response.data
+
+    def test_unknown_post_returns_404(self, client):
+        """Test that an unknown slug is a 404."""
+        assert client.get("/blog/does-not-exist").status_code == 404
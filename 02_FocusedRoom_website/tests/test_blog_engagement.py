@@ -0,0 +1,115 @@
+"""
+Unit tests for blog engagement counters.
+
+Tests cover:
+- Like/unlike keeps the counter in step with engagement rows
+- Helpful votes and duplicate votes
+- Stats endpoint answered from the counter table
+- Concurrent toggles from many users
+- Rebuilding counters from engagement rows
+"""
+
+import threading
+
+from app.models import BlogEngagement, BlogEngagementCounter, db
+from app.utils.blog_engagement import get_engagement_summary, rebuild_engagement_counters
+from app.utils.rate_limiter import rate_limiter
+
+SLUG = "science-of-deep-work"
+
+
+def _headers(user_agent="agent-1", ip="198.51.100.1"):
+    # The user identifier is a hash of X-Forwarded-For + User-Agent
+    return {"User-Agent": user_agent, "X-Forwarded-For": ip}
+
+
+def _like(client, user_agent="agent-1", ip="198.51.100.1"):
+    return client.post(
+        f"/api/blog/engagement/{SLUG}/like", headers=_headers(user_agent, ip)
+    ).get_json()
+
+
+def _counter(engagement_type):
+    row = db.session.get(BlogEngagementCounter, (SLUG, engagement_type))
+    return row.count if row else 0
+
+
+class TestEngagementCounters:
+    """Test suite for counter maintenance on the engagement endpoints."""
+
+    def setup_method(self):
+        rate_limiter.reset()
+
+    def test_like_and_unlike(self, client):
+        """Test that toggling updates the counter and returns the new count."""
+        assert _like(client)["data"] == {"action": "liked", "likes": 1}
+        assert _like(client, "agent-2")["data"] == {"action": "liked", "likes": 2}
+        assert _like(client)["data"] == {"action": "unliked", "likes": 1}
+
+        assert _counter("like") == 1
+        assert BlogEngagement.query.filter_by(engagement_type="like").count() == 1
+
+    def test_stats_endpoint(self, client):
+        """Test counts and user state from the GET endpoint."""
+        _like(client)
+        client.post(
+            f"/api/blog/engagement/{SLUG}/helpful",
+            json={"helpful": False, "feedback": "Too long"},
+            headers=_headers("agent-1"),
+        )
+
+        mine = client.get(f"/api/blog/engagement/{SLUG}", headers=_headers("agent-1"))
+        other = client.get(f"/api/blog/engagement/{SLUG}", headers=_headers("agent-9"))
+
+        assert mine.get_json()["data"] == {
+            "likes": 1,
+            "helpful_yes": 0,
+            "helpful_no": 1,
+            "user_liked": True,
+            "user_voted_helpful": True,
+        }
+        assert other.get_json()["data"]["user_liked"] is False
+        assert other.get_json()["data"]["likes"] == 1
+
+    def test_duplicate_vote_not_counted(self, client):
+        """Test that a second vote is rejected and not counted."""
+        for _ in range(2):
+            response = client.post(
+                f"/api/blog/engagement/{SLUG}/helpful",
+                json={"helpful": True},
+                headers=_headers("agent-1"),
+            )
+
+        assert response.status_code == 400
+        assert _counter("helpful_yes") == 1
+
+    def test_concurrent_likes(self, app):
+        """Test that concurrent likes from different users are all counted."""
+
+        def like(index):
+            with app.test_client() as client:
+                for _ in range(3):
+                    # like, unlike, like -> one like per user
+                    _like(client, f"agent-{index}", ip=f"198.51.100.{index + 10}")
+
+        threads = [threading.Thread(target=like, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        db.session.expire_all()
+        assert _counter("like") == BlogEngagement.query.filter_by(engagement_type="like").count()
+        assert _counter("like") == 8
+
+    def test_rebuild_counters(self, app):
+        """Test that counters can be backfilled from engagement rows."""
+        db.session.add_all(
+            BlogEngagement(post_slug=SLUG, engagement_type="like", user_identifier=f"user-{i}")
+            for i in range(3)
+        )
+        db.session.commit()
+
+        assert rebuild_engagement_counters() == 1
+        assert get_engagement_summary(SLUG, "user-0")["likes"] == 3
+        assert get_engagement_summary(SLUG, "user-0")["user_liked"] is True
@@ -0,0 +1,280 @@
+"""
+Unit tests for the Gemini circuit breaker.
+
+Tests cover:
+- Closed/open/half-open transitions (threshold, cool-down, single probe, stale and
+  cancelled probes)
+- State shared between breakers through the database and a Redis-protocol store
+- Failing open when the store is unavailable
+- GeminiClient going straight to fallback while the circuit is open
+- The worker rescheduling report jobs instead of storing fallback text
+"""
+
+import os
+import threading
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.models import BackgroundJob, BigFiveResult, CircuitBreakerState, db
+from app.utils.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    DatabaseStore,
+    MemoryStore,
+    RedisStore,
+    create_store,
+)
+from app.utils.gemini_client import GeminiClient, GeminiUnavailableError
+from app.utils.job_queue import JOB_PENDING
+from app.worker import Worker
+
+ANSWERS = [3, 4, 2, 5, 3, 4, 2, 3, 4, 5, 3, 2, 4, 3, 5, 4, 2, 3, 4, 5, 3, 4] * 2
+
+
+@pytest.fixture
+def redis_url():
+    """Run a Redis-protocol stand-in on a local port."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("redis")
+
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
+
+
+def _trip(breaker, failures):
+    for _ in range(failures):
+        breaker.record_failure()
+
+
+class TestTransitions:
+    """Test suite for breaker state transitions (in-memory store)."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that only consecutive failures count towards the threshold."""
+        breaker = CircuitBreaker("test", failure_threshold=3, cooldown=60)
+
+        _trip(breaker, 2)
+        breaker.record_success()
+        _trip(breaker, 2)
+        assert breaker.state() == CLOSED and breaker.allow()
+
+        breaker.record_failure()
+
+        assert breaker.state() == OPEN
+        assert breaker.allow() is False
+        assert breaker.get_stats()["rejected"] == 1
+        assert breaker.get_stats()["opened"] == 1
+
+    def test_single_probe_after_cooldown(self):
+        """Test that exactly one caller probes once the cool-down has passed."""
+        store = MemoryStore()
+        first = CircuitBreaker("test", store=store, failure_threshold=1, cooldown=0)
+        second = CircuitBreaker("test", store=store, failure_threshold=1, cooldown=0)
+        first.record_failure()
+
+        assert first.allow() is True
+        assert first.state() == HALF_OPEN
+        assert second.allow() is False
+
+        first.record_success()
+
+        assert second.state() == CLOSED and second.allow()
+
+    def test_failed_probe_reopens(self):
+        """Test that a failed probe starts a new cool-down."""
+        breaker = CircuitBreaker("test", failure_threshold=1, cooldown=0)
+        breaker.record_failure()
+        assert breaker.allow()
+
+        breaker.cooldown = 60
+        breaker.record_failure()
+
+        assert breaker.state() == OPEN
+        assert breaker.allow() is False
+
+    def test_stale_probe_is_replaced(self):
+        """Test that a probe that never reported back doesn't block the circuit forever."""
+        breaker = CircuitBreaker("test", failure_threshold=1, cooldown=0, probe_timeout=0)
+        breaker.record_failure()
+
+        assert breaker.allow() is True
+        assert breaker.allow() is True  # previous probe timed out
+
+    def test_cancelled_probe_can_be_taken_again(self):
+        """Test that a probe handed back unused lets another caller probe before probe_timeout."""
+        store = MemoryStore()
+        first = CircuitBreaker("test", store=store, failure_threshold=1, cooldown=0)
+        second = CircuitBreaker("test", store=store, failure_threshold=1, cooldown=0)
+        first.record_failure()
+        assert first.allow() is True
+        assert second.allow() is False
+
+        second.cancel_probe()  # Didn't claim the probe: no effect
+        assert second.allow() is False
+
+        first.cancel_probe()
+        assert second.allow() is True
+        assert second.state() == HALF_OPEN
+
+    def test_store_errors_fail_open(self):
+        """Test that an unreachable store allows calls."""
+        store = Mock()
+        store.name = "broken"
+        store.read.side_effect = ConnectionError("down")
+        store.update.side_effect = ConnectionError("down")
+        breaker = CircuitBreaker("test", store=store, failure_threshold=1)
+
+        breaker.record_failure()
+
+        assert breaker.allow() is True
+        assert breaker.state() == "unknown"
+        assert breaker.store_errors == 3
+
+
+class TestSharedStores:
+    """Test suite for breaker state shared across workers."""
+
+    def test_database_store(self, app):
+        """Test that a circuit opened by one worker is open for another."""
+        worker_a = CircuitBreaker("gemini", store=DatabaseStore(), failure_threshold=2)
+        worker_b = CircuitBreaker("gemini", store=DatabaseStore(), failure_threshold=2)
+
+        worker_a.record_failure()
+        worker_b.record_failure()
+
+        assert worker_a.allow() is False
+        row = db.session.get(CircuitBreakerState, "gemini")
+        assert (row.state, row.failures, row.version) == (OPEN, 2, 2)
+
+    def test_database_store_single_probe(self, app):
+        """Test that only one worker wins the half-open probe."""
+        worker_a = CircuitBreaker("gemini", store=DatabaseStore(), failure_threshold=1, cooldown=0)
+        worker_b = CircuitBreaker("gemini", store=DatabaseStore(), failure_threshold=1, cooldown=0)
+        worker_a.record_failure()
+
+        assert [worker_a.allow(), worker_b.allow()] == [True, False]
+
+        worker_a.record_success()
+        assert worker_b.allow() is True
+
+    def test_redis_store(self, redis_url):
+        """Test shared state and a single probe over the Redis protocol."""
+        worker_a = CircuitBreaker("gemini", store=RedisStore(url=redis_url), failure_threshold=1)
+        worker_b = CircuitBreaker("gemini", store=RedisStore(url=redis_url), failure_threshold=1)
+        worker_a.cooldown = worker_b.cooldown = 0
+
+        worker_a.record_failure()
+
+        assert worker_b.state() == OPEN
+        assert [worker_b.allow(), worker_a.allow()] == [True, False]
+
+        worker_b.record_success()
+        assert worker_a.state() == CLOSED
+
+    def test_create_store(self):
+        """Test backend selection by name."""
+        assert create_store("database").name == "database"
+        assert create_store("nonsense").name == "memory"
+
+
+@patch.dict(
+    os.environ,
+    {
+        "GEMINI_API_KEY": "test-key",
+        "GEMINI_BREAKER_BACKEND": "memory",
+        "GEMINI_BREAKER_FAILURE_THRESHOLD": "2",
+        "GEMINI_BREAKER_COOLDOWN": "60",
+        "REPORT_CACHE_ENABLED": "false",
+        "ARCHETYPE_REPORTS_ENABLED": "false",
+    },
+    clear=False,
+)
+@patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+@patch("app.utils.gemini_client.genai")
+class TestGeminiClientBreaker:
+    """Test suite for GeminiClient behaviour around the circuit breaker."""
+
+    SCORES = {"openness": 70.0}
+    PERCENTILES = {"openness": 75.0}
+
+    @patch("time.sleep")
+    def test_open_circuit_skips_api_and_sleep(self, mock_sleep, mock_genai):
+        """Test that an open circuit serves fallback without calling Gemini or sleeping."""
+        mock_model = Mock()
+        mock_model.generate_content.side_effect = Exception("API down")
+        mock_genai.GenerativeModel.return_value = mock_model
+        client = GeminiClient()
+
+        for _ in range(3):
+            report = client.generate_personality_suggestions(self.SCORES, self.PERCENTILES)
+
+        assert "Your Personality Profile" in report
+        assert mock_model.generate_content.call_count == 2
+        mock_sleep.assert_not_called()
+        assert client.get_stats()["breaker"]["state"] == OPEN
+        assert client.get_stats()["breaker"]["rejected"] == 1
+
+    def test_raise_on_failure(self, mock_genai):
+        """Test that callers that retry later get an exception instead of fallback text."""
+        mock_model = Mock()
+        mock_model.generate_content.side_effect = Exception("API down")
+        mock_genai.GenerativeModel.return_value = mock_model
+        client = GeminiClient()
+
+        with pytest.raises(GeminiUnavailableError):
+            client.generate_personality_suggestions(
+                self.SCORES, self.PERCENTILES, raise_on_failure=True
+            )
+
+    def test_stream_failures_trip_breaker(self, mock_genai):
+        """Test that streamed calls report their outcome to the breaker."""
+        mock_model = Mock()
+        mock_model.generate_content.side_effect = Exception("API down")
+        mock_genai.GenerativeModel.return_value = mock_model
+        client = GeminiClient()
+
+        for _ in range(3):
+            chunks = list(client.stream_personality_suggestions(self.SCORES, self.PERCENTILES))
+
+        assert "Your Personality Profile" in chunks[0]
+        assert mock_model.generate_content.call_count == 2
+
+
+class TestWorkerRetries:
+    """Test suite for report jobs while Gemini is unavailable."""
+
+    @patch(
+        "app.worker.generate_personality_suggestions",
+        side_effect=GeminiUnavailableError("down"),
+    )
+    def test_job_is_rescheduled_instead_of_falling_back(self, mock_generate, app, client):
+        """Test that a non-final attempt leaves the result pending and retries later."""
+        app.config["JOB_MAX_ATTEMPTS"] = 3
+        token = client.post("/big-five", json={"answers": ANSWERS}).get_json()["access_token"]
+        result_id = BigFiveResult.query.filter_by(access_token=token).one().id
+
+        Worker(app, worker_id="test-worker").run_once()
+
+        assert mock_generate.call_args.kwargs["fallback"] is False
+        job = BackgroundJob.query.filter_by(result_id=result_id).one()
+        assert job.status == JOB_PENDING
+        assert job.run_after > datetime.utcnow()
+        assert db.session.get(BigFiveResult, result_id).status == "pending"
+
+    @patch("app.worker.generate_personality_suggestions", return_value="## Fallback")
+    def test_last_attempt_uses_fallback(self, mock_generate, app, client):
+        """Test that the final attempt accepts fallback suggestions."""
+        app.config["JOB_MAX_ATTEMPTS"] = 1
+        client.post("/big-five", json={"answers": ANSWERS})
+
+        Worker(app, worker_id="test-worker").run_once()
+
+        assert mock_generate.call_args.kwargs["fallback"] is True
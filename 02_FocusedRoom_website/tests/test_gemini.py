@@ -7,16 +7,34 @@ Tests cover:
 - Error handling and retry logic
 - Timeout and rate limiting behavior
 - Provider determination logic
+- Sectioned reports generated concurrently with per-section fallback
+- Trait-only report fragments cached by trait levels
+- The fake model used for load tests
+- The static report instruction sent once as a system instruction / cached content
 """
 
 import os
+import re
+import threading
+import time
 from unittest.mock import Mock, patch
 
+import pytest
+
+from app.utils.fake_gemini import FakeGeminiError, FakeGenerativeModel
 from app.utils.gemini_client import (
+    PLACEHOLDER_PATTERN,
+    REPORT_SECTIONS,
+    REPORT_SYSTEM_INSTRUCTION,
+    SECTION_FALLBACKS,
     GeminiClient,
+    GeminiUnavailableError,
     generate_personality_suggestions,
     get_gemini_client,
+    group_report_sections,
+    split_prompt_sections,
 )
+from app.utils.validators import extract_name_from_big_five_report
 
 
 class TestGeminiClientInitialization:
@@ -299,6 +317,499 @@ class TestPromptGeneration:
         assert "focused room" in prompt.lower()
 
 
+@patch.dict(
+    os.environ,
+    {
+        "GEMINI_API_KEY": "test-key",
+        "GEMINI_BREAKER_BACKEND": "memory",
+        "GEMINI_LIMITER_BACKEND": "memory",
+        "REPORT_CACHE_ENABLED": "false",
+        "ARCHETYPE_REPORTS_ENABLED": "false",
+    },
+    clear=False,
+)
+@patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+@patch("app.utils.gemini_client.genai")
+class TestSystemInstruction:
+    """Test suite for the static report instruction registered once per client."""
+
+    SCORES = {"openness": 70.0, "neuroticism": 40.0}
+    DEMOGRAPHICS = {"name": "Alex", "lifePillars": {"career": "Dislike"}}
+
+    def test_full_prompt_fills_every_placeholder(self, mock_genai):
+        """Test that the self-contained prompt has the person's values in place."""
+        prompt = GeminiClient()._build_gemini_prompt(self.SCORES, self.SCORES, self.DEMOGRAPHICS)
+
+        assert PLACEHOLDER_PATTERN.search(prompt) is None
+        assert "## 💎 Final Insight for Alex" in prompt
+        assert "**Current Status:** Dislike" in prompt
+        assert "### Emotional Stability: 60/100" in prompt
+
+    def test_report_sends_only_the_profile(self, mock_genai):
+        """Test that full reports go to a model carrying the instruction, with a short prompt."""
+        mock_model = Mock()
+        mock_model.generate_content.return_value = Mock(text="## Report")
+        mock_genai.GenerativeModel.return_value = mock_model
+        client = GeminiClient()
+
+        client.generate_personality_suggestions(self.SCORES, self.SCORES, self.DEMOGRAPHICS)
+
+        mock_genai.GenerativeModel.assert_any_call(
+            client.model_name, system_instruction=REPORT_SYSTEM_INSTRUCTION
+        )
+        prompt = mock_model.generate_content.call_args[0][0]
+        assert "Name: Alex" in prompt and "70.0/100" in prompt
+        assert "YOUR MISSION" not in prompt
+        full_prompt = client._build_gemini_prompt(self.SCORES, self.SCORES, self.DEMOGRAPHICS)
+        assert len(prompt) * 10 < len(full_prompt)
+
+    def test_disabled_sends_full_prompt(self, mock_genai):
+        """Test GEMINI_SYSTEM_INSTRUCTION=false."""
+        mock_model = Mock()
+        mock_model.generate_content.return_value = Mock(text="## Report")
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        with patch.dict(os.environ, {"GEMINI_SYSTEM_INSTRUCTION": "false"}):
+            client = GeminiClient()
+            client.generate_personality_suggestions(self.SCORES, self.SCORES, self.DEMOGRAPHICS)
+
+        assert client.report_model is None
+        assert "YOUR MISSION" in mock_model.generate_content.call_args[0][0]
+
+    def test_placeholders_copied_into_report_are_filled(self, mock_genai):
+        """Test that instruction placeholders the model echoes never reach the stored report."""
+        mock_model = Mock()
+        mock_model.generate_content.return_value = Mock(
+            text="## 🎯 <name>, Here's Your Unique Personality Blueprint\n\n<openness>/100 <x>"
+        )
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        report = GeminiClient().generate_personality_suggestions(
+            self.SCORES, self.SCORES, self.DEMOGRAPHICS
+        )
+
+        assert report == "## 🎯 Alex, Here's Your Unique Personality Blueprint\n\n70/100 <x>"
+        assert extract_name_from_big_five_report(report) == "Alex"
+
+    def test_placeholders_split_across_stream_chunks_are_filled(self, mock_genai):
+        """Test that a placeholder spread over two chunks is still replaced."""
+        chunks = ["## 💎 Final Insight for <na", "me>\n\n<name>, keep", " going <"]
+        mock_model = Mock()
+        mock_model.generate_content.return_value = iter([Mock(text=text) for text in chunks])
+        mock_genai.GenerativeModel.return_value = mock_model
+        progress = []
+
+        report = GeminiClient().generate_personality_suggestions(
+            self.SCORES, self.SCORES, self.DEMOGRAPHICS, on_progress=progress.append
+        )
+
+        assert report == "## 💎 Final Insight for Alex\n\nAlex, keep going <"
+        assert all("<na" not in text for text in progress)
+
+    @patch.dict(os.environ, {"GEMINI_CONTEXT_CACHE_TTL": "3600"})
+    def test_context_cache_registered_once_and_refreshed(self, mock_genai):
+        """Test that the instruction is cached once and re-registered shortly before expiry."""
+        cached_model = Mock()
+        cached_model.generate_content.return_value = Mock(text="## Report")
+        mock_genai.GenerativeModel.from_cached_content.return_value = cached_model
+        client = GeminiClient()
+
+        for _ in range(2):
+            client.generate_personality_suggestions(self.SCORES, self.SCORES)
+        create = mock_genai.caching.CachedContent.create
+        assert create.call_count == 1
+        assert create.call_args.kwargs["system_instruction"] == REPORT_SYSTEM_INSTRUCTION
+        assert cached_model.generate_content.call_count == 2
+
+        client._context_cache_expires = time.time() + 30
+        client.generate_personality_suggestions(self.SCORES, self.SCORES)
+
+        assert create.call_count == 2
+        assert client.get_stats()["system_instruction"]["context_cache"] is True
+
+    @patch.dict(os.environ, {"GEMINI_CONTEXT_CACHE_TTL": "3600"})
+    def test_context_cache_failure_uses_system_instruction(self, mock_genai):
+        """Test that a cache the API refuses (e.g. too small) falls back to a plain instruction."""
+        mock_genai.caching.CachedContent.create.side_effect = Exception("content too small")
+
+        client = GeminiClient()
+
+        mock_genai.GenerativeModel.assert_any_call(
+            client.model_name, system_instruction=REPORT_SYSTEM_INSTRUCTION
+        )
+        stats = client.get_stats()["system_instruction"]
+        assert stats["enabled"] is True and stats["context_cache"] is False
+
+
+class TestStreamingSuggestions:
+    """Test suite for streamed report generation."""
+
+    @staticmethod
+    def _chunk(text):
+        chunk = Mock()
+        chunk.text = text
+        return chunk
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}, clear=False)
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_stream_yields_chunks_and_caches_report(self, mock_genai):
+        """Test that chunks are forwarded as they arrive and the full report is cached."""
+        mock_model = Mock()
+        mock_model.generate_content.return_value = iter(
+            [self._chunk("## Your "), self._chunk("Blueprint\n")]
+        )
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        client = GeminiClient()
+        scores = {"openness": 70.0}
+        percentiles = {"openness": 75.0}
+
+        chunks = list(client.stream_personality_suggestions(scores, percentiles))
+
+        assert chunks == ["## Your ", "Blueprint\n"]
+        assert mock_model.generate_content.call_args.kwargs["stream"] is True
+        assert list(client.stream_personality_suggestions(scores, percentiles)) == [
+            "## Your Blueprint"
+        ]
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}, clear=False)
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_stream_failure_before_output_falls_back(self, mock_genai):
+        """Test that a stream that fails immediately yields fallback suggestions."""
+        mock_model = Mock()
+        mock_model.generate_content.side_effect = Exception("API down")
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        client = GeminiClient()
+        chunks = list(client.stream_personality_suggestions({"openness": 70.0}, {}))
+
+        assert len(chunks) == 1
+        assert "Personality Profile" in chunks[0]
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}, clear=False)
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_stream_failure_after_output_raises(self, mock_genai):
+        """Test that a mid-stream failure is raised instead of returning a partial report."""
+
+        def broken_stream():
+            yield self._chunk("## Partial")
+            raise Exception("connection reset")
+
+        mock_model = Mock()
+        mock_model.generate_content.return_value = broken_stream()
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        client = GeminiClient()
+        stream = client.stream_personality_suggestions({"openness": 70.0}, {})
+
+        assert next(stream) == "## Partial"
+        with pytest.raises(Exception, match="connection reset"):
+            next(stream)
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}, clear=False)
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_stream_failure_is_signalled_instead_of_fallback(self, mock_genai):
+        """Test that a failed stream raises rather than passing generic text off as the report."""
+        mock_model = Mock()
+        mock_model.generate_content.side_effect = Exception("API down")
+        mock_genai.GenerativeModel.return_value = mock_model
+        progress = []
+
+        client = GeminiClient()
+        with pytest.raises(GeminiUnavailableError):
+            client.generate_personality_suggestions(
+                {"openness": 70.0}, {}, raise_on_failure=True, on_progress=progress.append
+            )
+        with pytest.raises(GeminiUnavailableError):
+            list(
+                client.stream_personality_suggestions({"openness": 70.0}, {}, raise_on_failure=True)
+            )
+
+        assert progress == []
+        # Nothing was cached: the second call went to Gemini again
+        assert mock_model.generate_content.call_count == 2
+
+
+SECTIONED_ENV = {
+    "GEMINI_API_KEY": "test-key",
+    "REPORT_SECTIONS_PARALLEL": "true",
+    "REPORT_FRAGMENT_CACHE_ENABLED": "false",
+}
+BALANCED = dict.fromkeys(
+    ["openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism"], 50.0
+)
+
+
+def _section_model(delay=0.0, fail=None):
+    """Mock model answering each section prompt with its own header after delay seconds."""
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def generate_content(prompt, generation_config=None, stream=False):
+        header = re.search(r"^## .*$", prompt, re.MULTILINE).group(0)
+        with lock:
+            active.append(header)
+            peak.append(len(active))
+        try:
+            time.sleep(delay(header) if callable(delay) else delay)
+            if fail and fail in header:
+                raise Exception("section failed")
+            chunk = Mock()
+            chunk.text = f"{header}\n\nBody of {header}"
+            return iter([chunk]) if stream else chunk
+        finally:
+            with lock:
+                active.remove(header)
+
+    model = Mock()
+    model.generate_content.side_effect = generate_content
+    model.peak = peak
+    return model
+
+
+class TestSectionedReports:
+    """Test suite for concurrently generated report sections."""
+
+    def test_prompt_blocks_are_grouped_in_report_order(self):
+        """Test that every ## block of the full prompt lands in exactly one section."""
+        prompt = GeminiClient()._build_gemini_prompt(BALANCED, BALANCED, {"name": "Alex"})
+        preamble, blocks, guidelines = split_prompt_sections(prompt)
+        groups = group_report_sections(blocks)
+
+        assert "Name: Alex" in preamble
+        assert guidelines.lstrip().startswith("CRITICAL GUIDELINES")
+        assert sum(groups, []) == blocks
+        assert [group[0].split("\n")[0] for group in groups] == [
+            "## QUOTE",
+            "## 📊 Your Trait Deep-Dive",
+            "## 🌍 Your Life Domain Blueprint",
+            "## 📅 Your Personalized Daily Routine",
+            "## 🎯 90-Day Incremental Improvement Plan",
+            "## 🛠️ Focused Room: Your Personalized Setup",
+            "## 💎 Final Insight for Alex",
+        ]
+
+    @patch.dict(os.environ, SECTIONED_ENV, clear=False)
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_sections_run_concurrently_and_assemble_in_order(self, mock_genai):
+        """Test that wall time tracks the slowest section, not the sum."""
+        mock_model = _section_model(delay=0.2)
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        client = GeminiClient()
+        started = time.monotonic()
+        report = client.generate_personality_suggestions(BALANCED, BALANCED, {"name": "Alex"})
+        elapsed = time.monotonic() - started
+
+        assert elapsed < 0.2 * len(REPORT_SECTIONS) / 2
+        assert max(mock_model.peak) == len(REPORT_SECTIONS)
+        headers = [line for line in report.split("\n") if line.startswith("## ")]
+        assert headers[0] == "## QUOTE"
+        assert headers[-1] == "## 💎 Final Insight for Alex"
+        token_limits = [
+            call.kwargs["generation_config"]["max_output_tokens"]
+            for call in mock_model.generate_content.call_args_list
+        ]
+        assert sorted(token_limits) == sorted(s["max_output_tokens"] for s in REPORT_SECTIONS)
+
+    @patch.dict(os.environ, SECTIONED_ENV, clear=False)
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_failed_section_falls_back_and_report_is_not_cached(self, mock_genai):
+        """Test per-section fallback text in place of a failed section."""
+        mock_model = _section_model(fail="90-Day")
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        client = GeminiClient()
+        report = client.generate_personality_suggestions(BALANCED, BALANCED)
+        again = client.generate_personality_suggestions(BALANCED, BALANCED)
+
+        assert SECTION_FALLBACKS["plan"] in report
+        assert "Body of ## 📅 Your Personalized Daily Routine" in report
+        assert report.index("Daily Routine") < report.index("90-Day")
+        assert again == report
+        assert mock_model.generate_content.call_count == 2 * len(REPORT_SECTIONS)
+        assert client.get_stats()["sections"]["failures"] == 2
+
+    @patch.dict(os.environ, {**SECTIONED_ENV, "REPORT_SECTION_TIMEOUT": "0.2"}, clear=False)
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_slow_section_is_replaced_at_deadline(self, mock_genai):
+        """Test that one slow section doesn't hold up the report past the deadline."""
+        mock_genai.GenerativeModel.return_value = _section_model(
+            delay=lambda header: 1.0 if "Focused Room" in header else 0.0
+        )
+
+        client = GeminiClient()
+        started = time.monotonic()
+        report = client.generate_personality_suggestions(BALANCED, BALANCED)
+
+        assert time.monotonic() - started < 0.8
+        assert SECTION_FALLBACKS["focused_room"] in report
+
+    @patch.dict(os.environ, SECTIONED_ENV, clear=False)
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_stream_yields_sections_in_order_and_caches(self, mock_genai):
+        """Test that streamed sections arrive in report order and the report is cached."""
+        # Later sections finish first
+        mock_genai.GenerativeModel.return_value = _section_model(
+            delay=lambda header: 0.1 if "QUOTE" in header else 0.0
+        )
+
+        client = GeminiClient()
+        chunks = list(client.stream_personality_suggestions(BALANCED, BALANCED))
+
+        assert len(chunks) == len(REPORT_SECTIONS)
+        assert chunks[0].startswith("## QUOTE")
+        assert chunks[1].startswith("\n\n## 📊")
+        assert list(client.stream_personality_suggestions(BALANCED, BALANCED)) == ["".join(chunks)]
+
+    @patch.dict(os.environ, SECTIONED_ENV, clear=False)
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_stream_with_every_section_failed_is_a_failure(self, mock_genai):
+        """Test that a streamed report made only of section fallbacks is not returned."""
+        mock_genai.GenerativeModel.return_value = _section_model(fail="## ")
+        progress = []
+
+        client = GeminiClient()
+        with pytest.raises(GeminiUnavailableError):
+            client.generate_personality_suggestions(
+                BALANCED, BALANCED, raise_on_failure=True, on_progress=progress.append
+            )
+
+        assert SECTION_FALLBACKS["plan"] in progress[-1]
+
+    @patch.dict(os.environ, {**SECTIONED_ENV, "REPORT_FRAGMENT_CACHE_ENABLED": "true"})
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_trait_only_fragments_are_shared_by_trait_levels(self, mock_genai):
+        """Test that a second person with the same levels only costs the personal sections."""
+        mock_model = _section_model()
+        mock_genai.GenerativeModel.return_value = mock_model
+        trait_only = [s["key"] for s in REPORT_SECTIONS if s.get("trait_only")]
+
+        client = GeminiClient()
+        first = client.generate_personality_suggestions(BALANCED, BALANCED, {"name": "Alex"})
+        fragment_prompts = [
+            call.args[0]
+            for call in mock_model.generate_content.call_args_list
+            if "Alex" not in call.args[0]
+        ]
+        similar = dict.fromkeys(BALANCED, 53.0)
+        second = client.generate_personality_suggestions(similar, similar, {"name": "Sam"})
+
+        assert len(fragment_prompts) == len(trait_only)
+        assert all("Openness to Experience: Moderate" in p for p in fragment_prompts)
+        assert mock_model.generate_content.call_count == 2 * len(REPORT_SECTIONS) - len(trait_only)
+        assert "Body of ## 🛠️ Focused Room: Your Personalized Setup" in first
+        assert "Body of ## 🛠️ Focused Room: Your Personalized Setup" in second
+        assert "## 💎 Final Insight for Sam" in second
+        stats = client.get_stats()["fragments"]
+        assert stats["hits"] == len(trait_only)
+        assert stats["misses"] == len(trait_only)
+        assert stats["output_tokens_saved"] > 0 and stats["prompt_tokens_saved"] > 0
+
+    @patch.dict(os.environ, {**SECTIONED_ENV, "REPORT_FRAGMENT_CACHE_ENABLED": "true"})
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_different_trait_levels_miss_the_fragment_cache(self, mock_genai):
+        """Test that fragments are keyed by the trait-level tuple."""
+        mock_model = _section_model()
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        client = GeminiClient()
+        client.generate_personality_suggestions(BALANCED, BALANCED)
+        client.generate_personality_suggestions({**BALANCED, "openness": 80.0}, BALANCED)
+
+        assert mock_model.generate_content.call_count == 2 * len(REPORT_SECTIONS)
+        assert client.get_stats()["fragments"]["hits"] == 0
+
+
+class TestFakeModel:
+    """Test suite for the stand-in model used by load tests."""
+
+    PROMPT = "Write the report.\n\n## Overview\n...\n## Career\n...\n## Overview\n"
+
+    def test_report_echoes_requested_sections(self):
+        """Test that each requested header appears once, within the token budget."""
+        model = FakeGenerativeModel(latency_median=0.001, latency_sigma=0)
+
+        text = model.generate_content(self.PROMPT, {"max_output_tokens": 100}).text
+
+        assert re.findall(r"^## .+$", text, re.M) == ["## Overview", "## Career"]
+        assert len(text) < 600
+
+    def test_streaming_latency_and_errors(self):
+        """Test that streams arrive in chunks after the sampled latency and errors surface."""
+        model = FakeGenerativeModel(latency_median=0.05, latency_sigma=0, chunk_chars=50)
+        start = time.time()
+
+        chunks = [chunk.text for chunk in model.generate_content(self.PROMPT, stream=True)]
+
+        assert len(chunks) > 1 and "".join(chunks).startswith("## Overview")
+        assert time.time() - start >= 0.05
+
+        model.error_rate = 1.0
+        with pytest.raises(FakeGeminiError):
+            list(model.generate_content(self.PROMPT, stream=True))
+        assert model.get_stats() == {"calls": 2, "errors": 1}
+
+    @patch.dict(
+        os.environ,
+        {
+            "GEMINI_FAKE_MODEL": "true",
+            "GEMINI_FAKE_LATENCY_MEDIAN": "0.001",
+            "GEMINI_FAKE_ERROR_RATE": "0",
+            "GEMINI_BREAKER_BACKEND": "memory",
+            "GEMINI_LIMITER_BACKEND": "memory",
+            "REPORT_CACHE_ENABLED": "false",
+            "ARCHETYPE_REPORTS_ENABLED": "false",
+        },
+        clear=False,
+    )
+    def test_fake_report_has_the_persons_name(self):
+        """Test that headers echoed from the system instruction carry the name, not <name>."""
+        report = GeminiClient().generate_personality_suggestions(
+            {"openness": 70.0}, {"openness": 75.0}, {"name": "Alex"}
+        )
+
+        assert "## 🎯 Alex, Here's Your Unique Personality Blueprint" in report
+        assert PLACEHOLDER_PATTERN.search(report) is None
+        assert extract_name_from_big_five_report(report) == "Alex"
+
+    @patch.dict(
+        os.environ,
+        {
+            "GEMINI_FAKE_MODEL": "true",
+            "GEMINI_FAKE_LATENCY_MEDIAN": "0.001",
+            "GEMINI_FAKE_ERROR_RATE": "1",
+            "GEMINI_BREAKER_BACKEND": "memory",
+            "GEMINI_LIMITER_BACKEND": "memory",
+            "REPORT_CACHE_ENABLED": "false",
+            "ARCHETYPE_REPORTS_ENABLED": "false",
+        },
+        clear=False,
+    )
+    def test_client_uses_fake_model(self):
+        """Test that GeminiClient selects the fake model by config, without an API key."""
+        client = GeminiClient()
+
+        report = client.generate_personality_suggestions({"openness": 70.0}, {"openness": 75.0})
+
+        assert client.provider == "fake"
+        assert "Your Personality Profile" in report  # fallback after simulated errors
+        assert client.get_stats()["fake_model"] == {"calls": 1, "errors": 1}
+        assert client.get_stats()["limiter"]["in_flight"] == 0
+
+
 class TestSingletonPattern:
     """Test suite for singleton client instance management."""
 
@@ -0,0 +1,201 @@
+"""
+Unit tests for the empirical percentile norms.
+
+Tests cover:
+- Building norm tables from stored results (overall and per segment)
+- Incremental refreshes from the watermark
+- Detecting a concurrent refresh
+- O(log n) lookups with segment fallback
+- /big-five using empirical percentiles
+- Periodic refresh in the background worker
+"""
+
+import pytest
+from sqlalchemy import text
+
+from app.models import BigFiveResult, Customer, NormTable, db
+from app.utils import norms
+from app.utils.bigfive import TRAITS, compute_bigfive_scores
+from app.utils.norms import (
+    NormLookup,
+    build_lookup_table,
+    lookup_percentile,
+    refresh_norms,
+    result_segments,
+)
+from app.utils.quantile_sketch import KLLSketch
+from app.worker import Worker
+
+ANSWERS = [3, 4, 2, 5, 3, 4, 2, 3, 4, 5, 3, 2, 4, 3, 5, 4, 2, 3, 4, 5, 3, 4] * 2
+
+
+@pytest.fixture(autouse=True)
+def fresh_lookup(monkeypatch):
+    """Don't let a lookup cached by another test leak into this one."""
+    monkeypatch.setattr(norms, "_norm_lookup", None)
+
+
+def _add_results(openness_scores, profession=None, career_stage=None):
+    for score in openness_scores:
+        customer_id = None
+        if profession or career_stage:
+            customer = Customer(
+                email_id=f"user{Customer.query.count()}@example.com",
+                profession=profession,
+                career_stage=career_stage,
+            )
+            db.session.add(customer)
+            db.session.flush()
+            customer_id = customer.customer_id
+        scores = {trait: 50.0 for trait in TRAITS}
+        scores["openness"] = score
+        db.session.add(BigFiveResult(customer_id=customer_id, scores={"scores": scores}))
+    db.session.commit()
+
+
+def _table(trait, segment="all"):
+    return db.session.get(NormTable, (trait, segment))
+
+
+class TestNormTables:
+    """Test suite for refresh_norms and the lookup table format."""
+
+    def test_segments(self):
+        """Test segment names are normalized and ordered most specific first."""
+        assert result_segments("  Software   Engineer ", "Mid-Level") == [
+            "profession:software engineer",
+            "career_stage:mid-level",
+            "all",
+        ]
+        assert result_segments(None, "") == ["all"]
+
+    def test_lookup_table_percentiles(self):
+        """Test mid-rank percentiles for exact matches and 'below' between values."""
+        sketch = KLLSketch()
+        sketch.update_many([10.0, 20.0, 20.0, 30.0])
+        table = build_lookup_table(sketch)
+
+        assert table["values"] == [10.0, 20.0, 30.0]
+        assert lookup_percentile(table, 20.0) == 50.0
+        assert lookup_percentile(table, 10.0) == 12.5
+        assert lookup_percentile(table, 25.0) == 75.0
+        assert lookup_percentile(table, 5.0) == 0.0
+        assert lookup_percentile(table, 99.0) == 100.0
+
+    def test_refresh_builds_overall_and_segment_tables(self, app):
+        """Test that results feed the 'all' table and their profession/stage tables."""
+        _add_results([10.0, 20.0], profession="Designer", career_stage="Senior")
+        _add_results([30.0, 40.0])
+
+        summary = refresh_norms()
+
+        assert summary["results"] == 4
+        assert summary["conflict"] is False
+        assert _table("openness").sample_count == 4
+        assert _table("openness", "profession:designer").sample_count == 2
+        assert _table("openness", "career_stage:senior").sample_count == 2
+        assert lookup_percentile(_table("openness").table, 30.0) == 62.5
+
+    def test_refresh_is_incremental(self, app):
+        """Test that only results after the watermark are folded in."""
+        _add_results([10.0, 20.0])
+        first = refresh_norms()
+
+        assert refresh_norms()["results"] == 0
+
+        _add_results([30.0])
+        second = refresh_norms()
+
+        assert second["results"] == 1
+        assert second["watermark"] > first["watermark"]
+        assert _table("openness").sample_count == 3
+        assert _table("neuroticism").sample_count == 3
+
+    def test_concurrent_refresh_is_detected(self, app, monkeypatch):
+        """Test that a refresh racing another worker's refresh writes nothing."""
+        _add_results([10.0])
+        refresh_norms()
+        _add_results([20.0])
+
+        scan = norms._scan_new_results
+
+        def scan_while_another_worker_commits(*args):
+            # Simulates another worker committing its refresh in between
+            db.session.execute(text("UPDATE norm_table SET version = version + 1"))
+            return scan(*args)
+
+        monkeypatch.setattr(norms, "_scan_new_results", scan_while_another_worker_commits)
+        summary = refresh_norms()
+
+        assert summary["conflict"] is True
+        assert _table("openness").sample_count == 1
+
+
+class TestNormLookup:
+    """Test suite for NormLookup."""
+
+    def test_prefers_most_specific_segment_with_enough_samples(self, app):
+        """Test segment preference and the min_samples threshold."""
+        _add_results([80.0, 90.0, 90.0], profession="Designer")
+        _add_results([10.0, 20.0], profession="Writer")
+        refresh_norms()
+        lookup = NormLookup(min_samples=3, check_interval=0)
+
+        assert lookup.percentile("openness", 90.0, result_segments("designer")) == (
+            pytest.approx(200 / 3, abs=1e-3),
+            "profession:designer",
+        )
+        # Only 2 writers: falls back to all 5 results
+        assert lookup.percentile("openness", 20.0, result_segments("writer")) == (30.0, "all")
+        assert lookup.percentile("unknown_trait", 20.0, ["all"]) is None
+
+    def test_reloads_only_when_tables_change(self, app):
+        """Test that unchanged tables are not reloaded."""
+        _add_results([10.0, 20.0])
+        refresh_norms()
+        lookup = NormLookup(min_samples=1, check_interval=0)
+
+        lookup.percentile("openness", 10.0, ["all"])
+        lookup.percentile("openness", 10.0, ["all"])
+        assert lookup.reloads == 1
+
+        _add_results([30.0])
+        refresh_norms()
+        assert lookup.percentile("openness", 30.0, ["all"]) == (pytest.approx(500 / 6), "all")
+        assert lookup.reloads == 2
+
+    def test_big_five_uses_empirical_percentiles(self, app, client, monkeypatch):
+        """Test that /big-five replaces curve percentiles once norms exist."""
+        expected_scores = compute_bigfive_scores(ANSWERS)["scores"]
+        _add_results([0.0, 100.0, expected_scores["openness"]])
+        refresh_norms()
+        monkeypatch.setattr(norms, "_norm_lookup", NormLookup(min_samples=3, check_interval=0))
+
+        data = client.post("/big-five", json={"answers": ANSWERS}).get_json()
+
+        assert data["percentiles"]["openness"] == 50.0
+        stored = BigFiveResult.query.filter_by(access_token=data["access_token"]).one().scores
+        assert stored["percentiles"]["openness"] == 50.0
+
+    def test_big_five_without_norms_uses_curve(self, client):
+        """Test that the built-in curve is used when no tables exist."""
+        data = client.post("/big-five", json={"answers": ANSWERS}).get_json()
+        assert data["percentiles"] == compute_bigfive_scores(ANSWERS)["percentiles"]
+
+
+class TestWorkerNormRefresh:
+    """Test suite for the worker's periodic norm refresh."""
+
+    def test_refresh_runs_once_per_interval(self, app):
+        """Test that the worker refreshes norms when due and not again until the interval."""
+        app.config["NORMS_REFRESH_INTERVAL"] = 3600
+        _add_results([10.0])
+        worker = Worker(app, worker_id="test-worker")
+
+        assert worker.refresh_norms_if_due()["results"] == 1
+        assert worker.refresh_norms_if_due() is None
+
+    def test_refresh_disabled(self, app):
+        """Test that NORMS_REFRESH_INTERVAL=0 disables the refresh."""
+        app.config["NORMS_REFRESH_INTERVAL"] = 0
+        assert Worker(app, worker_id="test-worker").refresh_norms_if_due() is None
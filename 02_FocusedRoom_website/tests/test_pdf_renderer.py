@@ -0,0 +1,190 @@
+"""
+Unit tests for the process-pool PDF renderer.
+
+Tests cover:
+- Rendering in worker processes and caching the bytes
+- Sharing one render between concurrent identical requests
+- Bounded queue rejection
+- Recovery after a worker process dies
+- /big-five/result/<access_token>/pdf endpoint
+"""
+
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.models import BigFiveResult, Customer, db
+from app.utils.pdf_renderer import PDFRenderer, PDFRenderQueueFullError, build_pdf_cache_key
+from app.utils.report_generator import get_report_styles
+
+SCORES = {"openness": 65.0, "conscientiousness": 80.0, "neuroticism": 30.0}
+PERCENTILES = {"openness": 70.0, "conscientiousness": 85.0, "neuroticism": 25.0}
+REPORT = "## Your Profile\n\nYou are **curious**.\n### Focus\n- Plan your *day*"
+
+
+def _slow_render(user_email, scores, percentiles, suggestions, result_id):
+    time.sleep(0.5)
+    return f"pdf:{result_id}".encode()
+
+
+def _crash_render(user_email, scores, percentiles, suggestions, result_id):
+    if result_id == 0:
+        os._exit(1)
+    return b"pdf"
+
+
+@pytest.fixture
+def make_renderer():
+    renderers = []
+
+    def factory(**kwargs):
+        kwargs.setdefault("max_workers", 1)
+        renderer = PDFRenderer(**kwargs)
+        renderers.append(renderer)
+        return renderer
+
+    yield factory
+    for renderer in renderers:
+        renderer.shutdown()
+
+
+class TestPDFRenderer:
+    """Test suite for PDFRenderer."""
+
+    def test_styles_built_once_per_process(self):
+        """Test that the stylesheet is shared between renders."""
+        assert get_report_styles() is get_report_styles()
+        assert "MinorHeading" in get_report_styles()
+
+    def test_render_returns_pdf_and_caches_bytes(self, make_renderer):
+        """Test a real render in a worker process, then a cache hit."""
+        renderer = make_renderer()
+
+        first = renderer.render("a@example.com", SCORES, PERCENTILES, REPORT, result_id=1)
+        second = renderer.render("a@example.com", SCORES, PERCENTILES, REPORT, result_id=1)
+
+        assert first.startswith(b"%PDF")
+        assert second == first
+        stats = renderer.stats()
+        assert stats["rendered"] == 1
+        assert stats["cache_hits"] == 1
+        assert stats["cache_entries"] == 1
+
+    def test_cache_key_covers_result_and_content(self):
+        """Test that a different result ID or report text gets its own cache entry."""
+        base = build_pdf_cache_key("a@example.com", SCORES, PERCENTILES, REPORT, 1)
+
+        assert base == build_pdf_cache_key("a@example.com", SCORES, PERCENTILES, REPORT, 1)
+        assert base != build_pdf_cache_key("a@example.com", SCORES, PERCENTILES, REPORT, 2)
+        assert base != build_pdf_cache_key("a@example.com", SCORES, PERCENTILES, "## Other", 1)
+
+    def test_identical_requests_share_one_render(self, make_renderer):
+        """Test that a report already in flight is not rendered twice."""
+        renderer = make_renderer(render_func=_slow_render)
+
+        first = renderer.submit("a@example.com", SCORES, PERCENTILES, REPORT, 5)
+        second = renderer.submit("a@example.com", SCORES, PERCENTILES, REPORT, 5)
+
+        assert second is first
+        assert first.result(timeout=30) == b"pdf:5"
+        assert renderer.stats()["coalesced"] == 1
+
+    def test_full_queue_rejects_new_renders(self, make_renderer):
+        """Test that submit() gives up once max_pending renders are queued."""
+        renderer = make_renderer(render_func=_slow_render, max_pending=1, queue_timeout=0.05)
+
+        running = renderer.submit("a@example.com", SCORES, PERCENTILES, REPORT, 1)
+        with pytest.raises(PDFRenderQueueFullError):
+            renderer.submit("b@example.com", SCORES, PERCENTILES, REPORT, 2)
+
+        assert running.result(timeout=30) == b"pdf:1"
+        assert renderer.stats()["rejected"] == 1
+        # The slot is free again once the render finished
+        assert renderer.render("b@example.com", SCORES, PERCENTILES, REPORT, 2) == b"pdf:2"
+
+    def test_pool_recovers_after_worker_dies(self, make_renderer):
+        """Test that a crashed worker process doesn't break later renders."""
+        renderer = make_renderer(render_func=_crash_render)
+
+        with pytest.raises(BrokenProcessPool):
+            renderer.render("a@example.com", SCORES, PERCENTILES, REPORT, 0)
+
+        assert renderer.render("a@example.com", SCORES, PERCENTILES, REPORT, 1) == b"pdf"
+        assert renderer.stats()["failed"] == 1
+
+
+class TestBigFiveResultPDF:
+    """Test suite for /big-five/result/<access_token>/pdf."""
+
+    @staticmethod
+    def _add_result(status="complete", suggestions=REPORT):
+        customer = Customer(email_id="jane@example.com", opt_in=True)
+        db.session.add(customer)
+        db.session.flush()
+        result = BigFiveResult(
+            customer_id=customer.customer_id,
+            scores={"scores": SCORES, "percentiles": PERCENTILES},
+            suggestions=suggestions,
+            status=status,
+        )
+        db.session.add(result)
+        db.session.commit()
+        return result
+
+    def test_returns_pdf_attachment(self, client):
+        """Test that a complete report is rendered with a masked email."""
+        result = self._add_result()
+        renderer = Mock()
+        renderer.render.return_value = b"%PDF-1.4 test"
+
+        with patch("app.routes.get_pdf_renderer", return_value=renderer):
+            response = client.get(f"/big-five/result/{result.access_token}/pdf")
+
+        assert response.status_code == 200
+        assert response.mimetype == "application/pdf"
+        assert response.data == b"%PDF-1.4 test"
+        assert "personality_report.pdf" in response.headers["Content-Disposition"]
+        kwargs = renderer.render.call_args.kwargs
+        assert kwargs["user_email"] == "j***@example.com"
+        assert kwargs["result_id"] == result.id
+
+    def test_pending_report_returns_409(self, client):
+        """Test that a report still being generated can't be downloaded yet."""
+        result = self._add_result(status="pending", suggestions=None)
+        assert client.get(f"/big-five/result/{result.access_token}/pdf").status_code == 409
+
+    def test_partial_report_returns_409(self, client):
+        """Test that the worker's partial text on a pending result isn't rendered."""
+        result = self._add_result(status="pending", suggestions="## Half a rep")
+        assert client.get(f"/big-five/result/{result.access_token}/pdf").status_code == 409
+
+    def test_provisional_report_is_rendered(self, client):
+        """Test that the generic report served while the AI report finishes can be downloaded."""
+        result = self._add_result(status="provisional")
+        renderer = Mock()
+        renderer.render.return_value = b"%PDF-1.4 test"
+
+        with patch("app.routes.get_pdf_renderer", return_value=renderer):
+            response = client.get(f"/big-five/result/{result.access_token}/pdf")
+
+        assert response.status_code == 200
+        assert renderer.render.call_args.kwargs["suggestions"] == REPORT
+
+    def test_full_queue_returns_503(self, client):
+        """Test that a saturated renderer sheds load with Retry-After."""
+        result = self._add_result()
+        renderer = Mock()
+        renderer.render.side_effect = PDFRenderQueueFullError("full")
+
+        with patch("app.routes.get_pdf_renderer", return_value=renderer):
+            response = client.get(f"/big-five/result/{result.access_token}/pdf")
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+
+    def test_unknown_result_returns_404(self, client):
+        """Test the PDF endpoint for a missing result."""
+        assert client.get("/big-five/result/not-a-token/pdf").status_code == 404
@@ -0,0 +1,189 @@
+"""
+Unit tests for the psychometric quality report.
+
+Tests cover:
+- Cronbach's alpha and item statistics against direct computations
+- Chunked covariance accumulation
+- Longstring and even-odd consistency flags
+- Report over stored results (per test length, skipped results)
+- /admin/psychometrics endpoint (ADMIN_TOKEN protection) and CLI formatting
+"""
+
+import numpy as np
+import pytest
+
+from app.models import BigFiveResult, db
+from app.tools.psychometrics import format_report
+from app.utils.answer_packing import pack_answers
+from app.utils.bigfive import DEFAULT_QUESTION_MAPPINGS
+from app.utils.psychometrics import (
+    PsychometricAccumulator,
+    compute_quality_report,
+    cronbach_alpha,
+    even_odd_consistency,
+    item_statistics_from_cov,
+    longstring,
+    response_style_flags,
+)
+
+
+def _simulated_answers(rows, n_items=44, seed=0):
+    """Answers driven by one latent level per trait plus noise (internally consistent)."""
+    rng = np.random.default_rng(seed)
+    latent = rng.normal(size=(rows, 5))
+    answers = np.empty((rows, n_items))
+    for column, indices in enumerate(DEFAULT_QUESTION_MAPPINGS[n_items].values()):
+        answers[:, indices] = latent[:, [column]] + rng.normal(size=(rows, len(indices)))
+    return np.clip(np.rint(3 + answers), 1, 5).astype(np.int8)
+
+
+class TestReliability:
+    """Test suite for alpha and item-total correlations."""
+
+    def test_cronbach_alpha_matches_formula(self):
+        """Test alpha against k/(k-1) * (1 - sum of item variances / total variance)."""
+        items = _simulated_answers(500)[:, DEFAULT_QUESTION_MAPPINGS[44]["openness"]]
+        k = items.shape[1]
+        expected = (
+            k / (k - 1) * (1 - items.var(axis=0, ddof=1).sum() / items.sum(axis=1).var(ddof=1))
+        )
+
+        assert cronbach_alpha(items) == pytest.approx(expected)
+        assert 0.8 < cronbach_alpha(items) < 0.95
+
+    def test_item_statistics_match_direct_computation(self):
+        """Test corrected item-total r and alpha-if-deleted for one item."""
+        items = _simulated_answers(500)[:, DEFAULT_QUESTION_MAPPINGS[44]["neuroticism"]]
+        stats = item_statistics_from_cov(np.cov(items, rowvar=False))
+        rest = items[:, 1:].sum(axis=1)
+
+        assert stats["item_total"][0] == pytest.approx(np.corrcoef(items[:, 0], rest)[0, 1])
+        assert stats["alpha_if_deleted"][0] == pytest.approx(cronbach_alpha(items[:, 1:]))
+
+    def test_chunked_covariance_matches_numpy(self):
+        """Test that accumulating chunks gives the same covariance as one pass."""
+        answers = _simulated_answers(1000, n_items=50)
+        accumulator = PsychometricAccumulator(50)
+        for start in range(0, 1000, 300):
+            accumulator.update(answers[start : start + 300])
+
+        assert accumulator.n == 1000
+        assert np.allclose(accumulator.covariance(), np.cov(answers, rowvar=False))
+
+    def test_random_answers_have_low_alpha(self):
+        """Test that uniformly random answers show no reliability."""
+        answers = np.random.default_rng(1).integers(1, 6, size=(2000, 44))
+        accumulator = PsychometricAccumulator(44)
+        accumulator.update(answers)
+
+        for stats in accumulator.report()["traits"].values():
+            assert abs(stats["alpha"]) < 0.2
+
+
+class TestResponseStyleFlags:
+    """Test suite for straight-lining and random-responding flags."""
+
+    def test_longstring(self):
+        """Test the longest run of identical consecutive answers."""
+        answers = np.array([[1, 1, 2, 2, 2, 3], [5, 5, 5, 5, 5, 5], [1, 2, 1, 2, 1, 2]])
+
+        assert longstring(answers).tolist() == [3, 6, 1]
+
+    def test_straight_lined_test_is_flagged(self):
+        """Test that answering 3 to everything is straight-lining, not random responding."""
+        answers = np.vstack([np.full(44, 3), _simulated_answers(1)[0]])
+
+        flags = response_style_flags(answers)
+
+        assert flags["straight_lining"].tolist() == [True, False]
+        assert np.isnan(flags["even_odd"][0])
+        assert not flags["random_responding"][0]
+
+    def test_inconsistent_halves_are_flagged_as_random(self):
+        """Test even-odd consistency for agreeing and contradicting half-scales."""
+        mapping = DEFAULT_QUESTION_MAPPINGS[44]
+        consistent = np.zeros(44)
+        contradictory = np.zeros(44)
+        for level, indices in zip([1, 2, 3, 4, 5], mapping.values()):
+            consistent[indices] = level
+            contradictory[indices[0::2]] = level
+            contradictory[indices[1::2]] = 6 - level
+        answers = np.vstack([consistent, contradictory])
+
+        assert even_odd_consistency(answers, mapping) == pytest.approx([1.0, -1.0])
+        assert response_style_flags(answers)["random_responding"].tolist() == [False, True]
+
+
+class TestQualityReport:
+    """Test suite for compute_quality_report and its endpoint."""
+
+    def _store(self, answers):
+        for row in answers:
+            db.session.add(
+                BigFiveResult(scores={"scores": {}}, raw_answers=pack_answers(row.tolist()))
+            )
+
+    def test_report_over_stored_results(self, app):
+        """Test per-length sections, flag counts with result IDs, and skipped results."""
+        self._store(np.full((1, 44), 4))
+        self._store(_simulated_answers(300))
+        self._store(_simulated_answers(200, n_items=50))
+        db.session.add(BigFiveResult(scores={"scores": {}}))
+        db.session.commit()
+
+        report = compute_quality_report(batch_size=64)
+
+        assert report["results"] == 501
+        assert report["skipped"] == 1
+        assert report["by_length"]["44"]["tests"] == 301
+        assert report["by_length"]["50"]["tests"] == 200
+        straight = report["by_length"]["44"]["flags"]["straight_lining"]
+        assert straight["count"] == 1
+        assert straight["result_ids"] == [1]
+        openness = report["by_length"]["50"]["traits"]["openness"]
+        assert openness["alpha"] > 0.8
+        assert [item["item"] for item in openness["items"]][:3] == [5, 10, 15]
+
+    def test_admin_endpoint(self, app, client):
+        """Test that /admin/psychometrics returns the report as JSON."""
+        app.config["ADMIN_TOKEN"] = "s3cret"
+        self._store(_simulated_answers(50))
+        db.session.commit()
+
+        response = client.get(
+            "/admin/psychometrics?straightline_run=8", headers={"Authorization": "Bearer s3cret"}
+        )
+        data = response.get_json()
+
+        assert response.status_code == 200
+        assert data["success"] is True
+        assert data["data"]["results"] == 50
+        assert data["data"]["settings"]["straightline_run"] == 8
+
+    def test_admin_endpoint_requires_token(self, app, client):
+        """Test that a missing or wrong bearer token is rejected before any result is read."""
+        app.config["ADMIN_TOKEN"] = "s3cret"
+
+        assert client.get("/admin/psychometrics").status_code == 401
+        wrong = client.get("/admin/psychometrics", headers={"Authorization": "Bearer nope"})
+        assert wrong.status_code == 401
+        assert wrong.headers["WWW-Authenticate"] == "Bearer"
+
+    def test_admin_endpoint_hidden_without_token(self, app, client):
+        """Test that the endpoint doesn't exist when ADMIN_TOKEN isn't configured."""
+        app.config["ADMIN_TOKEN"] = None
+
+        response = client.get("/admin/psychometrics", headers={"Authorization": "Bearer "})
+
+        assert response.status_code == 404
+
+    def test_format_report(self, app):
+        """Test the CLI summary lists alpha per trait and flag rates."""
+        self._store(_simulated_answers(100))
+        db.session.commit()
+
+        text = format_report(compute_quality_report())
+
+        assert "44-item test (100 tests)" in text
+        assert "openness" in text
+        assert "straight_lining:" in text
@@ -0,0 +1,103 @@
+"""
+Unit tests for the KLL quantile sketch.
+
+Tests cover:
+- Exact answers before the first compaction
+- Rank error bound on large streams
+- Merging sketches built separately
+- JSON round trip
+"""
+
+import json
+import random
+
+import pytest
+
+from app.utils.quantile_sketch import KLLSketch
+
+
+def _max_rank_error(sketch, values):
+    ordered = sorted(values)
+    errors = []
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        value = ordered[int(q * len(ordered))]
+        true_rank = sum(1 for v in ordered if v <= value)
+        errors.append(abs(sketch.rank(value) - true_rank) / len(ordered))
+    return max(errors)
+
+
+class TestKLLSketch:
+    """Test suite for KLLSketch."""
+
+    def test_small_streams_are_exact(self):
+        """Test that nothing is compacted before the sketch fills up."""
+        sketch = KLLSketch(k=200)
+        sketch.update_many([5.0, 1.0, 3.0, 3.0])
+
+        assert sketch.weighted_values() == [(1.0, 1), (3.0, 1), (3.0, 1), (5.0, 1)]
+        assert sketch.rank(3.0) == 3
+        assert sketch.quantile(0.5) == 3.0
+        assert (sketch.min, sketch.max) == (1.0, 5.0)
+
+    def test_rank_error_on_large_stream(self):
+        """Test that 100k values are summarized with about 1% rank error in far less memory."""
+        rng = random.Random(0)
+        values = [rng.gauss(50, 15) for _ in range(100_000)]
+        sketch = KLLSketch(k=200, seed=1)
+        sketch.update_many(values)
+
+        assert sketch.n == 100_000
+        assert sum(weight for _value, weight in sketch.weighted_values()) == 100_000
+        assert len(sketch.weighted_values()) < 1000
+        assert _max_rank_error(sketch, values) < 0.02
+
+    def test_update_many_matches_update(self):
+        """Test that bulk updates build the same sketch as one-at-a-time updates."""
+        values = [random.Random(2).random() for _ in range(5000)]
+        one_by_one = KLLSketch(k=50, seed=3)
+        for value in values:
+            one_by_one.update(value)
+        bulk = KLLSketch(k=50, seed=3)
+        bulk.update_many(values)
+
+        assert bulk.to_dict() == one_by_one.to_dict()
+
+    def test_merge(self):
+        """Test that merged sketches summarize the union of their streams."""
+        rng = random.Random(4)
+        values = [rng.uniform(0, 100) for _ in range(60_000)]
+        parts = [KLLSketch(k=200, seed=i) for i in range(3)]
+        for i, part in enumerate(parts):
+            part.update_many(values[i::3])
+
+        merged = KLLSketch(k=200, seed=9)
+        for part in parts:
+            merged.merge(part)
+
+        assert merged.n == 60_000
+        assert sum(weight for _value, weight in merged.weighted_values()) == 60_000
+        assert (merged.min, merged.max) == (min(values), max(values))
+        assert _max_rank_error(merged, values) < 0.02
+
+    def test_json_round_trip(self):
+        """Test that a serialized sketch restores identically."""
+        sketch = KLLSketch(k=50, seed=5)
+        sketch.update_many(range(10_000))
+
+        restored = KLLSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+
+        assert restored.weighted_values() == sketch.weighted_values()
+        assert restored.n == sketch.n
+        restored.update(1.0)
+        assert restored.n == sketch.n + 1
+
+    def test_empty_sketch(self):
+        """Test queries on an empty sketch."""
+        sketch = KLLSketch()
+        assert sketch.quantile(0.5) is None
+        assert sketch.rank(1.0) == 0
+
+    def test_rejects_tiny_k(self):
+        """Test that k below 8 is refused."""
+        with pytest.raises(ValueError):
+            KLLSketch(k=4)
@@ -0,0 +1,221 @@
+"""
+Unit tests for the pluggable rate limiter backends.
+
+Tests cover:
+- Fixed-window counting in the shared database table
+- Counters shared between limiter instances (i.e. gunicorn workers)
+- Redis-protocol backend against a local fakeredis TCP server
+- Backend selection from config and fail-open behaviour
+- The rate_limit decorator using the configured backend
+"""
+
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.models import RateLimitCounter, db
+from app.utils.rate_limiter import (
+    DatabaseBackend,
+    MemoryBackend,
+    RateLimiter,
+    RedisBackend,
+    create_backend,
+    rate_limiter,
+)
+
+
+@pytest.fixture
+def redis_url():
+    """Run a Redis-protocol stand-in on a local port."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("redis")
+
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
+
+
+class TestDatabaseBackend:
+    """Test suite for the rate_limit_counter table backend."""
+
+    def test_blocks_after_limit(self, app):
+        """Test that the limit is enforced within one window."""
+        limiter = RateLimiter(DatabaseBackend())
+
+        results = [limiter.check("subscribe:1.2.3.4", limit=3, window=60) for _ in range(4)]
+
+        assert [r["allowed"] for r in results] == [True, True, True, False]
+        assert results[2]["remaining"] == 0
+        assert db.session.get(RateLimitCounter, "subscribe:1.2.3.4").count == 4
+
+    def test_counters_shared_between_workers(self, app):
+        """Test that two limiter instances (workers) draw from the same budget."""
+        worker_a = RateLimiter(DatabaseBackend())
+        worker_b = RateLimiter(DatabaseBackend())
+
+        assert worker_a.is_allowed("ip", limit=2, window=60)
+        assert worker_b.is_allowed("ip", limit=2, window=60)
+        assert not worker_a.is_allowed("ip", limit=2, window=60)
+        assert worker_b.get_remaining_requests("ip", limit=2, window=60) == 0
+
+    def test_window_expiry_starts_new_window(self, app):
+        """Test that an expired window is reset by the upsert itself."""
+        limiter = RateLimiter(DatabaseBackend())
+        limiter.check("ip", limit=1, window=60)
+
+        with patch("app.utils.rate_limiter.time.time", return_value=10**10):
+            result = limiter.check("ip", limit=1, window=60)
+
+        assert result["allowed"] is True
+        assert result["reset_time"] == 10**10 + 60
+
+    def test_expired_rows_are_purged(self, app):
+        """Test that stale windows are deleted periodically."""
+        backend = DatabaseBackend(purge_interval=0)
+        backend.hit("old", limit=5, window=1)
+
+        with patch("app.utils.rate_limiter.time.time", return_value=10**10):
+            backend.hit("new", limit=5, window=60)
+
+        assert db.session.get(RateLimitCounter, "old") is None
+
+
+class TestRedisBackend:
+    """Test suite for the Redis-protocol backend."""
+
+    def test_blocks_after_limit(self, redis_url):
+        """Test counting and expiry metadata over the wire."""
+        limiter = RateLimiter(RedisBackend(url=redis_url))
+
+        results = [limiter.check("subscribe:1.2.3.4", limit=2, window=60) for _ in range(3)]
+
+        assert [r["allowed"] for r in results] == [True, True, False]
+        assert results[-1]["reset_time"] > 0
+
+    def test_counters_shared_between_workers(self, redis_url):
+        """Test that separate connections share one budget."""
+        worker_a = RateLimiter(RedisBackend(url=redis_url))
+        worker_b = RateLimiter(RedisBackend(url=redis_url))
+
+        assert worker_a.is_allowed("ip", limit=1, window=60)
+        assert not worker_b.is_allowed("ip", limit=1, window=60)
+
+        worker_b.reset()
+        assert worker_a.is_allowed("ip", limit=1, window=60)
+
+    def test_unreachable_server_fails_open(self):
+        """Test that requests are allowed when the store is down."""
+        client = Mock()
+        client.pipeline.side_effect = ConnectionError("refused")
+        limiter = RateLimiter(RedisBackend(client=client))
+
+        assert limiter.is_allowed("ip", limit=1, window=60)
+
+
+class TestBackendSelection:
+    """Test suite for config-driven backend selection."""
+
+    def test_create_backend(self):
+        """Test that names map to backends, with memory as the fallback."""
+        assert isinstance(create_backend("database"), DatabaseBackend)
+        assert isinstance(create_backend("memory"), MemoryBackend)
+        assert isinstance(create_backend("bogus"), MemoryBackend)
+
+    def test_decorator_uses_configured_backend(self, app, client):
+        """Test that the decorated route counts in the shared table."""
+        app.config["RATE_LIMIT_BACKEND"] = "database"
+        rate_limiter.init_app(app)
+        try:
+            with patch("app.routes.email_service") as mock_email:
+                mock_email.send_welcome_vision_email.return_value = {"success": True}
+                for i in range(6):
+                    response = client.post(
+                        "/api/subscribe",
+                        json={"email": f"limit{i}@example.com"},
+                        environ_base={"REMOTE_ADDR": "203.0.113.9"},
+                    )
+        finally:
+            rate_limiter.backend = MemoryBackend()
+
+        assert response.status_code == 429
+        counter = db.session.get(RateLimitCounter, "subscribe:203.0.113.9")
+        assert counter.count == 6
+
+
+class TestGCRA:
+    """Test suite for the GCRA algorithm."""
+
+    def test_burst_then_steady_rate(self):
+        """Test that a full burst is allowed and one slot refills per interval."""
+        backend = MemoryBackend()
+        with patch("app.utils.rate_limiter.time.time", return_value=1000.0):
+            results = [backend.gcra("ip", limit=5, window=60) for _ in range(6)]
+        assert [r["allowed"] for r in results] == [True] * 5 + [False]
+        assert results[-1]["reset_time"] == 1012
+
+        # One emission interval (60/5 = 12s) later exactly one more request fits
+        with patch("app.utils.rate_limiter.time.time", return_value=1012.0):
+            assert backend.gcra("ip", limit=5, window=60)["allowed"] is True
+            assert backend.gcra("ip", limit=5, window=60)["allowed"] is False
+
+    def test_one_float_per_key_and_lru_bound(self):
+        """Test that GCRA state is a single float and the key count is bounded."""
+        backend = MemoryBackend(max_keys=3)
+        for i in range(5):
+            backend.gcra(f"ip{i}", limit=5, window=60)
+
+        assert list(backend.tats) == ["ip2", "ip3", "ip4"]
+        assert all(isinstance(tat, float) for tat in backend.tats.values())
+
+    def test_idle_keys_are_swept(self):
+        """Test that keys whose state has fully refilled are removed."""
+        backend = MemoryBackend(sweep_interval=0)
+        backend.gcra("idle-gcra", limit=5, window=60)
+        backend.hit("idle-window", limit=5, window=60)
+
+        with patch("app.utils.rate_limiter.time.time", return_value=10**10):
+            backend.gcra("active", limit=5, window=60)
+
+        assert list(backend.tats) == ["active"]
+        assert "idle-window" not in backend.requests
+
+    def test_database_backend(self, app):
+        """Test GCRA as a single upsert on the shared table."""
+        limiter = RateLimiter(DatabaseBackend())
+
+        results = [limiter.check("ip", limit=3, window=60, algorithm="gcra") for _ in range(4)]
+
+        assert [r["allowed"] for r in results] == [True, True, True, False]
+        assert results[0]["remaining"] == 2
+
+    def test_redis_backend(self, redis_url):
+        """Test GCRA over the Redis protocol."""
+        limiter = RateLimiter(RedisBackend(url=redis_url))
+
+        results = [limiter.check("ip", limit=2, window=60, algorithm="gcra") for _ in range(3)]
+
+        assert [r["allowed"] for r in results] == [True, True, False]
+
+    def test_route_selects_gcra(self, app):
+        """Test that rate_limit(algorithm='gcra') stores GCRA state for that route."""
+        from flask import Flask
+
+        from app.utils.rate_limiter import rate_limit
+
+        demo = Flask(__name__)
+
+        @demo.route("/ping")
+        @rate_limit(limit=2, window=60, algorithm="gcra")
+        def ping():
+            return "pong"
+
+        rate_limiter.reset()
+        client = demo.test_client()
+        codes = [client.get("/ping").status_code for _ in range(3)]
+
+        assert codes == [200, 200, 429]
+        assert "ping:127.0.0.1" in rate_limiter.backend.tats
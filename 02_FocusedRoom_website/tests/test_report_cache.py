@@ -0,0 +1,201 @@
+"""
+Unit tests for the Gemini report cache.
+
+Tests cover:
+- Cache key quantization and demographic normalization
+- LRU eviction by entry count and size
+- TTL expiry
+- Persistent DB layer shared across cache instances
+- Purging expired rows from the background worker
+- GeminiClient integration (one API call for repeat submissions)
+"""
+
+import os
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+from app.models import ReportCacheEntry, db
+from app.utils.gemini_client import GeminiClient
+from app.utils.report_cache import (
+    ReportCache,
+    build_cache_key,
+    build_fragment_key,
+    normalize_demographics,
+)
+from app.worker import Worker
+
+SCORES = {"openness": 70.4, "conscientiousness": 55.3, "neuroticism": 30.1}
+PERCENTILES = {"openness": 76.7, "conscientiousness": 56.7, "neuroticism": 24.4}
+DEMOGRAPHICS = {
+    "name": "Asha",
+    "career": "Software Engineer",
+    "careerStage": "Mid Career",
+    "lifePillars": {"career": "Like it", "health": "Okay"},
+}
+
+
+class TestCacheKey:
+    """Test suite for content-addressed cache keys."""
+
+    def test_near_identical_scores_share_key(self):
+        """Test that scores within one bucket map to the same key."""
+        nudged = {trait: value + 1.0 for trait, value in SCORES.items()}
+
+        assert build_cache_key(SCORES, PERCENTILES, DEMOGRAPHICS, bucket=5) == build_cache_key(
+            nudged, PERCENTILES, DEMOGRAPHICS, bucket=5
+        )
+
+    def test_different_scores_differ(self):
+        """Test that scores in different buckets produce different keys."""
+        shifted = dict(SCORES, openness=90.0)
+
+        assert build_cache_key(SCORES, PERCENTILES, DEMOGRAPHICS) != build_cache_key(
+            shifted, PERCENTILES, DEMOGRAPHICS
+        )
+
+    def test_fragment_key_depends_on_section_levels_and_prompt(self):
+        """Test that fragment keys change with the section, any trait level or the prompt."""
+        levels = ("High", "Moderate", "Low", "High", "Moderate")
+        key = build_fragment_key("focused_room", levels, "prompt")
+
+        assert len(key) == 64
+        assert key == build_fragment_key("focused_room", levels, "prompt")
+        assert key != build_fragment_key("traits", levels, "prompt")
+        assert key != build_fragment_key("focused_room", levels[:4] + ("Low",), "prompt")
+        assert key != build_fragment_key("focused_room", levels, "edited prompt")
+
+    def test_demographics_are_normalized(self):
+        """Test that whitespace/case noise and unused fields don't change the key."""
+        noisy = {
+            "name": "  Asha ",
+            "career": "software   engineer",
+            "careerStage": "MID CAREER",
+            "lifePillars": {"career": "like it", "health": "okay"},
+            "email": "ignored@example.com",
+        }
+
+        assert build_cache_key(SCORES, PERCENTILES, DEMOGRAPHICS) == build_cache_key(
+            SCORES, PERCENTILES, noisy
+        )
+
+    def test_name_keeps_case(self):
+        """Test that the name is case-sensitive because the report echoes it."""
+        assert normalize_demographics({"name": "Asha"}) != normalize_demographics({"name": "asha"})
+
+
+class TestReportCache:
+    """Test suite for the in-process cache layer."""
+
+    def test_get_set_and_stats(self):
+        """Test basic hit/miss accounting."""
+        cache = ReportCache(use_db=False)
+
+        assert cache.get("k") is None
+        cache.set("k", "report")
+        assert cache.get("k") == "report"
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_lru_eviction_by_entries(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = ReportCache(max_entries=2, use_db=False)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")  # 'b' is now least recently used
+        cache.set("c", "3")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.stats()["evictions"] == 1
+
+    def test_eviction_by_size(self):
+        """Test that total bytes stay under max_bytes."""
+        cache = ReportCache(max_bytes=10, use_db=False)
+        cache.set("a", "x" * 6)
+        cache.set("b", "y" * 6)
+
+        assert cache.get("a") is None
+        assert cache.stats()["bytes"] == 6
+
+    def test_ttl_expiry(self):
+        """Test that expired entries are misses."""
+        cache = ReportCache(ttl=60, use_db=False)
+        cache.set("k", "report")
+
+        with patch("app.utils.report_cache.time.monotonic", return_value=10**12):
+            assert cache.get("k") is None
+
+    def test_db_layer_shared_between_instances(self, app):
+        """Test that a report stored by one worker is found by another."""
+        ReportCache().set("shared", "stored report")
+
+        other_worker = ReportCache()
+
+        assert other_worker.get("shared") == "stored report"
+        assert other_worker.stats()["db_hits"] == 1
+        assert db.session.get(ReportCacheEntry, "shared").hit_count == 1
+
+    def test_worker_purges_expired_rows(self, app):
+        """Test that the worker deletes expired rows nobody looks up again."""
+        now = datetime.utcnow()
+        for key, expires_at in (("old", now - timedelta(days=1)), ("fresh", now + timedelta(1))):
+            db.session.add(ReportCacheEntry(cache_key=key, report="r", expires_at=expires_at))
+        db.session.commit()
+        worker = Worker(app, worker_id="test-worker")
+
+        assert worker.purge_report_cache_if_due() == 1
+        assert worker.purge_report_cache_if_due() is None  # not due again yet
+
+        assert [row.cache_key for row in ReportCacheEntry.query] == ["fresh"]
+
+
+class TestGeminiClientCaching:
+    """Test suite for report caching inside GeminiClient."""
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}, clear=False)
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_repeat_submission_served_from_cache(self, mock_genai):
+        """Test that an identical second submission doesn't call the API."""
+        mock_response = Mock()
+        mock_response.text = "Cached personality report"
+        mock_model = Mock()
+        mock_model.generate_content.return_value = mock_response
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        client = GeminiClient()
+        first = client.generate_personality_suggestions(SCORES, PERCENTILES, DEMOGRAPHICS)
+        second = client.generate_personality_suggestions(SCORES, PERCENTILES, DEMOGRAPHICS)
+
+        assert first == second == "Cached personality report"
+        assert mock_model.generate_content.call_count == 1
+        assert client.get_stats()["report_cache"]["hits"] == 1
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}, clear=False)
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_fallback_reports_are_not_cached(self, mock_genai):
+        """Test that a failed API call is retried on the next submission."""
+        mock_model = Mock()
+        mock_model.generate_content.side_effect = Exception("API down")
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        client = GeminiClient()
+        with patch("time.sleep"):
+            client.generate_personality_suggestions(SCORES, PERCENTILES, max_retries=1)
+            client.generate_personality_suggestions(SCORES, PERCENTILES, max_retries=1)
+
+        assert mock_model.generate_content.call_count == 2
+
+    def test_admin_stats_endpoint(self, app, client):
+        """Test that cache counters are exposed to admins."""
+        app.config["ADMIN_TOKEN"] = "s3cret"
+
+        assert client.get("/admin/gemini/stats").status_code == 401
+        response = client.get("/admin/gemini/stats", headers={"Authorization": "Bearer s3cret"})
+
+        assert response.status_code == 200
+        assert "provider" in response.get_json()["data"]
@@ -0,0 +1,116 @@
+"""
+Unit tests for the bulk rescoring tool.
+
+Tests cover:
+- Stale scores are recomputed from raw answers, current ones left alone
+- Results without raw answers are skipped
+- One executemany UPDATE per chunk
+- Checkpointing and resuming after an interruption
+- Dry runs
+"""
+
+import numpy as np
+import pytest
+from sqlalchemy import event
+
+from app.models import BigFiveResult, db
+from app.tools import rescore
+from app.utils.answer_packing import pack_answers
+from app.utils.bigfive import compute_bigfive_scores
+
+
+def _add_results(count, stale=True, n_items=44, seed=0):
+    """Add results with packed answers; stale ones store outdated scores."""
+    answers = np.random.default_rng(seed).integers(1, 6, size=(count, n_items)).tolist()
+    for row in answers:
+        if stale:
+            scores = {"scores": {"openness": 0.0}, "percentiles": {}, "raw_scores": {}}
+        else:
+            result_data = compute_bigfive_scores(row)
+            scores = {key: result_data[key] for key in ("scores", "percentiles", "raw_scores")}
+        db.session.add(BigFiveResult(scores=scores, raw_answers=pack_answers(row)))
+    db.session.commit()
+    return answers
+
+
+class TestRescoreResults:
+    """Test suite for rescore_results."""
+
+    def test_stale_scores_are_recomputed(self, app):
+        """Test that stored scores match compute_bigfive_scores after a rescore."""
+        answers = _add_results(7, n_items=44) + _add_results(5, n_items=50, seed=1)
+        _add_results(3, stale=False, seed=2)
+
+        summary = rescore.rescore_results(chunk_size=4, use_norms=False)
+
+        assert summary["rows"] == 15
+        assert summary["updated"] == 12
+        assert summary["skipped"] == 0
+        db.session.expire_all()
+        results = BigFiveResult.query.order_by(BigFiveResult.id).all()
+        for result, row in zip(results, answers):
+            assert result.scores["scores"] == compute_bigfive_scores(row)["scores"]
+
+    def test_results_without_raw_answers_are_skipped(self, app):
+        """Test that old results keep their scores and are counted as skipped."""
+        db.session.add(BigFiveResult(scores={"scores": {"openness": 1.0}}))
+        _add_results(2)
+
+        summary = rescore.rescore_results(use_norms=False)
+
+        assert (summary["rows"], summary["updated"], summary["skipped"]) == (3, 2, 1)
+        assert db.session.get(BigFiveResult, 1).scores == {"scores": {"openness": 1.0}}
+
+    def test_one_executemany_update_per_chunk(self, app):
+        """Test that each chunk is written back with a single batched UPDATE."""
+        _add_results(10)
+        updates = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE"):
+                updates.append((executemany, len(parameters)))
+
+        event.listen(db.engine, "before_cursor_execute", capture)
+        try:
+            rescore.rescore_results(chunk_size=4, use_norms=False)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capture)
+
+        assert updates == [(True, 4), (True, 4), (True, 2)]
+
+    def test_resume_from_checkpoint(self, app, tmp_path, monkeypatch):
+        """Test that an interrupted run continues after the last committed chunk."""
+        _add_results(10)
+        checkpoint = str(tmp_path / "rescore.json")
+        original = rescore._rescore_chunk
+        calls = []
+
+        def interrupted(after_id, *args):
+            calls.append(after_id)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return original(after_id, *args)
+
+        monkeypatch.setattr(rescore, "_rescore_chunk", interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            rescore.rescore_results(chunk_size=4, checkpoint_path=checkpoint, use_norms=False)
+        db.session.rollback()
+        assert rescore.load_checkpoint(checkpoint)["last_id"] == 4
+
+        summary = rescore.rescore_results(chunk_size=4, checkpoint_path=checkpoint, use_norms=False)
+
+        assert calls == [0, 4, 4, 8]
+        assert (summary["rows"], summary["updated"], summary["last_id"]) == (10, 10, 10)
+        assert rescore.load_checkpoint(checkpoint) is None
+
+    def test_dry_run_writes_nothing(self, app):
+        """Test that a dry run counts changes without updating any rows."""
+        _add_results(3)
+
+        summary = rescore.rescore_results(dry_run=True, use_norms=False)
+
+        assert summary["updated"] == 3
+        db.session.expire_all()
+        assert all(
+            result.scores["scores"] == {"openness": 0.0} for result in BigFiveResult.query.all()
+        )
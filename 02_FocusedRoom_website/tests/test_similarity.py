@@ -0,0 +1,209 @@
+"""
+Unit tests for the "people like you" similarity index.
+
+Tests cover:
+- KD-tree queries against brute force (including rejected points)
+- Excluding the query result and the same customer's other results
+- Incremental refresh and tree rebuilds
+- Demographic aggregation (rare values folded into "other")
+- /big-five/result/<access_token>/similar endpoint
+"""
+
+import numpy as np
+import pytest
+
+from app.models import BigFiveResult, Customer, db
+from app.utils import similarity
+from app.utils.bigfive import TRAITS
+from app.utils.similarity import KDTree, SimilarityIndex, summarize_demographics
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    """Each test builds its own process-wide index."""
+    monkeypatch.setattr(similarity, "_similarity_index", None)
+
+
+def _add_result(scores, customer=None):
+    result = BigFiveResult(
+        customer_id=customer.customer_id if customer else None,
+        scores={"scores": dict(zip(TRAITS, scores))},
+    )
+    db.session.add(result)
+    db.session.flush()
+    return result
+
+
+def _add_customer(email, **demographics):
+    customer = Customer(email_id=email, **demographics)
+    db.session.add(customer)
+    db.session.flush()
+    return customer
+
+
+class TestKDTree:
+    """Test suite for KDTree."""
+
+    @pytest.mark.parametrize("discrete", [False, True])
+    def test_matches_brute_force(self, discrete):
+        """Test exact k-NN results, also with many tied distances."""
+        rng = np.random.default_rng(0)
+        points = rng.normal(50, 15, size=(5000, 5))
+        if discrete:
+            points = np.rint(points / 5) * 5
+        points = points.astype(np.float32)
+        tree = KDTree(points, leaf_size=16)
+
+        for query in rng.integers(0, len(points), 25):
+            distances, _ = tree.query(points[query], 7, lambda rows, q=query: rows == q)
+            expected = ((points - points[query]) ** 2).sum(axis=1)
+            expected[query] = np.inf
+            assert np.allclose(distances, np.sort(expected)[:7])
+
+    def test_fewer_points_than_k(self):
+        """Test that a small tree returns every eligible point."""
+        tree = KDTree(np.zeros((3, 5)))
+
+        distances, indices = tree.query(np.ones(5), 10, lambda rows: rows == 0)
+
+        assert sorted(indices.tolist()) == [1, 2]
+        assert np.allclose(distances, 5.0)
+
+
+class TestSimilarityIndex:
+    """Test suite for SimilarityIndex."""
+
+    def test_nearest_excludes_self_and_same_customer(self, app):
+        """Test that neighbours are other people's results, nearest first."""
+        me = _add_customer("me@example.com")
+        query = _add_result([50, 50, 50, 50, 50], me)
+        _add_result([50, 50, 50, 50, 51], me)  # my own retake
+        near = _add_result([52, 50, 50, 50, 50])
+        far = _add_result([90, 10, 50, 50, 50])
+        nearer = _add_result([50, 49, 50, 50, 50])
+        db.session.commit()
+
+        found = SimilarityIndex(check_interval=0).neighbours(query.id, k=5)
+
+        assert found["result_ids"].tolist() == [nearer.id, near.id, far.id]
+        assert found["distances"][:2].tolist() == pytest.approx([1.0, 2.0])
+
+    def test_incremental_refresh_and_rebuild(self, app):
+        """Test that new results are appended and the tree rebuilt past rebuild_tail."""
+        rng = np.random.default_rng(1)
+        for scores in rng.uniform(0, 100, size=(30, 5)):
+            _add_result(scores.tolist())
+        db.session.commit()
+        index = SimilarityIndex(check_interval=0, rebuild_tail=10, background_rebuild=False)
+
+        assert index.refresh() == 30
+        assert index.rebuilds == 1
+        for scores in rng.uniform(0, 100, size=(5, 5)):
+            _add_result(scores.tolist())
+        db.session.commit()
+        assert index.refresh() == 5
+        assert index.rebuilds == 1  # 5 results in the tail, below rebuild_tail
+        assert len(index) == 35
+
+        # Tree (30) + tail (5) give the same answer as brute force over all 35
+        vectors = np.array(
+            [[r.scores["scores"][t] for t in TRAITS] for r in BigFiveResult.query.all()],
+            dtype=np.float32,
+        )
+        found = index.neighbours(35, k=4)
+        expected = np.sort(((vectors[:-1] - vectors[-1]) ** 2).sum(axis=1))[:4]
+        assert np.allclose(found["distances"] ** 2, expected, rtol=1e-4)
+
+    def test_new_result_found_before_interval(self, app):
+        """Test that a result newer than the last refresh triggers one immediately."""
+        index = SimilarityIndex(check_interval=3600)
+        _add_result([10, 20, 30, 40, 50])
+        db.session.commit()
+        index.refresh(force=True)
+
+        newer = _add_result([10, 20, 30, 40, 55])
+        db.session.commit()
+
+        assert index.neighbours(newer.id, k=1)["distances"].tolist() == [5.0]
+        assert index.neighbours(9999, k=1) is None
+
+    def test_results_without_scores_are_not_indexed(self, app):
+        """Test that incomplete score JSON is skipped."""
+        db.session.add(BigFiveResult(scores={"scores": {"openness": 50}}))
+        _add_result([1, 2, 3, 4, 5])
+        db.session.commit()
+
+        index = SimilarityIndex(check_interval=0)
+
+        assert index.refresh() == 1
+        assert index.neighbours(1, k=3) is None
+
+
+class TestDemographics:
+    """Test suite for summarize_demographics."""
+
+    def test_rare_values_are_folded_into_other(self):
+        """Test that values held by fewer than min_group people are not listed."""
+        customers = [
+            {"profession": "Engineer", "career_stage": "mid", "purpose": "focus"},
+            {"profession": "engineer ", "career_stage": "mid", "purpose": None},
+            {"profession": "Astronaut", "career_stage": None, "purpose": "My very own goal"},
+        ]
+
+        summary = summarize_demographics(customers, min_group=2)
+
+        assert summary["customers"] == 3
+        assert summary["profession"] == {
+            "values": [{"value": "engineer", "count": 2}],
+            "other": 1,
+        }
+        assert summary["career_stage"]["values"] == [{"value": "mid", "count": 2}]
+        assert summary["purpose"] == {"values": [], "other": 2}
+
+
+class TestSimilarEndpoint:
+    """Test suite for GET /big-five/result/<access_token>/similar."""
+
+    def test_similar_profiles(self, client):
+        """Test anonymized profiles plus aggregated demographics."""
+        query = _add_result([50, 50, 50, 50, 50])
+        for index in range(5):
+            customer = _add_customer(
+                f"p{index}@example.com", profession="Designer", career_stage="Senior"
+            )
+            _add_result([50 + index, 50, 50, 50, 50.4], customer)
+        db.session.commit()
+
+        response = client.get(f"/big-five/result/{query.access_token}/similar?k=5")
+        data = response.get_json()
+
+        assert response.status_code == 200
+        assert data["k"] == 5
+        profiles = data["data"]["profiles"]
+        assert [p["distance"] for p in profiles] == [0, 1, 2, 3, 4]
+        assert set(profiles[0]) == {"distance", "scores"}
+        # Scores come back in SIMILARITY_SCORE_BUCKET steps, never exact
+        assert [p["scores"]["openness"] for p in profiles] == [50, 50, 50, 55, 55]
+        assert {p["scores"]["neuroticism"] for p in profiles} == {50}
+        assert data["data"]["demographics"]["profession"]["values"] == [
+            {"value": "designer", "count": 5}
+        ]
+        assert "p0@example.com" not in response.get_data(as_text=True)
+
+    def test_small_groups_are_not_listed(self, client):
+        """Test that demographics of fewer than SIMILARITY_MIN_GROUP people are hidden."""
+        query = _add_result([50, 50, 50, 50, 50])
+        for index in range(4):
+            customer = _add_customer(f"p{index}@example.com", profession="Designer")
+            _add_result([50 + index, 50, 50, 50, 50], customer)
+        db.session.commit()
+
+        data = client.get(f"/big-five/result/{query.access_token}/similar?k=4").get_json()
+
+        assert data["data"]["demographics"]["profession"] == {"values": [], "other": 4}
+
+    def test_unknown_result_and_bad_k(self, client):
+        """Test 404 for unknown results and 400 for out-of-range k."""
+        assert client.get("/big-five/result/not-a-token/similar").status_code == 404
+        assert client.get("/big-five/result/not-a-token/similar?k=0").status_code == 400
+        assert client.get("/big-five/result/not-a-token/similar?k=1000").status_code == 400
@@ -0,0 +1,223 @@
+"""
+Unit tests for single-flight report generation.
+
+Tests cover:
+- Identical concurrent calls sharing one in-process call (results and errors)
+- Workers sharing a call through the lease table (stored result, failed leader,
+  expired lease)
+- Failing open when the lease table is unavailable
+- GeminiClient coalescing duplicate report requests
+"""
+
+import os
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from app.models import SingleFlightLease, db
+from app.utils.gemini_client import GeminiClient
+from app.utils.single_flight import SingleFlight
+
+
+def _run_concurrently(func, count):
+    """Call func(index) from count threads at once; returns their results in order."""
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def run(index):
+        barrier.wait()
+        results[index] = func(index)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestInProcess:
+    """Test suite for coalescing within one process (no app context)."""
+
+    def test_concurrent_calls_share_one_result(self):
+        """Test that only the leader runs while identical calls wait for it."""
+        flight = SingleFlight("test")
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.1)
+            return "report"
+
+        results = _run_concurrently(lambda _: flight.do("key", slow), 5)
+
+        assert results == ["report"] * 5
+        assert len(calls) == 1
+        stats = flight.get_stats()
+        assert (stats["leaders"], stats["shared_in_process"], stats["in_flight"]) == (1, 4, 0)
+
+    def test_different_keys_and_later_calls_run(self):
+        """Test that only identical in-flight calls are coalesced."""
+        flight = SingleFlight("test")
+        func = Mock(return_value="report")
+
+        flight.do("a", func)
+        flight.do("b", func)
+        flight.do("a", func)
+
+        assert func.call_count == 3
+
+    def test_error_is_shared(self):
+        """Test that followers get the leader's error instead of running again."""
+        flight = SingleFlight("test")
+        calls = []
+
+        def failing():
+            calls.append(1)
+            time.sleep(0.05)
+            raise ValueError("boom")
+
+        def call(_index):
+            try:
+                return flight.do("key", failing)
+            except ValueError as e:
+                return str(e)
+
+        assert _run_concurrently(call, 3) == ["boom"] * 3
+        assert len(calls) == 1
+
+    def test_slow_leader_is_not_waited_for_forever(self):
+        """Test that a follower runs the call itself after wait_timeout."""
+        flight = SingleFlight("test", wait_timeout=0.05)
+        release = threading.Event()
+        leader = threading.Thread(target=lambda: flight.do("key", lambda: release.wait(2)))
+        leader.start()
+        while flight.get_stats()["in_flight"] == 0:
+            time.sleep(0.005)
+
+        assert flight.do("key", lambda: "own result") == "own result"
+        assert flight.get_stats()["wait_timeouts"] == 1
+        release.set()
+        leader.join()
+
+
+class TestAcrossWorkers:
+    """Test suite for calls shared through the single_flight_lease table."""
+
+    def test_follower_gets_result_stored_by_leader(self, app):
+        """Test that a worker waits for another worker's lease and reuses its result."""
+        worker_a = SingleFlight("test", poll_interval=0.01)
+        worker_b = SingleFlight("test", poll_interval=0.01)
+        started = threading.Event()
+        func_b = Mock(return_value="b's report")
+
+        def leader():
+            with app.app_context():
+                worker_a.do("key", lambda: started.set() or time.sleep(0.1) or "a's report")
+
+        thread = threading.Thread(target=leader)
+        thread.start()
+        started.wait(2)
+
+        assert worker_b.do("key", func_b) == "a's report"
+        thread.join()
+        func_b.assert_not_called()
+        assert worker_b.get_stats()["shared_across_workers"] == 1
+
+        row = db.session.get(SingleFlightLease, "test:key")
+        assert row.result == "a's report"
+        assert row.expires_at <= time.time() + worker_a.result_ttl
+
+    def test_failed_leader_releases_lease(self, app):
+        """Test that a leader without a result drops its lease so others can run."""
+        flight = SingleFlight("test")
+
+        assert flight.do("key", lambda: None) is None
+
+        assert db.session.get(SingleFlightLease, "test:key") is None
+        assert flight.do("key", lambda: "report") == "report"
+
+    def test_expired_lease_is_taken_over(self, app):
+        """Test that the lease of a crashed leader stops blocking after lease_ttl."""
+        db.session.add(SingleFlightLease(key="test:key", owner="dead", expires_at=time.time() - 1))
+        db.session.commit()
+        flight = SingleFlight("test")
+
+        assert flight.do("key", lambda: "report") == "report"
+        assert flight.get_stats()["leaders"] == 1
+
+    def test_store_errors_fail_open(self, app):
+        """Test that an unusable lease table lets the call run unshared."""
+        flight = SingleFlight("test")
+
+        with patch.object(flight, "_claim", side_effect=RuntimeError("db down")):
+            assert flight.do("key", lambda: "report") == "report"
+
+        assert flight.get_stats()["store_errors"] == 1
+
+
+@patch.dict(
+    os.environ,
+    {
+        "GEMINI_API_KEY": "test-key",
+        "GEMINI_BREAKER_BACKEND": "memory",
+        "GEMINI_LIMITER_BACKEND": "memory",
+        "REPORT_CACHE_ENABLED": "false",
+        "ARCHETYPE_REPORTS_ENABLED": "false",
+    },
+    clear=False,
+)
+@patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+@patch("app.utils.gemini_client.genai")
+class TestGeminiClientSingleFlight:
+    """Test suite for duplicate report requests in GeminiClient."""
+
+    SCORES = {"openness": 70.0}
+
+    def _slow_model(self, mock_genai):
+        mock_model = Mock()
+        mock_model.generate_content.side_effect = lambda *args, **kwargs: (
+            time.sleep(0.1) or Mock(text="## Report")
+        )
+        mock_genai.GenerativeModel.return_value = mock_model
+        return mock_model
+
+    def test_duplicate_requests_share_one_call(self, mock_genai):
+        """Test that a double submit makes one Gemini call."""
+        mock_model = self._slow_model(mock_genai)
+        client = GeminiClient()
+
+        reports = _run_concurrently(
+            lambda _: client.generate_personality_suggestions(self.SCORES, self.SCORES), 2
+        )
+
+        assert reports == ["## Report", "## Report"]
+        assert mock_model.generate_content.call_count == 1
+        assert client.get_stats()["single_flight"]["shared_in_process"] == 1
+
+    def test_different_inputs_are_not_coalesced(self, mock_genai):
+        """Test that the key covers the exact inputs (no cache bucketing)."""
+        mock_model = self._slow_model(mock_genai)
+        client = GeminiClient()
+
+        _run_concurrently(
+            lambda index: client.generate_personality_suggestions(
+                {"openness": 70.0 + index * 0.5}, self.SCORES
+            ),
+            2,
+        )
+
+        assert mock_model.generate_content.call_count == 2
+
+    @patch.dict(os.environ, {"GEMINI_SINGLE_FLIGHT_BACKEND": "none"})
+    def test_disabled(self, mock_genai):
+        """Test GEMINI_SINGLE_FLIGHT_BACKEND=none."""
+        mock_model = self._slow_model(mock_genai)
+        client = GeminiClient()
+
+        _run_concurrently(
+            lambda _: client.generate_personality_suggestions(self.SCORES, self.SCORES), 2
+        )
+
+        assert mock_model.generate_content.call_count == 2
+        assert client.get_stats()["single_flight"] is None
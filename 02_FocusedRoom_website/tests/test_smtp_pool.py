@@ -0,0 +1,227 @@
+"""
+Unit tests for the pooled SMTP transport.
+
+Tests cover:
+- Connection reuse across messages
+- Recycling after max messages per connection
+- NOOP health check on idle connections
+- Reconnect when the server dropped the connection
+- EmailService sending through the pool
+- End-to-end delivery to a local aiosmtpd sink (skipped if aiosmtpd is missing)
+"""
+
+import os
+import smtplib
+import socket
+import threading
+from email.message import EmailMessage
+from unittest.mock import patch
+
+import pytest
+
+from app.utils.emailer import EmailService
+from app.utils.smtp_pool import SMTPConnectionPool
+
+
+class FakeSMTP:
+    """Stand-in for smtplib.SMTP that records calls instead of touching the network."""
+
+    instances = []
+
+    def __init__(self, host, port, timeout=None):
+        self.host = host
+        self.port = port
+        self.sent = []
+        self.noop_code = 250
+        self.fail_next_send = None
+        self.closed = False
+        self.logged_in = False
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        self.logged_in = True
+
+    def send_message(self, msg):
+        if self.fail_next_send is not None:
+            error, self.fail_next_send = self.fail_next_send, None
+            raise error
+        self.sent.append(msg)
+
+    def noop(self):
+        return self.noop_code, b"OK"
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+def _message(to="user@example.com"):
+    msg = EmailMessage()
+    msg["From"] = "noreply@focusedroom.com"
+    msg["To"] = to
+    msg["Subject"] = "Test"
+    msg.set_content("Hello")
+    return msg
+
+
+def _pool(**kwargs):
+    FakeSMTP.instances = []
+    options = {"username": "user", "password": "secret", "smtp_factory": FakeSMTP}
+    options.update(kwargs)
+    return SMTPConnectionPool("smtp.example.com", 587, **options)
+
+
+class TestSMTPConnectionPool:
+    """Test suite for SMTPConnectionPool."""
+
+    def test_connection_is_reused(self):
+        """Test that consecutive messages share one authenticated connection."""
+        pool = _pool()
+
+        for _ in range(5):
+            pool.send_message(_message())
+
+        assert len(FakeSMTP.instances) == 1
+        assert FakeSMTP.instances[0].logged_in
+        assert len(FakeSMTP.instances[0].sent) == 5
+        assert pool.stats()["connections_reused"] == 4
+
+    def test_connection_recycled_after_max_messages(self):
+        """Test that a connection is closed after max_messages_per_connection."""
+        pool = _pool(max_messages_per_connection=2)
+
+        for _ in range(3):
+            pool.send_message(_message())
+
+        assert len(FakeSMTP.instances) == 2
+        assert FakeSMTP.instances[0].closed
+        assert pool.stats()["connections_recycled"] == 1
+
+    def test_idle_connection_failing_noop_is_replaced(self):
+        """Test that a connection failing its NOOP check is replaced before use."""
+        pool = _pool(idle_check_after=0)
+        pool.send_message(_message())
+        FakeSMTP.instances[0].noop_code = 421
+
+        pool.send_message(_message())
+
+        assert len(FakeSMTP.instances) == 2
+        assert len(FakeSMTP.instances[1].sent) == 1
+        assert pool.stats()["health_check_failures"] == 1
+
+    def test_reconnects_when_server_disconnected(self):
+        """Test that a dropped connection is retried once on a fresh connection."""
+        pool = _pool()
+        pool.send_message(_message())
+        FakeSMTP.instances[0].fail_next_send = smtplib.SMTPServerDisconnected("gone")
+
+        pool.send_message(_message())
+
+        assert len(FakeSMTP.instances) == 2
+        assert len(FakeSMTP.instances[1].sent) == 1
+        assert pool.stats()["reconnects"] == 1
+
+    def test_recipient_errors_keep_connection(self):
+        """Test that message-level errors are raised without dropping the connection."""
+        pool = _pool()
+        pool.send_message(_message())
+        FakeSMTP.instances[0].fail_next_send = smtplib.SMTPRecipientsRefused({})
+
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            pool.send_message(_message())
+        pool.send_message(_message())
+
+        assert len(FakeSMTP.instances) == 1
+
+    def test_pool_is_bounded_under_concurrency(self):
+        """Test that concurrent senders never open more than max_size connections."""
+        pool = _pool(max_size=3)
+        threads = [
+            threading.Thread(target=lambda: [pool.send_message(_message()) for _ in range(20)])
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(FakeSMTP.instances) <= 3
+        assert pool.stats()["messages_sent"] == 160
+
+    def test_close_quits_idle_connections(self):
+        """Test that close() ends idle sessions."""
+        pool = _pool()
+        pool.send_message(_message())
+
+        pool.close()
+
+        assert FakeSMTP.instances[0].closed
+        assert pool.stats()["idle"] == 0
+
+
+SMTP_ENV = {
+    "MAIL_SERVER": "smtp.example.com",
+    "MAIL_PORT": "587",
+    "MAIL_USERNAME": "user",
+    "MAIL_PASSWORD": "secret",
+    "SENDGRID_API_KEY": "",
+}
+
+
+class TestEmailServiceSMTP:
+    """Test suite for EmailService using the SMTP pool."""
+
+    @patch.dict(os.environ, SMTP_ENV, clear=False)
+    @patch("app.utils.smtp_pool.smtplib.SMTP", FakeSMTP)
+    def test_fallback_sends_share_pool(self):
+        """Test that repeated sends reuse the same SMTP connection."""
+        FakeSMTP.instances = []
+        service = EmailService()
+        assert service.provider == "smtp"
+
+        for _ in range(3):
+            result = service._send_email_with_fallback(
+                "user@example.com", "Subject", "<p>Hi</p>", "Hi"
+            )
+            assert result["success"] is True
+
+        assert len(FakeSMTP.instances) == 1
+        assert len(FakeSMTP.instances[0].sent) == 3
+
+
+class TestAiosmtpdSink:
+    """End-to-end test against a real local SMTP server."""
+
+    def test_pool_delivers_to_local_sink(self):
+        """Test that the pool delivers every message over a single session."""
+        controller_module = pytest.importorskip("aiosmtpd.controller")
+
+        class Sink:
+            def __init__(self):
+                self.messages = 0
+
+            async def handle_DATA(self, server, session, envelope):  # noqa: N802
+                self.messages += 1
+                return "250 Message accepted for delivery"
+
+        handler = Sink()
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        controller = controller_module.Controller(handler, hostname="127.0.0.1", port=port)
+        controller.start()
+        try:
+            pool = SMTPConnectionPool("127.0.0.1", port, use_tls=False)
+            for _ in range(10):
+                pool.send_message(_message())
+            pool.close()
+        finally:
+            controller.stop()
+
+        assert handler.messages == 10
+        assert pool.stats()["connections_opened"] == 1
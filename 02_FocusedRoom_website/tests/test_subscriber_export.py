@@ -0,0 +1,83 @@
+"""
+Unit tests for the streamed subscriber CSV export.
+
+Tests cover:
+- CSV contents (test counts, latest test date, customers without tests)
+- One aggregated query regardless of subscriber count
+- Streaming in batches
+"""
+
+import csv
+from datetime import datetime
+from io import StringIO
+
+from sqlalchemy import event
+
+from app.models import BigFiveResult, Customer, db
+from app.routes import _iter_subscriber_csv
+
+
+def _add_customer(email, created, result_dates=()):
+    customer = Customer(email_id=email, create_dt=created, opt_in=True)
+    db.session.add(customer)
+    db.session.flush()
+    for index, created_at in enumerate(result_dates, start=1):
+        db.session.add(
+            BigFiveResult(
+                customer_id=customer.customer_id,
+                report_id=index,
+                scores={"scores": {}},
+                created_at=created_at,
+            )
+        )
+    return customer
+
+
+class TestSubscriberExport:
+    """Test suite for /admin/subscribers/export."""
+
+    def test_csv_contents(self, client):
+        """Test aggregated counts and dates per subscriber."""
+        _add_customer(
+            "two@example.com",
+            datetime(2025, 1, 2),
+            [datetime(2025, 1, 3, 9, 0, 0), datetime(2025, 2, 1, 10, 30, 0)],
+        )
+        _add_customer("none@example.com", datetime(2025, 1, 1))
+        db.session.commit()
+
+        response = client.get("/admin/subscribers/export")
+        rows = list(csv.reader(StringIO(response.get_data(as_text=True))))
+
+        assert response.mimetype == "text/csv"
+        assert rows[0][0] == "ID"
+        assert rows[1][1:] == [
+            "two@example.com",
+            "Yes",
+            "2025-01-02 00:00:00",
+            "2",
+            "2025-02-01 10:30:00",
+        ]
+        assert rows[2][1:] == ["none@example.com", "Yes", "2025-01-01 00:00:00", "0", "N/A"]
+
+    def test_single_query_for_many_subscribers(self, app):
+        """Test that the export issues one query, not one per subscriber."""
+        for i in range(25):
+            _add_customer(f"user{i}@example.com", datetime(2025, 1, 1), [datetime(2025, 1, 2)])
+        db.session.commit()
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            chunks = list(_iter_subscriber_csv(batch_size=10))
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 1
+        # Header chunk + 3 batches (10 + 10 + 5 rows)
+        assert len(chunks) == 4
+        assert sum(chunk.count("\n") for chunk in chunks) == 26
@@ -0,0 +1,585 @@
+"""
+Unit tests for the background job queue and Big Five report worker.
+
+Tests cover:
+- Enqueue/claim/complete lifecycle
+- Retry backoff and permanent failure
+- Reclaiming jobs abandoned by a dead worker (and not those still heartbeating)
+- Async /big-five submission (202 + polling)
+- Inline mode when no worker is running
+- Inline latency budget: provisional generic report, upgraded in the background
+- Server-Sent Events relay of the report the worker is writing
+- Idempotency-Key replays (including a concurrent duplicate losing the race)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.models import BackgroundJob, BigFiveResult, IdempotencyKey, db
+from app.routes import _check_idempotency_key
+from app.utils.gemini_client import GeminiClient, GeminiUnavailableError
+from app.utils.job_queue import (
+    BIG_FIVE_REPORT_JOB,
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_PENDING,
+    JOB_RUNNING,
+    claim_job,
+    claim_next_job,
+    complete_job,
+    enqueue_job,
+    fail_job,
+    heartbeat_job,
+)
+from app.worker import Worker, publish_report_progress, run_job, store_provisional_report
+
+ANSWERS = [3, 4, 2, 5, 3, 4, 2, 3, 4, 5, 3, 2, 4, 3, 5, 4, 2, 3, 4, 5, 3, 4] * 2
+
+
+def _result_id(access_token):
+    return BigFiveResult.query.filter_by(access_token=access_token).one().id
+
+
+class TestJobQueue:
+    """Test suite for the DB-backed job queue."""
+
+    def test_claim_marks_job_running(self, app):
+        """Test that claiming flips a pending job to running exactly once."""
+        job = enqueue_job("test_job", payload={"x": 1})
+        db.session.commit()
+
+        claimed = claim_next_job("worker-1")
+
+        assert claimed.id == job.id
+        assert claimed.status == JOB_RUNNING
+        assert claimed.locked_by == "worker-1"
+        assert claimed.attempts == 1
+        assert claim_next_job("worker-2") is None
+
+    def test_claim_specific_job(self, app):
+        """Test that claim_job only claims the requested job."""
+        first = enqueue_job("test_job")
+        second = enqueue_job("test_job")
+        db.session.commit()
+
+        claimed = claim_job(second.id, "inline")
+
+        assert claimed.id == second.id
+        assert db.session.get(BackgroundJob, first.id).status == JOB_PENDING
+        assert claim_job(second.id, "other") is None
+
+    def test_complete_job(self, app):
+        """Test that completed jobs are not claimed again."""
+        enqueue_job("test_job")
+        db.session.commit()
+
+        job = claim_next_job("worker-1")
+        complete_job(job)
+
+        assert job.status == JOB_DONE
+        assert claim_next_job("worker-1") is None
+
+    def test_failed_job_is_rescheduled_with_backoff(self, app):
+        """Test that a failed attempt is retried later, not immediately."""
+        enqueue_job("test_job")
+        db.session.commit()
+
+        job = claim_next_job("worker-1")
+        before = datetime.utcnow()
+        will_retry = fail_job(job, "boom", max_attempts=3, retry_delay=60)
+
+        assert will_retry is True
+        assert job.status == JOB_PENDING
+        # Jittered within [backoff/2, backoff]
+        assert before + timedelta(seconds=30) <= job.run_after
+        assert job.run_after <= datetime.utcnow() + timedelta(seconds=60)
+        assert job.last_error == "boom"
+        assert claim_next_job("worker-1") is None
+
+    def test_job_fails_permanently_after_max_attempts(self, app):
+        """Test that jobs stop retrying after max_attempts."""
+        enqueue_job("test_job")
+        db.session.commit()
+
+        job = claim_next_job("worker-1")
+        will_retry = fail_job(job, "boom", max_attempts=1)
+
+        assert will_retry is False
+        assert job.status == JOB_FAILED
+
+    def test_abandoned_running_job_is_reclaimed(self, app):
+        """Test that a job locked by a dead worker is claimable after the lock timeout."""
+        enqueue_job("test_job")
+        db.session.commit()
+
+        job = claim_next_job("dead-worker")
+        job.locked_at = datetime.utcnow() - timedelta(seconds=600)
+        db.session.commit()
+
+        reclaimed = claim_next_job("worker-2", lock_timeout=300)
+
+        assert reclaimed.id == job.id
+        assert reclaimed.locked_by == "worker-2"
+        assert reclaimed.attempts == 2
+
+    def test_heartbeat_keeps_long_job_from_being_reclaimed(self, app):
+        """Test that a job whose worker is still heartbeating is not claimed again."""
+        enqueue_job("test_job")
+        db.session.commit()
+        job = claim_next_job("busy-worker")
+        job.locked_at = datetime.utcnow() - timedelta(seconds=600)
+        db.session.commit()
+
+        assert heartbeat_job(job.id, "busy-worker") is True
+
+        assert claim_next_job("worker-2", lock_timeout=300) is None
+        assert heartbeat_job(job.id, "other-worker") is False
+
+    def test_run_job_heartbeats_while_handler_runs(self, app):
+        """Test that run_job refreshes the lock of a job that outlives the heartbeat interval."""
+        app.config["JOB_LOCK_TIMEOUT"] = 0.15
+        enqueue_job("slow_job")
+        db.session.commit()
+        job = claim_next_job("worker-1")
+        locked_at = job.locked_at
+        beats = []
+
+        def slow_handler(_job):
+            time.sleep(0.3)
+            db.session.rollback()
+            beats.append(db.session.get(BackgroundJob, job.id).locked_at)
+            return {}
+
+        with patch.dict("app.worker.JOB_HANDLERS", {"slow_job": slow_handler}):
+            run_job(job)
+
+        assert beats[0] > locked_at
+        assert job.status == JOB_DONE
+
+
+class TestBigFiveAsyncPipeline:
+    """Test suite for the asynchronous /big-five submission flow."""
+
+    def test_post_returns_202_and_enqueues_job(self, client):
+        """Test that submission returns immediately with a pending result."""
+        response = client.post("/big-five", json={"answers": ANSWERS})
+
+        assert response.status_code == 202
+        data = response.get_json()
+        assert data["success"] is True
+        assert data["status"] == "pending"
+        assert data["status_url"] == f"/big-five/result/{data['access_token']}"
+        assert "result_id" not in data
+        assert "openness" in data["scores"]
+
+        job = BackgroundJob.query.filter_by(result_id=_result_id(data["access_token"])).one()
+        assert job.kind == BIG_FIVE_REPORT_JOB
+        assert job.status == JOB_PENDING
+
+    @patch("app.worker.generate_personality_suggestions", return_value="## Report")
+    def test_worker_completes_report(self, mock_generate, app, client):
+        """Test that the worker stores the report and the status endpoint returns it."""
+        token = client.post("/big-five", json={"answers": ANSWERS}).get_json()["access_token"]
+
+        pending = client.get(f"/big-five/result/{token}").get_json()
+        assert pending["status"] == "pending"
+        assert pending["suggestions"] is None
+
+        processed = Worker(app, worker_id="test-worker").run_once()
+
+        assert processed == 1
+        mock_generate.assert_called_once()
+        done = client.get(f"/big-five/result/{token}").get_json()
+        assert done["status"] == "complete"
+        assert done["suggestions"] == "## Report"
+
+    @patch("app.worker.send_big_five_emails", return_value=True)
+    @patch("app.worker.generate_personality_suggestions", return_value="## Report")
+    def test_worker_sends_emails_for_email_submissions(self, _mock_generate, mock_emails, app):
+        """Test that the worker sends emails using the job payload."""
+        client = app.test_client()
+        client.post(
+            "/big-five",
+            json={"answers": ANSWERS, "email": "worker@example.com", "demographics": {}},
+        )
+
+        Worker(app, worker_id="test-worker").run_once()
+
+        mock_emails.assert_called_once()
+        assert mock_emails.call_args.kwargs["email"] == "worker@example.com"
+        assert mock_emails.call_args.kwargs["is_new_subscriber"] is True
+
+    @patch("app.worker.generate_personality_suggestions", side_effect=RuntimeError("down"))
+    def test_worker_failure_marks_result_failed(self, _mock_generate, app, client):
+        """Test that a permanently failing job marks the result as failed."""
+        app.config["JOB_MAX_ATTEMPTS"] = 1
+        token = client.post("/big-five", json={"answers": ANSWERS}).get_json()["access_token"]
+        result_id = _result_id(token)
+
+        Worker(app, worker_id="test-worker").run_once()
+
+        assert db.session.get(BigFiveResult, result_id).status == "failed"
+
+    @patch("app.worker.generate_personality_suggestions", return_value="## Inline Report")
+    def test_inline_mode_returns_report(self, _mock_generate, app, client):
+        """Test that BIG_FIVE_ASYNC=false processes the job in the request."""
+        app.config["BIG_FIVE_ASYNC"] = False
+
+        response = client.post("/big-five", json={"answers": ANSWERS})
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["status"] == "complete"
+        assert data["suggestions"] == "## Inline Report"
+
+    def test_unknown_result_returns_404(self, client):
+        """Test the status endpoint for a missing result."""
+        response = client.get("/big-five/result/not-a-token")
+        assert response.status_code == 404
+
+    def test_sequential_id_does_not_open_result(self, client):
+        """Test that results are only reachable through their access token."""
+        token = client.post("/big-five", json={"answers": ANSWERS}).get_json()["access_token"]
+        result_id = _result_id(token)
+
+        assert len(token) >= 32
+        for route in ("result/{}", "result/{}/pdf", "result/{}/similar", "stream/{}"):
+            assert client.get("/big-five/" + route.format(result_id)).status_code == 404
+
+
+def _wait_for_status(result_id, status, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.session.rollback()  # See commits from the background thread
+        result = db.session.get(BigFiveResult, result_id)
+        if result.status == status:
+            return result
+        time.sleep(0.02)
+    raise AssertionError(f"Result {result_id} never reached status {status}")
+
+
+def _wait_for_job(result_id, status, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.session.rollback()
+        job = BackgroundJob.query.filter_by(result_id=result_id).one()
+        if job.status == status:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job for result {result_id} never reached status {status}")
+
+
+class TestInlineLatencyBudget:
+    """Test suite for BIG_FIVE_LATENCY_BUDGET in inline mode."""
+
+    @patch("app.worker.send_big_five_emails", return_value=True)
+    def test_slow_report_is_upgraded_in_background(self, mock_emails, app, client):
+        """Test that the generic report is served at once and replaced when the AI finishes."""
+        app.config.update(BIG_FIVE_ASYNC=False, BIG_FIVE_LATENCY_BUDGET=0.05)
+        release = threading.Event()
+
+        def slow_generate(**_kwargs):
+            release.wait(5)
+            return "## AI Report"
+
+        with patch("app.worker.generate_personality_suggestions", side_effect=slow_generate):
+            data = client.post(
+                "/big-five",
+                json={"answers": ANSWERS, "email": "slow@example.com", "demographics": {}},
+            ).get_json()
+
+            assert data["status"] == "provisional"
+            assert "Your Personality Profile" in data["suggestions"]
+            polled = client.get(data["status_url"]).get_json()
+            assert polled["suggestions"] == data["suggestions"]
+            mock_emails.assert_not_called()
+
+            release.set()
+            result_id = _result_id(data["access_token"])
+            result = _wait_for_status(result_id, "complete")
+            _wait_for_job(result_id, JOB_DONE)  # emails go out after the report commit
+
+        assert result.suggestions == "## AI Report"
+        mock_emails.assert_called_once()
+        assert mock_emails.call_args.kwargs["suggestions"] == "## AI Report"
+
+    @patch("app.worker.generate_personality_suggestions", return_value="## Fast Report")
+    def test_report_within_budget_is_returned(self, _mock_generate, app, client):
+        """Test that a report finishing within the budget is returned as before."""
+        app.config.update(BIG_FIVE_ASYNC=False, BIG_FIVE_LATENCY_BUDGET=5)
+
+        data = client.post("/big-five", json={"answers": ANSWERS}).get_json()
+
+        assert data["status"] == "complete"
+        assert data["suggestions"] == "## Fast Report"
+
+    def test_provisional_report_never_overwrites_final(self, app):
+        """Test that a stand-in is only stored while the result is pending."""
+        result = BigFiveResult(scores={}, suggestions="## AI Report", status="complete")
+        db.session.add(result)
+        db.session.commit()
+
+        assert store_provisional_report(result.id, "generic") is False
+        db.session.refresh(result)
+        assert result.suggestions == "## AI Report"
+
+
+class TestBigFiveReportStream:
+    """Test suite for the /big-five/stream/<access_token> SSE endpoint."""
+
+    @staticmethod
+    def _relay(client, token, result_id, states):
+        """GET the stream body, moving the result through states at each relay poll."""
+        states = iter(states)
+
+        def next_state(_seconds):
+            text, status = next(states)
+            BigFiveResult.query.filter_by(id=result_id).update(
+                {"suggestions": text, "status": status}
+            )
+            db.session.commit()
+
+        # The body is generated lazily, so read it while sleep is still patched
+        with patch("app.routes.time.sleep", side_effect=next_state):
+            response = client.get(f"/big-five/stream/{token}")
+            assert response.mimetype == "text/event-stream"
+            return response.get_data(as_text=True)
+
+    def test_stream_relays_worker_progress(self, app, client):
+        """Test that published partial text is forwarded as it grows, without claiming the job."""
+        token = client.post("/big-five", json={"answers": ANSWERS}).get_json()["access_token"]
+        result_id = _result_id(token)
+
+        body = self._relay(client, token, result_id, [("## A", "pending"), ("## AB", "complete")])
+
+        assert '"text": "## A"' in body
+        assert '"text": "B"' in body
+        assert body.index("event: chunk") < body.index("event: done")
+        job = BackgroundJob.query.filter_by(result_id=result_id).one()
+        assert (job.status, job.attempts) == (JOB_PENDING, 0)
+
+    def test_restarted_report_replaces_sent_text(self, app, client):
+        """Test that text from a failed attempt is replaced when the retry's text arrives."""
+        token = client.post("/big-five", json={"answers": ANSWERS}).get_json()["access_token"]
+        result_id = _result_id(token)
+
+        body = self._relay(
+            client,
+            token,
+            result_id,
+            [
+                ("## Old", "pending"),
+                (None, "pending"),
+                ("## New", "pending"),
+                ("## New", "complete"),
+            ],
+        )
+
+        assert 'event: replace\ndata: {"text": "## New"}' in body
+        assert "event: done" in body
+
+    def test_failed_report_ends_stream(self, app, client):
+        """Test that a permanently failed report sends an error event."""
+        token = client.post("/big-five", json={"answers": ANSWERS}).get_json()["access_token"]
+
+        body = self._relay(client, token, _result_id(token), [(None, "failed")])
+
+        assert "event: error" in body
+
+    def test_deleted_result_ends_stream(self, app, client):
+        """Test that a result removed while its stream is open ends it with an error event."""
+        token = client.post("/big-five", json={"answers": ANSWERS}).get_json()["access_token"]
+        result_id = _result_id(token)
+
+        def delete_result(_seconds):
+            BackgroundJob.query.filter_by(result_id=result_id).delete()
+            BigFiveResult.query.filter_by(id=result_id).delete()
+            db.session.commit()
+
+        with patch("app.routes.time.sleep", side_effect=delete_result):
+            body = client.get(f"/big-five/stream/{token}").get_data(as_text=True)
+
+        assert body.rstrip().endswith('data: {"error": "Report generation failed"}')
+
+    def test_stream_gives_up_before_gunicorn_timeout(self, app, client):
+        """Test that the relay stops after STREAM_WAIT_TIMEOUT so the browser polls instead."""
+        token = client.post("/big-five", json={"answers": ANSWERS}).get_json()["access_token"]
+
+        with patch("app.routes.STREAM_WAIT_TIMEOUT", 0):
+            body = client.get(f"/big-five/stream/{token}").get_data(as_text=True)
+
+        assert "Timed out waiting for report" in body
+
+    @patch("app.worker.generate_personality_suggestions", return_value="## Done")
+    def test_completed_report_is_sent_immediately(self, _mock_generate, app, client):
+        """Test that a finished report is streamed as one chunk."""
+        token = client.post("/big-five", json={"answers": ANSWERS}).get_json()["access_token"]
+        Worker(app, worker_id="test-worker").run_once()
+
+        body = client.get(f"/big-five/stream/{token}").get_data(as_text=True)
+
+        assert '"text": "## Done"' in body
+        assert "event: done" in body
+
+    def test_stream_unknown_result_returns_404(self, client):
+        """Test the stream endpoint for a missing result."""
+        assert client.get("/big-five/stream/not-a-token").status_code == 404
+
+    def test_worker_publishes_partial_report(self, app, client):
+        """Test that the worker stores the text generated so far on the pending result."""
+        token = client.post("/big-five", json={"answers": ANSWERS}).get_json()["access_token"]
+        result_id = _result_id(token)
+        seen = []
+
+        def generate(on_progress, **_kwargs):
+            on_progress("## Part")
+            db.session.rollback()
+            result = db.session.get(BigFiveResult, result_id)
+            seen.append((result.suggestions, result.status))
+            return "## Part and the rest"
+
+        with patch("app.worker.generate_personality_suggestions", side_effect=generate):
+            Worker(app, worker_id="test-worker").run_once()
+
+        assert seen == [("## Part", "pending")]
+        assert db.session.get(BigFiveResult, result_id).suggestions == "## Part and the rest"
+
+    def test_failed_attempt_clears_partial_report(self, app, client):
+        """Test that a retried report doesn't leave the failed attempt's text behind."""
+        token = client.post("/big-five", json={"answers": ANSWERS}).get_json()["access_token"]
+        result_id = _result_id(token)
+
+        def generate(on_progress, **_kwargs):
+            on_progress("## Cut off")
+            raise GeminiUnavailableError("stream broke")
+
+        with patch("app.worker.generate_personality_suggestions", side_effect=generate):
+            Worker(app, worker_id="test-worker").run_once()
+
+        result = db.session.get(BigFiveResult, result_id)
+        assert (result.suggestions, result.status) == (None, "pending")
+        assert BackgroundJob.query.filter_by(result_id=result_id).one().status == JOB_PENDING
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}, clear=False)
+    @patch("app.utils.gemini_client.GEMINI_AVAILABLE", True)
+    @patch("app.utils.gemini_client.genai")
+    def test_failed_stream_is_retried_not_stored(self, mock_genai, app, client):
+        """Test that a stream failing before any text reschedules the job, not a generic report."""
+        mock_genai.GenerativeModel.return_value.generate_content.side_effect = Exception("down")
+        token = client.post("/big-five", json={"answers": ANSWERS}).get_json()["access_token"]
+        result_id = _result_id(token)
+
+        with patch("app.utils.gemini_client.get_gemini_client", return_value=GeminiClient()):
+            Worker(app, worker_id="test-worker").run_once()
+
+        result = db.session.get(BigFiveResult, result_id)
+        assert (result.suggestions, result.status) == (None, "pending")
+        job = BackgroundJob.query.filter_by(result_id=result_id).one()
+        assert (job.status, job.attempts) == (JOB_PENDING, 1)
+
+    def test_progress_is_only_published_while_pending(self, app):
+        """Test that progress never overwrites a provisional or finished report."""
+        result = BigFiveResult(scores={}, suggestions="## Generic", status="provisional")
+        db.session.add(result)
+        db.session.commit()
+
+        assert publish_report_progress(result.id, "## Part") is False
+        db.session.refresh(result)
+        assert result.suggestions == "## Generic"
+
+
+class TestIdempotencyKey:
+    """Test suite for the Idempotency-Key header on /big-five."""
+
+    HEADERS = {"Idempotency-Key": "submit-1"}
+
+    def test_repeated_key_replays_original_result(self, client):
+        """Test that a retry returns the first result instead of creating another."""
+        first = client.post("/big-five", json={"answers": ANSWERS}, headers=self.HEADERS)
+        second = client.post("/big-five", json={"answers": ANSWERS}, headers=self.HEADERS)
+
+        assert first.status_code == second.status_code == 202
+        assert second.get_json()["access_token"] == first.get_json()["access_token"]
+        assert second.get_json()["stream_url"] == first.get_json()["stream_url"]
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+        assert BigFiveResult.query.count() == 1
+        assert BackgroundJob.query.count() == 1
+
+    @patch("app.worker.generate_personality_suggestions", return_value="## Report")
+    def test_replay_of_finished_result_includes_report(self, mock_generate, app, client):
+        """Test that a replay after the report is done returns it without a new call."""
+        client.post("/big-five", json={"answers": ANSWERS}, headers=self.HEADERS)
+        Worker(app, worker_id="test-worker").run_once()
+
+        response = client.post("/big-five", json={"answers": ANSWERS}, headers=self.HEADERS)
+
+        assert response.status_code == 200
+        assert response.get_json()["suggestions"] == "## Report"
+        mock_generate.assert_called_once()
+
+    def test_key_reused_for_different_request_is_rejected(self, client):
+        """Test that a key cannot be replayed with another body."""
+        client.post("/big-five", json={"answers": ANSWERS}, headers=self.HEADERS)
+
+        response = client.post(
+            "/big-five", json={"answers": list(reversed(ANSWERS))}, headers=self.HEADERS
+        )
+
+        assert response.status_code == 422
+        assert BigFiveResult.query.count() == 1
+
+    def test_expired_key_creates_new_result(self, app, client):
+        """Test that keys older than IDEMPOTENCY_KEY_TTL are forgotten."""
+        first = client.post("/big-five", json={"answers": ANSWERS}, headers=self.HEADERS)
+        app.config["IDEMPOTENCY_KEY_TTL"] = 0
+
+        second = client.post("/big-five", json={"answers": ANSWERS}, headers=self.HEADERS)
+
+        assert second.status_code == 202
+        assert second.get_json()["access_token"] != first.get_json()["access_token"]
+
+    def test_key_for_deleted_result_creates_new_result(self, client):
+        """Test that a key whose result was deleted is dropped instead of replayed."""
+        client.post("/big-five", json={"answers": ANSWERS}, headers=self.HEADERS)
+        BackgroundJob.query.delete()
+        BigFiveResult.query.delete()
+        db.session.commit()
+
+        response = client.post("/big-five", json={"answers": ANSWERS}, headers=self.HEADERS)
+
+        assert response.status_code == 202
+        assert "Idempotent-Replayed" not in response.headers
+        assert BigFiveResult.query.count() == 1
+        assert db.session.get(IdempotencyKey, "submit-1").result_id == BigFiveResult.query.one().id
+
+    def test_concurrent_duplicate_is_rolled_back_and_replayed(self, client):
+        """Test that the loser of a race on the same key returns the winner's result."""
+        first = client.post("/big-five", json={"answers": ANSWERS}, headers=self.HEADERS)
+        check = _check_idempotency_key
+        lookups = []
+
+        def stale_check(data):
+            # The duplicate looked the key up before the first request committed it
+            lookups.append(data)
+            if len(lookups) == 1:
+                encoded = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+                return {
+                    "key": "submit-1",
+                    "request_hash": hashlib.sha256(encoded).hexdigest(),
+                }, None
+            return check(data)
+
+        with patch("app.routes._check_idempotency_key", side_effect=stale_check):
+            second = client.post("/big-five", json={"answers": ANSWERS}, headers=self.HEADERS)
+
+        assert second.status_code == 202
+        assert second.get_json()["access_token"] == first.get_json()["access_token"]
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert BigFiveResult.query.count() == 1
+        assert BackgroundJob.query.count() == 1